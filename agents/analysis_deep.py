@@ -10,6 +10,8 @@ from config.yf_suppress import suppress_yf_noise
 suppress_yf_noise()
 import yfinance as yf
 from llm import ask_llm
+from utils.yf_cache import get_info as _yf_get_info, get_financials as _yf_get_financials
+from data.earnings_calendar import financials_not_before as _financials_not_before
 
 from agents.prompts import (
     build_fundamental_deep,
@@ -41,9 +43,9 @@ except Exception:
 def _get_stock_data(ticker: str) -> tuple:
     """拉取财务、info、季度摘要、新闻，供各分析使用。"""
     stock = yf.Ticker(ticker)
-    info = stock.info or {}
+    info = _yf_get_info(ticker)
     try:
-        financials = stock.financials
+        financials = _yf_get_financials(ticker, not_before=_financials_not_before(ticker))
         financials_str = financials.to_string() if financials is not None and not financials.empty else "无"
     except Exception:
         financials_str = "无"
@@ -64,8 +66,14 @@ def _get_stock_data(ticker: str) -> tuple:
 
 
 def _get_peers_list(ticker: str, info: dict) -> str:
-    """同行列表：优先用传入/配置，否则按行业从内置池取若干。"""
-    # 可扩展：从 API 或配置读取 peers
+    """同行列表：优先从同行索引取同行业、市值最接近的若干只（data/peer_index，只读缓存），否则按板块从内置池取。"""
+    try:
+        from data.peer_index import nearest_peers
+        peers = nearest_peers(ticker, info=info)
+    except Exception:
+        peers = []
+    if peers:
+        return ", ".join(peers)
     sector = (info.get("sector") or "").strip()
     industry = (info.get("industry") or "").strip()
     # 简单按行业给常见同行（示例，可改为从 universe 按 sector 筛）
@@ -110,7 +118,7 @@ def run_moat(ticker: str) -> str:
 
 
 def run_peers(ticker: str, peers: Optional[str] = None) -> str:
-    """③ 同行业横向对比。peers 不传则按行业从内置池推断。"""
+    """③ 同行业横向对比。peers 不传则按行业与市值从同行索引推断。"""
     ticker = ticker.upper().strip()
     if _USE_LANGCHAIN and _LANGCHAIN_AVAILABLE:
         return _lc_peers({"ticker": ticker, "peers": peers})
@@ -0,0 +1,91 @@
+"""
+池内横截面分位：对本次分析的整池标的，一次向量化计算动量、量比、距高点、ATR% 的百分位（0–100，100 为池内最高），
+附到每张卡片并参与定量基准线（agents.score_baseline）。同样 +5% 的 20 日涨幅在普涨池里可能垫底，
+相对排名比单只的绝对阈值更有信息量。
+
+- 摘要来自面板引擎（agents.technical_panel.from_frames），K 线走 utils.yf_cache 缓存，与随后逐只分析共用；
+- 缺失值不参与排名（该项分位为 None）；有效标的少于 CROSS_SECTION_MIN_POOL 时不输出分位。
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from config.analysis_config import CROSS_SECTION_MIN_POOL
+
+# 分位键 -> (摘要段, 字段, 展示名)
+RANK_FIELDS = {
+    "momentum_20d": ("momentum_summary", "return_20d_pct", "20日动量"),
+    "momentum_60d": ("momentum_summary", "return_60d_pct", "60日动量"),
+    "volume_ratio": ("volume_context", "volume_ratio", "量比"),
+    "dist_to_high": ("momentum_summary", "dist_to_52w_high_pct", "距高点"),
+    "atr_pct": ("tech_levels", "atr_pct", "ATR%"),
+}
+
+
+def _value(summary: dict, section: str, key: str) -> float:
+    v = (summary.get(section) or {}).get(key)
+    return float(v) if v is not None else np.nan
+
+
+def cross_section_ranks(summaries: Dict[str, dict], min_pool: int = CROSS_SECTION_MIN_POOL) -> Dict[str, Dict[str, Any]]:
+    """
+    ticker -> 技术面摘要，返回 ticker -> {分位键: 0–100 或 None, "pool_size": 有效标的数}。
+    ok=False 的标的不参与；分位为 pandas rank(pct=True)（并列取平均），保留 1 位小数。
+    """
+    ok = {t: s for t, s in summaries.items() if s and s.get("ok")}
+    if len(ok) < max(1, min_pool):
+        return {}
+    tickers = list(ok)
+    values = np.array(
+        [[_value(ok[t], sec, key) for sec, key, _ in RANK_FIELDS.values()] for t in tickers],
+        dtype=float,
+    )
+    ranks = pd.DataFrame(values, index=tickers, columns=list(RANK_FIELDS)).rank(pct=True) * 100
+    ranks = ranks.round(1).astype(object).where(ranks.notna(), None)
+    out: Dict[str, Dict[str, Any]] = {}
+    for t, row in ranks.iterrows():
+        out[t] = {**row.to_dict(), "pool_size": len(tickers)}
+    return out
+
+
+def pool_cross_section(
+    tickers: List[str],
+    interval: str = "1d",
+    prepost: bool = False,
+    workers: int = 8,
+) -> Dict[str, Dict[str, Any]]:
+    """拉取（缓存）整池 K 线，面板引擎一次算出摘要后计算分位；失败返回 {}。"""
+    from agents.technical import _INTERVAL_DEFAULT_PERIOD
+    from agents.technical_panel import from_frames
+    from utils.yf_cache import get_history
+
+    interval = (interval or "1d").strip().lower()
+    period = _INTERVAL_DEFAULT_PERIOD.get(interval, "6mo")
+    tickers = [t.strip().upper() for t in tickers if (t or "").strip()]
+
+    def _load(t: str) -> Optional[pd.DataFrame]:
+        try:
+            return get_history(t, period=period, interval=interval, prepost=prepost)
+        except Exception:
+            return None
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            frames = dict(zip(tickers, executor.map(_load, tickers)))
+        summaries = from_frames({t: f for t, f in frames.items() if f is not None and not f.empty}, interval, prepost)
+        return cross_section_ranks(summaries)
+    except Exception as e:
+        print(f"[CrossSection] 池内分位计算失败: {e}", flush=True)
+        return {}
+
+
+def cross_section_text(ranks: Optional[Dict[str, Any]]) -> str:
+    """Prompt / 卡片用一行描述，如「20日动量 85 | 量比 40 | …（池内 30 只，100=最高）」。"""
+    if not ranks:
+        return "—"
+    parts = [f"{label} {ranks[k]:.0f}" for k, (_, _, label) in RANK_FIELDS.items() if ranks.get(k) is not None]
+    if not parts:
+        return "—"
+    return " | ".join(parts) + f"（池内 {ranks.get('pool_size')} 只，分位 100=最高）"
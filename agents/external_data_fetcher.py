@@ -14,6 +14,7 @@ suppress_yf_noise()
 from datetime import datetime
 from typing import Dict, Any, Optional, List
 import yfinance as yf
+from utils.yf_cache import get_history as _yf_get_history, get_info as _yf_get_info
 
 
 def _market_type(ticker: str) -> str:
@@ -213,9 +214,7 @@ def _build_financial_data(stock) -> dict:
     except Exception:
         pass
     try:
-        info = stock.info
-        if info is None or not isinstance(info, dict):
-            info = {}
+        info = _yf_get_info(stock.ticker)
         roe = _float_or_none(info.get("returnOnEquity"))
         if roe is not None:
             # yfinance 多为小数(0.5=50%)，转为百分比
@@ -363,9 +362,7 @@ def fetch_external_data_json(
 
     try:
         stock = yf.Ticker(ticker)
-        info = stock.info
-        if info is None or not isinstance(info, dict):
-            info = {}
+        info = _yf_get_info(ticker)
     except Exception as e:
         return {"stock_code": ticker, "market_type": _market_type(ticker), "error": f"数据拉取失败: {str(e)[:100]}"}
 
@@ -380,11 +377,7 @@ def fetch_external_data_json(
             pass
 
     # 历史 K 线（用于技术分析，至少 60 根）
-    hist = None
-    try:
-        hist = stock.history(period=period, interval=interval)
-    except Exception:
-        pass
+    hist = _yf_get_history(ticker, period=period, interval=interval)
 
     # 新闻
     news_list = []
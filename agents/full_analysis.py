@@ -62,17 +62,15 @@ def _interval_label(interval: str, prepost: bool) -> str:
     """用于报告标题/卡片的 K 线周期描述。"""
     if interval == "1d":
         return "日K"
-    labels = {"1m": "1分钟K", "5m": "5分钟K", "15m": "15分钟K", "30m": "30分钟K", "60m": "60分钟K"}
+    labels = {"1m": "1分钟K", "5m": "5分钟K", "10m": "10分钟K", "15m": "15分钟K", "30m": "30分钟K", "60m": "60分钟K"}
     s = labels.get(interval, f"{interval}K")
     if prepost:
         s += "（含盘前盘后）"
     return s
 
 
-def _momentum_text(technical: dict) -> str:
+def _momentum_text(technical: dict, cross_section: Optional[Dict[str, Any]] = None) -> str:
     mom = technical.get("momentum_summary") or {}
-    if not mom:
-        return "—"
     parts = []
     if mom.get("return_20d_pct") is not None:
         parts.append(f"近20根K收益率: {mom['return_20d_pct']}%")
@@ -80,6 +78,10 @@ def _momentum_text(technical: dict) -> str:
         parts.append(f"近60根K收益率: {mom['return_60d_pct']}%")
     if mom.get("dist_to_52w_high_pct") is not None:
         parts.append(f"距窗口最高价: {mom['dist_to_52w_high_pct']}%")
+    if cross_section:
+        from agents.cross_section import cross_section_text
+
+        parts.append(f"池内分位: {cross_section_text(cross_section)}")
     return "；".join(parts) if parts else "—"
 
 
@@ -96,6 +98,7 @@ def _build_prompt(
     rag_context: str = "",
     backtest_summary: Optional[Dict[str, Any]] = None,
     quant_block: str = "",
+    cross_section: Optional[Dict[str, Any]] = None,
 ) -> str:
     tech_text = "无数据"
     tech_levels = technical.get("tech_levels") or {}
@@ -149,7 +152,7 @@ MACD顶背离: {div.get('macd_top')}  MACD底背离: {div.get('macd_bottom')}  R
 ATR%: {atr_pct}%（ATR/收盘价×100，用于止损与仓位参考）
 
 【动量（规则因子）】
-{_momentum_text(technical)}
+{_momentum_text(technical, cross_section)}
 
 【技术面入场/离场参考（供你评估加仓价与减仓价）】
 入场参考: {tech_levels.get('entry_note') or '—'}
@@ -371,11 +374,13 @@ def run_full_analysis(
     interval: str = "1d",
     include_prepost: bool = False,
     backtest_summary: Optional[Dict[str, Any]] = None,
+    cross_section: Optional[Dict[str, Any]] = None,
 ) -> Optional[Dict[str, Any]]:
     """
     对单只标的做技术+消息+财报+期权综合分析，返回报告卡片所需字段。
     interval: 1d=日K（波段），5m/15m/1m=分K（超短线）。
     include_prepost: 是否含盘前盘后数据（仅分K时常用）。
+    cross_section: 该标的在本次分析池内的横截面分位（agents.cross_section），写入卡片、Prompt 与定量基准线。
     若某步失败则返回 None 或部分数据。
     """
     ticker = ticker.upper().strip()
@@ -414,7 +419,7 @@ def run_full_analysis(
         if ANALYSIS_QUANT_BASELINE_ENABLED:
             from agents.score_baseline import compute_quant_baseline, baseline_to_score10_hint
             quant_baseline_100, quant_baseline_note = compute_quant_baseline(
-                technical, fundamental, options_summary,
+                technical, fundamental, options_summary, cross_section,
             )
             hint = baseline_to_score10_hint(quant_baseline_100)
             quant_block = (
@@ -432,6 +437,7 @@ def run_full_analysis(
         rag_context=rag_context,
         backtest_summary=backtest_summary,
         quant_block=quant_block,
+        cross_section=cross_section,
     )
     from config.llm_config import PROMPT_TONE
     _tone_map = {
@@ -499,4 +505,5 @@ def run_full_analysis(
         "source_data": _build_source_data(ticker, interval),
         "quant_baseline_100": quant_baseline_100,
         "quant_baseline_note": quant_baseline_note or "—",
+        "cross_section": cross_section or None,
     }
@@ -1,11 +1,18 @@
 from config.yf_suppress import suppress_yf_noise
 suppress_yf_noise()
+import hashlib
 import math
 import yfinance as yf
 from llm import ask_llm
 from typing import Optional, Dict, Any
-from utils.yf_cache import get_history as _yf_get_history
+from utils.yf_cache import get_history as _yf_get_history, get_info as _yf_get_info, get_financials as _yf_get_financials
+from utils.yf_cache import (
+    get_financials_interpretation_cached as _get_interp_cached,
+    put_financials_interpretation as _put_interp,
+)
 from utils.av_fallback import get_quote as _av_get_quote
+from data.market_snapshot import get_spot_quote as _get_spot_quote
+from data.earnings_calendar import financials_not_before as _financials_not_before, get_earnings as _get_earnings
 
 
 def _safe_float(v) -> Optional[float]:
@@ -24,71 +31,81 @@ def get_fundamental_data(ticker: str, use_prepost: bool = False) -> Dict[str, An
     拉取财报与行情相关原始数据，供报告卡片和 LLM 综合研判使用。
     use_prepost: 为 True 时（日 K 且勾选盘前/盘后），当前价与涨跌幅使用盘前/盘后价格。
     """
-    stock = yf.Ticker(ticker)
-    info = stock.info or {}
+    info = _yf_get_info(ticker)
     hist = None
     try:
-        financials = stock.financials
+        earnings = _get_earnings(ticker)
+    except Exception:
+        earnings = {}
+    try:
+        # 最近一次财报发布前写入的财报缓存视为过期
+        financials = _yf_get_financials(ticker, not_before=_financials_not_before(ticker))
         financials_str = financials.to_string() if financials is not None and not financials.empty else "无"
     except Exception:
         financials_str = "无"
     current = None
     change_pct = None
-    try:
-        # 日 K 且盘前/盘后：优先用 info 的盘后/盘前价与涨跌幅
-        if use_prepost:
-            post_price = info.get("postMarketPrice")
-            post_pct = info.get("postMarketChangePercent")
-            pre_price = info.get("preMarketPrice")
-            pre_pct = info.get("preMarketChangePercent")
-            try:
-                if post_price is not None and str(post_price).strip() != "":
-                    current = _safe_float(post_price)
-                    change_pct = _safe_float(post_pct)
-                elif pre_price is not None and str(pre_price).strip() != "":
-                    current = _safe_float(pre_price)
-                    change_pct = _safe_float(pre_pct)
-                else:
+    # A股/港股：优先用全市场行情快照（一次请求覆盖全市场），省去逐只 5 日 K 请求
+    spot = None if use_prepost else _get_spot_quote(ticker)
+    if spot is not None:
+        current = spot.get("price")
+        change_pct = spot.get("change_pct")
+    else:
+        try:
+            # 日 K 且盘前/盘后：优先用 info 的盘后/盘前价与涨跌幅
+            if use_prepost:
+                post_price = info.get("postMarketPrice")
+                post_pct = info.get("postMarketChangePercent")
+                pre_price = info.get("preMarketPrice")
+                pre_pct = info.get("preMarketChangePercent")
+                try:
+                    if post_price is not None and str(post_price).strip() != "":
+                        current = _safe_float(post_price)
+                        change_pct = _safe_float(post_pct)
+                    elif pre_price is not None and str(pre_price).strip() != "":
+                        current = _safe_float(pre_price)
+                        change_pct = _safe_float(pre_pct)
+                    else:
+                        current = None
+                        change_pct = None
+                except (TypeError, ValueError):
                     current = None
                     change_pct = None
-            except (TypeError, ValueError):
+                if current is not None and change_pct is None:
+                    # 有盘前/盘后价但无现成涨跌幅：用昨收推算
+                    prev_close = info.get("regularMarketPreviousClose") or info.get("previousClose")
+                    if prev_close is not None:
+                        prev = _safe_float(prev_close)
+                        if prev and prev != 0:
+                            change_pct = (current - prev) / prev * 100
+            else:
                 current = None
                 change_pct = None
-            if current is not None and change_pct is None:
-                # 有盘前/盘后价但无现成涨跌幅：用昨收推算
-                prev_close = info.get("regularMarketPreviousClose") or info.get("previousClose")
-                if prev_close is not None:
-                    prev = _safe_float(prev_close)
-                    if prev and prev != 0:
-                        change_pct = (current - prev) / prev * 100
-        else:
-            current = None
-            change_pct = None
 
-        if current is None or (not use_prepost):
-            hist = _yf_get_history(ticker, period="5d", interval="1d", prepost=use_prepost)
-            if hist is not None and len(hist) >= 2 and hasattr(hist, "columns") and "Close" in hist.columns:
-                current = _safe_float(hist["Close"].iloc[-1])
-                prev = _safe_float(hist["Close"].iloc[-2])
-                if current is not None and prev is not None and prev != 0:
-                    change_pct = (current - prev) / prev * 100
-                else:
+            if current is None or (not use_prepost):
+                hist = _yf_get_history(ticker, period="5d", interval="1d", prepost=use_prepost)
+                if hist is not None and len(hist) >= 2 and hasattr(hist, "columns") and "Close" in hist.columns:
+                    current = _safe_float(hist["Close"].iloc[-1])
+                    prev = _safe_float(hist["Close"].iloc[-2])
+                    if current is not None and prev is not None and prev != 0:
+                        change_pct = (current - prev) / prev * 100
+                    else:
+                        change_pct = None
+                elif not use_prepost:
+                    current = _safe_float(info.get("currentPrice") or info.get("regularMarketPrice"))
+                    change_pct = _safe_float(info.get("regularMarketChangePercent"))
+        except Exception:
+            if current is None:
+                try:
+                    current = _safe_float(info.get("currentPrice") or info.get("regularMarketPrice"))
+                except (TypeError, ValueError):
+                    current = None
+            if change_pct is None:
+                pct = info.get("regularMarketChangePercent")
+                try:
+                    change_pct = _safe_float(pct)
+                except (TypeError, ValueError):
                     change_pct = None
-            elif not use_prepost:
-                current = _safe_float(info.get("currentPrice") or info.get("regularMarketPrice"))
-                change_pct = _safe_float(info.get("regularMarketChangePercent"))
-    except Exception:
-        if current is None:
-            try:
-                current = _safe_float(info.get("currentPrice") or info.get("regularMarketPrice"))
-            except (TypeError, ValueError):
-                current = None
-        if change_pct is None:
-            pct = info.get("regularMarketChangePercent")
-            try:
-                change_pct = _safe_float(pct)
-            except (TypeError, ValueError):
-                change_pct = None
 
     # yfinance 全部失败时，尝试 Alpha Vantage fallback（仅美股，需 ALPHA_VANTAGE_API_KEY）
     if current is None:
@@ -112,11 +129,17 @@ def get_fundamental_data(ticker: str, use_prepost: bool = False) -> Dict[str, An
         except (TypeError, ValueError):
             week52_low = None
 
-    # 量比：近期成交量 / 平均成交量（近5日日均 vs info 平均）
+    # 量比：近期成交量 / 平均成交量（近5日日均 vs info 平均）；A股/港股用快照当日成交量
     volume_ratio = None
     try:
         avg_vol = info.get("averageVolume")
-        if hist is not None and hasattr(hist, "columns") and "Volume" in hist.columns and len(hist) > 0 and avg_vol and float(avg_vol) > 0:
+        if spot is not None:
+            if spot.get("volume") and avg_vol and float(avg_vol) > 0:
+                volume_ratio = float(spot["volume"]) / float(avg_vol)
+            else:
+                # info 无均量时退回东方财富量比（分时均量口径）
+                volume_ratio = spot.get("volume_ratio")
+        elif hist is not None and hasattr(hist, "columns") and "Volume" in hist.columns and len(hist) > 0 and avg_vol and float(avg_vol) > 0:
             recent_vol = float(hist["Volume"].iloc[-1])
             volume_ratio = recent_vol / float(avg_vol)
     except Exception:
@@ -143,43 +166,8 @@ def get_fundamental_data(ticker: str, use_prepost: bool = False) -> Dict[str, An
     else:
         recommendation = None
 
-    # 下次财报日（calendar 中 Earnings Date 为日期列表；若无则用 get_earnings_dates）
-    # A股/港股 Yahoo 常无财报日历，且 get_earnings_dates 会打 "may be delisted" 误导；仅美股调 get_earnings_dates
-    next_earnings = None
-    ticker_upper = (ticker or "").upper()
-    is_cn_hk = ".SS" in ticker_upper or ".SZ" in ticker_upper or ".HK" in ticker_upper
-    try:
-        from datetime import date
-        cal = getattr(stock, "calendar", None) or getattr(stock, "get_calendar", lambda: None)()
-        if isinstance(cal, dict) and cal.get("Earnings Date"):
-            ed_list = cal["Earnings Date"]
-            if isinstance(ed_list, list) and ed_list:
-                today = date.today()
-                for d in ed_list:
-                    if hasattr(d, "strftime"):
-                        d_date = d if hasattr(d, "year") else getattr(d, "date", lambda: d)()
-                        if d_date >= today:
-                            next_earnings = d_date.strftime("%Y-%m-%d") if hasattr(d_date, "strftime") else str(d_date)[:10]
-                            break
-            elif hasattr(ed_list, "strftime"):
-                next_earnings = ed_list.strftime("%Y-%m-%d")
-            else:
-                next_earnings = str(ed_list)[:10]
-        if not next_earnings and not is_cn_hk:
-            edf = stock.get_earnings_dates(limit=4)
-            if edf is not None and not edf.empty and len(edf.index) > 0:
-                for idx in list(edf.index)[:4]:
-                    try:
-                        dt = idx.to_pydatetime().date() if hasattr(idx, "to_pydatetime") else (idx.date() if hasattr(idx, "date") else idx)
-                        if hasattr(dt, "strftime"):
-                            next_earnings = dt.strftime("%Y-%m-%d")
-                        else:
-                            next_earnings = str(dt)[:10]
-                        break
-                    except Exception:
-                        continue
-    except Exception:
-        pass
+    # 下次财报日：读本地持久化财报日历（data/earnings_calendar，到期或财报日过后才联网刷新）
+    next_earnings = earnings.get("next_earnings")
 
     def _fmt_mcap(v):
         if v is None:
@@ -196,6 +184,9 @@ def get_fundamental_data(ticker: str, use_prepost: bool = False) -> Dict[str, An
         except Exception:
             return "—"
 
+    # A股快照含实时总市值，优先于 info（info 按 6h 缓存）
+    market_cap_raw = (spot.get("market_cap") if spot is not None else None) or info.get("marketCap")
+
     trailing_pe = info.get("trailingPE")
     forward_pe = info.get("forwardPE")
     pe_str = "—"
@@ -215,8 +206,8 @@ def get_fundamental_data(ticker: str, use_prepost: bool = False) -> Dict[str, An
         "short_name": info.get("shortName") or ticker.upper(),
         "sector": info.get("sector") or "—",
         "industry": info.get("industry") or "—",
-        "market_cap": _fmt_mcap(info.get("marketCap")),
-        "market_cap_raw": info.get("marketCap"),
+        "market_cap": _fmt_mcap(market_cap_raw),
+        "market_cap_raw": market_cap_raw,
         "current_price": round(current, 2) if current is not None else None,
         "change_pct": round(change_pct, 2) if change_pct is not None else None,
         "trailing_pe": float(trailing_pe) if trailing_pe is not None else None,
@@ -238,17 +229,24 @@ def get_financials_interpretation(ticker: str, financials_str: str, max_chars: i
     """
     用 LLM 对财报摘要做 2-3 句话解读：收入/利润/现金流趋势 + 1 个主要风险或关注点。
     无数据或调用失败时返回空字符串。
+    按 (ticker, 财报摘要) 缓存，最近一次财报发布（财报日历）后失效。
     """
     if not financials_str or (financials_str or "").strip() in ("", "无"):
         return ""
     text = (financials_str or "")[:max_chars]
+    digest = hashlib.sha1(text.encode("utf-8")).hexdigest()
+    cached = _get_interp_cached(ticker, digest, not_before=_financials_not_before(ticker))
+    if cached:
+        return cached
     try:
         out = ask_llm(
             user=f"""以下为 {ticker} 的财报摘要（部分）。请用 2-3 句话概括：收入与利润趋势、现金流情况；并指出 1 个主要风险或关注点。直接输出解读，不要标题或编号。
 
 {text}"""
         )
-        return (out or "").strip()
+        out = (out or "").strip()
+        _put_interp(ticker, digest, out)
+        return out
     except Exception:
         return ""
 
@@ -0,0 +1,184 @@
+"""
+技术指标 numpy 内核：MA / MACD / KDJ(Stoch) / RSI / 布林带 / OBV / ATR，公式与 ta 库（pandas rolling / ewm）一致，
+但只在 float 数组上运算，不为每个指标构造中间 pandas Series，也不依赖 ta。
+
+- EMA 未向量化：按 pandas ewm(adjust=False, min_periods) 的递推在 Python float 上逐步计算，与 ta 逐位一致
+  （MACD / RSI 的一致性测试要求逐位相等）。闭式 / 分块前缀和或 lfilter 的求和顺序不同，结果只在舍入误差内一致，
+  且 scipy 不在依赖中；单标的 500 根 K 线每条 EMA 约 0.15 毫秒；
+- 滚动均值 / 标准差 / 极值用 sliding_window_view 按窗口计算，窗口内任一值为 NaN 时结果为 NaN（同 min_periods=window）；
+  窗口内全部相同值时直接返回该值（标准差为 0），与 pandas 一致；其余情况与 pandas 差异在浮点舍入误差内。
+
+agents.technical 按 config.analysis_config.TECH_INDICATOR_BACKEND（numpy / ta）选择后端；
+与 ta 的一致性见 tests/test_indicator_kernels.py，耗时对比见 scripts/bench_indicator_kernels.py。
+"""
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+_NAN = float("nan")
+
+
+def _windows(x: np.ndarray, window: int) -> Optional[np.ndarray]:
+    if len(x) < window:
+        return None
+    return np.lib.stride_tricks.sliding_window_view(x, window)
+
+
+def _rolling(x: np.ndarray, window: int, fn) -> np.ndarray:
+    x = np.asarray(x, dtype=float)
+    out = np.full(len(x), _NAN)
+    win = _windows(x, window)
+    if win is not None:
+        out[window - 1 :] = fn(win)
+    return out
+
+
+def rolling_mean(x: np.ndarray, window: int) -> np.ndarray:
+    """pandas rolling(window).mean()。"""
+
+    def fn(win):
+        res = win.mean(axis=-1)
+        flat = (win == win[:, :1]).all(axis=-1)
+        res[flat] = win[flat, 0]
+        return res
+
+    return _rolling(x, window, fn)
+
+
+def rolling_std(x: np.ndarray, window: int, ddof: int = 0) -> np.ndarray:
+    """pandas rolling(window).std(ddof)。"""
+
+    def fn(win):
+        res = win.std(axis=-1, ddof=ddof)
+        res[(win == win[:, :1]).all(axis=-1)] = 0.0
+        return res
+
+    return _rolling(x, window, fn)
+
+
+def rolling_min(x: np.ndarray, window: int) -> np.ndarray:
+    return _rolling(x, window, lambda win: win.min(axis=-1))
+
+
+def rolling_max(x: np.ndarray, window: int) -> np.ndarray:
+    return _rolling(x, window, lambda win: win.max(axis=-1))
+
+
+def ema(x: np.ndarray, alpha: float, min_periods: int) -> np.ndarray:
+    """
+    pandas ewm(alpha, adjust=False, min_periods).mean()：前导 NaN 跳过，中间 NaN 按 ignore_na=False 衰减权重。
+    逐元素 Python 循环（非向量化），以保证与 pandas / ta 逐位一致，原因见模块说明。
+    """
+    vals = np.asarray(x, dtype=float).tolist()
+    out = [_NAN] * len(vals)
+    # 与 pandas 相同的 alpha 归一化（alpha -> com -> alpha）
+    alpha = 1.0 / (1.0 + (1.0 / alpha - 1.0))
+    factor = 1.0 - alpha
+    weighted = _NAN
+    old_wt = 1.0
+    nobs = 0
+    for i, cur in enumerate(vals):
+        obs = cur == cur
+        nobs += obs
+        if weighted == weighted:
+            old_wt *= factor
+            if obs:
+                if weighted != cur:
+                    weighted = (old_wt * weighted + alpha * cur) / (old_wt + alpha)
+                old_wt = 1.0
+        elif obs:
+            weighted = cur
+        if nobs >= min_periods:
+            out[i] = weighted
+    return np.array(out, dtype=float)
+
+
+def ema_span(x: np.ndarray, span: int) -> np.ndarray:
+    """ta 的 _ema：ewm(span, min_periods=span, adjust=False)。"""
+    return ema(x, 1.0 / (1.0 + (span - 1) / 2.0), span)
+
+
+def _shift1(x: np.ndarray) -> np.ndarray:
+    out = np.empty(len(x))
+    out[:1] = _NAN
+    out[1:] = x[:-1]
+    return out
+
+
+def macd(close: np.ndarray, fast: int = 12, slow: int = 26, sign: int = 9) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(macd, signal, diff)，同 ta.trend.MACD。"""
+    line = ema_span(close, fast) - ema_span(close, slow)
+    signal = ema_span(line, sign)
+    return line, signal, line - signal
+
+
+def stoch(high: np.ndarray, low: np.ndarray, close: np.ndarray, window: int = 14, smooth: int = 3) -> Tuple[np.ndarray, np.ndarray]:
+    """(K, D)，同 ta.momentum.StochasticOscillator。"""
+    smin = rolling_min(low, window)
+    smax = rolling_max(high, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        k = 100 * (close - smin) / (smax - smin)
+    return k, rolling_mean(k, smooth)
+
+
+def rsi(close: np.ndarray, window: int = 14) -> np.ndarray:
+    """Wilder RSI，同 ta.momentum.RSIIndicator。"""
+    diff = np.asarray(close, dtype=float) - _shift1(np.asarray(close, dtype=float))
+    up = np.where(diff > 0, diff, 0.0)
+    down = -np.where(diff < 0, diff, 0.0)
+    emaup = ema(up, 1.0 / window, window)
+    emadn = ema(down, 1.0 / window, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(emadn == 0, 100, 100 - (100 / (1 + emaup / emadn)))
+
+
+def bollinger(close: np.ndarray, window: int = 20, window_dev: float = 2.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(upper, middle, lower)，同 ta.volatility.BollingerBands（总体标准差 ddof=0）。"""
+    mavg = rolling_mean(close, window)
+    mstd = rolling_std(close, window, ddof=0)
+    return mavg + window_dev * mstd, mavg, mavg - window_dev * mstd
+
+
+def obv(close: np.ndarray, volume: np.ndarray) -> np.ndarray:
+    """OBV 能量潮，同 ta.volume.OnBalanceVolumeIndicator（成交量空值处保持 NaN，累加跳过）。"""
+    close = np.asarray(close, dtype=float)
+    signed = np.where(close < _shift1(close), -np.asarray(volume, dtype=float), volume)
+    out = np.nancumsum(signed)
+    out[np.isnan(signed)] = _NAN
+    return out
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+    """ATR：真实波幅（三项取最大、跳过 NaN）的 period 根简单均值，同 agents.technical._atr。"""
+    prev = _shift1(np.asarray(close, dtype=float))
+    tr = np.fmax(np.fmax(high - low, np.abs(high - prev)), np.abs(low - prev))
+    return rolling_mean(tr, period)
+
+
+def indicator_series(
+    close: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    volume: Optional[np.ndarray],
+    bb_period: int = 20,
+    bb_std_mult: float = 2.0,
+    volume_ma_period: int = 20,
+) -> Dict[str, np.ndarray]:
+    """全部指标序列，键名与 agents.technical._indicator_series 相同。"""
+    close = np.asarray(close, dtype=float)
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    ind: Dict[str, np.ndarray] = {}
+    for n in (5, 10, 20, 60):
+        ind[f"ma{n}"] = rolling_mean(close, n)
+    ind["macd"], ind["macd_signal"], ind["macd_diff"] = macd(close)
+    ind["stoch_k"], ind["stoch_d"] = stoch(high, low, close)
+    ind["rsi"] = rsi(close)
+    ind["bb_h"], ind["bb_m"], ind["bb_l"] = bollinger(close, bb_period, bb_std_mult)
+    if volume is not None:
+        volume = np.asarray(volume, dtype=float)
+        ind["vol_ma"] = rolling_mean(volume, volume_ma_period)
+        ind["obv"] = obv(close, volume)
+        ind["obv_ma"] = rolling_mean(ind["obv"], volume_ma_period)
+    ind["atr"] = atr(high, low, close)
+    return ind
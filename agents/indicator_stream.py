@@ -0,0 +1,596 @@
+"""
+增量指标状态：分K 每来一根新 K 线只做 O(1) 更新，而不是对整个窗口重算全部指标。
+
+- 覆盖 EMA/MACD、Wilder RSI、随机指标 KDJ、滚动 MA/布林带、OBV、ATR，更新公式与 pandas ewm/rolling
+  （即 ta 库所用内核）逐步一致：EMA 按 pandas adjust=False 递推，滚动均值/方差按 pandas 的
+  Kahan 补偿加减窗口实现；
+- TechnicalStream 聚合全部指标并保留摘要所需的近 K 根尾部序列（背离、动量、均线等），
+  可交给 agents.technical._summarize 生成与全量计算相同字段的摘要；
+- 状态按 (ticker, interval, period, prepost) 存一份，只提交已收盘的 K 线；最后一根（可能仍在形成中）只在副本上计算；
+- 活跃状态留在进程内 LRU（TECH_STREAM_CACHE_SIZE 个），每个状态最多每 _PERSIST_SEC 秒、被淘汰时与进程退出时
+  写回 data/cache.db 的 indicator_state 表（to_dict / from_dict），读路径不再每次读写数据库；
+  副本用结构复制（copy），不经 JSON。
+
+get_technical_summary 对 TECH_STREAM_INTRADAY 列出的分K 周期（默认 1m,5m：K 线多、刷新最频繁）走 stream_summary()，
+失败回退全量计算；设为 1 对全部分K 启用，设为 0 关闭。摘要与全量计算逐字段一致（tests/test_indicator_stream.py）。
+"""
+import atexit
+import json
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from config.analysis_config import (
+    BB_PERIOD,
+    BB_STD_MULT,
+    DIVERGENCE_LOOKBACK,
+    DIVERGENCE_MIN_BARS,
+    VOLUME_MA_PERIOD,
+)
+from utils import yf_cache
+
+# 走增量状态的分K 周期：逗号分隔；1 / true 为全部分K，0 / false 关闭
+TECH_STREAM_INTRADAY = os.environ.get("TECH_STREAM_INTRADAY", "1m,5m").strip().lower()
+# 进程内保留的活跃状态数
+TECH_STREAM_CACHE_SIZE = max(1, int(os.environ.get("TECH_STREAM_CACHE_SIZE", "512").strip() or "512"))
+# 同一状态写回数据库的最短间隔（秒）
+_PERSIST_SEC = 300
+
+_NAN = float("nan")
+# 摘要需要的尾部长度：动量窗口 120 根 + 1、背离回看、60 日收益
+_TAIL = max(121, DIVERGENCE_LOOKBACK + 1, DIVERGENCE_MIN_BARS, 61)
+# 需要尾部序列的指标（背离 / 金叉 / ATR 根数判断），其余只需最新值
+_TAIL_KEYS = ("macd", "macd_signal", "rsi", "atr")
+
+_DDL = """
+CREATE TABLE IF NOT EXISTS indicator_state (
+    state_key  TEXT PRIMARY KEY,
+    updated_at REAL NOT NULL,
+    payload    TEXT NOT NULL
+);
+"""
+
+
+def stream_enabled(interval: str) -> bool:
+    """该分K 周期是否走增量状态（见 TECH_STREAM_INTRADAY）。"""
+    if TECH_STREAM_INTRADAY in ("", "0", "false", "no"):
+        return False
+    if TECH_STREAM_INTRADAY in ("1", "true", "yes"):
+        return True
+    return (interval or "").strip().lower() in {s.strip() for s in TECH_STREAM_INTRADAY.split(",")}
+
+
+def _alpha_from_span(span: int) -> float:
+    # 与 pandas 一致：span -> com -> alpha
+    return 1.0 / (1.0 + (span - 1) / 2.0)
+
+
+def _alpha_from_alpha(alpha: float) -> float:
+    return 1.0 / (1.0 + (1.0 / alpha - 1.0))
+
+
+class Ema:
+    """pandas ewm(adjust=False, min_periods) 的逐步递推。"""
+
+    def __init__(self, alpha: float, min_periods: int):
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.weighted = _NAN
+        self.nobs = 0
+
+    def update(self, x: float) -> float:
+        obs = x == x
+        self.nobs += int(obs)
+        if self.weighted == self.weighted:
+            if obs and self.weighted != x:
+                old_wt = 1.0 - self.alpha
+                self.weighted = (old_wt * self.weighted + self.alpha * x) / (old_wt + self.alpha)
+        elif obs:
+            self.weighted = x
+        return self.weighted if self.nobs >= self.min_periods else _NAN
+
+
+class RollingMean:
+    """pandas rolling(window).mean() 的逐步实现（Kahan 补偿加/减、连续相同值精确返回）。"""
+
+    def __init__(self, window: int, min_periods: Optional[int] = None):
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+        self.buf: deque = deque()
+        self.nobs = 0
+        self.sum_x = 0.0
+        self.comp_add = 0.0
+        self.comp_remove = 0.0
+        self.neg_ct = 0
+        self.same = 0
+        self.prev = _NAN
+
+    def _add(self, v: float) -> None:
+        if v != v:
+            return
+        self.nobs += 1
+        y = v - self.comp_add
+        t = self.sum_x + y
+        self.comp_add = t - self.sum_x - y
+        self.sum_x = t
+        if math.copysign(1.0, v) < 0:
+            self.neg_ct += 1
+        if v == self.prev:
+            self.same += 1
+        else:
+            self.same = 1
+        self.prev = v
+
+    def _remove(self, v: float) -> None:
+        if v != v:
+            return
+        self.nobs -= 1
+        y = -v - self.comp_remove
+        t = self.sum_x + y
+        self.comp_remove = t - self.sum_x - y
+        self.sum_x = t
+        if math.copysign(1.0, v) < 0:
+            self.neg_ct -= 1
+
+    def update(self, x: float) -> float:
+        if len(self.buf) == self.window:
+            self._remove(self.buf.popleft())
+        elif not self.buf:
+            self.prev = x
+            self.same = 0
+        self.buf.append(x)
+        self._add(x)
+        if self.nobs >= self.min_periods and self.nobs > 0:
+            result = self.sum_x / self.nobs
+            if self.same >= self.nobs:
+                result = self.prev
+            elif self.neg_ct == 0 and result < 0:
+                result = 0.0
+            elif self.neg_ct == self.nobs and result > 0:
+                result = 0.0
+            return result
+        return _NAN
+
+
+class RollingStd:
+    """pandas rolling(window).std(ddof) 的逐步实现（Welford + 补偿）。"""
+
+    def __init__(self, window: int, ddof: int = 0):
+        self.window = window
+        self.ddof = ddof
+        self.buf: deque = deque()
+        self.nobs = 0
+        self.mean_x = 0.0
+        self.ssqdm_x = 0.0
+        self.comp_add = 0.0
+        self.comp_remove = 0.0
+        self.same = 0
+        self.prev = _NAN
+
+    def _add(self, v: float) -> None:
+        if v != v:
+            return
+        if v == self.prev:
+            self.same += 1
+        else:
+            self.same = 1
+        self.prev = v
+        self.nobs += 1
+        prev_mean = self.mean_x - self.comp_add
+        y = v - self.comp_add
+        t = y - self.mean_x
+        self.comp_add = t + self.mean_x - y
+        self.mean_x += t / self.nobs
+        self.ssqdm_x += (v - prev_mean) * (v - self.mean_x)
+
+    def _remove(self, v: float) -> None:
+        if v != v:
+            return
+        self.nobs -= 1
+        if self.nobs:
+            prev_mean = self.mean_x - self.comp_remove
+            y = v - self.comp_remove
+            t = y - self.mean_x
+            self.comp_remove = t + self.mean_x - y
+            self.mean_x -= t / self.nobs
+            self.ssqdm_x -= (v - prev_mean) * (v - self.mean_x)
+        else:
+            self.mean_x = 0.0
+            self.ssqdm_x = 0.0
+
+    def update(self, x: float) -> float:
+        if not self.buf:
+            self.prev = x
+            self.same = 0
+        if len(self.buf) == self.window:
+            self._remove(self.buf.popleft())
+        self.buf.append(x)
+        self._add(x)
+        if self.nobs >= self.window and self.nobs > self.ddof:
+            if self.nobs == 1 or self.same >= self.nobs:
+                var = 0.0
+            else:
+                var = self.ssqdm_x / (self.nobs - self.ddof)
+            return math.sqrt(var) if var > 0 else 0.0
+        return _NAN
+
+
+class RollingExtreme:
+    """定长窗口最小/最大值（窗口不超过数十根，直接在 deque 上取极值）。"""
+
+    def __init__(self, window: int, kind: str = "max"):
+        self.window = window
+        self.kind = kind
+        self.buf: deque = deque(maxlen=window)
+
+    def update(self, x: float) -> float:
+        self.buf.append(x)
+        if len(self.buf) < self.window:
+            return _NAN
+        vals = [v for v in self.buf if v == v]
+        if len(vals) < self.window:
+            return _NAN
+        return max(vals) if self.kind == "max" else min(vals)
+
+
+def _div(a: float, b: float) -> float:
+    """与 numpy 浮点除法一致：除零得 ±inf / nan，而不是抛异常。"""
+    if b == 0:
+        if a == 0 or a != a:
+            return _NAN
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+    return a / b
+
+
+class TechnicalStream:
+    """单标的全部指标的增量状态 + 摘要所需尾部序列。"""
+
+    def __init__(self):
+        self.mas = {n: RollingMean(n) for n in (5, 10, 20, 60)}
+        self.ema_fast = Ema(_alpha_from_span(12), 12)
+        self.ema_slow = Ema(_alpha_from_span(26), 26)
+        self.ema_sign = Ema(_alpha_from_span(9), 9)
+        self.low_min = RollingExtreme(14, "min")
+        self.high_max = RollingExtreme(14, "max")
+        self.stoch_d = RollingMean(3)
+        self.rsi_up = Ema(_alpha_from_alpha(1 / 14), 14)
+        self.rsi_dn = Ema(_alpha_from_alpha(1 / 14), 14)
+        self.bb_mean = RollingMean(BB_PERIOD)
+        self.bb_std = RollingStd(BB_PERIOD, ddof=0)
+        self.vol_ma = RollingMean(VOLUME_MA_PERIOD)
+        self.obv = 0.0
+        self.obv_started = False
+        self.obv_ma = RollingMean(VOLUME_MA_PERIOD)
+        self.atr = RollingMean(14)
+        self.prev_close = _NAN
+        self.n_bars = 0
+        self.first_ts: Optional[int] = None
+        self.last_ts: Optional[int] = None
+        self.last_close = _NAN
+        self.tail: Dict[str, deque] = {
+            k: deque(maxlen=_TAIL) for k in ("close", "high", "low", "volume") + _TAIL_KEYS
+        }
+        self.last: Dict[str, float] = {}
+
+    def update(self, ts: int, high: float, low: float, close: float, volume: float) -> None:
+        """推进一根 K 线（O(1)）。ts 为 UTC 纳秒时间戳。"""
+        last: Dict[str, float] = {}
+        for n, ma in self.mas.items():
+            last[f"ma{n}"] = ma.update(close)
+
+        fast = self.ema_fast.update(close)
+        slow = self.ema_slow.update(close)
+        macd = fast - slow
+        signal = self.ema_sign.update(macd)
+        last["macd"] = macd
+        last["macd_signal"] = signal
+        last["macd_diff"] = macd - signal
+
+        smin = self.low_min.update(low)
+        smax = self.high_max.update(high)
+        k = _div(100 * (close - smin), smax - smin)
+        last["stoch_k"] = k
+        last["stoch_d"] = self.stoch_d.update(k)
+
+        diff = close - self.prev_close
+        up = diff if diff > 0 else 0.0
+        down = -(diff if diff < 0 else 0.0)
+        emaup = self.rsi_up.update(up)
+        emadn = self.rsi_dn.update(down)
+        if emadn == 0:
+            last["rsi"] = 100.0
+        else:
+            last["rsi"] = 100 - (100 / (1 + _div(emaup, emadn)))
+
+        mavg = self.bb_mean.update(close)
+        mstd = self.bb_std.update(close)
+        last["bb_m"] = mavg
+        last["bb_h"] = mavg + BB_STD_MULT * mstd
+        last["bb_l"] = mavg - BB_STD_MULT * mstd
+
+        last["vol_ma"] = self.vol_ma.update(volume)
+        signed = -volume if close < self.prev_close else volume
+        if signed == signed:
+            self.obv = self.obv + signed if self.obv_started else signed
+            self.obv_started = True
+        last["obv"] = self.obv if self.obv_started else _NAN
+        last["obv_ma"] = self.obv_ma.update(last["obv"])
+
+        pc = self.prev_close
+        tr_parts = [v for v in (high - low, abs(high - pc), abs(low - pc)) if v == v]
+        last["atr"] = self.atr.update(max(tr_parts) if tr_parts else _NAN)
+
+        self.prev_close = close
+        self.last_close = close
+        self.n_bars += 1
+        if self.first_ts is None:
+            self.first_ts = ts
+        self.last_ts = ts
+        self.last = last
+        for key, v in (("close", close), ("high", high), ("low", low), ("volume", volume)):
+            self.tail[key].append(v)
+        for key in _TAIL_KEYS:
+            self.tail[key].append(last[key])
+
+    def arrays(self):
+        """返回 (close, high, low, volume, ind) 供 _summarize：尾部序列 + 其余指标的最新值。"""
+        close = np.array(self.tail["close"], dtype=float)
+        ind = {k: np.array([v], dtype=float) for k, v in self.last.items()}
+        for key in _TAIL_KEYS:
+            ind[key] = np.array(self.tail[key], dtype=float)
+        return (
+            close,
+            np.array(self.tail["high"], dtype=float),
+            np.array(self.tail["low"], dtype=float),
+            np.array(self.tail["volume"], dtype=float),
+            ind,
+        )
+
+    # ---------- 序列化 ----------
+
+    def to_dict(self) -> Dict[str, Any]:
+        def enc(obj):
+            if isinstance(obj, deque):
+                return {"__deque__": list(obj), "maxlen": obj.maxlen}
+            if isinstance(obj, dict):
+                return {str(k): enc(v) for k, v in obj.items()}
+            if isinstance(obj, (Ema, RollingMean, RollingStd, RollingExtreme)):
+                return {"__cls__": type(obj).__name__, **{k: enc(v) for k, v in vars(obj).items()}}
+            if isinstance(obj, float) and obj != obj:
+                return "nan"
+            if isinstance(obj, float) and math.isinf(obj):
+                return "inf" if obj > 0 else "-inf"
+            return obj
+
+        return {k: enc(v) for k, v in vars(self).items()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TechnicalStream":
+        classes = {c.__name__: c for c in (Ema, RollingMean, RollingStd, RollingExtreme)}
+
+        def dec(obj):
+            if isinstance(obj, dict):
+                if "__deque__" in obj:
+                    return deque([dec(v) for v in obj["__deque__"]], maxlen=obj["maxlen"])
+                if "__cls__" in obj:
+                    inst = classes[obj["__cls__"]].__new__(classes[obj["__cls__"]])
+                    for k, v in obj.items():
+                        if k != "__cls__":
+                            setattr(inst, k, dec(v))
+                    return inst
+                return {k: dec(v) for k, v in obj.items()}
+            if obj == "nan":
+                return _NAN
+            if obj in ("inf", "-inf"):
+                return math.inf if obj == "inf" else -math.inf
+            return obj
+
+        inst = cls.__new__(cls)
+        for k, v in data.items():
+            setattr(inst, k, dec(v))
+        inst.mas = {int(n): ma for n, ma in inst.mas.items()}
+        return inst
+
+    def copy(self) -> "TechnicalStream":
+        """结构复制：各指标对象与 deque 复制一份，数值为不可变标量直接共用。"""
+        return _clone(self)
+
+
+def _clone(obj):
+    if isinstance(obj, deque):
+        return deque(obj, maxlen=obj.maxlen)
+    if isinstance(obj, dict):
+        return {k: _clone(v) for k, v in obj.items()}
+    if isinstance(obj, (TechnicalStream, Ema, RollingMean, RollingStd, RollingExtreme)):
+        inst = obj.__class__.__new__(obj.__class__)
+        inst.__dict__ = {k: _clone(v) for k, v in vars(obj).items()}
+        return inst
+    return obj
+
+
+# ---------- 持久化 ----------
+
+
+def _state_key(ticker: str, interval: str, prepost: bool, period: Optional[str] = None) -> str:
+    return f"{(ticker or '').upper()}|{interval}|{period or ''}|{int(prepost)}"
+
+
+def _conn(path=None):
+    conn = yf_cache._get_conn(path)
+    conn.executescript(_DDL)
+    return conn
+
+
+def _load(key: str) -> Optional[TechnicalStream]:
+    try:
+        row = _conn().execute("SELECT payload FROM indicator_state WHERE state_key = ?", (key,)).fetchone()
+        return TechnicalStream.from_dict(json.loads(row[0])) if row else None
+    except Exception:
+        return None
+
+
+def _save(key: str, state: TechnicalStream, path=None) -> None:
+    try:
+        with _conn(path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO indicator_state VALUES (?, ?, ?)",
+                (key, time.time(), json.dumps(state.to_dict())),
+            )
+    except Exception:
+        pass
+
+
+def load_state(ticker: str, interval: str, prepost: bool, period: Optional[str] = None) -> Optional[TechnicalStream]:
+    """读数据库中持久化的状态（不经进程内缓存）。"""
+    return _load(_state_key(ticker, interval, prepost, period))
+
+
+def save_state(ticker: str, interval: str, prepost: bool, state: TechnicalStream, period: Optional[str] = None) -> None:
+    _save(_state_key(ticker, interval, prepost, period), state)
+
+
+# 进程内 LRU：key -> [状态, 上次写回时间, 是否有未写回的推进, 所属数据库路径]
+# 数据库路径在登记时确定：延迟写回（淘汰 / 进程退出）写到状态来源的库，而不是写回当时的 yf_cache._DB_PATH
+_LIVE: "OrderedDict[str, list]" = OrderedDict()
+_LIVE_LOCK = threading.Lock()
+
+
+def _checkout(key: str) -> Optional[list]:
+    """取出状态（同时从 LRU 移除，同步期间归调用方独占；并发的同 key 调用会各自从库中重建）。"""
+    path = yf_cache._DB_PATH
+    with _LIVE_LOCK:
+        entry = _LIVE.pop(key, None)
+    if entry is not None:
+        if entry[3] == path:
+            return entry
+        if entry[2]:  # 缓存库已切换（如测试替换路径）：旧状态写回原库，不跨库复用
+            _save(key, entry[0], entry[3])
+    state = _load(key)
+    return None if state is None else [state, time.time(), False, path]
+
+
+def _checkin(key: str, entry: list) -> None:
+    now = time.time()
+    entry[3:] = [yf_cache._DB_PATH]
+    if entry[2] and now - entry[1] >= _PERSIST_SEC:
+        _save(key, entry[0], entry[3])
+        entry[1], entry[2] = now, False
+    evicted = []
+    with _LIVE_LOCK:
+        _LIVE[key] = entry
+        _LIVE.move_to_end(key)
+        while len(_LIVE) > TECH_STREAM_CACHE_SIZE:
+            evicted.append(_LIVE.popitem(last=False))
+    for k, e in evicted:
+        if e[2]:
+            _save(k, e[0], e[3])
+
+
+def flush_states() -> int:
+    """把进程内有未写回推进的状态全部写回数据库（进程退出时自动调用），返回写回数。"""
+    with _LIVE_LOCK:
+        dirty = [(k, e) for k, e in _LIVE.items() if e[2]]
+    for k, e in dirty:
+        _save(k, e[0], e[3])
+        e[1], e[2] = time.time(), False
+    return len(dirty)
+
+
+def clear_live_states() -> None:
+    """清空进程内状态缓存（不写回）。"""
+    with _LIVE_LOCK:
+        _LIVE.clear()
+
+
+atexit.register(flush_states)
+
+
+def _ts_ns(index: pd.Index) -> List[int]:
+    idx = pd.DatetimeIndex(index)
+    if idx.tz is not None:
+        idx = idx.tz_convert("UTC").tz_localize(None)
+    return idx.as_unit("ns").asi8.tolist()
+
+
+def _sync(state: Optional[TechnicalStream], hist: pd.DataFrame, ts: List[int]) -> TechnicalStream:
+    """
+    把已收盘 K 线（除最后一根）推进到状态里。状态与本次历史窗口对不上（窗口起点后移、
+    K 线被修订、首次运行）时从窗口起点重建，保证与全量计算同起点。
+    """
+    h = hist["High"].to_numpy(dtype=float)
+    l = hist["Low"].to_numpy(dtype=float)
+    c = hist["Close"].to_numpy(dtype=float)
+    v = hist["Volume"].to_numpy(dtype=float)
+    start = 0
+    if state is not None and state.first_ts == ts[0] and state.last_ts in ts[:-1]:
+        pos = ts.index(state.last_ts)
+        if state.last_close == c[pos]:
+            start = pos + 1
+        else:
+            state = None
+    else:
+        state = None
+    if state is None:
+        state = TechnicalStream()
+    for i in range(start, len(ts) - 1):
+        state.update(ts[i], h[i], l[i], c[i], v[i])
+    return state
+
+
+def stream_live(
+    ticker: str,
+    hist: pd.DataFrame,
+    interval: str,
+    prepost: bool,
+    period: Optional[str] = None,
+    include_last: bool = True,
+) -> Optional[TechnicalStream]:
+    """
+    同步已收盘 K 线的状态（进程内缓存，定期写回），返回其副本；include_last=True 时副本再推进最后一根
+    （可能仍在形成中），否则只含已收盘 K 线。行情含空值或无成交量列时返回 None。
+    """
+    cols = ("High", "Low", "Close", "Volume")
+    if hist is None or len(hist) < 2 or not all(c in hist.columns for c in cols):
+        return None
+    if hist[list(cols)].isna().to_numpy().any():
+        return None
+    ts = _ts_ns(hist.index)
+    key = _state_key(ticker, interval, prepost, period)
+    entry = _checkout(key)
+    before = (entry[0], entry[0].n_bars) if entry else (None, -1)
+    state = _sync(before[0], hist, ts)
+    if entry is None or state is not before[0]:
+        entry = [state, 0.0, True]  # 新建 / 重建：尽快写回
+    elif state.n_bars != before[1]:
+        entry[2] = True
+    live = state.copy()
+    _checkin(key, entry)
+    if not include_last:
+        return live
+
+    # 最后一根可能仍在形成中：只在副本上推进，不提交
+    last = hist.iloc[-1]
+    live.update(ts[-1], float(last["High"]), float(last["Low"]), float(last["Close"]), float(last["Volume"]))
+    return live
+
+
+def stream_summary(
+    ticker: str, hist: pd.DataFrame, interval: str, prepost: bool, period: Optional[str] = None
+) -> Optional[dict]:
+    """
+    用增量状态生成分K技术面摘要（字段与 get_technical_summary 相同）。
+    行情含空值或无成交量列时返回 None，由调用方回退全量计算。
+    """
+    from agents.technical import _summarize
+
+    live = stream_live(ticker, hist, interval, prepost, period)
+    if live is None:
+        return None
+    close, high, low, volume, ind = live.arrays()
+    return _summarize(close, high, low, volume, ind, hist.index[-1], interval, prepost)
@@ -13,6 +13,13 @@ SMAR Tool: 根据用户输入的 GitLab MR 链接，拉取 MR 的完整上下文
 import re
 import requests
 
+try:
+    # 在本项目内运行时复用共享连接池；作为独立 SMAR Tool 运行时回退 requests 模块级函数
+    from utils.http_session import get_session as _get_session
+    _http = _get_session("gitlab")
+except ImportError:
+    _http = requests
+
 
 def parse_mr_url(mr_url: str) -> tuple:
     """
@@ -54,7 +61,7 @@ def fetch_mr_details(base_url: str, project_id: str, mr_iid: int, token: str = N
     """获取 MR 基本信息。"""
     url = f"{base_url}/api/v4/projects/{project_id}/merge_requests/{mr_iid}"
     headers = _auth_headers(token, use_oauth)
-    r = requests.get(url, headers=headers or None, timeout=30)
+    r = _http.get(url, headers=headers or None, timeout=30)
     r.raise_for_status()
     return r.json()
 
@@ -63,7 +70,7 @@ def fetch_mr_changes(base_url: str, project_id: str, mr_iid: int, token: str = N
     """获取 MR 的 changes（含 diff）。"""
     url = f"{base_url}/api/v4/projects/{project_id}/merge_requests/{mr_iid}/changes"
     headers = _auth_headers(token, use_oauth)
-    r = requests.get(url, headers=headers or None, timeout=60)
+    r = _http.get(url, headers=headers or None, timeout=60)
     r.raise_for_status()
     data = r.json()
     return data.get("changes", [])
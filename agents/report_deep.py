@@ -133,6 +133,7 @@ def run_one_ticker_deep_report(
     interval: str = "1d",
     include_prepost: bool = False,
     backtest_summary: Optional[Dict[str, Any]] = None,
+    cross_section: Optional[Dict[str, Any]] = None,
 ) -> Optional[Dict[str, Any]]:
     """
     对单只标的：1) 跑 full_analysis 得卡片基础数据；2) 跑深度分析 ①②③④⑤；3) 取上次 full_deep_run；4) 跑对比得大方向/近期趋势；5) 合并为富卡片。
@@ -149,6 +150,8 @@ def run_one_ticker_deep_report(
             interval=interval,
             include_prepost=include_prepost,
             backtest_summary=backtest_summary,
+            # 池内分位仅在报告循环算出时传入
+            **({"cross_section": cross_section} if cross_section else {}),
         )
     except Exception as e:
         print(f"[Report] {ticker} 综合分析异常: {e}", flush=True)
@@ -4,6 +4,8 @@
 """
 from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
+
 
 def _clamp(x: float, lo: float, hi: float) -> float:
     return max(lo, min(hi, x))
@@ -13,10 +15,12 @@ def compute_quant_baseline(
     technical: Dict[str, Any],
     fundamental: Dict[str, Any],
     options_summary: Dict[str, Any],
+    cross_section: Optional[Dict[str, Any]] = None,
 ) -> Tuple[int, str]:
     """
     返回 (0–100 分, 一行说明)。
     中性起点 50；技术偏多加分、偏空减分；期权与估值微调。
+    cross_section 为池内分位（agents.cross_section），传入时按相对强弱再微调。
     """
     reasons: List[str] = []
     score = 50.0
@@ -83,6 +87,35 @@ def compute_quant_baseline(
         score -= 5
         reasons.append("技术数据不足-5")
 
+    if cross_section:
+        from config.analysis_config import CROSS_SECTION_BOTTOM_PCT, CROSS_SECTION_TOP_PCT
+
+        top, bottom = CROSS_SECTION_TOP_PCT, CROSS_SECTION_BOTTOM_PCT
+        rk = cross_section.get("momentum_20d")
+        if rk is not None:
+            if rk >= top:
+                score += 3
+                reasons.append(f"池内动量分位{rk:.0f}+3")
+            elif rk <= bottom:
+                score -= 3
+                reasons.append(f"池内动量分位{rk:.0f}-3")
+        rk = cross_section.get("volume_ratio")
+        if rk is not None and rk >= top:
+            score += 2
+            reasons.append(f"池内量比分位{rk:.0f}+2")
+        rk = cross_section.get("dist_to_high")
+        if rk is not None:
+            if rk >= top:
+                score += 2
+                reasons.append(f"池内距高点分位{rk:.0f}+2")
+            elif rk <= bottom:
+                score -= 2
+                reasons.append(f"池内距高点分位{rk:.0f}-2")
+        rk = cross_section.get("atr_pct")
+        if rk is not None and rk >= top:
+            score -= 2
+            reasons.append(f"池内波动分位{rk:.0f}-2")
+
     chg = fundamental.get("change_pct")
     if chg is not None:
         if chg > 2:
@@ -122,6 +155,37 @@ def compute_quant_baseline(
     return final, note
 
 
+def technical_subscores_panel(f: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    compute_quant_baseline 技术面部分的向量化版本（同一规则与分值），供因子库（data/factor_store）按日批量计算。
+    f 为同形数组：long_align / golden_cross / above_zero / div_top / div_bottom（布尔），
+    kdj_k（空值已按 50）、rsi（未取整），volume_ratio / return_20d_pct / dist_to_high_pct（与摘要同样保留 2 位小数）；不可用为 NaN。
+    返回各子项得分数组与 tech_baseline（50 + 子项之和，限制在 0–100 并取整）。
+    """
+    def flag(key):
+        return np.asarray(f[key], dtype=bool)
+
+    with np.errstate(invalid="ignore"):
+        k = np.asarray(f["kdj_k"], dtype=float)
+        rsi = np.asarray(f["rsi"], dtype=float)
+        vr = np.asarray(f["volume_ratio"], dtype=float)
+        r20 = np.asarray(f["return_20d_pct"], dtype=float)
+        dh = np.asarray(f["dist_to_high_pct"], dtype=float)
+        subs = {
+            "sub_trend": np.where(flag("long_align"), 12.0, 0.0),
+            "sub_macd": np.where(flag("golden_cross"), 5.0, np.where(flag("above_zero"), 3.0, 0.0)),
+            "sub_kdj": np.where(k < 20, 3.0, 0.0) - np.where(k > 80, 4.0, 0.0),
+            "sub_rsi": np.where(rsi < 30, 3.0, 0.0) - np.where(rsi > 70, 4.0, 0.0),
+            "sub_divergence": np.where(flag("div_bottom"), 5.0, 0.0) - np.where(flag("div_top"), 6.0, 0.0),
+            "sub_volume": np.where(vr >= 1.5, 4.0, np.where(vr < 0.7, -3.0, 0.0)),
+            "sub_momentum": np.where(r20 > 5, 4.0, np.where(r20 < -8, -5.0, 0.0)),
+            "sub_high": np.where(dh > -8, 3.0, np.where(dh < -35, -4.0, 0.0)),
+        }
+    total = 50.0 + sum(subs.values())
+    subs["tech_baseline"] = np.round(np.clip(total, 0, 100))
+    return subs
+
+
 def baseline_to_score10_hint(baseline_100: int) -> str:
     """将 0–100 映射到 1–10 档提示（供 Prompt 文字）。"""
     # 线性映射：0->1, 100->10
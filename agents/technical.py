@@ -2,18 +2,23 @@
 技术面：从 yfinance 历史数据计算 MA、MACD、KDJ、RSI、布林带、OBV、量能、ATR%，并给出数值摘要供 LLM 解读。
 支持 MACD/RSI 背离自动检测。支持日K（1d）与分K（1m/5m/15m），可选盘前盘后（prepost）。
 入场/离场规则可配置：ATR 止损倍数、放量突破阈值（见 config/analysis_config）。
-指标计算使用 ta 库（Python>=3.10，pip install ta）。
+指标计算默认使用 numpy 内核（agents/indicator_kernels），TECH_INDICATOR_BACKEND=ta 时使用 ta 库（Python>=3.10，pip install ta）。
 """
 from config.yf_suppress import suppress_yf_noise
 suppress_yf_noise()
+import copy
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
 import pandas as pd
 import yfinance as yf
-from typing import Optional, Tuple, List
-from ta.trend import MACD as _TaMacd
+from typing import Dict, Optional, Tuple, List
 from utils.yf_cache import get_history as _yf_get_history
-from ta.momentum import RSIIndicator as _TaRsi, StochasticOscillator as _TaStoch
-from ta.volatility import BollingerBands as _TaBb
-from ta.volume import OnBalanceVolumeIndicator as _TaObv
+from agents import indicator_kernels as _kernels
+import config.analysis_config as _analysis_config
 
 from config.analysis_config import (
     ATR_STOP_MULT,
@@ -23,14 +28,20 @@ from config.analysis_config import (
     VOLUME_MA_PERIOD,
     DIVERGENCE_LOOKBACK,
     DIVERGENCE_MIN_BARS,
+    TECH_INDICATOR_BACKEND,
 )
 
 # 分K 默认拉取周期（yfinance 限制：1m 最多约 7d，5m/15m 最多约 60d）
-_INTERVAL_DEFAULT_PERIOD = {"1d": "6mo", "1m": "5d", "5m": "5d", "15m": "5d", "30m": "5d", "60m": "5d"}
+_INTERVAL_DEFAULT_PERIOD = {"1d": "6mo", "1m": "5d", "5m": "5d", "10m": "5d", "15m": "5d", "30m": "5d", "60m": "5d"}
 # 分K 最少需要根数（MA60 需 60 根，分K 可放宽到 30）
 _MIN_BARS_DAILY = 60
 _MIN_BARS_INTRADAY = 30
 
+# 技术面摘要记忆化：同一份 K 线（指纹相同）与同一套参数下直接复用结果，进程内共享、LRU 有界
+TECH_SUMMARY_CACHE_SIZE = int(os.environ.get("TECH_SUMMARY_CACHE_SIZE", "512").strip() or "512")
+_SUMMARY_CACHE: "OrderedDict[tuple, dict]" = OrderedDict()
+_SUMMARY_LOCK = threading.Lock()
+
 
 def _atr(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14) -> pd.Series:
     """ATR(14)，用于止损参考。"""
@@ -43,28 +54,102 @@ def _atr(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14) ->
     return tr.rolling(period).mean()
 
 
-def _find_swing_highs(series: pd.Series, window: int = 3) -> List[int]:
+def _nanmax(a: np.ndarray) -> float:
+    """与 pandas Series.max() 一致：跳过 NaN，全 NaN 返回 NaN。"""
+    a = a[~np.isnan(a)]
+    return float(a.max()) if len(a) else float("nan")
+
+
+def _swing_mask(values: np.ndarray, window: int = 3, kind: str = "high") -> np.ndarray:
+    """
+    向量化 swing 点：第 i 根等于 [i-window, i+window] 居中窗口内的最大（high）/最小（low）值即为 swing。
+    values 为一维序列或二维 (bars × tickers) 矩阵（沿第 0 轴），窗口内 NaN 忽略；首尾 window 根不判定。
+    """
+    a = np.asarray(values, dtype=float)
+    mask = np.zeros(a.shape, dtype=bool)
+    n = a.shape[0]
+    if n < 2 * window + 1:
+        return mask
+    win = np.lib.stride_tricks.sliding_window_view(a, 2 * window + 1, axis=0)
+    reduce = np.fmax if kind == "high" else np.fmin
+    ext = reduce.reduce(win, axis=-1)
+    mask[window : n - window] = a[window : n - window] == ext
+    return mask
+
+
+def _find_swing_highs(series, window: int = 3) -> List[int]:
     """返回近期 swing high 的索引列表（从旧到新）。"""
-    idxs = []
-    for i in range(window, len(series) - window):
-        if series.iloc[i] == series.iloc[i - window : i + window + 1].max():
-            idxs.append(i)
-    return idxs
+    return np.flatnonzero(_swing_mask(np.asarray(series, dtype=float), window, "high")).tolist()
 
 
-def _find_swing_lows(series: pd.Series, window: int = 3) -> List[int]:
+def _find_swing_lows(series, window: int = 3) -> List[int]:
     """返回近期 swing low 的索引列表（从旧到新）。"""
-    idxs = []
-    for i in range(window, len(series) - window):
-        if series.iloc[i] == series.iloc[i - window : i + window + 1].min():
-            idxs.append(i)
-    return idxs
+    return np.flatnonzero(_swing_mask(np.asarray(series, dtype=float), window, "low")).tolist()
+
+
+def _last_two(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """每列最近两个 True 的行号 (i1, i2) 及是否至少有两个。"""
+    n = mask.shape[0]
+    has1 = mask.any(axis=0)
+    i2 = n - 1 - mask[::-1].argmax(axis=0)
+    rest = mask.copy()
+    rest[i2, np.arange(mask.shape[1])] = False
+    has2 = has1 & rest.any(axis=0)
+    i1 = n - 1 - rest[::-1].argmax(axis=0)
+    return i1, i2, has2
+
+
+def detect_divergence_panel(
+    close: np.ndarray,
+    macd_line: np.ndarray,
+    rsi: np.ndarray,
+    counts: np.ndarray,
+    lookback: int = 30,
+    min_bars: int = 20,
+    window: int = 3,
+) -> Dict[str, np.ndarray]:
+    """
+    面板版背离检测：输入为右对齐的 (bars × tickers) 矩阵（每列有效数据在底部，counts 为各列有效根数），
+    返回 {"macd_top", "macd_bottom", "rsi_top", "rsi_bottom"} -> 各列布尔数组。
+    规则与逐只检测一致：每列取近 min(lookback, count-1) 根，比较最近两个 swing 高/低点。
+    """
+    close = np.asarray(close, dtype=float).reshape(len(close), -1)
+    macd_line = np.asarray(macd_line, dtype=float).reshape(close.shape)
+    rsi = np.asarray(rsi, dtype=float).reshape(close.shape)
+    counts = np.asarray(counts).reshape(-1)
+    k = close.shape[1]
+    out = {key: np.zeros(k, dtype=bool) for key in ("macd_top", "macd_bottom", "rsi_top", "rsi_bottom")}
+    if lookback < 5 or k == 0:
+        return out
+
+    length = min(lookback, len(close))
+    c = close[-length:]
+    m = macd_line[-length:]
+    r = rsi[-length:]
+    use = np.minimum(lookback, counts - 1)
+    # 候选点需完整窗口落在各自的近 use 根内（与逐只切片后判定一致）
+    rows = np.arange(length)[:, None]
+    start = (length - use)[None, :]
+    candidate = (rows >= start + window) & (rows < length - window)
+    # 窗口外（含左侧填充）置 NaN，避免参与极值比较
+    c_in = np.where(rows >= start, c, np.nan)
+    active = counts >= min_bars
+    cols = np.arange(k)
+
+    for kind, key_m, key_r, better in (("high", "macd_top", "rsi_top", np.greater), ("low", "macd_bottom", "rsi_bottom", np.less)):
+        mask = _swing_mask(c_in, window, kind) & candidate
+        i1, i2, has2 = _last_two(mask)
+        ok = active & has2
+        price_ext = better(c[i2, cols], c[i1, cols])
+        out[key_m] = ok & price_ext & better(m[i1, cols], m[i2, cols])
+        out[key_r] = ok & price_ext & better(r[i1, cols], r[i2, cols])
+    return out
 
 
 def _detect_divergence(
-    close: pd.Series,
-    macd_line: pd.Series,
-    rsi_series: pd.Series,
+    close,
+    macd_line,
+    rsi_series,
     lookback: int = 30,
     min_bars: int = 20,
 ) -> dict:
@@ -74,54 +159,29 @@ def _detect_divergence(
     底背离：价格创新低，指标未创新低。
     返回 {"macd_top", "macd_bottom", "rsi_top", "rsi_bottom"} 布尔值。
     """
-    out = {"macd_top": False, "macd_bottom": False, "rsi_top": False, "rsi_bottom": False}
-    n = len(close)
-    if n < min_bars or lookback < 5:
-        return out
-    use = min(lookback, n - 1)
-    window = 3
-
-    # 取近期数据
-    c = close.iloc[-use:]
-    m = macd_line.iloc[-use:]
-    r = rsi_series.iloc[-use:]
-
-    # Swing highs/lows
-    sh = _find_swing_highs(c, window)
-    sl = _find_swing_lows(c, window)
-
-    # 顶背离：取最近两个 swing high，价格更高但指标更低
-    if len(sh) >= 2:
-        i1, i2 = sh[-2], sh[-1]
-        if c.iloc[i2] > c.iloc[i1] and m.iloc[i2] < m.iloc[i1]:
-            out["macd_top"] = True
-        if c.iloc[i2] > c.iloc[i1] and r.iloc[i2] < r.iloc[i1]:
-            out["rsi_top"] = True
-
-    # 底背离：取最近两个 swing low，价格更低但指标更高
-    if len(sl) >= 2:
-        i1, i2 = sl[-2], sl[-1]
-        if c.iloc[i2] < c.iloc[i1] and m.iloc[i2] > m.iloc[i1]:
-            out["macd_bottom"] = True
-        if c.iloc[i2] < c.iloc[i1] and r.iloc[i2] > r.iloc[i1]:
-            out["rsi_bottom"] = True
-
-    return out
+    c = np.asarray(close, dtype=float)
+    res = detect_divergence_panel(
+        c, np.asarray(macd_line, dtype=float), np.asarray(rsi_series, dtype=float),
+        np.array([len(c)]), lookback=lookback, min_bars=min_bars,
+    )
+    return {key: bool(v[0]) for key, v in res.items()}
 
 
 def _compute_entry_exit_levels(
-    close: pd.Series,
-    high: pd.Series,
-    low: pd.Series,
+    close: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
     ma20: Optional[float],
     ma60: Optional[float],
     price: float,
     is_daily: bool,
     volume_ratio_tech: Optional[float] = None,
+    atr: Optional[np.ndarray] = None,
 ) -> dict:
     """
     基于均线、波动(ATR/ATR%)与量能计算技术面入场/离场参考，供报告展示与 LLM 评估。
     规则可调：TECH_ATR_STOP_MULT（ATR 止损倍数）、TECH_VOLUME_BREAKOUT_RATIO（放量突破量比阈值）。
+    atr：已算好的 ATR(14) 序列（与 close 等长）；不传则按 high/low/close 现算。
     """
     out = {
         "support_ma20": None,
@@ -136,9 +196,10 @@ def _compute_entry_exit_levels(
         return out
 
     lookback = min(20, len(high) - 1)
-    resistance_20d = float(high.iloc[-lookback:].max()) if lookback > 0 else None
-    atr_series = _atr(high, low, close)
-    atr_val = float(atr_series.iloc[-1]) if len(atr_series) >= 14 else None
+    resistance_20d = _nanmax(high[-lookback:]) if lookback > 0 else None
+    if atr is None:
+        atr = _atr(pd.Series(high), pd.Series(low), pd.Series(close)).to_numpy()
+    atr_val = float(atr[-1]) if len(atr) >= 14 else None
     atr_pct = round(atr_val / price * 100, 2) if (atr_val is not None and price and price > 0) else None
 
     out["support_ma20"] = round(ma20, 2) if ma20 is not None else None
@@ -243,115 +304,150 @@ def _build_tech_status_one_line(
     return "；".join(parts) if parts else "—"
 
 
-def get_technical_summary(
-    ticker: str,
-    period: Optional[str] = None,
-    interval: str = "1d",
-    prepost: bool = False,
-) -> dict:
+def _insufficient(reason: str, interval: str, prepost: bool) -> dict:
+    """数据不足 / 结构异常时的统一返回。"""
+    return {
+        "ok": False,
+        "reason": reason,
+        "trend_ma": None,
+        "macd_summary": None,
+        "kdj_summary": None,
+        "rsi_summary": None,
+        "bb_summary": None,
+        "obv_summary": None,
+        "divergence_summary": None,
+        "volume_context": None,
+        "tech_levels": {},
+        "tech_status_one_line": None,
+        "interval": interval,
+        "prepost": prepost,
+    }
+
+
+def _indicator_series(
+    close: pd.Series,
+    high: pd.Series,
+    low: pd.Series,
+    volume: Optional[pd.Series],
+    backend: Optional[str] = None,
+) -> Dict[str, np.ndarray]:
     """
-    拉取历史数据并计算技术指标，返回数值摘要（供 LLM 生成「趋势结构 / MACD状态 / KDJ状态」描述）。
-    interval: 1d=日K，5m/15m/1m=分K（超短线）。
-    prepost: 是否含盘前盘后数据。
+    单标的全部指标序列，与 close 等长的 float 数组：
+    ma5/ma10/ma20/ma60、vol_ma、macd/macd_signal/macd_diff、stoch_k/stoch_d、rsi、bb_h/bb_m/bb_l、obv/obv_ma、atr。
+    backend 为 numpy（默认，见 TECH_INDICATOR_BACKEND）时用 agents/indicator_kernels，为 ta 时用 ta 库。
+    面板引擎（agents/technical_panel）按同样公式逐列计算，二者交给 _summarize 组装出相同的摘要。
     """
-    interval = (interval or "1d").strip().lower()
-    period = period or _INTERVAL_DEFAULT_PERIOD.get(interval, "6mo")
-    is_daily = interval == "1d"
-    min_bars = _MIN_BARS_DAILY if is_daily else _MIN_BARS_INTRADAY
+    if (backend or TECH_INDICATOR_BACKEND) != "ta":
+        return _kernels.indicator_series(
+            close.to_numpy(dtype=float),
+            high.to_numpy(dtype=float),
+            low.to_numpy(dtype=float),
+            volume.to_numpy(dtype=float) if volume is not None else None,
+            bb_period=BB_PERIOD,
+            bb_std_mult=BB_STD_MULT,
+            volume_ma_period=VOLUME_MA_PERIOD,
+        )
+    # ta 后端：按需导入（numpy 后端不依赖 ta）
+    from ta.momentum import RSIIndicator as _TaRsi, StochasticOscillator as _TaStoch
+    from ta.trend import MACD as _TaMacd
+    from ta.volatility import BollingerBands as _TaBb
+    from ta.volume import OnBalanceVolumeIndicator as _TaObv
+
+    ind: Dict[str, np.ndarray] = {}
+    for n in (5, 10, 20, 60):
+        ind[f"ma{n}"] = close.rolling(n).mean().to_numpy(dtype=float)
 
-    hist = _yf_get_history(ticker, period=period, interval=interval, prepost=prepost)
-    if hist is None or len(hist) < min_bars:
-        return {
-            "ok": False,
-            "reason": "历史数据不足",
-            "trend_ma": None,
-            "macd_summary": None,
-            "kdj_summary": None,
-            "rsi_summary": None,
-            "bb_summary": None,
-            "obv_summary": None,
-            "divergence_summary": None,
-            "volume_context": None,
-            "tech_levels": {},
-            "tech_status_one_line": None,
-            "interval": interval,
-            "prepost": prepost,
-        }
-    if not hasattr(hist, "columns") or "Close" not in hist.columns or "High" not in hist.columns or "Low" not in hist.columns:
-        return {
-            "ok": False,
-            "reason": "行情结构异常或暂无价格数据",
-            "trend_ma": None,
-            "macd_summary": None,
-            "kdj_summary": None,
-            "rsi_summary": None,
-            "bb_summary": None,
-            "obv_summary": None,
-            "divergence_summary": None,
-            "volume_context": None,
-            "tech_levels": {},
-            "tech_status_one_line": None,
-            "interval": interval,
-            "prepost": prepost,
-        }
+    # MACD（ta 库：fast=12, slow=26, signal=9）
+    _macd_ind = _TaMacd(close=close)
+    ind["macd"] = _macd_ind.macd().to_numpy(dtype=float)
+    ind["macd_signal"] = _macd_ind.macd_signal().to_numpy(dtype=float)
+    ind["macd_diff"] = _macd_ind.macd_diff().to_numpy(dtype=float)
 
-    close = hist["Close"]
-    high = hist["High"]
-    low = hist["Low"]
-    volume = hist["Volume"] if hasattr(hist, "columns") and "Volume" in hist.columns else None
+    # KDJ：ta StochasticOscillator → K/D
+    _stoch_ind = _TaStoch(high=high, low=low, close=close)
+    ind["stoch_k"] = _stoch_ind.stoch().to_numpy(dtype=float)
+    ind["stoch_d"] = _stoch_ind.stoch_signal().to_numpy(dtype=float)
+
+    # RSI(14)（ta 库 Wilder 平滑，与原公式一致）
+    ind["rsi"] = _TaRsi(close=close).rsi().to_numpy(dtype=float)
+
+    # 布林带（ta 库：window=BB_PERIOD, window_dev=BB_STD_MULT）
+    _bb_ind = _TaBb(close=close, window=BB_PERIOD, window_dev=BB_STD_MULT)
+    ind["bb_h"] = _bb_ind.bollinger_hband().to_numpy(dtype=float)
+    ind["bb_m"] = _bb_ind.bollinger_mavg().to_numpy(dtype=float)
+    ind["bb_l"] = _bb_ind.bollinger_lband().to_numpy(dtype=float)
+
+    # 量能与 OBV 能量潮（ta 库）
+    if volume is not None:
+        ind["vol_ma"] = volume.rolling(VOLUME_MA_PERIOD).mean().to_numpy(dtype=float)
+        obv_series = _TaObv(close=close, volume=volume.astype(float)).on_balance_volume()
+        ind["obv"] = obv_series.to_numpy(dtype=float)
+        ind["obv_ma"] = obv_series.rolling(VOLUME_MA_PERIOD).mean().to_numpy(dtype=float)
+
+    ind["atr"] = _atr(high, low, close).to_numpy(dtype=float)
+    return ind
+
+
+def _summarize(
+    close: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    volume: Optional[np.ndarray],
+    ind: Dict[str, np.ndarray],
+    last_ts,
+    interval: str,
+    prepost: bool,
+    divergence_summary: Optional[dict] = None,
+) -> dict:
+    """由 OHLCV 与指标序列组装技术面摘要（单标的与面板引擎共用，保证输出一致）。"""
+    is_daily = interval == "1d"
+    n = len(close)
 
     # 量能上下文：近期成交量 / N 日均量
     volume_ratio_tech = None
     volume_ma20 = None
     if volume is not None and len(volume) >= VOLUME_MA_PERIOD:
-        volume_ma20 = float(volume.rolling(VOLUME_MA_PERIOD).mean().iloc[-1])
+        volume_ma20 = float(ind["vol_ma"][-1])
         if volume_ma20 and volume_ma20 > 0:
-            volume_ratio_tech = float(volume.iloc[-1]) / volume_ma20
+            volume_ratio_tech = float(volume[-1]) / volume_ma20
 
     # 均线
-    ma5 = close.rolling(5).mean().iloc[-1] if len(close) >= 5 else None
-    ma10 = close.rolling(10).mean().iloc[-1] if len(close) >= 10 else None
-    ma20 = close.rolling(20).mean().iloc[-1] if len(close) >= 20 else None
-    ma60 = close.rolling(60).mean().iloc[-1] if len(close) >= 60 else None
-    price = close.iloc[-1]
-
-    # MACD（ta 库：fast=12, slow=26, signal=9）
-    _macd_ind = _TaMacd(close=close)
-    macd_line = _macd_ind.macd().fillna(0)
-    signal_line = _macd_ind.macd_signal().fillna(0)
-    macd_hist_s = _macd_ind.macd_diff().fillna(0)
-    macd_val = float(macd_line.iloc[-1])
-    signal_val = float(signal_line.iloc[-1])
-    hist_val = float(macd_hist_s.iloc[-1])
+    ma5 = ind["ma5"][-1] if n >= 5 else None
+    ma10 = ind["ma10"][-1] if n >= 10 else None
+    ma20 = ind["ma20"][-1] if n >= 20 else None
+    ma60 = ind["ma60"][-1] if n >= 60 else None
+    price = close[-1]
+
+    # MACD（空值按 0 处理）
+    macd_line = np.nan_to_num(ind["macd"], nan=0.0)
+    signal_line = np.nan_to_num(ind["macd_signal"], nan=0.0)
+    macd_val = float(macd_line[-1])
+    signal_val = float(signal_line[-1])
+    hist_val = float(np.nan_to_num(ind["macd_diff"][-1:], nan=0.0)[0])
     macd_above_zero = macd_val > 0
     macd_golden = (macd_val > signal_val) and (
-        len(macd_line) > 1 and float(macd_line.iloc[-2]) <= float(signal_line.iloc[-2])
+        len(macd_line) > 1 and float(macd_line[-2]) <= float(signal_line[-2])
     )
 
-    # KDJ：ta StochasticOscillator → K/D，J=3K-2D
-    _stoch_ind = _TaStoch(high=high, low=low, close=close)
-    k = _stoch_ind.stoch().fillna(50)
-    d = _stoch_ind.stoch_signal().fillna(50)
-    j = 3 * k - 2 * d
-    k_val = float(k.iloc[-1])
-    d_val = float(d.iloc[-1])
-    j_val = float(j.iloc[-1])
+    # KDJ：J=3K-2D（空值按 50 处理）
+    k_val = float(np.nan_to_num(ind["stoch_k"][-1:], nan=50.0)[0])
+    d_val = float(np.nan_to_num(ind["stoch_d"][-1:], nan=50.0)[0])
+    j_val = 3 * k_val - 2 * d_val
     kdj_overbought = k_val > 80
     kdj_oversold = k_val < 20
 
-    # RSI(14)（ta 库 Wilder 平滑，与原公式一致）
-    rsi_series = _TaRsi(close=close).rsi()
-    rsi_val = float(rsi_series.iloc[-1]) if len(rsi_series) >= 14 and pd.notna(rsi_series.iloc[-1]) else None
+    # RSI(14)
+    rsi_series = ind["rsi"]
+    rsi_val = float(rsi_series[-1]) if n >= 14 and pd.notna(rsi_series[-1]) else None
     rsi_overbought = rsi_val is not None and rsi_val > 70
     rsi_oversold = rsi_val is not None and rsi_val < 30
 
-    # 布林带（ta 库：window=BB_PERIOD, window_dev=BB_STD_MULT）
-    _bb_ind = _TaBb(close=close, window=BB_PERIOD, window_dev=BB_STD_MULT)
+    # 布林带
     bb_summary = None
-    if len(close) >= BB_PERIOD:
-        u = float(_bb_ind.bollinger_hband().iloc[-1])
-        m = float(_bb_ind.bollinger_mavg().iloc[-1])
-        l = float(_bb_ind.bollinger_lband().iloc[-1])
+    if n >= BB_PERIOD:
+        u = float(ind["bb_h"][-1])
+        m = float(ind["bb_m"][-1])
+        l = float(ind["bb_l"][-1])
         bb_summary = {
             "upper": round(u, 2),
             "middle": round(m, 2),
@@ -361,24 +457,24 @@ def get_technical_summary(
             "bollinger_pct": round((price - l) / (u - l) * 100, 1) if (u - l) > 0 else None,
         }
 
-    # OBV 能量潮（ta 库）
+    # OBV 能量潮
     obv_summary = None
     if volume is not None and len(volume) >= 5:
-        obv_series = _TaObv(close=close, volume=volume.astype(float)).on_balance_volume()
-        obv_now = float(obv_series.iloc[-1])
-        obv_ma = float(obv_series.rolling(VOLUME_MA_PERIOD).mean().iloc[-1]) if len(obv_series) >= VOLUME_MA_PERIOD else None
+        obv_now = float(ind["obv"][-1])
+        obv_ma = float(ind["obv_ma"][-1]) if n >= VOLUME_MA_PERIOD else None
         obv_summary = {
             "obv": round(obv_now, 0),
             "obv_ma": round(obv_ma, 0) if obv_ma is not None else None,
             "obv_above_ma": obv_now > obv_ma if obv_ma is not None else None,
         }
 
-    # MACD/RSI 背离检测
-    divergence_summary = _detect_divergence(
-        close, macd_line, rsi_series,
-        lookback=DIVERGENCE_LOOKBACK,
-        min_bars=DIVERGENCE_MIN_BARS,
-    )
+    # MACD/RSI 背离检测（面板引擎已批量算好时直接传入）
+    if divergence_summary is None:
+        divergence_summary = _detect_divergence(
+            close, macd_line, rsi_series,
+            lookback=DIVERGENCE_LOOKBACK,
+            min_bars=DIVERGENCE_MIN_BARS,
+        )
 
     # 日线多头排列：价格 > MA5 > MA10 > MA20 > MA60（日 K 维度）
     long_align = False
@@ -429,7 +525,6 @@ def get_technical_summary(
             "volume_ma20": round(volume_ma20, 0) if volume_ma20 is not None else None,
         }
 
-    last_ts = hist.index[-1]
     last_date_str = str(last_ts.date()) if hasattr(last_ts, "date") else str(last_ts)[:19]
 
     tech_levels = _compute_entry_exit_levels(
@@ -437,6 +532,7 @@ def get_technical_summary(
         ma20=ma20, ma60=ma60, price=price,
         is_daily=is_daily,
         volume_ratio_tech=volume_ratio_tech,
+        atr=ind.get("atr"),
     )
 
     # 一句技术面状态摘要，供 LLM 直接使用
@@ -459,23 +555,22 @@ def get_technical_summary(
     # 动量摘要：N 根 K 收益率、相对窗口内最高价的距离（供定量基准与 Prompt）
     momentum_summary = None
     try:
-        n = len(close)
         ret_20d_pct = None
         if n >= 21:
-            c0 = float(close.iloc[-1])
-            c20 = float(close.iloc[-21])
+            c0 = float(close[-1])
+            c20 = float(close[-21])
             if c20 and c20 > 0:
                 ret_20d_pct = round((c0 / c20 - 1) * 100, 2)
         ret_60d_pct = None
         if n >= 61:
-            c0 = float(close.iloc[-1])
-            c60 = float(close.iloc[-61])
+            c0 = float(close[-1])
+            c60 = float(close[-61])
             if c60 and c60 > 0:
                 ret_60d_pct = round((c0 / c60 - 1) * 100, 2)
         win = min(252, n) if is_daily else min(120, n)
         dist_to_52w_high_pct = None
         if win >= 20:
-            hh = float(high.iloc[-win:].max())
+            hh = _nanmax(high[-win:])
             if hh > 0:
                 dist_to_52w_high_pct = round((float(price) / hh - 1) * 100, 2)
         momentum_summary = {
@@ -505,3 +600,115 @@ def get_technical_summary(
         "tech_status_one_line": tech_status_one_line,
         "momentum_summary": momentum_summary,
     }
+
+
+def summarize_ohlcv(hist: pd.DataFrame, interval: str = "1d", prepost: bool = False) -> dict:
+    """对已有的 OHLCV DataFrame 计算技术面摘要（不联网）；字段与 get_technical_summary 相同。"""
+    interval = (interval or "1d").strip().lower()
+    min_bars = _MIN_BARS_DAILY if interval == "1d" else _MIN_BARS_INTRADAY
+    if hist is None or len(hist) < min_bars:
+        return _insufficient("历史数据不足", interval, prepost)
+    if not hasattr(hist, "columns") or "Close" not in hist.columns or "High" not in hist.columns or "Low" not in hist.columns:
+        return _insufficient("行情结构异常或暂无价格数据", interval, prepost)
+
+    close = hist["Close"]
+    high = hist["High"]
+    low = hist["Low"]
+    volume = hist["Volume"] if "Volume" in hist.columns else None
+    ind = _indicator_series(close, high, low, volume)
+    return _summarize(
+        close.to_numpy(dtype=float),
+        high.to_numpy(dtype=float),
+        low.to_numpy(dtype=float),
+        volume.to_numpy(dtype=float) if volume is not None else None,
+        ind,
+        hist.index[-1],
+        interval,
+        prepost,
+    )
+
+
+def get_technical_summary(
+    ticker: str,
+    period: Optional[str] = None,
+    interval: str = "1d",
+    prepost: bool = False,
+) -> dict:
+    """
+    拉取历史数据并计算技术指标，返回数值摘要（供 LLM 生成「趋势结构 / MACD状态 / KDJ状态」描述）。
+    interval: 1d=日K，5m/15m/1m=分K（超短线）。
+    prepost: 是否含盘前盘后数据。
+    批量标的请用 agents.technical_panel.get_panel_technical_summaries（向量化，输出一致）。
+    同一 K 线指纹与参数下的重复调用（/report、深度报告、数据预取）直接返回记忆化结果（TECH_SUMMARY_CACHE_SIZE）。
+    """
+    interval = (interval or "1d").strip().lower()
+    period = period or _INTERVAL_DEFAULT_PERIOD.get(interval, "6mo")
+    hist = _yf_get_history(ticker, period=period, interval=interval, prepost=prepost)
+    key = _summary_key(ticker, interval, prepost, hist)
+    if key is not None:
+        with _SUMMARY_LOCK:
+            hit = _SUMMARY_CACHE.get(key)
+            if hit is not None:
+                _SUMMARY_CACHE.move_to_end(key)
+                return copy.deepcopy(hit)
+    out = _compute_technical_summary(ticker, hist, interval, prepost, period)
+    if key is not None and TECH_SUMMARY_CACHE_SIZE > 0:
+        with _SUMMARY_LOCK:
+            _SUMMARY_CACHE[key] = copy.deepcopy(out)
+            while len(_SUMMARY_CACHE) > TECH_SUMMARY_CACHE_SIZE:
+                _SUMMARY_CACHE.popitem(last=False)
+    return out
+
+
+def _config_hash() -> str:
+    """analysis_config 全部参数（含指标后端）的摘要，参数变化后旧的记忆化结果不再命中。"""
+    params = sorted((k, repr(v)) for k, v in vars(_analysis_config).items() if k.isupper())
+    params.append(("backend", TECH_INDICATOR_BACKEND))
+    return hashlib.sha1(repr(params).encode("utf-8")).hexdigest()[:16]
+
+
+def _key_float(value) -> Optional[float]:
+    """指纹里的数值：NaN 记为 None（nan != nan，否则含 NaN 的指纹永远不命中）。"""
+    v = float(value)
+    return None if v != v else v
+
+
+def _summary_key(ticker: str, interval: str, prepost: bool, hist) -> Optional[tuple]:
+    """
+    K 线指纹：(ticker, interval, prepost, 最后一根时间, 根数, 最后一根收盘/成交量, 参数摘要)。
+    最后一根在盘中仍会变化（时间与根数不变），故一并纳入其收盘价与成交量。
+    """
+    try:
+        if hist is None or len(hist) == 0 or "Close" not in hist.columns:
+            return None
+        last = hist.iloc[-1]
+        close = _key_float(last["Close"])
+        vol = _key_float(last["Volume"]) if "Volume" in hist.columns else None
+        return (
+            (ticker or "").upper(), interval, bool(prepost),
+            str(hist.index[-1]), len(hist), close, vol,
+            _config_hash(),
+        )
+    except Exception:
+        return None
+
+
+def clear_summary_cache() -> None:
+    """清空技术面摘要记忆化（测试或参数热更新后调用）。"""
+    with _SUMMARY_LOCK:
+        _SUMMARY_CACHE.clear()
+
+
+def _compute_technical_summary(ticker: str, hist, interval: str, prepost: bool, period: Optional[str] = None) -> dict:
+    """实际计算（未命中记忆化时）：分K 优先走增量指标状态，否则全量计算。"""
+    if interval != "1d" and hist is not None and len(hist) >= _MIN_BARS_INTRADAY:
+        # 分K：增量指标状态（agents/indicator_stream），每次只推进新收盘的 K 线
+        from agents.indicator_stream import stream_enabled, stream_summary
+        if stream_enabled(interval):
+            try:
+                out = stream_summary(ticker, hist, interval, prepost, period)
+                if out is not None:
+                    return out
+            except Exception:
+                pass
+    return summarize_ohlcv(hist, interval=interval, prepost=prepost)
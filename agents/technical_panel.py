@@ -0,0 +1,210 @@
+"""
+技术面面板引擎：对已对齐的 (bars × tickers) OHLCV 矩阵一次性计算全部标的的 MA/MACD/KDJ/RSI/布林带/OBV/ATR，
+再逐标的交给 agents.technical._summarize 组装摘要，输出与 get_technical_summary 逐只计算完全一致。
+
+- 指标按列向量化（pandas rolling / ewm 作用于整张 DataFrame，与 ta 库同一公式、同一数值内核；
+  单只默认的 numpy 后端 agents/indicator_kernels 与之差异在浮点舍入误差内）；
+- MACD/RSI 背离用 detect_divergence_panel 整表一次检测；
+- 输入矩阵可含缺失（上市晚、停牌、A股/美股混合日历）：先按列把有效 K 线（Close 非空）右对齐压紧，
+  每只标的即等价于其自身去空后的历史序列；
+- 数据来源可以是 utils.bar_store 面板（from_bar_panel）或任意 ticker -> DataFrame 字典（from_frames）。
+
+用法：
+  from agents.technical_panel import get_panel_technical_summaries
+  summaries = get_panel_technical_summaries(close, high, low, volume, interval="1d")
+"""
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from agents.technical import (
+    _MIN_BARS_DAILY,
+    _MIN_BARS_INTRADAY,
+    _insufficient,
+    _summarize,
+    detect_divergence_panel,
+)
+from config.analysis_config import (
+    BB_PERIOD,
+    BB_STD_MULT,
+    DIVERGENCE_LOOKBACK,
+    DIVERGENCE_MIN_BARS,
+    VOLUME_MA_PERIOD,
+)
+
+# 与 ta 库默认参数一致
+_MACD_FAST, _MACD_SLOW, _MACD_SIGN = 12, 26, 9
+_STOCH_WINDOW, _STOCH_SMOOTH = 14, 3
+_RSI_WINDOW = 14
+_ATR_PERIOD = 14
+
+
+def _compact(close: pd.DataFrame, others: List[pd.DataFrame]):
+    """
+    按列把 Close 非空的行稳定地移到底部（右对齐），缺失行统一置 NaN 并留在顶部。
+    返回 (压紧后的 close, 其他字段列表, 每列有效根数, 每列原始行号矩阵)。
+    """
+    c = close.to_numpy(dtype=float)
+    valid = ~np.isnan(c)
+    order = np.argsort(valid, axis=0, kind="stable")
+    counts = valid.sum(axis=0)
+    n = c.shape[0]
+    pad = np.arange(n)[:, None] < (n - counts)[None, :]
+
+    def take(a: np.ndarray) -> np.ndarray:
+        out = np.take_along_axis(a, order, axis=0)
+        out[pad] = np.nan
+        return out
+
+    cols = close.columns
+    rng = pd.RangeIndex(n)
+    packed_close = pd.DataFrame(take(c), index=rng, columns=cols)
+    packed_others = [pd.DataFrame(take(o.to_numpy(dtype=float)), index=rng, columns=cols) for o in others]
+    return packed_close, packed_others, counts, order
+
+
+def compute_panel_indicators(
+    close: pd.DataFrame,
+    high: pd.DataFrame,
+    low: pd.DataFrame,
+    volume: pd.DataFrame,
+) -> Dict[str, pd.DataFrame]:
+    """
+    (bars × tickers) 矩阵上计算全部指标，键名与 agents.technical._indicator_series 相同。
+    要求每列有效数据连续且右对齐（见 _compact）；左侧为 NaN 填充。
+    """
+    ind: Dict[str, pd.DataFrame] = {}
+    for n in (5, 10, 20, 60):
+        ind[f"ma{n}"] = close.rolling(n).mean()
+
+    ema_fast = close.ewm(span=_MACD_FAST, min_periods=_MACD_FAST, adjust=False).mean()
+    ema_slow = close.ewm(span=_MACD_SLOW, min_periods=_MACD_SLOW, adjust=False).mean()
+    macd = ema_fast - ema_slow
+    macd_signal = macd.ewm(span=_MACD_SIGN, min_periods=_MACD_SIGN, adjust=False).mean()
+    ind["macd"] = macd
+    ind["macd_signal"] = macd_signal
+    ind["macd_diff"] = macd - macd_signal
+
+    smin = low.rolling(_STOCH_WINDOW, min_periods=_STOCH_WINDOW).min()
+    smax = high.rolling(_STOCH_WINDOW, min_periods=_STOCH_WINDOW).max()
+    stoch_k = 100 * (close - smin) / (smax - smin)
+    ind["stoch_k"] = stoch_k
+    ind["stoch_d"] = stoch_k.rolling(_STOCH_SMOOTH, min_periods=_STOCH_SMOOTH).mean()
+
+    diff = close.diff(1)
+    up = diff.where(diff > 0, 0.0)
+    down = -diff.where(diff < 0, 0.0)
+    emaup = up.ewm(alpha=1 / _RSI_WINDOW, min_periods=_RSI_WINDOW, adjust=False).mean()
+    emadn = down.ewm(alpha=1 / _RSI_WINDOW, min_periods=_RSI_WINDOW, adjust=False).mean()
+    rsi = pd.DataFrame(
+        np.where(emadn == 0, 100, 100 - (100 / (1 + emaup / emadn))),
+        index=close.index,
+        columns=close.columns,
+    )
+    # 左侧填充行的 diff 被 where 置 0 会提前满足 min_periods，按各列自身起点重新屏蔽
+    first = close.notna().to_numpy().argmax(axis=0)
+    own_pos = np.arange(len(close))[:, None] - first[None, :]
+    ind["rsi"] = rsi.mask(own_pos < _RSI_WINDOW - 1)
+
+    mavg = close.rolling(BB_PERIOD, min_periods=BB_PERIOD).mean()
+    mstd = close.rolling(BB_PERIOD, min_periods=BB_PERIOD).std(ddof=0)
+    ind["bb_h"] = mavg + BB_STD_MULT * mstd
+    ind["bb_m"] = mavg
+    ind["bb_l"] = mavg - BB_STD_MULT * mstd
+
+    ind["vol_ma"] = volume.rolling(VOLUME_MA_PERIOD).mean()
+    obv = pd.DataFrame(
+        np.where(close < close.shift(1), -volume, volume),
+        index=close.index,
+        columns=close.columns,
+    ).cumsum()
+    ind["obv"] = obv
+    ind["obv_ma"] = obv.rolling(VOLUME_MA_PERIOD).mean()
+
+    prev_close = close.shift(1)
+    tr = np.fmax(np.fmax(high - low, (high - prev_close).abs()), (low - prev_close).abs())
+    ind["atr"] = tr.rolling(_ATR_PERIOD).mean()
+    return ind
+
+
+def get_panel_technical_summaries(
+    close: pd.DataFrame,
+    high: pd.DataFrame,
+    low: pd.DataFrame,
+    volume: Optional[pd.DataFrame] = None,
+    interval: str = "1d",
+    prepost: bool = False,
+) -> Dict[str, dict]:
+    """
+    批量技术面摘要：输入为同一时间轴的 (bars × tickers) 矩阵，返回 ticker -> 摘要 dict
+    （与 get_technical_summary 对同一段历史的输出一致；数据不足的标的返回 ok=False）。
+    """
+    interval = (interval or "1d").strip().lower()
+    min_bars = _MIN_BARS_DAILY if interval == "1d" else _MIN_BARS_INTRADAY
+    tickers = list(close.columns)
+    if volume is None:
+        volume = pd.DataFrame(np.nan, index=close.index, columns=close.columns)
+    high = high.reindex(columns=tickers)
+    low = low.reindex(columns=tickers)
+    volume = volume.reindex(columns=tickers)
+
+    c, (h, l, v), counts, order = _compact(close, [high, low, volume])
+    ind = {k: df.to_numpy() for k, df in compute_panel_indicators(c, h, l, v).items()}
+    c_arr, h_arr, l_arr, v_arr = c.to_numpy(), h.to_numpy(), l.to_numpy(), v.to_numpy()
+    n = len(c_arr)
+    last_rows = order[-1] if n else np.zeros(len(tickers), dtype=int)
+    # 背离整表一次检测（MACD 空值按 0，与单只口径一致）
+    div = detect_divergence_panel(
+        c_arr, np.nan_to_num(ind["macd"], nan=0.0), ind["rsi"], counts,
+        lookback=DIVERGENCE_LOOKBACK, min_bars=DIVERGENCE_MIN_BARS,
+    )
+
+    out: Dict[str, dict] = {}
+    for j, t in enumerate(tickers):
+        cnt = int(counts[j])
+        if cnt < min_bars:
+            out[t] = _insufficient("历史数据不足", interval, prepost)
+            continue
+        s = slice(n - cnt, n)
+        vol = v_arr[s, j]
+        out[t] = _summarize(
+            c_arr[s, j],
+            h_arr[s, j],
+            l_arr[s, j],
+            None if np.isnan(vol).all() else vol,
+            {k: a[s, j] for k, a in ind.items()},
+            close.index[last_rows[j]],
+            interval,
+            prepost,
+            divergence_summary={key: bool(v[j]) for key, v in div.items()},
+        )
+    return out
+
+
+def from_frames(frames: Dict[str, pd.DataFrame], interval: str = "1d", prepost: bool = False) -> Dict[str, dict]:
+    """ticker -> OHLCV DataFrame 字典的便捷入口（按并集时间轴对齐后计算）。"""
+    frames = {t: f for t, f in frames.items() if f is not None and "Close" in f.columns}
+    if not frames:
+        return {}
+    fields = ["Close", "High", "Low", "Volume"]
+    # 一次 concat 完成并集对齐（逐字段构造 DataFrame 会对每列重复 reindex）
+    wide = pd.concat({t: f.reindex(columns=fields) for t, f in frames.items()}, axis=1, sort=True)
+    m = {c: wide.xs(c, axis=1, level=1) for c in fields}
+    return get_panel_technical_summaries(
+        m["Close"], m["High"], m["Low"], m["Volume"], interval=interval, prepost=prepost
+    )
+
+
+def from_bar_panel(panel, tickers: Optional[List[str]] = None, prepost: bool = False) -> Dict[str, dict]:
+    """utils.bar_store.BarPanel 的便捷入口（直接读取 memmap 矩阵）。"""
+    fields = set(panel.fields)
+    close = panel.matrix("Close", tickers)
+    return get_panel_technical_summaries(
+        close,
+        panel.matrix("High", tickers),
+        panel.matrix("Low", tickers),
+        panel.matrix("Volume", tickers) if "Volume" in fields else None,
+        interval=panel.interval,
+        prepost=prepost,
+    )
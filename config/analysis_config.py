@@ -55,6 +55,9 @@ ATR_PERIOD = _int_env("TECH_ATR_PERIOD", 14)
 # 量能
 VOLUME_MA_PERIOD = _int_env("TECH_VOLUME_MA_PERIOD", 20)
 
+# 指标计算后端：numpy（agents/indicator_kernels，不构造中间 Series）或 ta（ta 库）
+TECH_INDICATOR_BACKEND = (os.environ.get("TECH_INDICATOR_BACKEND", "numpy").strip().lower() or "numpy")
+
 # 背离检测：回溯 K 线数（用于寻找近期高低点）
 DIVERGENCE_LOOKBACK = _int_env("TECH_DIVERGENCE_LOOKBACK", 30)
 # 背离检测：至少需要多少根 K 线
@@ -95,3 +98,12 @@ ANALYSIS_QUANT_BASELINE_ENABLED = os.environ.get("ANALYSIS_QUANT_BASELINE_ENABLE
     "false",
     "no",
 )
+
+# ---------- 池内横截面分位（agents/cross_section，报告卡片与定量基准线） ----------
+# 设为 0 / false / no 关闭
+CROSS_SECTION_ENABLED = os.environ.get("CROSS_SECTION_ENABLED", "1").strip().lower() not in ("0", "false", "no")
+# 有效标的少于该数时不计算分位（池太小分位无意义）
+CROSS_SECTION_MIN_POOL = _int_env("CROSS_SECTION_MIN_POOL", 5)
+# 分位 ≥ 该值视为池内靠前、≤ 下限视为靠后（0–100，100 为池内最高）
+CROSS_SECTION_TOP_PCT = _float_env("CROSS_SECTION_TOP_PCT", 80.0)
+CROSS_SECTION_BOTTOM_PCT = _float_env("CROSS_SECTION_BOTTOM_PCT", 20.0)
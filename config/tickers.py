@@ -4,15 +4,9 @@
 """
 from typing import List
 
+from data.constituents import get_constituents
 from data.universe import (
     get_top_by_market_cap_and_growth,
-    get_nasdaq100_tickers_from_web,
-    get_hangseng_tickers_from_web,
-    get_hstech_tickers_from_web,
-    get_csi300_tickers_from_web,
-    get_russell2000_tickers_from_web,
-    get_csi300_tickers_akshare,
-    get_csi2000_tickers_akshare,
     get_cn_spot_tickers_akshare,
 )
 
@@ -159,6 +153,14 @@ CN_CSI2000_TICKERS_FALLBACK = [
     "001979.SZ", "002027.SZ", "002044.SZ", "002065.SZ", "002078.SZ", "002129.SZ",
 ]
 
+# 每日定时报告任务（scripts/daily_report.py 依次请求；data/warmup.py 按同一列表预热缓存）
+DAILY_REPORT_JOBS = [
+    {"market": MARKET_US, "pool": POOL_LARGE, "limit": 100, "label": "美股SP500"},
+    {"market": MARKET_CN, "pool": POOL_CSI300, "limit": 100, "label": "A股沪深300"},
+    {"market": MARKET_CN, "pool": POOL_SMALL_CN, "limit": 100, "label": "A股中证2000"},
+    {"market": MARKET_HK, "pool": POOL_HK_HSI, "limit": 100, "label": "港股恒指"},
+]
+
 # A股/港股 ticker → 中文名称（报告展示用），可自行扩充
 TICKER_ZH_NAMES = {
     "0700.HK": "腾讯控股", "9988.HK": "阿里巴巴", "3690.HK": "美团", "0941.HK": "中国移动",
@@ -187,47 +189,45 @@ def get_report_tickers(
     pool = (pool or "").strip().lower()
     n = max(1, min(limit, 500))
 
-    # 美股纳斯达克100：优先线上
+    # 指数成分读本地快照（data/constituents，过期后台刷新；首次同步拉线上），无则回退静态列表
+    # 美股纳斯达克100
     if market == MARKET_US and pool == POOL_NASDAQ100:
-        tickers = get_nasdaq100_tickers_from_web()
+        tickers = get_constituents(POOL_NASDAQ100)
         return (tickers[:n] if tickers else NASDAQ_100_TICKERS_FALLBACK[:n])
-    # 美股小盘：罗素2000，优先线上
+    # 美股小盘：罗素2000
     if market == MARKET_US and pool == POOL_SMALL_US:
-        tickers = get_russell2000_tickers_from_web()
+        tickers = get_constituents(POOL_SMALL_US)
         return (tickers[:n] if tickers else RUSSELL_2000_TICKERS_FALLBACK[:n])
-    # A股沪深300：优先 AKShare
+    # A股沪深300：AKShare，失败 Wikipedia
     if market == MARKET_CN and pool == POOL_CSI300:
-        tickers = get_csi300_tickers_akshare()
+        tickers = get_constituents(POOL_CSI300)
         return (tickers[:n] if tickers else CN_QUALITY_TICKERS_FALLBACK[:n])
-    # A股小盘/潜力：中证2000，优先 AKShare，失败用沪深300+全A 扩充
+    # A股小盘/潜力：中证2000，失败用沪深300+全A 扩充
     if market == MARKET_CN and pool == POOL_SMALL_CN:
-        tickers = get_csi2000_tickers_akshare()
+        tickers = get_constituents(POOL_SMALL_CN)
         if tickers:
             return tickers[:n]
         # 中证2000 拉取失败时：用沪深300 + 全A市值 扩充，避免仅 64 只
-        tickers = get_csi300_tickers_akshare()
+        tickers = get_constituents(POOL_CSI300)
         if tickers and len(tickers) >= n:
             return tickers[:n]
         tickers = get_cn_spot_tickers_akshare(limit=max(n, 200), sort_by="总市值")
         return (tickers[:n] if tickers else CN_CSI2000_TICKERS_FALLBACK[:n])
 
-    # A股：优先 AKShare（沪深300 或 全A按市值），再 Wikipedia，再静态
+    # A股：沪深300 成分（AKShare / Wikipedia），再全A按市值，再静态
     if market == MARKET_CN:
-        tickers = get_csi300_tickers_akshare()
+        tickers = get_constituents(POOL_CSI300)
         if tickers:
             return tickers[:n]
         tickers = get_cn_spot_tickers_akshare(limit=n, sort_by="总市值")
-        if tickers:
-            return tickers[:n]
-        tickers = get_csi300_tickers_from_web()
         return (tickers[:n] if tickers else CN_QUALITY_TICKERS_FALLBACK[:n])
     # 港股：按 pool 选择恒指或恒科
     if market == MARKET_HK:
         if pool == POOL_HK_HSTECH:
-            tickers = get_hstech_tickers_from_web()
+            tickers = get_constituents(POOL_HK_HSTECH)
             return (tickers[:n] if tickers else HK_HSTECH_TICKERS_FALLBACK[:n])
         # 恒指：pool=hsi / hangseng / sp500 / 空
-        tickers = get_hangseng_tickers_from_web()
+        tickers = get_constituents(POOL_HK_HSI)
         return (tickers[:n] if tickers else HK_QUALITY_TICKERS_FALLBACK[:n])
     # 美股大盘：limit<=10 用静态快；limit>10 拉 S&P 500 线上再按市值+增长排序
     if market == MARKET_US:
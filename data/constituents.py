@@ -0,0 +1,197 @@
+"""
+指数成分股本地快照：各选股池（S&P 500 / 纳指100 / 罗素2000 / 沪深300 / 中证2000 / 恒指 / 恒科）的成分
+按日期存为 JSON 快照，报告解析股票池时只读本地文件（毫秒级），不再每次抓 Wikipedia / Nasdaq API / AKShare。
+
+  data/constituents/<pool>/<YYYY-MM-DD>.json   {"pool", "date", "checked_at", "source", "tickers"}
+  data/constituents/<pool>/diffs.jsonl         每次成分变化一行：{"date", "prev_date", "added", "removed"}
+
+- 刷新：快照超过 CONSTITUENTS_REFRESH_SEC 未核对时，先返回旧快照，后台线程重新抓取；
+  无快照（首次）时同步抓取。抓取结果与最新快照相同则只更新 checked_at，不新增快照；
+- 历史：members_at(pool, date) 返回该日有效的成分（不晚于 date 的最近一份快照），可做时点回测；
+- 写入先落临时文件再 os.replace，读者不会读到半个文件。目录可用环境变量 CONSTITUENTS_DIR 覆盖。
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+CONSTITUENTS_DIR = Path(os.environ.get("CONSTITUENTS_DIR", "").strip() or str(_PROJECT_ROOT / "data" / "constituents"))
+# 快照核对间隔（秒）：超过后后台刷新
+CONSTITUENTS_REFRESH_SEC = int(os.environ.get("CONSTITUENTS_REFRESH_SEC", "86400").strip() or "86400")
+
+# 池 -> data.universe 中按顺序尝试的抓取函数（调用时再取，便于替换）
+_FETCHERS: Dict[str, tuple] = {
+    "sp500": ("_sp500_tickers_from_wikipedia",),
+    "nasdaq100": ("get_nasdaq100_tickers_from_web",),
+    "russell2000": ("get_russell2000_tickers_from_web",),
+    "csi300": ("get_csi300_tickers_akshare", "get_csi300_tickers_from_web"),
+    "csi2000": ("get_csi2000_tickers_akshare",),
+    "hsi": ("get_hangseng_tickers_from_web",),
+    "hstech": ("get_hstech_tickers_from_web",),
+}
+
+_INFLIGHT: set = set()
+_LOCK = threading.Lock()
+
+
+def _pool_dir(pool: str) -> Path:
+    return CONSTITUENTS_DIR / pool
+
+
+def _write_json(path: Path, data: Dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.parent / f".tmp-{uuid.uuid4().hex}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def list_snapshots(pool: str) -> List[str]:
+    """该池已有快照的日期（升序）。"""
+    d = _pool_dir(pool)
+    if not d.exists():
+        return []
+    return sorted(p.stem for p in d.glob("????-??-??.json"))
+
+
+def load_snapshot(pool: str, date: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """最新快照；date（YYYY-MM-DD）给定时取不晚于该日的最近一份。没有返回 None。"""
+    dates = list_snapshots(pool)
+    if date is not None:
+        dates = [d for d in dates if d <= date]
+    for d in reversed(dates):
+        try:
+            with open(_pool_dir(pool) / f"{d}.json", encoding="utf-8") as f:
+                snap = json.load(f)
+            if snap.get("tickers"):
+                return {**snap, "date": d}  # 以文件名为准
+        except Exception:
+            continue
+    return None
+
+
+def members_at(pool: str, date: str) -> Optional[List[str]]:
+    """时点成分：date 当日有效的成分股列表。"""
+    snap = load_snapshot(pool, date)
+    return list(snap["tickers"]) if snap else None
+
+
+def load_diffs(pool: str) -> List[Dict[str, Any]]:
+    """该池历次成分变化（按记录顺序）。"""
+    path = _pool_dir(pool) / "diffs.jsonl"
+    if not path.exists():
+        return []
+    out = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    out.append(json.loads(line))
+                except ValueError:
+                    continue
+    return out
+
+
+def _fetch(pool: str) -> Optional[tuple]:
+    """按顺序调用抓取函数，返回 (tickers, 来源函数名)；全部失败返回 None。"""
+    from data import universe
+
+    for name in _FETCHERS.get(pool, ()):
+        try:
+            tickers = getattr(universe, name)()
+        except Exception as e:
+            print(f"[Constituents] {pool} {name} 失败: {e}", flush=True)
+            tickers = None
+        if tickers:
+            return list(dict.fromkeys(tickers)), name
+    return None
+
+
+def refresh(pool: str) -> Optional[List[str]]:
+    """
+    线上抓取一次并落盘：成分集合与最新快照相同（只是顺序不同，如市值排序变化）只更新 checked_at、沿用旧顺序；
+    不同则写当日快照并追加一行 diff（含本次来源）。
+    抓取失败返回 None（保留旧快照）。
+    """
+    got = _fetch(pool)
+    if got is None:
+        return None
+    tickers, source = got
+    now = time.time()
+    today = time.strftime("%Y-%m-%d", time.localtime(now))
+    prev = load_snapshot(pool)
+    if prev is not None and set(prev["tickers"]) == set(tickers):
+        _write_json(_pool_dir(pool) / f"{prev['date']}.json", {**prev, "checked_at": now, "source": source})
+        return list(prev["tickers"])
+    _write_json(
+        _pool_dir(pool) / f"{today}.json",
+        {"pool": pool, "date": today, "checked_at": now, "source": source, "tickers": tickers},
+    )
+    if prev is not None:
+        old, new = set(prev["tickers"]), set(tickers)
+        diff = {
+            "date": today,
+            "prev_date": prev["date"],
+            "source": source,
+            "added": [t for t in tickers if t not in old],
+            "removed": [t for t in prev["tickers"] if t not in new],
+        }
+        with open(_pool_dir(pool) / "diffs.jsonl", "a", encoding="utf-8") as f:
+            f.write(json.dumps(diff, ensure_ascii=False) + "\n")
+        print(f"[Constituents] {pool} 成分变化：+{len(diff['added'])} -{len(diff['removed'])}", flush=True)
+    return tickers
+
+
+def _refresh_background(pool: str) -> None:
+    with _LOCK:
+        if pool in _INFLIGHT:
+            return
+        _INFLIGHT.add(pool)
+
+    def run():
+        try:
+            refresh(pool)
+        except Exception as e:
+            print(f"[Constituents] {pool} 后台刷新失败: {e}", flush=True)
+        finally:
+            with _LOCK:
+                _INFLIGHT.discard(pool)
+
+    threading.Thread(target=run, name=f"constituents-{pool}", daemon=True).start()
+
+
+def get_constituents(
+    pool: str,
+    max_age_sec: Optional[float] = None,
+    background: bool = True,
+) -> Optional[List[str]]:
+    """
+    读本地快照；超过 max_age_sec（默认 CONSTITUENTS_REFRESH_SEC）未核对时后台刷新（background=False 则同步刷新）。
+    无快照时同步抓取；抓取也失败返回 None，由调用方回退静态列表。
+    """
+    if pool not in _FETCHERS:
+        return None
+    max_age = CONSTITUENTS_REFRESH_SEC if max_age_sec is None else max_age_sec
+    snap = load_snapshot(pool)
+    if snap is None:
+        return refresh(pool)
+    if time.time() - float(snap.get("checked_at") or 0) > max_age:
+        if background:
+            _refresh_background(pool)
+        else:
+            return refresh(pool) or list(snap["tickers"])
+    return list(snap["tickers"])
+
+
+def refresh_all(pools: Optional[Iterable[str]] = None) -> Dict[str, Optional[int]]:
+    """同步刷新多个池（预热 / 定时任务用），返回 池 -> 成分数（失败为 None）。"""
+    out: Dict[str, Optional[int]] = {}
+    for pool in pools or _FETCHERS:
+        tickers = refresh(pool)
+        out[pool] = len(tickers) if tickers else None
+    return out
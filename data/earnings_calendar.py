@@ -0,0 +1,228 @@
+"""
+持久化财报日历：按 ticker 存下次 / 最近一次财报日（data/cache.db 的 earnings_calendar 表），
+报告阶段本地读取，不再每只标的每次调用 stock.calendar / get_earnings_dates。
+
+刷新策略：
+  - 定期：每条记录 EARNINGS_CALENDAR_TTL_DAYS 天（默认 7）后到期；盘前预热 refresh_calendar() 批量刷新到期条目；
+  - 事件：已知的下次财报日过去后（+1 天）立即到期，刷新出新的「最近一次财报日」。
+
+同一份日历驱动财报相关缓存失效：financials_not_before(ticker) 返回最近一次财报发布的时间点，
+早于该时刻写入的财报缓存（utils.yf_cache.get_financials）与 LLM 财报解读缓存视为过期。
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.yf_suppress import suppress_yf_noise
+suppress_yf_noise()
+import yfinance as yf
+
+from utils import yf_cache
+
+EARNINGS_CALENDAR_TTL_DAYS = int(os.environ.get("EARNINGS_CALENDAR_TTL_DAYS", "7").strip() or "7")
+# 拉取失败时的重试间隔（秒）：保留旧数据，稍后再试
+_RETRY_SEC = 6 * 3600
+# 财报日之后多久才认为 Yahoo 财报表已更新（天）
+_FIN_LAG_DAYS = 1
+
+_DDL = """
+CREATE TABLE IF NOT EXISTS earnings_calendar (
+    ticker        TEXT PRIMARY KEY,
+    next_date     TEXT,
+    last_date     TEXT,
+    fetched_at    REAL NOT NULL,
+    refresh_after REAL NOT NULL
+);
+"""
+
+
+def _conn():
+    conn = yf_cache._get_conn()
+    conn.executescript(_DDL)
+    return conn
+
+
+def _is_cn_hk(ticker: str) -> bool:
+    t = (ticker or "").upper()
+    return ".SS" in t or ".SZ" in t or ".HK" in t
+
+
+def _to_date(v) -> Optional[date]:
+    try:
+        if isinstance(v, datetime):
+            return v.date()
+        if isinstance(v, date):
+            return v
+        if hasattr(v, "to_pydatetime"):
+            return v.to_pydatetime().date()
+        return datetime.strptime(str(v)[:10], "%Y-%m-%d").date()
+    except Exception:
+        return None
+
+
+def _date_ts(d: Optional[str]) -> Optional[float]:
+    """YYYY-MM-DD -> 当日 00:00 UTC 的时间戳。"""
+    if not d:
+        return None
+    try:
+        return datetime.strptime(d, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp()
+    except ValueError:
+        return None
+
+
+def _fetch_dates(ticker: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    从 yfinance 拉取 (下次财报日, 最近一次财报日)，格式 YYYY-MM-DD。
+    calendar 的 Earnings Date 为未来日期列表；美股再用 get_earnings_dates 补齐历史与未来日期
+    （A股/港股 Yahoo 常无财报日历，且 get_earnings_dates 会打 "may be delisted" 误导，故跳过）。
+    """
+    stock = yf.Ticker(ticker)
+    dates: List[date] = []
+    cal = getattr(stock, "calendar", None) or getattr(stock, "get_calendar", lambda: None)()
+    if isinstance(cal, dict) and cal.get("Earnings Date"):
+        ed = cal["Earnings Date"]
+        for d in ed if isinstance(ed, list) else [ed]:
+            dd = _to_date(d)
+            if dd is not None:
+                dates.append(dd)
+    if not _is_cn_hk(ticker):
+        try:
+            edf = stock.get_earnings_dates(limit=8)
+            if edf is not None and not edf.empty:
+                for idx in edf.index:
+                    dd = _to_date(idx)
+                    if dd is not None:
+                        dates.append(dd)
+        except Exception:
+            pass
+    today = date.today()
+    future = sorted(d for d in dates if d >= today)
+    past = sorted(d for d in dates if d < today)
+    next_d = future[0].strftime("%Y-%m-%d") if future else None
+    last_d = past[-1].strftime("%Y-%m-%d") if past else None
+    return next_d, last_d
+
+
+def _refresh_after(next_date: Optional[str], now: float) -> float:
+    """定期到期时间与「下次财报日 +1 天」取较早者。"""
+    due = now + EARNINGS_CALENDAR_TTL_DAYS * 86400
+    ts = _date_ts(next_date)
+    if ts is not None:
+        due = min(due, max(ts + 86400, now + 3600))
+    return due
+
+
+def _read(ticker: str) -> Optional[Tuple[Optional[str], Optional[str], float, float]]:
+    try:
+        return _conn().execute(
+            "SELECT next_date, last_date, fetched_at, refresh_after FROM earnings_calendar WHERE ticker = ?",
+            (ticker,),
+        ).fetchone()
+    except Exception:
+        return None
+
+
+def refresh_ticker(ticker: str) -> Dict[str, Optional[str]]:
+    """拉取并写入单只标的的财报日；失败时保留旧记录、_RETRY_SEC 后再试。"""
+    t = (ticker or "").upper().strip()
+    now = time.time()
+    old = _read(t)
+    try:
+        next_d, last_d = _fetch_dates(t)
+        fetched = True
+    except Exception:
+        next_d, last_d = (old[0], old[1]) if old else (None, None)
+        fetched = False
+    if fetched and old is not None and last_d is None:
+        # 部分数据源只给未来日期：沿用已知的最近一次财报日
+        last_d = old[1]
+    if fetched and old is not None and old[0] and old[0] < date.today().strftime("%Y-%m-%d"):
+        # 旧的「下次财报日」已过去，即为最近一次财报日
+        last_d = max(filter(None, [last_d, old[0]]))
+    refresh_after = _refresh_after(next_d, now) if fetched else now + _RETRY_SEC
+    try:
+        with _conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO earnings_calendar VALUES (?, ?, ?, ?, ?)",
+                (t, next_d, last_d, now if fetched else (old[2] if old else 0.0), refresh_after),
+            )
+    except Exception:
+        pass
+    return {"next_earnings": next_d, "last_earnings": last_d}
+
+
+def get_earnings(ticker: str, refresh: bool = True) -> Dict[str, Optional[str]]:
+    """
+    本地读取 {next_earnings, last_earnings}（YYYY-MM-DD 或 None）。
+    无记录或已到期且 refresh=True 时联网刷新一次；refresh=False 时只读本地。
+    """
+    t = (ticker or "").upper().strip()
+    row = _read(t)
+    if row is not None and (not refresh or time.time() < row[3]):
+        next_d = row[0]
+        if next_d and next_d < date.today().strftime("%Y-%m-%d"):
+            next_d = None
+        return {"next_earnings": next_d, "last_earnings": row[1]}
+    if not refresh:
+        return {"next_earnings": None, "last_earnings": None}
+    return refresh_ticker(t)
+
+
+def financials_not_before(ticker: str) -> Optional[float]:
+    """
+    最近一次财报发布后财报类缓存的有效起点（Unix 时间戳）：财报日 + _FIN_LAG_DAYS 天；
+    若尚未到该时刻，则取财报日当天 0 点（当天之前写入的缓存失效，之后写入的当天有效）。
+    无已知财报日返回 None。只读本地日历，不触发网络请求。
+    """
+    row = _read((ticker or "").upper().strip())
+    if row is None:
+        return None
+    ts = _date_ts(row[1])
+    if ts is None:
+        return None
+    lagged = ts + _FIN_LAG_DAYS * 86400
+    return lagged if lagged <= time.time() else ts
+
+
+def due_tickers(tickers: List[str]) -> List[str]:
+    """从 tickers 中筛出无记录或已到期的标的。"""
+    now = time.time()
+    out = []
+    for t in tickers:
+        row = _read((t or "").upper().strip())
+        if row is None or now >= row[3]:
+            out.append(t)
+    return out
+
+
+def refresh_calendar(tickers: List[str], workers: int = 8, force: bool = False) -> int:
+    """批量刷新财报日历（默认只刷新到期条目），返回实际刷新的标的数。"""
+    todo = list(tickers) if force else due_tickers(tickers)
+    if not todo:
+        return 0
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for _ in executor.map(refresh_ticker, todo):
+            pass
+    return len(todo)
+
+
+def calendar_rows(tickers: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """导出日历（调试 / 展示用）。"""
+    try:
+        conn = _conn()
+        if tickers:
+            marks = ",".join("?" for _ in tickers)
+            rows = conn.execute(
+                f"SELECT ticker, next_date, last_date, fetched_at, refresh_after FROM earnings_calendar WHERE ticker IN ({marks})",
+                [t.upper() for t in tickers],
+            ).fetchall()
+        else:
+            rows = conn.execute("SELECT ticker, next_date, last_date, fetched_at, refresh_after FROM earnings_calendar").fetchall()
+    except Exception:
+        return []
+    return [
+        {"ticker": r[0], "next_earnings": r[1], "last_earnings": r[2], "fetched_at": r[3], "refresh_after": r[4]}
+        for r in rows
+    ]
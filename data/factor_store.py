@@ -0,0 +1,283 @@
+"""
+历史日频因子库：按 (交易日, 市场) 分区的列式存储，每个分区存当日全部标的的技术指标值与定量基准
+（agents.score_baseline）技术面子项得分，用于研究各子项是否有预测力、做回测。
+
+- 目录：FACTOR_STORE_DIR（默认 data/factors）/{market}/{YYYY-MM-DD}/，
+  分区内 tickers.npy（标的）+ factors.npy（标的 × 因子 float64 矩阵，memmap 读取）+ meta.json（列名）；
+- 计算：面板引擎同口径（agents.technical_panel 的压紧 + 指标 + 背离），每日的值等于当天收盘后
+  对该标的调用 summarize_ohlcv 得到的摘要字段；历史不足 60 根的标的当日不写入；
+- 写入：backfill() 由已有日K（utils.bar_store 面板 / 任意 ticker -> DataFrame）批量回填全部交易日，
+  append_daily() 只追加最新交易日分区；已存在的分区不改写已有标的的行，只并入新标的（同市场多个选股池分别写入）；
+- 前瞻收益：分区只存当日收盘价，load_factors(forward=(1, 5, 20)) 读取时按各标的自身后续交易日的收盘价计算
+  fwd_ret_{N}d（%，多市场一起读时不受他市场交易日影响），因此追加新分区后历史行的前瞻收益自动补全，无需回写旧分区。
+
+用法：
+  from data.factor_store import backfill_from_bar_panel, load_factors
+  backfill_from_bar_panel(open_panel("1d"))
+  df = load_factors(start="2023-01-01", market="us", columns=["rsi", "sub_trend"], forward=(5, 20))
+"""
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from agents.score_baseline import technical_subscores_panel
+from agents.technical import _MIN_BARS_DAILY, detect_divergence_panel
+from agents.technical_panel import _compact, compute_panel_indicators
+from config.analysis_config import DIVERGENCE_LOOKBACK, DIVERGENCE_MIN_BARS
+
+_STORE_DIR = Path(os.environ.get("FACTOR_STORE_DIR", "").strip() or Path(__file__).parent / "factors")
+
+# 指标因子（与技术面摘要同名同口径，百分比类保留 2 位小数）
+INDICATOR_COLUMNS = [
+    "close", "ma5", "ma10", "ma20", "ma60",
+    "macd", "macd_signal", "macd_hist", "golden_cross", "above_zero",
+    "kdj_k", "kdj_d", "rsi", "bollinger_pct", "volume_ratio", "atr_pct",
+    "return_20d_pct", "return_60d_pct", "dist_to_high_pct", "long_align",
+    "div_top", "div_bottom",
+]
+SUBSCORE_COLUMNS = [
+    "sub_trend", "sub_macd", "sub_kdj", "sub_rsi", "sub_divergence",
+    "sub_volume", "sub_momentum", "sub_high", "tech_baseline",
+]
+FACTOR_COLUMNS = INDICATOR_COLUMNS + SUBSCORE_COLUMNS
+
+
+def _market_of(ticker: str) -> str:
+    t = (ticker or "").upper()
+    if t.endswith(".SS") or t.endswith(".SZ"):
+        return "cn"
+    if t.endswith(".HK"):
+        return "hk"
+    return "us"
+
+
+def _shift(a: np.ndarray, k: int) -> np.ndarray:
+    out = np.full(a.shape, np.nan)
+    out[k:] = a[:-k]
+    return out
+
+
+def compute_factor_panel(frames: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """
+    ticker -> 日K DataFrame 计算全部交易日的因子，返回 因子名 -> (日期 × 标的) DataFrame。
+    历史不足 _MIN_BARS_DAILY 根的 (日期, 标的) 为 NaN。
+    """
+    frames = {t: f for t, f in frames.items() if f is not None and "Close" in f.columns and len(f)}
+    if not frames:
+        return {}
+    fields = ["Close", "High", "Low", "Volume"]
+    wide = pd.concat({t: f.reindex(columns=fields) for t, f in frames.items()}, axis=1, sort=True)
+    m = {c: wide.xs(c, axis=1, level=1) for c in fields}
+    close = m["Close"]
+    c_df, (h_df, l_df, v_df), counts, order = _compact(close, [m["High"], m["Low"], m["Volume"]])
+    ind = {k: df.to_numpy() for k, df in compute_panel_indicators(c_df, h_df, l_df, v_df).items()}
+    c, h, v = c_df.to_numpy(), h_df.to_numpy(), v_df.to_numpy()
+    n = len(c)
+    pos = np.arange(n)[:, None] - (n - counts)[None, :] + 1  # 该标的截至本行的根数（≤0 为左侧填充）
+
+    f: Dict[str, np.ndarray] = {"close": c}
+    for w in (5, 10, 20, 60):
+        f[f"ma{w}"] = ind[f"ma{w}"]
+    macd = np.nan_to_num(ind["macd"], nan=0.0)
+    signal = np.nan_to_num(ind["macd_signal"], nan=0.0)
+    f["macd"], f["macd_signal"] = macd, signal
+    f["macd_hist"] = np.nan_to_num(ind["macd_diff"], nan=0.0)
+    f["golden_cross"] = (macd > signal) & (pos >= 2) & (_shift(macd, 1) <= _shift(signal, 1))
+    f["above_zero"] = macd > 0
+    f["kdj_k"] = np.nan_to_num(ind["stoch_k"], nan=50.0)
+    f["kdj_d"] = np.nan_to_num(ind["stoch_d"], nan=50.0)
+    f["rsi"] = np.where(pos >= 14, ind["rsi"], np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        width = ind["bb_h"] - ind["bb_l"]
+        f["bollinger_pct"] = np.where(width > 0, np.round((c - ind["bb_l"]) / width * 100, 1), np.nan)
+        vol_ma = ind["vol_ma"]
+        f["volume_ratio"] = np.where((pos >= 20) & (vol_ma > 0), np.round(v / vol_ma, 2), np.nan)
+        f["atr_pct"] = np.where(pos >= 14, np.round(ind["atr"] / c * 100, 2), np.nan)
+        c20, c60 = _shift(c, 20), _shift(c, 60)
+        f["return_20d_pct"] = np.where((pos >= 21) & (c20 > 0), np.round((c / c20 - 1) * 100, 2), np.nan)
+        f["return_60d_pct"] = np.where((pos >= 61) & (c60 > 0), np.round((c / c60 - 1) * 100, 2), np.nan)
+        hh = pd.DataFrame(h).rolling(252, min_periods=1).max().to_numpy()
+        f["dist_to_high_pct"] = np.where((pos >= 20) & (hh > 0), np.round((c / hh - 1) * 100, 2), np.nan)
+        f["long_align"] = (pos >= 60) & (c > f["ma5"]) & (f["ma5"] > f["ma10"]) & (f["ma10"] > f["ma20"]) & (f["ma20"] > f["ma60"])
+
+    # 背离：逐日用截至当日的序列整表检测（每次只看近 lookback 根）
+    div_top = np.zeros(c.shape, dtype=bool)
+    div_bottom = np.zeros(c.shape, dtype=bool)
+    rsi_raw = ind["rsi"]
+    for r in range(n):
+        cnt = np.clip(pos[r], 0, None)
+        if not (cnt >= _MIN_BARS_DAILY).any():
+            continue
+        res = detect_divergence_panel(
+            c[: r + 1], macd[: r + 1], rsi_raw[: r + 1], cnt,
+            lookback=DIVERGENCE_LOOKBACK, min_bars=DIVERGENCE_MIN_BARS,
+        )
+        div_top[r] = res["macd_top"] | res["rsi_top"]
+        div_bottom[r] = res["macd_bottom"] | res["rsi_bottom"]
+    f["div_top"], f["div_bottom"] = div_top, div_bottom
+    f.update(technical_subscores_panel(f))
+    f["rsi"] = np.round(f["rsi"], 2)  # 超买超卖按未取整值判定，与摘要一致
+
+    # 压紧坐标 -> 原日期行；历史不足的置 NaN
+    eligible = pos >= _MIN_BARS_DAILY
+    out: Dict[str, pd.DataFrame] = {}
+    for key in FACTOR_COLUMNS:
+        vals = np.where(eligible, np.asarray(f[key], dtype=float), np.nan)
+        grid = np.full(vals.shape, np.nan)
+        np.put_along_axis(grid, order, vals, axis=0)
+        out[key] = pd.DataFrame(grid, index=close.index, columns=close.columns)
+    return out
+
+
+# ---------- 分区读写 ----------
+
+
+def _partition_path(market: str, day: str) -> Path:
+    return _STORE_DIR / market / day
+
+
+def list_partitions(market: Optional[str] = None, start: Optional[str] = None, end: Optional[str] = None) -> List[Path]:
+    """列出分区目录（按日期升序），可按市场与日期区间过滤（YYYY-MM-DD，闭区间）。"""
+    if not _STORE_DIR.exists():
+        return []
+    markets = [market] if market else sorted(p.name for p in _STORE_DIR.iterdir() if p.is_dir())
+    out = []
+    for mk in markets:
+        base = _STORE_DIR / mk
+        if not base.is_dir():
+            continue
+        for p in base.iterdir():
+            if not (p / "meta.json").exists():
+                continue
+            if (start and p.name < start) or (end and p.name > end):
+                continue
+            out.append(p)
+    return sorted(out, key=lambda p: (p.name, p.parent.name))
+
+
+def _write_partition(market: str, day: str, table: pd.DataFrame) -> None:
+    """原子写入一个分区（临时目录写完后 rename）。"""
+    path = _partition_path(market, day)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix=f".{day}.", dir=path.parent))
+    try:
+        np.save(tmp / "tickers.npy", np.array(table.index, dtype=str))
+        np.save(tmp / "factors.npy", table[FACTOR_COLUMNS].to_numpy(dtype=float))
+        (tmp / "meta.json").write_text(json.dumps({"date": day, "market": market, "columns": FACTOR_COLUMNS}))
+        if path.exists():
+            shutil.rmtree(path)
+        os.replace(tmp, path)
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+
+def _write_days(panel: Dict[str, pd.DataFrame], days: Iterable[pd.Timestamp], overwrite: bool) -> int:
+    written = 0
+    stacked = pd.concat({k: df for k, df in panel.items()}, axis=1)
+    for ts in days:
+        row = stacked.loc[ts].unstack(level=0).reindex(columns=FACTOR_COLUMNS)
+        row = row[row["close"].notna()]
+        if row.empty:
+            continue
+        day = pd.Timestamp(ts).strftime("%Y-%m-%d")
+        for market, table in row.groupby(row.index.map(_market_of)):
+            if not overwrite and (_partition_path(market, day) / "meta.json").exists():
+                # 同市场多个选股池同日写入：已有标的的行不改写，只并入新标的
+                existing = _read_partition(_partition_path(market, day))
+                table = table[~table.index.isin(existing.index)]
+                if table.empty:
+                    continue
+                table = pd.concat([existing, table])
+            _write_partition(market, day, table.sort_index())
+            written += 1
+    return written
+
+
+def _read_partition(path: Path) -> pd.DataFrame:
+    """读整个分区为 标的 × FACTOR_COLUMNS 表（旧分区缺的列为 NaN）。"""
+    meta = json.loads((path / "meta.json").read_text())
+    names = np.load(path / "tickers.npy")
+    mat = np.asarray(np.load(path / "factors.npy", mmap_mode="r"))
+    return pd.DataFrame(mat, index=pd.Index(names, dtype=object), columns=meta["columns"]).reindex(columns=FACTOR_COLUMNS)
+
+
+def backfill(frames: Dict[str, pd.DataFrame], overwrite: bool = False) -> int:
+    """由日K批量回填全部交易日分区；默认已存在的分区只并入新标的。返回写入（含合并）的分区数。"""
+    panel = compute_factor_panel(frames)
+    if not panel:
+        return 0
+    n = _write_days(panel, panel["close"].index, overwrite)
+    print(f"[FactorStore] 回填 {len(frames)} 只标的，写入 {n} 个分区", flush=True)
+    return n
+
+
+def append_daily(frames: Dict[str, pd.DataFrame]) -> int:
+    """只追加最新交易日（frames 中最后一个日期）的分区；已存在则只并入新标的。frames 需含足够历史（≥60 根）。"""
+    panel = compute_factor_panel(frames)
+    if not panel:
+        return 0
+    return _write_days(panel, panel["close"].index[-1:], overwrite=False)
+
+
+def backfill_from_bar_panel(panel, tickers: Optional[List[str]] = None, overwrite: bool = False) -> int:
+    """由 utils.bar_store 日K面板回填（不联网）。"""
+    tickers = tickers or [t for t in panel.tickers if t in panel]
+    frames = {t: panel.frame(t) for t in tickers if t in panel}
+    return backfill(frames, overwrite=overwrite)
+
+
+def load_factors(
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    market: Optional[str] = None,
+    columns: Optional[Sequence[str]] = None,
+    tickers: Optional[Sequence[str]] = None,
+    forward: Sequence[int] = (1, 5, 20),
+) -> pd.DataFrame:
+    """
+    读取因子，返回以 (date, ticker) 为索引的长表；forward 中每个 N 追加 fwd_ret_{N}d（%，按各标的后续
+    分区收盘价计算，区间末尾不足 N 个交易日的为 NaN）。前瞻收益需要 end 之后的分区时，额外读取其收盘价。
+    """
+    cols = list(columns) if columns else list(FACTOR_COLUMNS)
+    want = [c for c in cols if c in FACTOR_COLUMNS]
+    need = list(dict.fromkeys(want + (["close"] if forward else [])))
+    idx = [FACTOR_COLUMNS.index(c) for c in need]
+    tick_set = {t.upper() for t in tickers} if tickers else None
+
+    parts = []
+    paths = list_partitions(market, start, None if forward else end)
+    for p in paths:
+        meta = json.loads((p / "meta.json").read_text())
+        names = np.load(p / "tickers.npy")
+        mat = np.load(p / "factors.npy", mmap_mode="r")
+        col_idx = [meta["columns"].index(c) for c in need] if meta["columns"] != FACTOR_COLUMNS else idx
+        sel = np.isin(names, list(tick_set)) if tick_set else slice(None)
+        df = pd.DataFrame(np.asarray(mat[sel][:, col_idx]), columns=need)
+        df.insert(0, "ticker", names[sel])
+        df.insert(0, "date", pd.Timestamp(meta["date"]))
+        parts.append(df)
+    if not parts:
+        empty = pd.MultiIndex.from_arrays([[], []], names=["date", "ticker"])
+        return pd.DataFrame(columns=want, index=empty)
+    long = pd.concat(parts, ignore_index=True).set_index(["date", "ticker"]).sort_index()
+    long = long[~long.index.duplicated(keep="last")]
+
+    if forward:
+        # 各标的按自身交易日（非空收盘）往后数 k 根：跨市场读取时日期并集含他市场独有的交易日
+        closes = long["close"].dropna()
+        by_ticker = closes.groupby(level="ticker")
+        for k in forward:
+            fwd = (by_ticker.shift(-k) / closes - 1) * 100
+            long[f"fwd_ret_{k}d"] = fwd.reindex(long.index)
+        if end:
+            long = long[long.index.get_level_values("date") <= pd.Timestamp(end)]
+        if "close" not in want:
+            long = long.drop(columns="close")
+    return long
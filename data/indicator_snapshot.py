@@ -0,0 +1,259 @@
+"""
+最新技术指标快照表：每个 (ticker, interval) 一行，存最近一次计算出的技术面摘要字段
+（trend_ma / macd_summary / kdj_summary / rsi_summary / bb_summary / volume_context / momentum_summary），
+常用筛选字段展开为独立列并建索引，「哪些标的多头排列且 MACD 金叉」之类的问题变成一次 SQL 查询，
+不必对每只标的重跑 get_technical_summary。
+
+- 存储：data/cache.db 的 tech_snapshot 表（与 utils.yf_cache 同库）；
+- 刷新：面板引擎算出的摘要批量 upsert（refresh_from_frames / refresh_from_bar_panel），
+  盘前预热（data/warmup）拉完日 K 后自动刷新；数据不足（ok=False）的标的不写入、保留旧行；
+- 查询：query_snapshot(...) 按 RSI 区间、多头排列、金叉、量比、距 52 周高点、定量基准分等过滤，get_snapshot 取单行；
+- tech_baseline：写入时用 agents.score_baseline 对摘要算出的技术面定量基准分（0–100，不含估值 / 期权），供筛选排序。
+"""
+import json
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from agents.score_baseline import compute_quant_baseline
+from utils import yf_cache
+
+_SECTIONS = (
+    "trend_ma",
+    "macd_summary",
+    "kdj_summary",
+    "rsi_summary",
+    "bb_summary",
+    "volume_context",
+    "momentum_summary",
+)
+
+_DDL = """
+CREATE TABLE IF NOT EXISTS tech_snapshot (
+    ticker          TEXT NOT NULL,
+    interval        TEXT NOT NULL,
+    last_date       TEXT,
+    updated_at      REAL NOT NULL,
+    price           REAL,
+    long_align      INTEGER,
+    above_ma20      INTEGER,
+    above_ma60      INTEGER,
+    macd_above_zero INTEGER,
+    macd_golden     INTEGER,
+    kdj_k           REAL,
+    rsi             REAL,
+    volume_ratio    REAL,
+    bollinger_pct   REAL,
+    return_20d_pct  REAL,
+    return_60d_pct  REAL,
+    dist_to_high_pct REAL,
+    tech_baseline   REAL,
+    payload         TEXT NOT NULL,
+    PRIMARY KEY (ticker, interval)
+);
+CREATE INDEX IF NOT EXISTS idx_tech_snapshot_align ON tech_snapshot (interval, long_align, macd_golden);
+CREATE INDEX IF NOT EXISTS idx_tech_snapshot_rsi ON tech_snapshot (interval, rsi);
+CREATE INDEX IF NOT EXISTS idx_tech_snapshot_vol ON tech_snapshot (interval, volume_ratio);
+CREATE INDEX IF NOT EXISTS idx_tech_snapshot_high ON tech_snapshot (interval, dist_to_high_pct);
+"""
+# 旧表迁移后再建的索引
+_DDL_BASELINE = "CREATE INDEX IF NOT EXISTS idx_tech_snapshot_baseline ON tech_snapshot (interval, tech_baseline);"
+
+_COLUMNS = (
+    "ticker", "interval", "last_date", "updated_at", "price", "long_align", "above_ma20", "above_ma60",
+    "macd_above_zero", "macd_golden", "kdj_k", "rsi", "volume_ratio", "bollinger_pct",
+    "return_20d_pct", "return_60d_pct", "dist_to_high_pct", "tech_baseline", "payload",
+)
+
+
+def _conn():
+    conn = yf_cache._get_conn()
+    conn.executescript(_DDL)
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(tech_snapshot)").fetchall()}
+    if "tech_baseline" not in cols:
+        try:
+            conn.execute("ALTER TABLE tech_snapshot ADD COLUMN tech_baseline REAL")
+        except Exception:
+            pass  # 其他进程已迁移
+    conn.executescript(_DDL_BASELINE)
+    return conn
+
+
+def _json_default(o):
+    # 摘要中的比较结果多为 numpy 标量
+    if isinstance(o, np.generic):
+        return o.item()
+    raise TypeError(f"不可序列化: {type(o)}")
+
+
+def _flag(v) -> Optional[int]:
+    return None if v is None else int(bool(v))
+
+
+def _get(summary: dict, section: str, key: str):
+    return (summary.get(section) or {}).get(key)
+
+
+def _row(ticker: str, interval: str, summary: dict, now: float) -> tuple:
+    payload = {k: summary.get(k) for k in _SECTIONS}
+    return (
+        ticker.upper(),
+        interval,
+        summary.get("last_date"),
+        now,
+        _get(summary, "trend_ma", "price"),
+        _flag(summary.get("daily_long_align")),
+        _flag(_get(summary, "trend_ma", "above_ma20")),
+        _flag(_get(summary, "trend_ma", "above_ma60")),
+        _flag(_get(summary, "macd_summary", "above_zero")),
+        _flag(_get(summary, "macd_summary", "golden_cross")),
+        _get(summary, "kdj_summary", "k"),
+        _get(summary, "rsi_summary", "rsi"),
+        _get(summary, "volume_context", "volume_ratio"),
+        _get(summary, "bb_summary", "bollinger_pct"),
+        _get(summary, "momentum_summary", "return_20d_pct"),
+        _get(summary, "momentum_summary", "return_60d_pct"),
+        _get(summary, "momentum_summary", "dist_to_52w_high_pct"),
+        compute_quant_baseline(summary, {}, {})[0],
+        json.dumps(payload, ensure_ascii=False, default=_json_default),
+    )
+
+
+def upsert_summaries(summaries: Dict[str, dict], interval: str = "1d") -> int:
+    """写入 / 覆盖 ticker -> 技术面摘要；返回写入行数（ok=False 的跳过）。"""
+    now = time.time()
+    rows = [_row(t, interval, s, now) for t, s in summaries.items() if s and s.get("ok")]
+    if not rows:
+        return 0
+    marks = ",".join("?" for _ in _COLUMNS)
+    try:
+        with _conn() as conn:
+            conn.executemany(f"INSERT OR REPLACE INTO tech_snapshot ({','.join(_COLUMNS)}) VALUES ({marks})", rows)
+    except Exception as e:
+        print(f"[Snapshot] 写入失败: {e}", flush=True)
+        return 0
+    return len(rows)
+
+
+def refresh_from_frames(frames: Dict[str, pd.DataFrame], interval: str = "1d", prepost: bool = False) -> int:
+    """面板引擎批量计算 ticker -> OHLCV 的摘要并写入快照。"""
+    from agents.technical_panel import from_frames
+
+    return upsert_summaries(from_frames(frames, interval=interval, prepost=prepost), interval)
+
+
+def refresh_from_bar_panel(panel, tickers: Optional[List[str]] = None) -> int:
+    """由 utils.bar_store 面板批量计算并写入快照。"""
+    from agents.technical_panel import from_bar_panel
+
+    return upsert_summaries(from_bar_panel(panel, tickers), panel.interval)
+
+
+def _decode(row: tuple) -> Dict[str, Any]:
+    out = dict(zip(_COLUMNS, row))
+    payload = json.loads(out.pop("payload") or "{}")
+    for key in ("long_align", "above_ma20", "above_ma60", "macd_above_zero", "macd_golden"):
+        out[key] = None if out[key] is None else bool(out[key])
+    out.update(payload)
+    return out
+
+
+def get_snapshot(ticker: str, interval: str = "1d") -> Optional[Dict[str, Any]]:
+    """单只标的最新快照（含各摘要段），无记录返回 None。"""
+    try:
+        row = _conn().execute(
+            f"SELECT {','.join(_COLUMNS)} FROM tech_snapshot WHERE ticker = ? AND interval = ?",
+            ((ticker or "").upper(), interval),
+        ).fetchone()
+    except Exception:
+        return None
+    return _decode(row) if row else None
+
+
+def snapshot_filters(
+    interval: str = "1d",
+    tickers: Optional[List[str]] = None,
+    long_align: Optional[bool] = None,
+    macd_golden: Optional[bool] = None,
+    macd_above_zero: Optional[bool] = None,
+    rsi_min: Optional[float] = None,
+    rsi_max: Optional[float] = None,
+    volume_ratio_min: Optional[float] = None,
+    dist_to_high_min: Optional[float] = None,
+    dist_to_high_max: Optional[float] = None,
+    baseline_min: Optional[float] = None,
+    baseline_max: Optional[float] = None,
+    max_age_sec: Optional[float] = None,
+) -> Tuple[str, list]:
+    """query_snapshot 的过滤条件 -> (WHERE 子句, 参数)，供其他模块在 tech_snapshot 上拼查询（data/screener）。"""
+    where, params = ["interval = ?"], [interval]
+    for col, val in (("long_align", long_align), ("macd_golden", macd_golden), ("macd_above_zero", macd_above_zero)):
+        if val is not None:
+            where.append(f"{col} = ?")
+            params.append(int(bool(val)))
+    for col, op, val in (
+        ("rsi", ">=", rsi_min),
+        ("rsi", "<=", rsi_max),
+        ("volume_ratio", ">=", volume_ratio_min),
+        ("dist_to_high_pct", ">=", dist_to_high_min),
+        ("dist_to_high_pct", "<=", dist_to_high_max),
+        ("tech_baseline", ">=", baseline_min),
+        ("tech_baseline", "<=", baseline_max),
+    ):
+        if val is not None:
+            where.append(f"{col} {op} ?")
+            params.append(float(val))
+    if tickers:
+        where.append(f"ticker IN ({','.join('?' for _ in tickers)})")
+        params.extend(t.upper() for t in tickers)
+    if max_age_sec is not None:
+        where.append("updated_at >= ?")
+        params.append(time.time() - max_age_sec)
+    return " AND ".join(where), params
+
+
+def query_snapshot(
+    interval: str = "1d",
+    tickers: Optional[List[str]] = None,
+    long_align: Optional[bool] = None,
+    macd_golden: Optional[bool] = None,
+    macd_above_zero: Optional[bool] = None,
+    rsi_min: Optional[float] = None,
+    rsi_max: Optional[float] = None,
+    volume_ratio_min: Optional[float] = None,
+    dist_to_high_min: Optional[float] = None,
+    dist_to_high_max: Optional[float] = None,
+    baseline_min: Optional[float] = None,
+    baseline_max: Optional[float] = None,
+    max_age_sec: Optional[float] = None,
+    order_by: str = "ticker",
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> List[Dict[str, Any]]:
+    """
+    按条件筛选快照行（条件为 None 表示不限）。order_by 为列名，前缀 - 表示降序（如 "-volume_ratio"）。
+    dist_to_high 为距窗口最高价的百分比（≤0，-5 表示低于高点 5%）。
+    """
+    where, params = snapshot_filters(
+        interval, tickers, long_align, macd_golden, macd_above_zero, rsi_min, rsi_max, volume_ratio_min,
+        dist_to_high_min, dist_to_high_max, baseline_min, baseline_max, max_age_sec,
+    )
+    desc = order_by.startswith("-")
+    col = order_by.lstrip("-")
+    if col not in _COLUMNS or col == "payload":
+        col = "ticker"
+    sql = (
+        f"SELECT {','.join(_COLUMNS)} FROM tech_snapshot WHERE {where} "
+        f"ORDER BY {col} IS NULL, {col} {'DESC' if desc else 'ASC'}, ticker"
+    )
+    if limit is not None:
+        sql += " LIMIT ? OFFSET ?"
+        params.extend([int(limit), int(offset)])
+    try:
+        rows = _conn().execute(sql, params).fetchall()
+    except Exception as e:
+        print(f"[Snapshot] 查询失败: {e}", flush=True)
+        return []
+    return [_decode(r) for r in rows]
@@ -0,0 +1,204 @@
+"""
+分K实时盯盘：按固定间隔轮询自选股最新 K 线，用增量指标状态（agents/indicator_stream）逐根更新指标，
+重新评估规则信号；信号翻转时产生事件（由 scripts/intraday_monitor.py 推送 Webhook），
+只有信号翻转的标的才升级给 LLM 综合研判（run_full_analysis），替代每隔几分钟重跑整份报告。
+
+信号与报告 tech_levels 的入场/离场规则同一口径（阈值见 config/analysis_config）：
+  - breakout_20：收盘突破前 20 根最高价（突破近期高点）
+  - volume_breakout：突破且量比 ≥ VOLUME_BREAKOUT_RATIO（放量突破）
+  - above_ma20 / above_ma60：站上 / 跌破 MA20、MA60（减仓 / 离场参考）
+  - atr_stop：收盘跌破近 20 根最高收盘 − ATR_STOP_MULT×ATR（ATR 止损）
+  - macd_golden：MACD 位于信号线上方（金叉 / 死叉）
+首次观察到的标的只记录基线，不产生事件。
+信号只在已收盘的 K 线上评估：最后一根尚未走完时不计入（盘中形成中的 K 线会让突破 / 金叉在两轮之间来回翻转，
+每次翻转都会重复推送并升级 LLM），等它收盘后再判断。
+"""
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from agents.indicator_stream import TechnicalStream, stream_live
+from config.analysis_config import ATR_STOP_MULT, VOLUME_BREAKOUT_RATIO
+from utils.yf_cache import get_history as _get_history
+
+# 分K 默认拉取周期（与 agents.technical 一致）
+_DEFAULT_PERIOD = "5d"
+_LOOKBACK = 20
+
+# 信号 -> (变为 True 时的描述, 变为 False 时的描述)
+SIGNAL_LABELS: Dict[str, tuple] = {
+    "breakout_20": ("突破近20根高点", "回落至近20根高点下方"),
+    "volume_breakout": (f"放量突破（量比≥{VOLUME_BREAKOUT_RATIO}）", "放量突破结束"),
+    "above_ma20": ("站上MA20", "跌破MA20"),
+    "above_ma60": ("站上MA60", "跌破MA60"),
+    "atr_stop": (f"触发 {ATR_STOP_MULT}×ATR 止损", "收复 ATR 止损位"),
+    "macd_golden": ("MACD金叉", "MACD死叉"),
+}
+
+
+def _bar_length(interval: str) -> Optional[pd.Timedelta]:
+    m = re.fullmatch(r"(\d+)(m|h)", (interval or "").strip().lower())
+    if not m:
+        return None
+    return pd.Timedelta(minutes=int(m.group(1)) * (60 if m.group(2) == "h" else 1))
+
+
+def _now() -> pd.Timestamp:
+    return pd.Timestamp.now(tz="UTC")
+
+
+def last_bar_closed(index: pd.Index, interval: str) -> bool:
+    """最后一根 K 线是否已走完（开始时间 + 周期 <= 当前时间）；无时区的索引按 UTC 处理。"""
+    length = _bar_length(interval)
+    if length is None or not len(index):
+        return True
+    start = pd.Timestamp(index[-1])
+    if start.tzinfo is None:
+        start = start.tz_localize("UTC")
+    return start + length <= _now()
+
+
+def compute_signals(live: TechnicalStream) -> Dict[str, Any]:
+    """由增量状态（截至最后一根已收盘 K 线）计算信号布尔值与相关数值。"""
+    close = np.array(live.tail["close"], dtype=float)
+    high = np.array(live.tail["high"], dtype=float)
+    volume = np.array(live.tail["volume"], dtype=float)
+    last = live.last
+    price = float(close[-1])
+
+    prior_high = float(np.max(high[-_LOOKBACK - 1 : -1])) if len(high) > _LOOKBACK else float("nan")
+    vol_ma = last.get("vol_ma", float("nan"))
+    volume_ratio = float(volume[-1] / vol_ma) if vol_ma and vol_ma > 0 else None
+    atr = last.get("atr", float("nan"))
+    stop = float(np.max(close[-_LOOKBACK:])) - ATR_STOP_MULT * atr
+
+    breakout = bool(price > prior_high)
+    signals = {
+        "breakout_20": breakout,
+        "volume_breakout": breakout and volume_ratio is not None and volume_ratio >= VOLUME_BREAKOUT_RATIO,
+        "above_ma20": bool(price > last["ma20"]),
+        "above_ma60": bool(price > last["ma60"]),
+        "atr_stop": bool(price < stop),
+        "macd_golden": bool(last["macd"] > last["macd_signal"]),
+    }
+    metrics = {
+        "price": round(price, 4),
+        "volume_ratio": round(volume_ratio, 2) if volume_ratio is not None else None,
+        "resistance_20": round(prior_high, 4) if prior_high == prior_high else None,
+        "atr_stop": round(stop, 4) if stop == stop else None,
+    }
+    return {"signals": signals, "metrics": metrics}
+
+
+class IntradayMonitor:
+    """
+    盯盘器：poll_once() 轮询一遍全部标的并返回本轮事件；run() 按间隔循环。
+    escalate(ticker) 仅对本轮有信号翻转的标的调用（默认 None 不升级），返回值附在事件的 analysis 字段。
+    """
+
+    def __init__(
+        self,
+        tickers: List[str],
+        interval: str = "5m",
+        prepost: bool = False,
+        period: str = _DEFAULT_PERIOD,
+        escalate: Optional[Callable[[str], Optional[Dict[str, Any]]]] = None,
+        workers: int = 8,
+    ):
+        self.tickers = [t.strip().upper() for t in tickers if (t or "").strip()]
+        self.interval = (interval or "5m").strip().lower()
+        self.prepost = prepost
+        self.period = period
+        self.escalate = escalate
+        self.workers = max(1, workers)
+        self.state: Dict[str, Dict[str, bool]] = {}
+
+    def evaluate(self, ticker: str) -> Optional[Dict[str, Any]]:
+        """
+        拉取（缓存 / 重采样）最新 K 线并增量更新指标，返回 {signals, metrics, last_ts}（last_ts 为评估所用的
+        最后一根已收盘 K 线）；失败返回 None。
+        """
+        try:
+            hist = _get_history(ticker, period=self.period, interval=self.interval, prepost=self.prepost)
+            closed = last_bar_closed(hist.index, self.interval)
+            live = stream_live(ticker, hist, self.interval, self.prepost, self.period, include_last=closed)
+            if live is None or len(live.tail["close"]) <= _LOOKBACK:
+                return None
+            out = compute_signals(live)
+            out["last_ts"] = str(hist.index[-1 if closed else -2])
+            return out
+        except Exception as e:
+            print(f"[Monitor] {ticker} 评估失败: {e}", flush=True)
+            return None
+
+    def poll_once(self) -> List[Dict[str, Any]]:
+        """轮询一遍，返回信号翻转事件列表（按标的顺序）。"""
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results = dict(zip(self.tickers, executor.map(self.evaluate, self.tickers)))
+        events: List[Dict[str, Any]] = []
+        for ticker in self.tickers:
+            res = results.get(ticker)
+            if res is None:
+                continue
+            prev = self.state.get(ticker)
+            self.state[ticker] = res["signals"]
+            if prev is None:
+                continue
+            flips = [k for k, v in res["signals"].items() if prev.get(k) is not None and prev[k] != v]
+            if not flips:
+                continue
+            analysis = None
+            if self.escalate is not None:
+                try:
+                    analysis = self.escalate(ticker)
+                except Exception as e:
+                    print(f"[Monitor] {ticker} LLM 研判失败: {e}", flush=True)
+            for key in flips:
+                on = res["signals"][key]
+                events.append({
+                    "ticker": ticker,
+                    "signal": key,
+                    "on": on,
+                    "label": SIGNAL_LABELS[key][0 if on else 1],
+                    "interval": self.interval,
+                    "last_ts": res["last_ts"],
+                    **res["metrics"],
+                    "analysis": analysis,
+                })
+        return events
+
+    def run(
+        self,
+        poll_sec: int = 60,
+        on_events: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+        max_cycles: Optional[int] = None,
+    ) -> None:
+        """按 poll_sec 间隔循环轮询；有事件时回调 on_events。max_cycles 为 None 时一直运行。"""
+        cycle = 0
+        while max_cycles is None or cycle < max_cycles:
+            started = time.time()
+            events = self.poll_once()
+            cycle += 1
+            print(f"[Monitor] 第 {cycle} 轮：{len(self.state)}/{len(self.tickers)} 只有效，事件 {len(events)} 条", flush=True)
+            if events and on_events is not None:
+                on_events(events)
+            if max_cycles is not None and cycle >= max_cycles:
+                break
+            time.sleep(max(0.0, poll_sec - (time.time() - started)))
+
+
+def llm_escalation(interval: str, prepost: bool) -> Callable[[str], Optional[Dict[str, Any]]]:
+    """升级函数：对翻转标的跑一次综合分析，只保留推送所需字段。"""
+    from agents.full_analysis import run_full_analysis
+
+    def _escalate(ticker: str) -> Optional[Dict[str, Any]]:
+        card = run_full_analysis(ticker, interval=interval, include_prepost=prepost)
+        if not card:
+            return None
+        return {k: card.get(k) for k in ("action", "score", "core_conclusion", "score_reason") if card.get(k) is not None}
+
+    return _escalate
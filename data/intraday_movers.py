@@ -0,0 +1,238 @@
+"""
+盘中异动扫描（分K，5m / 15m）：每隔 N 分钟对整池评估一次「涨幅 + 分时量比」，新命中才推送。
+
+- 分时量比（RVOL）：今日开盘至当前时刻的累计成交量 ÷ 前 INTRADAY_RVOL_DAYS 个交易日同一时刻的累计成交量均值，
+  开盘天然放量不会被当成异动；当前 K 线可能尚未走完，量比偏保守；
+- 增量取数：K 线存于 utils.bar_store 面板（"<interval>-movers"），每轮只拉最近 2 天接到缓存后
+  （与日K全市场分段扫描共用 data.us_movers_scan._load_incremental），首次或复权变化时才拉完整 period；
+- 去重：同一标的同一交易日同一周期只推送一次，记录在 data/cache.db 的 intraday_mover_alerts 表，进程重启后仍生效；
+  只在推送成功后登记（claim），推送失败下一轮重试，--dry-run 不登记、不影响正式运行。
+"""
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from data.us_movers_scan import _load_incremental
+from utils import yf_cache
+
+# 分时量比的历史基准交易日数
+INTRADAY_RVOL_DAYS = max(1, int(os.environ.get("INTRADAY_RVOL_DAYS", "20").strip() or "20"))
+# yfinance 5m/15m 最多约 60 天；1mo 足够覆盖 20 个交易日
+_DEFAULT_PERIOD = "1mo"
+_RECENT_PERIOD = "2d"
+_MIN_HISTORY_DAYS = 5
+# 去重记录保留天数
+_ALERT_KEEP_DAYS = 7
+
+_DDL = """
+CREATE TABLE IF NOT EXISTS intraday_mover_alerts (
+    alert_key  TEXT PRIMARY KEY,
+    created_at REAL NOT NULL
+);
+"""
+
+
+def eval_intraday_mover(
+    df: pd.DataFrame,
+    *,
+    min_change_pct: float = 3.0,
+    min_rvol: float = 2.0,
+    min_avg_dollar_volume: float = 20_000_000.0,
+    require_above_prev_high: bool = False,
+    rvol_days: int = INTRADAY_RVOL_DAYS,
+) -> Optional[Dict[str, Any]]:
+    """
+    对单标的分K判断盘中异动（评估点为最后一根 K 线，时间戳为交易所当地时间）。
+
+    条件：较昨收涨幅、分时量比、前几日日均成交额（美元，由分K汇总）；可选：现价站上昨日最高价。
+    历史交易日不足 5 天返回 None。
+    """
+    if df is None or df.empty:
+        return None
+    need = ("Close", "High", "Volume")
+    if not all(c in df.columns for c in need):
+        return None
+    d = df[list(need)].apply(pd.to_numeric, errors="coerce").dropna(subset=["Close"])
+    if d.empty:
+        return None
+    idx = pd.DatetimeIndex(d.index)
+    session = idx.normalize()
+    minute = np.asarray(idx.hour * 60 + idx.minute)
+    close = d["Close"].to_numpy(dtype=float)
+    high = d["High"].to_numpy(dtype=float)
+    vol = d["Volume"].fillna(0).to_numpy(dtype=float)
+
+    today = session[-1]
+    is_today = np.asarray(session == today)
+    prior = session[~is_today].unique()[-max(1, rvol_days) :]
+    if len(prior) < _MIN_HISTORY_DAYS:
+        return None
+    in_prior = np.asarray(session.isin(prior))
+    slot = minute[-1]
+
+    cum_today = float(vol[is_today].sum())
+    at_slot = in_prior & (minute <= slot)
+    base = pd.Series(vol[at_slot]).groupby(session[at_slot]).sum().reindex(prior, fill_value=0.0).mean()
+    if not base > 0:
+        return None
+    rvol = cum_today / base
+
+    last_day = np.asarray(session == prior[-1])
+    prev_close = close[last_day][-1]
+    prev_high = float(np.nanmax(high[last_day]))
+    price = close[-1]
+    if prev_close <= 0 or price <= 0:
+        return None
+    change_pct = (price / prev_close - 1.0) * 100.0
+    avg_dollar = float(pd.Series((close * vol)[in_prior]).groupby(session[in_prior]).sum().mean())
+    above_prev_high = bool(price >= prev_high * 0.9999)
+
+    if change_pct < min_change_pct or rvol < min_rvol or avg_dollar < min_avg_dollar_volume:
+        return None
+    if require_above_prev_high and not above_prev_high:
+        return None
+    return {
+        "change_pct": round(change_pct, 2),
+        "rvol": round(rvol, 2),
+        "avg_dollar_vol": round(avg_dollar, 0),
+        "above_prev_high": above_prev_high,
+        "close": round(float(price), 4),
+        "session": f"{today:%Y-%m-%d}",
+        "bar_time": f"{idx[-1]:%H:%M}",
+    }
+
+
+def _conn():
+    conn = yf_cache._get_conn()
+    conn.executescript(_DDL)
+    return conn
+
+
+def _already_sent(keys: List[str]) -> set:
+    """已登记（推送成功过）的 key；数据库不可用时视为都未登记。"""
+    if not keys:
+        return set()
+    try:
+        rows = _conn().execute(
+            f"SELECT alert_key FROM intraday_mover_alerts WHERE alert_key IN ({','.join('?' for _ in keys)})", keys
+        ).fetchall()
+    except Exception:
+        return set()
+    return {r[0] for r in rows}
+
+
+def _claim(key: str) -> bool:
+    """登记一条提醒；已登记过（本进程或其他进程 / 之前的运行）返回 False。数据库不可用时按新提醒处理。"""
+    try:
+        with _conn() as conn:
+            cur = conn.execute("INSERT OR IGNORE INTO intraday_mover_alerts VALUES (?, ?)", (key, time.time()))
+            conn.execute(
+                "DELETE FROM intraday_mover_alerts WHERE created_at < ?", (time.time() - _ALERT_KEEP_DAYS * 86400,)
+            )
+            return cur.rowcount == 1
+    except Exception as e:
+        print(f"[IntradayMovers] 去重记录失败: {e}", flush=True)
+        return True
+
+
+class IntradayMoversScanner:
+    """
+    盘中异动扫描器：scan_once() 增量取数并评估整池，返回本交易日尚未推送过的命中（按涨幅降序，不登记）；
+    claim(rows) 在推送成功后登记去重；run() 按间隔循环。规则参数同 eval_intraday_mover。
+    """
+
+    def __init__(
+        self,
+        tickers: List[str],
+        interval: str = "5m",
+        period: str = _DEFAULT_PERIOD,
+        prepost: bool = False,
+        chunk: int = 60,
+        **rules: Any,
+    ):
+        self.tickers = list(dict.fromkeys(t.strip().upper() for t in tickers if (t or "").strip()))
+        self.interval = (interval or "5m").strip().lower()
+        self.period = period
+        self.prepost = prepost
+        self.chunk = chunk
+        self.rules = rules
+
+    def _store_interval(self) -> str:
+        # 单独命名，不与 bar_store 中普通分K面板合并；含盘前盘后的另存一份
+        return f"{self.interval}-movers{'-pp' if self.prepost else ''}"
+
+    def fetch(self) -> Dict[str, pd.DataFrame]:
+        """增量取数：每轮只拉最近 2 天接到缓存面板后。"""
+        return _load_incremental(
+            self.tickers,
+            self._store_interval(),
+            self.period,
+            self.chunk,
+            interval=self.interval,
+            recent_period=_RECENT_PERIOD,
+            max_age_sec=0,
+            prepost=self.prepost,
+        )
+
+    def scan_once(self) -> List[Dict[str, Any]]:
+        frames = self.fetch()
+        # 只评估最新交易日有 K 线的标的（停牌的不用旧 K 线报异动）
+        latest = max((f.index[-1].normalize() for f in frames.values() if len(f)), default=None)
+        rows: List[Dict[str, Any]] = []
+        for t, f in frames.items():
+            if not len(f) or f.index[-1].normalize() != latest:
+                continue
+            try:
+                m = eval_intraday_mover(f, **self.rules)
+            except Exception as e:
+                print(f"[IntradayMovers] {t} 评估失败: {e}", flush=True)
+                continue
+            if m:
+                key = f"{t}|{self.interval}|{int(self.prepost)}|{m['session']}"
+                rows.append({"ticker": t, "interval": self.interval, **m, "alert_key": key})
+        sent = _already_sent([r["alert_key"] for r in rows])
+        rows = [r for r in rows if r["alert_key"] not in sent]
+        rows.sort(key=lambda r: r["change_pct"], reverse=True)
+        return rows
+
+    @staticmethod
+    def claim(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """推送成功后登记去重，返回本次新登记的行（其他进程已抢先登记的不计）。"""
+        return [r for r in rows if _claim(r["alert_key"])]
+
+    def run(
+        self,
+        poll_sec: int = 300,
+        on_alerts: Optional[Callable[[List[Dict[str, Any]]], bool]] = None,
+        max_cycles: Optional[int] = None,
+    ) -> None:
+        """
+        按 poll_sec 间隔循环扫描；有新命中时回调 on_alerts，其返回 True（推送成功）才登记去重，
+        返回 False 或抛异常时下一轮重发。max_cycles 为 None 时一直运行。
+        """
+        cycle = 0
+        while max_cycles is None or cycle < max_cycles:
+            started = time.time()
+            try:
+                alerts = self.scan_once()
+            except Exception as e:
+                print(f"[IntradayMovers] 扫描失败: {e}", flush=True)
+                alerts = []
+            cycle += 1
+            print(
+                f"[IntradayMovers] 第 {cycle} 轮：{len(self.tickers)} 只，新命中 {len(alerts)}，"
+                f"耗时 {time.time() - started:.1f}s",
+                flush=True,
+            )
+            if alerts and on_alerts is not None:
+                try:
+                    if on_alerts(alerts):
+                        self.claim(alerts)
+                except Exception as e:
+                    print(f"[IntradayMovers] 推送失败，下一轮重试: {e}", flush=True)
+            if max_cycles is not None and cycle >= max_cycles:
+                break
+            time.sleep(max(0.0, poll_sec - (time.time() - started)))
@@ -0,0 +1,143 @@
+"""
+全市场实时行情快照（AKShare）：A股 stock_zh_a_spot_em、港股 stock_hk_spot_em 一次请求返回全市场
+最新价、涨跌幅、成交量、（A股）量比与总市值。进程内按市场缓存 MARKET_SNAPSHOT_TTL_SEC 秒，
+get_fundamental_data 对 .SS/.SZ/.HK 优先从快照取价，沪深300/中证2000 报告由逐只 yfinance 行情请求降为每周期一次。
+
+未安装 akshare 或接口失败时返回空快照（同样缓存一个周期，避免反复重试），调用方回退 yfinance。
+"""
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import pandas as pd
+
+from data.universe import _akshare_code_to_yfinance
+
+# 快照有效期（秒）：全 A 约 5000 行、分页拉取需数秒，默认 5 分钟刷新一次
+MARKET_SNAPSHOT_TTL_SEC = int(os.environ.get("MARKET_SNAPSHOT_TTL_SEC", "300").strip() or "300")
+
+# market -> (拉取时间戳, 原始 DataFrame, ticker -> quote)
+_SNAPSHOTS: Dict[str, Tuple[float, Optional[pd.DataFrame], Dict[str, Dict[str, Any]]]] = {}
+_LOCK = threading.Lock()
+
+
+def _num(v) -> Optional[float]:
+    try:
+        f = float(v)
+    except (TypeError, ValueError):
+        return None
+    return None if f != f else f
+
+
+def _hk_code_to_yfinance(code: str) -> Optional[str]:
+    """AKShare 港股 5 位代码（如 00700）转 yfinance 格式（0700.HK）。"""
+    c = "".join(str(code or "").strip().split())
+    if not c.isdigit():
+        return None
+    return str(int(c)).zfill(4) + ".HK"
+
+
+def _fetch_cn() -> Tuple[Optional[pd.DataFrame], Dict[str, Dict[str, Any]]]:
+    import akshare as ak
+    df = ak.stock_zh_a_spot_em()
+    if df is None or df.empty or "代码" not in df.columns:
+        return None, {}
+    # 只保留沪深 6 位代码（排除北交所 8 位等）
+    df = df[df["代码"].astype(str).str.match(r"^\d{6}$", na=False)].copy()
+    quotes: Dict[str, Dict[str, Any]] = {}
+    for row in df.to_dict("records"):
+        t = _akshare_code_to_yfinance(str(row.get("代码", "")).strip())
+        if not t:
+            continue
+        vol = _num(row.get("成交量"))
+        quotes[t] = {
+            "name": row.get("名称"),
+            "price": _num(row.get("最新价")),
+            "change_pct": _num(row.get("涨跌幅")),
+            # 东方财富成交量单位为「手」（100 股）
+            "volume": vol * 100 if vol is not None else None,
+            "volume_ratio": _num(row.get("量比")),
+            "market_cap": _num(row.get("总市值")),
+        }
+    return df, quotes
+
+
+def _fetch_hk() -> Tuple[Optional[pd.DataFrame], Dict[str, Dict[str, Any]]]:
+    import akshare as ak
+    df = ak.stock_hk_spot_em()
+    if df is None or df.empty or "代码" not in df.columns:
+        return None, {}
+    quotes: Dict[str, Dict[str, Any]] = {}
+    for row in df.to_dict("records"):
+        t = _hk_code_to_yfinance(row.get("代码"))
+        if not t:
+            continue
+        quotes[t] = {
+            "name": row.get("名称"),
+            "price": _num(row.get("最新价")),
+            "change_pct": _num(row.get("涨跌幅")),
+            "volume": _num(row.get("成交量")),
+            "volume_ratio": None,
+            # 港股快照不含市值，由 yfinance info 补
+            "market_cap": None,
+        }
+    return df, quotes
+
+
+_FETCHERS = {"cn": _fetch_cn, "hk": _fetch_hk}
+
+
+def _snapshot(market: str) -> Tuple[Optional[pd.DataFrame], Dict[str, Dict[str, Any]]]:
+    """取某市场快照；过期时在锁内刷新（并发调用只触发一次请求）。"""
+    now = time.time()
+    cached = _SNAPSHOTS.get(market)
+    if cached is not None and now - cached[0] < MARKET_SNAPSHOT_TTL_SEC:
+        return cached[1], cached[2]
+    with _LOCK:
+        cached = _SNAPSHOTS.get(market)
+        if cached is not None and time.time() - cached[0] < MARKET_SNAPSHOT_TTL_SEC:
+            return cached[1], cached[2]
+        try:
+            df, quotes = _FETCHERS[market]()
+        except Exception as e:
+            print(f"[Snapshot] {market} 行情快照拉取失败: {e}", flush=True)
+            df, quotes = None, {}
+        _SNAPSHOTS[market] = (time.time(), df, quotes)
+        return df, quotes
+
+
+def _market_of(ticker: str) -> Optional[str]:
+    t = (ticker or "").upper()
+    if t.endswith(".SS") or t.endswith(".SZ"):
+        return "cn"
+    if t.endswith(".HK"):
+        return "hk"
+    return None
+
+
+def get_spot_quote(ticker: str) -> Optional[Dict[str, Any]]:
+    """
+    A股/港股单只实时行情（来自全市场快照）：{name, price, change_pct, volume, volume_ratio, market_cap}。
+    非 A股/港股、快照不可用或快照中无该标的时返回 None。
+    """
+    market = _market_of(ticker)
+    if market is None:
+        return None
+    _, quotes = _snapshot(market)
+    q = quotes.get((ticker or "").upper())
+    if not q or q.get("price") is None:
+        return None
+    return q
+
+
+def get_cn_spot_table() -> Optional[pd.DataFrame]:
+    """全 A 快照原始表（沪深 6 位代码），供按市值/成交额等排序取池；不可用返回 None。"""
+    df, _ = _snapshot("cn")
+    return df
+
+
+def clear_snapshots() -> None:
+    """清空进程内快照（测试或需要强制刷新时）。"""
+    with _LOCK:
+        _SNAPSHOTS.clear()
@@ -0,0 +1,156 @@
+"""
+同行索引：从 utils/yf_cache 已缓存的 info（板块、行业、市值、国家）建内存索引，按「同行业 + 市值接近」给出 k 个最近同行，
+供深度分析 ③ 同行对比（run_peers / chain_peers）使用，分析阶段不发任何网络请求。
+
+- 建索引：一条 SQL 用 json_extract 只取四个字段（不解析整份 info），按行业 / 板块分桶；
+  非标准 JSON 的旧条目（含 NaN / Infinity，json_valid 为假）不进这条 SQL、改用 Python 解析，
+  避免一行坏数据让整条语句失败（SQLite < 3.42 的 json_extract 不接受 NaN）；
+- 查询：先在同行业桶内按 |log 市值差| 排序（国家不同加 PEER_COUNTRY_PENALTY），不足 k 只再从同板块补齐，
+  桶内通常几十只，单次查询为微秒级；
+- 刷新：info_cache 条目数或最新写入时间变化时重建，最多每 _RECHECK_SEC 秒核对一次。
+覆盖范围取决于 info 缓存：S&P 500 市值排名（data/universe.get_market_caps）与盘前预热会填充大部分美股。
+"""
+import json
+import math
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils import yf_cache
+
+PEERS_K = int(os.environ.get("PEERS_K", "8").strip() or "8")
+# 国家不同的惩罚（log 市值单位，1.0 约等于市值相差 e 倍）
+PEER_COUNTRY_PENALTY = 1.0
+_RECHECK_SEC = 300
+
+# ticker -> (sector, industry, country, log 市值或 None)
+_Profile = Tuple[str, str, str, Optional[float]]
+
+
+class PeerIndex:
+    """行业 / 板块分桶的同行索引。"""
+
+    def __init__(self, profiles: Dict[str, _Profile]):
+        self.profiles = profiles
+        self.by_industry: Dict[str, List[str]] = {}
+        self.by_sector: Dict[str, List[str]] = {}
+        for t, (sector, industry, _, _) in profiles.items():
+            if industry:
+                self.by_industry.setdefault(industry, []).append(t)
+            if sector:
+                self.by_sector.setdefault(sector, []).append(t)
+
+    def __len__(self) -> int:
+        return len(self.profiles)
+
+    def nearest(self, ticker: str, k: int = PEERS_K, profile: Optional[_Profile] = None) -> List[str]:
+        """k 个最近同行（不含自身）：同行业优先，不足再从同板块补；无行业 / 板块信息返回空列表。"""
+        ticker = ticker.upper()
+        profile = profile or self.profiles.get(ticker)
+        if profile is None:
+            return []
+        sector, industry, country, log_cap = profile
+        out: List[str] = []
+        for bucket in (self.by_industry.get(industry), self.by_sector.get(sector)):
+            if not bucket or len(out) >= k:
+                continue
+            seen = set(out)
+            cands = [t for t in bucket if t != ticker and t not in seen]
+            cands.sort(key=lambda t: (self._distance(log_cap, country, self.profiles[t]), t))
+            out.extend(cands[: k - len(out)])
+        return out
+
+    @staticmethod
+    def _distance(log_cap: Optional[float], country: str, other: _Profile) -> float:
+        if log_cap is None or other[3] is None:
+            d = math.inf
+        else:
+            d = abs(log_cap - other[3])
+        if country and other[2] and country != other[2]:
+            d += PEER_COUNTRY_PENALTY
+        return d
+
+
+def _log_cap(value: Any) -> Optional[float]:
+    try:
+        v = float(value)
+    except (TypeError, ValueError):
+        return None
+    return math.log(v) if v > 0 else None
+
+
+def profile_from_info(info: Dict[str, Any]) -> Optional[_Profile]:
+    """由单只 info 构造画像；板块与行业都缺失时返回 None。"""
+    sector = (info.get("sector") or "").strip()
+    industry = (info.get("industry") or "").strip()
+    if not sector and not industry:
+        return None
+    return sector, industry, (info.get("country") or "").strip(), _log_cap(info.get("marketCap"))
+
+
+def build_index() -> PeerIndex:
+    """从 info_cache 建索引（不看 TTL：板块 / 行业基本不变，市值只用于排序）。"""
+    profiles: Dict[str, _Profile] = {}
+    rows: list = []
+    try:
+        rows = yf_cache._get_conn().execute(
+            "SELECT ticker, json_extract(payload, '$.sector'), json_extract(payload, '$.industry'), "
+            "json_extract(payload, '$.country'), json_extract(payload, '$.marketCap'), "
+            "json_extract(payload, '$.quoteType') FROM info_cache WHERE json_valid(payload)"
+        ).fetchall()
+        # 旧条目含 NaN / Infinity（非标准 JSON）：少量，用 Python 解析
+        for ticker, payload in yf_cache._get_conn().execute(
+            "SELECT ticker, payload FROM info_cache WHERE NOT json_valid(payload)"
+        ):
+            try:
+                info = json.loads(payload)
+            except ValueError:
+                continue
+            if isinstance(info, dict):
+                rows.append((ticker, *(info.get(k) for k in ("sector", "industry", "country", "marketCap", "quoteType"))))
+    except Exception as e:
+        print(f"[PeerIndex] 读取 info 缓存失败: {e}", flush=True)
+    for ticker, sector, industry, country, mcap, quote_type in rows:
+        if quote_type and str(quote_type).upper() != "EQUITY":
+            continue
+        p = profile_from_info({"sector": sector, "industry": industry, "country": country, "marketCap": mcap})
+        if p is not None:
+            profiles[str(ticker).upper()] = p
+    return PeerIndex(profiles)
+
+
+_INDEX: Optional[PeerIndex] = None
+_SIGNATURE: Optional[tuple] = None
+_CHECKED_AT: float = 0
+_LOCK = threading.Lock()
+
+
+def _signature() -> Optional[tuple]:
+    try:
+        return tuple(yf_cache._get_conn().execute("SELECT COUNT(*), MAX(fetched_at) FROM info_cache").fetchone())
+    except Exception:
+        return None
+
+
+def get_index(force: bool = False) -> PeerIndex:
+    """当前进程的索引；info 缓存有变化时重建。"""
+    global _INDEX, _SIGNATURE, _CHECKED_AT
+    with _LOCK:
+        now = time.time()
+        if _INDEX is not None and not force and now - _CHECKED_AT < _RECHECK_SEC:
+            return _INDEX
+        sig = _signature()
+        _CHECKED_AT = now
+        if _INDEX is None or force or sig != _SIGNATURE:
+            _INDEX, _SIGNATURE = build_index(), sig
+        return _INDEX
+
+
+def nearest_peers(ticker: str, k: int = PEERS_K, info: Optional[Dict[str, Any]] = None) -> List[str]:
+    """
+    k 个同行业、市值最接近的同行代码。info 给定时以其为准（标的本身不在缓存中也可查）。
+    索引为空或无行业信息时返回空列表，由调用方回退。
+    """
+    profile = profile_from_info(info) if info else None
+    return get_index().nearest(ticker, k=k, profile=profile)
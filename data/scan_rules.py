@@ -0,0 +1,338 @@
+"""
+扫描规则 DSL：用一行表达式描述选股条件，编译一次后在整池对齐矩阵（K 线 × 标的）上向量化求值，
+例如 `pct_change(1) > 3 and volume / shift(sma(volume, 20), 1) > 1.5`。
+
+- 语法为 Python 表达式的安全子集（ast 解析，不执行任何代码）：数字、+ - * / **、比较（可连写 0 < x < 5）、and / or / not；
+- 字段：open / high / low / close / volume，bars 为截至该根的有效 K 线数（数据不足时可写 bars >= 60）；
+- 函数：pct_change([x,] n)、shift(x, n)/ref、sma、ema、std、highest、lowest（均为 (x, n) 滚动窗口）、
+  rsi([x,] n=14)、atr(n=14)、abs(x)、max(a, b)/min(a, b)（逐元素）、rank(x)（同一根 K 线上池内百分位 0–100）；
+- 窗口为整数常量；窗口内有缺失时结果为缺失，涉及缺失值的比较按「未知」处理，not 之后仍为未知，不会误命中；
+- 规则取各标的最后一根 K 线的结果；多条具名扫描共用一次面板，相同子表达式（如 sma(volume, 20)）只算一次。
+
+矩阵对齐方式与 data.us_movers_scan.eval_us_daily_movers_panel 相同（各列有效行压到底部）。
+"""
+import ast
+from typing import Callable, Dict, List, Mapping, Union
+
+import numpy as np
+import pandas as pd
+
+FIELDS = ("open", "high", "low", "close", "volume")
+
+_NEED = ["Close", "High", "Low", "Volume"]
+_NAN = float("nan")
+
+
+class ScanPanel:
+    """整池对齐后的 (K 线 × 标的) 矩阵 + 子表达式缓存；同一面板可跑任意多条规则。"""
+
+    def __init__(self, frames: Dict[str, pd.DataFrame]):
+        frames = {
+            t: f for t, f in frames.items() if f is not None and not f.empty and all(c in f.columns for c in _NEED)
+        }
+        self.tickers: List[str] = list(frames)
+        self.cache: Dict[str, np.ndarray] = {}
+        self.fields: Dict[str, np.ndarray] = {}
+        if not frames:
+            self.valid = np.zeros((0, 0), dtype=bool)
+            return
+        cols = ["Open"] + _NEED
+        wide = pd.concat({t: f.reindex(columns=cols) for t, f in frames.items()}, axis=1, sort=True)
+        mats = {c: wide.xs(c, axis=1, level=1).reindex(columns=self.tickers).to_numpy(dtype=float) for c in cols}
+        valid = ~(np.isnan(mats["Close"]) | np.isnan(mats["High"]) | np.isnan(mats["Low"]))
+        order = np.argsort(valid, axis=0, kind="stable")
+        self.valid = np.take_along_axis(valid, order, axis=0)
+        for c in cols:
+            m = np.take_along_axis(mats[c], order, axis=0)
+            if c == "Volume":
+                m = np.nan_to_num(m, nan=0.0)
+            m[~self.valid] = _NAN  # 顶部补齐行一律缺失，窗口覆盖到即为缺失
+            self.fields[c.lower()] = m
+
+    @property
+    def shape(self):
+        return self.valid.shape
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+
+# ---------- 矩阵运算 ----------
+
+
+def _as_matrix(x, p: ScanPanel) -> np.ndarray:
+    x = np.asarray(x, dtype=float)
+    return x if x.shape == p.shape else np.broadcast_to(x, p.shape).copy()
+
+
+def _rolling(x: np.ndarray, n: int, fn) -> np.ndarray:
+    out = np.full(x.shape, _NAN)
+    if len(x) >= n:
+        out[n - 1 :] = fn(np.lib.stride_tricks.sliding_window_view(x, n, axis=0))
+    return out
+
+
+def _shift(x: np.ndarray, n: int) -> np.ndarray:
+    if n == 0:
+        return x
+    out = np.full(x.shape, _NAN)
+    if n < len(x):
+        out[n:] = x[:-n]
+    return out
+
+
+def _ema(x: np.ndarray, alpha: float, min_periods: int) -> np.ndarray:
+    """逐行递推、各标的同时计算（adjust=False；前导缺失跳过，中间缺失沿用上一值）。"""
+    out = np.full(x.shape, _NAN)
+    w = np.full(x.shape[1], _NAN)
+    nobs = np.zeros(x.shape[1])
+    for i, row in enumerate(x):
+        obs = ~np.isnan(row)
+        nobs += obs
+        w = np.where(np.isnan(w), row, np.where(obs, alpha * row + (1 - alpha) * w, w))
+        out[i] = np.where(nobs >= min_periods, w, _NAN)
+    return out
+
+
+def _rsi(x: np.ndarray, n: int) -> np.ndarray:
+    d = x - _shift(x, 1)
+    gain = _ema(np.where(np.isnan(d), _NAN, np.maximum(d, 0)), 1.0 / n, n)
+    loss = _ema(np.where(np.isnan(d), _NAN, np.maximum(-d, 0)), 1.0 / n, n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = 100 - 100 / (1 + gain / loss)
+    return np.where((loss == 0) & ~np.isnan(gain), 100.0, out)
+
+
+def _atr(p: ScanPanel, n: int) -> np.ndarray:
+    h, l, c = p.fields["high"], p.fields["low"], p.fields["close"]
+    pc = _shift(c, 1)
+    tr = np.fmax(h - l, np.fmax(np.abs(h - pc), np.abs(l - pc)))  # 首根无昨收时为 high - low
+    return _ema(tr, 1.0 / n, n)
+
+
+def _rank(x: np.ndarray) -> np.ndarray:
+    return pd.DataFrame(x).rank(axis=1, pct=True).to_numpy() * 100
+
+
+def _compare(op, a, b):
+    """比较结果为 1.0 / 0.0，任一侧缺失为 NaN（未知）。"""
+    with np.errstate(invalid="ignore"):
+        return np.where(np.isnan(a) | np.isnan(b), _NAN, op(a, b).astype(float))
+
+
+def _and(a, b):
+    out = np.minimum(a, b)
+    return np.where((a == 0) | (b == 0), 0.0, out)
+
+
+def _or(a, b):
+    out = np.maximum(a, b)
+    return np.where((a == 1) | (b == 1), 1.0, out)
+
+
+# ---------- 编译 ----------
+
+_BINOPS = {ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply, ast.Div: np.divide, ast.Pow: np.power}
+_CMPOPS = {
+    ast.Gt: np.greater,
+    ast.GtE: np.greater_equal,
+    ast.Lt: np.less,
+    ast.LtE: np.less_equal,
+    ast.Eq: np.equal,
+    ast.NotEq: np.not_equal,
+}
+_WINDOW_FUNCS = {
+    "sma": lambda x, n: _rolling(x, n, lambda w: w.mean(axis=-1)),
+    "std": lambda x, n: _rolling(x, n, lambda w: w.std(axis=-1, ddof=1)),
+    "highest": lambda x, n: _rolling(x, n, lambda w: w.max(axis=-1)),
+    "lowest": lambda x, n: _rolling(x, n, lambda w: w.min(axis=-1)),
+    "ema": lambda x, n: _ema(x, 2.0 / (n + 1), n),
+    "shift": _shift,
+    "ref": _shift,
+}
+
+Node = Callable[[ScanPanel], np.ndarray]
+
+
+def _int_arg(node: ast.AST, func: str, minimum: int = 1) -> int:
+    if not (isinstance(node, ast.Constant) and isinstance(node.value, int) and not isinstance(node.value, bool)):
+        raise ValueError(f"{func} 的窗口参数须为整数常量")
+    if node.value < minimum:
+        raise ValueError(f"{func} 的窗口参数须 >= {minimum}")
+    return node.value
+
+
+def _memo(key: str, fn: Node) -> Node:
+    def run(p: ScanPanel):
+        hit = p.cache.get(key)
+        if hit is None:
+            hit = p.cache[key] = fn(p)
+        return hit
+
+    return run
+
+
+def _compile_call(node: ast.Call) -> Node:
+    if not isinstance(node.func, ast.Name) or node.keywords:
+        raise ValueError("仅支持按位置传参的内置函数调用")
+    name, args = node.func.id, node.args
+    close: Node = lambda p: p.fields["close"]
+
+    if name in _WINDOW_FUNCS:
+        if len(args) != 2:
+            raise ValueError(f"{name}(x, n) 需要 2 个参数")
+        x, n = _compile(args[0]), _int_arg(args[1], name, 0 if name in ("shift", "ref") else 1)
+        fn = _WINDOW_FUNCS[name]
+        return lambda p: fn(_as_matrix(x(p), p), n)
+    if name in ("pct_change", "rsi"):
+        if len(args) > 2:
+            raise ValueError(f"{name}([x,] n) 最多 2 个参数")
+        x = _compile(args[0]) if len(args) == 2 else close
+        default = 1 if name == "pct_change" else 14
+        n = _int_arg(args[-1], name) if args else default
+        if name == "rsi":
+            return lambda p: _rsi(_as_matrix(x(p), p), n)
+
+        def pct(p):
+            v = _as_matrix(x(p), p)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                return (v / _shift(v, n) - 1.0) * 100.0
+
+        return pct
+    if name == "atr":
+        if len(args) > 1:
+            raise ValueError("atr(n) 只有 1 个参数")
+        n = _int_arg(args[0], name) if args else 14
+        return lambda p: _atr(p, n)
+    if name in ("abs", "rank"):
+        if len(args) != 1:
+            raise ValueError(f"{name}(x) 需要 1 个参数")
+        x = _compile(args[0])
+        if name == "abs":
+            return lambda p: np.abs(x(p))
+        return lambda p: _rank(_as_matrix(x(p), p))
+    if name in ("max", "min"):
+        if len(args) != 2:
+            raise ValueError(f"{name}(a, b) 需要 2 个参数")
+        a, b = _compile(args[0]), _compile(args[1])
+        op = np.maximum if name == "max" else np.minimum
+        return lambda p: op(a(p), b(p))
+    raise ValueError(f"不支持的函数: {name}")
+
+
+def _compile(node: ast.AST) -> Node:
+    key = ast.dump(node)
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise ValueError(f"不支持的常量: {node.value!r}")
+        value = float(node.value)
+        return lambda p: value
+    if isinstance(node, ast.Name):
+        if node.id == "bars":
+            return _memo(key, lambda p: np.where(p.valid, np.cumsum(p.valid, axis=0), _NAN))
+        if node.id not in FIELDS:
+            raise ValueError(f"未知字段: {node.id}（可用 {', '.join(FIELDS)}, bars）")
+        field = node.id
+        return lambda p: p.fields[field]
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINOPS:
+        a, b, op = _compile(node.left), _compile(node.right), _BINOPS[type(node.op)]
+
+        def binop(p):
+            with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+                return op(a(p), b(p))
+
+        return _memo(key, binop)
+    if isinstance(node, ast.UnaryOp):
+        x = _compile(node.operand)
+        if isinstance(node.op, ast.USub):
+            return _memo(key, lambda p: -x(p))
+        if isinstance(node.op, ast.UAdd):
+            return x
+        if isinstance(node.op, ast.Not):
+            return _memo(key, lambda p: 1.0 - x(p))
+    if isinstance(node, ast.Compare):
+        if not all(type(op) in _CMPOPS for op in node.ops):
+            raise ValueError("仅支持 > >= < <= == != 比较")
+        operands = [_compile(n) for n in [node.left, *node.comparators]]
+        ops = [_CMPOPS[type(op)] for op in node.ops]
+
+        def compare(p):
+            vals = [f(p) for f in operands]
+            out = _compare(ops[0], vals[0], vals[1])
+            for i in range(1, len(ops)):
+                out = _and(out, _compare(ops[i], vals[i], vals[i + 1]))
+            return out
+
+        return _memo(key, compare)
+    if isinstance(node, ast.BoolOp):
+        parts = [_compile(v) for v in node.values]
+        combine = _and if isinstance(node.op, ast.And) else _or
+
+        def boolop(p):
+            out = parts[0](p)
+            for f in parts[1:]:
+                out = combine(out, f(p))
+            return out
+
+        return _memo(key, boolop)
+    if isinstance(node, ast.Call):
+        return _memo(key, _compile_call(node))
+    raise ValueError(f"不支持的语法: {type(node).__name__}")
+
+
+def _is_condition(node: ast.AST) -> bool:
+    if isinstance(node, (ast.Compare, ast.BoolOp)):
+        return True
+    return isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not) and _is_condition(node.operand)
+
+
+class ScanRule:
+    """编译后的规则：evaluate(panel) 返回各标的最后一根 K 线是否命中（bool 数组，顺序同 panel.tickers）。"""
+
+    def __init__(self, expr: str, fn: Node):
+        self.expr = expr
+        self._fn = fn
+
+    def evaluate(self, panel: ScanPanel) -> np.ndarray:
+        if not len(panel) or not panel.shape[0]:
+            return np.zeros(len(panel), dtype=bool)
+        res = _as_matrix(self._fn(panel), panel)
+        return res[-1] == 1.0
+
+    def __repr__(self) -> str:
+        return f"ScanRule({self.expr!r})"
+
+
+def compile_rule(expr: str) -> ScanRule:
+    """解析并编译一条规则；语法或函数不支持时抛 ValueError。"""
+    text = (expr or "").strip()
+    if not text:
+        raise ValueError("扫描规则为空")
+    try:
+        tree = ast.parse(text, mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"扫描规则语法错误: {e.msg}") from None
+    if not _is_condition(tree.body):
+        raise ValueError("扫描规则须为条件表达式（比较 / and / or / not）")
+    for n in ast.walk(tree.body):
+        if isinstance(n, ast.BoolOp) and not isinstance(n.op, (ast.And, ast.Or)):
+            raise ValueError("不支持的逻辑运算")
+    return ScanRule(text, _compile(tree.body))
+
+
+def run_scans(
+    frames: Union[Dict[str, pd.DataFrame], ScanPanel],
+    scans: Mapping[str, Union[str, ScanRule]],
+) -> Dict[str, List[str]]:
+    """
+    多条具名规则在同一面板上一次求值，返回 名称 -> 命中 ticker 列表（按 frames 顺序）。
+    frames 可直接传已建好的 ScanPanel 以复用其子表达式缓存。
+    """
+    panel = frames if isinstance(frames, ScanPanel) else ScanPanel(frames)
+    out: Dict[str, List[str]] = {}
+    for name, rule in scans.items():
+        if not isinstance(rule, ScanRule):
+            rule = compile_rule(rule)
+        hit = rule.evaluate(panel)
+        out[name] = [panel.tickers[j] for j in np.flatnonzero(hit)]
+    return out
@@ -0,0 +1,132 @@
+"""
+条件选股：在已落盘的技术指标快照（data/indicator_snapshot 的 tech_snapshot）与 info 缓存（utils/yf_cache 的 info_cache）上
+按条件过滤、排序、分页，不拉行情、不调 LLM，单次查询几十毫秒，供生成报告前交互式挑选标的（GET /screen）。
+
+- 股票池：tickers 显式给定，或按 market + pool 取指数成分本地快照（data/constituents，全部成分，不截断）；
+  只读本地，不联网：池没有本地快照时返回空结果并附 note（先跑盘前预热或生成一次该池报告）；
+- 技术条件：RSI 区间、多头排列、MACD 金叉、量比、距 52 周高点、技术面定量基准分（均在 tech_snapshot 建有索引）；
+- 估值条件：PE（trailingPE）区间，与 tech_snapshot 同库 LEFT JOIN info_cache 用 json_extract 取字段；
+  无 info 缓存、PE 为空或 payload 非标准 JSON（含 NaN，json_valid 为假）的标的在设置 PE 条件时被排除；
+- 结果：{"total", "page", "page_size", "items", "elapsed_ms"[, "note"]}，total 为过滤后总数（同一条 SQL 的窗口计数）；
+  查询失败抛 ScreenError（接口返回 500），不伪装成「无匹配」。
+"""
+import time
+from typing import Any, Dict, List, Optional
+
+from config.tickers import MARKET_CN, MARKET_HK, MARKET_US, POOL_CSI300, POOL_HK_HSI, POOL_LARGE
+from data.constituents import load_snapshot
+from data.indicator_snapshot import _conn, snapshot_filters
+
+# 结果行的列（快照列 + info 字段），sort 只接受这些
+_SNAPSHOT_COLUMNS = (
+    "ticker", "last_date", "updated_at", "price", "long_align", "macd_golden", "macd_above_zero",
+    "kdj_k", "rsi", "volume_ratio", "bollinger_pct", "return_20d_pct", "return_60d_pct",
+    "dist_to_high_pct", "tech_baseline",
+)
+_ITEM_COLUMNS = _SNAPSHOT_COLUMNS + ("pe", "forward_pe", "market_cap", "name")
+_BOOL_COLUMNS = ("long_align", "macd_golden", "macd_above_zero")
+_DEFAULT_POOL = {MARKET_US: POOL_LARGE, MARKET_CN: POOL_CSI300, MARKET_HK: POOL_HK_HSI}
+MAX_PAGE_SIZE = 200
+
+
+class ScreenError(RuntimeError):
+    """筛选查询失败（数据库错误等）。"""
+
+
+def _resolve_pool(market: str, pool: Optional[str]) -> str:
+    market = (market or MARKET_US).strip().lower()
+    return (pool or "").strip().lower() or _DEFAULT_POOL.get(market, POOL_LARGE)
+
+
+def pool_tickers(market: str = MARKET_US, pool: Optional[str] = None) -> Optional[List[str]]:
+    """选股池全部成分，只读本地成分快照（不联网、不触发刷新）；没有快照返回 None。"""
+    snap = load_snapshot(_resolve_pool(market, pool))
+    return list(snap["tickers"]) if snap else None
+
+
+def screen(
+    tickers: Optional[List[str]] = None,
+    market: str = MARKET_US,
+    pool: Optional[str] = None,
+    interval: str = "1d",
+    long_align: Optional[bool] = None,
+    macd_golden: Optional[bool] = None,
+    rsi_min: Optional[float] = None,
+    rsi_max: Optional[float] = None,
+    volume_ratio_min: Optional[float] = None,
+    dist_to_high_min: Optional[float] = None,
+    dist_to_high_max: Optional[float] = None,
+    baseline_min: Optional[float] = None,
+    baseline_max: Optional[float] = None,
+    pe_min: Optional[float] = None,
+    pe_max: Optional[float] = None,
+    max_age_sec: Optional[float] = None,
+    sort: str = "-tech_baseline",
+    page: int = 1,
+    page_size: int = 50,
+) -> Dict[str, Any]:
+    """
+    条件为 None 表示不限；sort 为结果列名，前缀 - 表示降序（空值排最后，同值按代码）。
+    page 从 1 开始，page_size 上限 MAX_PAGE_SIZE。查询失败抛 ScreenError。
+    """
+    started = time.perf_counter()
+    universe = [t.upper() for t in tickers] if tickers else pool_tickers(market, pool)
+    page = max(1, int(page))
+    page_size = max(1, min(int(page_size), MAX_PAGE_SIZE))
+    out: Dict[str, Any] = {"total": 0, "page": page, "page_size": page_size, "items": []}
+    if not universe:
+        if universe is None:
+            out["note"] = f"选股池 {_resolve_pool(market, pool)} 无本地成分快照（先运行盘前预热或生成一次该池报告）"
+        out["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return out
+
+    where, params = snapshot_filters(
+        interval, universe, long_align=long_align, macd_golden=macd_golden, rsi_min=rsi_min, rsi_max=rsi_max,
+        volume_ratio_min=volume_ratio_min, dist_to_high_min=dist_to_high_min, dist_to_high_max=dist_to_high_max,
+        baseline_min=baseline_min, baseline_max=baseline_max, max_age_sec=max_age_sec,
+    )
+    outer, outer_params = [], []
+    for op, val in ((">=", pe_min), ("<=", pe_max)):
+        if val is not None:
+            outer.append(f"pe {op} ?")
+            outer_params.append(float(val))
+    desc = sort.startswith("-")
+    col = sort.lstrip("-")
+    if col not in _ITEM_COLUMNS:
+        col = "ticker"
+    snap_cols = ",".join(f"s.{c}" for c in _SNAPSHOT_COLUMNS)
+    base = (
+        f"SELECT * FROM (SELECT {snap_cols}, "
+        "json_extract(i.payload, '$.trailingPE') AS pe, json_extract(i.payload, '$.forwardPE') AS forward_pe, "
+        "json_extract(i.payload, '$.marketCap') AS market_cap, "
+        "COALESCE(json_extract(i.payload, '$.shortName'), json_extract(i.payload, '$.longName')) AS name "
+        f"FROM (SELECT * FROM tech_snapshot WHERE {where}) s LEFT JOIN info_cache i ON i.ticker = s.ticker AND json_valid(i.payload)) "
+        f"{'WHERE ' + ' AND '.join(outer) if outer else ''}"
+    )
+    params += outer_params
+    sql = (
+        f"SELECT *, COUNT(*) OVER () FROM ({base}) "
+        f"ORDER BY {col} IS NULL, {col} {'DESC' if desc else 'ASC'}, ticker LIMIT ? OFFSET ?"
+    )
+    try:
+        rows = _conn().execute(sql, params + [page_size, (page - 1) * page_size]).fetchall()
+    except Exception as e:
+        print(f"[Screener] 查询失败: {e}", flush=True)
+        raise ScreenError(f"筛选查询失败: {e}") from e
+    items = []
+    for r in rows:
+        item = dict(zip(_ITEM_COLUMNS, r[:-1]))
+        for key in _BOOL_COLUMNS:
+            item[key] = None if item[key] is None else bool(item[key])
+        items.append(item)
+    if rows:
+        out["total"] = int(rows[0][-1])
+    elif page > 1:
+        # 超出末页：仍返回总数
+        try:
+            out["total"] = int(_conn().execute(f"SELECT COUNT(*) FROM ({base})", params).fetchone()[0])
+        except Exception as e:
+            raise ScreenError(f"筛选查询失败: {e}") from e
+    out["items"] = items
+    out["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return out
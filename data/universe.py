@@ -6,21 +6,141 @@
 quoteSummary/topHoldings 仅含约 10 只重仓。完整列表优先使用指数编制方 Nasdaq 官网
 api.nasdaq.com（股票代码与 Yahoo/yfinance 一致），失败再回退 Wikipedia。
 """
+import json
+import os
+import re
 import time
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
 
 import pandas as pd
-import requests
-from config.yf_suppress import suppress_yf_noise
 from config.delisted import DELISTED_TICKERS
-suppress_yf_noise()
-import yfinance as yf
+
+from utils.bar_store import frames_from_store
+from utils import yf_cache
+from utils.bulk_download import bulk_download
+from utils.http_session import get_session
 
 
 def _filter_delisted(tickers: List[str]) -> List[str]:
     return [t for t in tickers if t not in DELISTED_TICKERS]
 
 
+# ---------- 跨进程共享缓存（data/cache.db）：排序后的股票池、全市场代码目录按天有效，所有进程共用 ----------
+
+UNIVERSE_CACHE_TTL_SEC = int(os.environ.get("UNIVERSE_CACHE_TTL_SEC", "86400").strip() or "86400")
+# 计算租约：同一时刻只有一个进程在算，其余等待其结果；持有者崩溃时租约到期后由他人接手
+_LEASE_SEC = 900
+_LEASE_WAIT_SEC = 180
+
+_UNIVERSE_DDL = """
+CREATE TABLE IF NOT EXISTS universe_cache (
+    cache_key   TEXT PRIMARY KEY,
+    computed_at REAL NOT NULL,
+    payload     TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS universe_lease (
+    cache_key  TEXT PRIMARY KEY,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS market_cap_cache (
+    ticker     TEXT PRIMARY KEY,
+    fetched_at REAL NOT NULL,
+    market_cap REAL
+);
+"""
+
+
+def _conn():
+    conn = yf_cache._get_conn()
+    conn.executescript(_UNIVERSE_DDL)
+    return conn
+
+
+def _read_shared(key: str, ttl: float) -> Optional[List[str]]:
+    try:
+        row = _conn().execute("SELECT computed_at, payload FROM universe_cache WHERE cache_key = ?", (key,)).fetchone()
+        if row is not None and time.time() - row[0] < ttl:
+            value = json.loads(row[1])
+            if isinstance(value, list) and value:
+                return value
+    except Exception:
+        pass
+    return None
+
+
+def _write_shared(key: str, value: List[str]) -> None:
+    try:
+        with _conn() as conn:
+            conn.execute("INSERT OR REPLACE INTO universe_cache VALUES (?, ?, ?)", (key, time.time(), json.dumps(value)))
+    except Exception as e:
+        print(f"[Universe] 写入共享缓存失败 {key}: {e}", flush=True)
+
+
+def _acquire_lease(key: str) -> bool:
+    """抢计算租约（单条事务：清过期 + 插入）；数据库不可用时视为抢到，本进程自行计算。"""
+    now = time.time()
+    try:
+        with _conn() as conn:
+            conn.execute("DELETE FROM universe_lease WHERE cache_key = ? AND expires_at < ?", (key, now))
+            cur = conn.execute("INSERT OR IGNORE INTO universe_lease VALUES (?, ?)", (key, now + _LEASE_SEC))
+            return cur.rowcount == 1
+    except Exception:
+        return True
+
+
+def _release_lease(key: str) -> None:
+    try:
+        with _conn() as conn:
+            conn.execute("DELETE FROM universe_lease WHERE cache_key = ?", (key,))
+    except Exception:
+        pass
+
+
+def _shared_cached(
+    key: str,
+    compute: Callable[[], Optional[List[str]]],
+    ttl: float = UNIVERSE_CACHE_TTL_SEC,
+) -> Optional[List[str]]:
+    """
+    读共享缓存，未命中时抢租约计算并写回；其他进程正在计算时轮询等待其结果（超时则自行计算）。
+    compute 返回空视为失败，不写缓存。
+    """
+    hit = _read_shared(key, ttl)
+    if hit is not None:
+        return hit
+    if not _acquire_lease(key):
+        deadline = time.time() + _LEASE_WAIT_SEC
+        while time.time() < deadline:
+            time.sleep(1.0)
+            hit = _read_shared(key, ttl)
+            if hit is not None:
+                return hit
+            if _acquire_lease(key):
+                break  # 持有者已放弃（计算失败 / 进程退出）
+        else:
+            return compute()
+    try:
+        value = compute()
+        if value:
+            _write_shared(key, value)
+        return value
+    finally:
+        _release_lease(key)
+
+
+def clear_universe_cache(key: Optional[str] = None) -> None:
+    """清除共享缓存（key 为空时全部），下次调用重新计算。"""
+    try:
+        with _conn() as conn:
+            if key is None:
+                conn.execute("DELETE FROM universe_cache")
+            else:
+                conn.execute("DELETE FROM universe_cache WHERE cache_key = ?", (key,))
+    except Exception:
+        pass
+
+
 # ---------- 线上成分股拉取（指数编制方 / Wikipedia 等），失败则返回 None，由调用方回退静态列表 ----------
 
 
@@ -64,7 +184,7 @@ def get_nasdaq100_tickers_from_nasdaq_api() -> Optional[List[str]]:
             "Accept-Language": "en-US,en;q=0.9",
             "Referer": "https://www.nasdaq.com/",
         }
-        resp = requests.get(url, headers=headers, timeout=30)
+        resp = get_session().get(url, headers=headers, timeout=30)
         resp.raise_for_status()
         body = resp.json()
         rows = body.get("data", {}).get("data", {}).get("rows")
@@ -266,16 +386,12 @@ def get_csi2000_tickers_akshare() -> Optional[List[str]]:
 
 
 def get_cn_spot_tickers_akshare(limit: int = 300, sort_by: str = "总市值") -> Optional[List[str]]:
-    """用 AKShare 拉取全 A 实时行情，按 sort_by 排序取前 limit 只（yfinance 格式）。"""
+    """用 AKShare 拉取全 A 实时行情（与 get_fundamental_data 共用 data.market_snapshot 快照），按 sort_by 排序取前 limit 只（yfinance 格式）。"""
     try:
-        import akshare as ak
-        df = ak.stock_zh_a_spot_em()
+        from data.market_snapshot import get_cn_spot_table
+        df = get_cn_spot_table()
         if df is None or df.empty:
             return None
-        if "代码" not in df.columns:
-            return None
-        # 只保留沪深 6 位代码（排除北交所 8 位等）
-        df = df[df["代码"].astype(str).str.match(r"^\d{6}$", na=False)].copy()
         if sort_by in df.columns:
             df = df.sort_values(sort_by, ascending=False, na_position="last")
         out = []
@@ -353,25 +469,83 @@ def get_russell2000_tickers_from_web() -> Optional[List[str]]:
         pass
     return None
 
-# 内存缓存：避免每次 /report 都拉 Wikipedia + 批量行情（缓存整份排序列表，取前 n 只）
-_CACHE: Optional[List[str]] = None
-_CACHE_TS: float = 0
-_CACHE_TTL_SEC = 86400  # 1 天
-# 拉取时一次算出的池大小（按市值+增长排序后缓存）
-_POOL_SIZE = 200
+# ---------- 美股全市场（Nasdaq Trader 代码目录：纳斯达克 + NYSE/NYSE American/Arca/Cboe 等） ----------
+
+_US_SYMBOL_DIRECTORY = (
+    ("https://www.nasdaqtrader.com/dynamic/SymDir/nasdaqlisted.txt", "Symbol"),
+    ("https://www.nasdaqtrader.com/dynamic/SymDir/otherlisted.txt", "ACT Symbol"),
+)
+# 非普通股：权证、单位、权利、优先股、债券 / 票据
+_US_NON_COMMON = re.compile(r"\b(warrants?|units?|rights?|preferred|notes|debentures?|depositary shares? representing)\b|%", re.I)
+
+
+def _parse_symbol_directory(text: str, symbol_col: str) -> List[str]:
+    """解析 Nasdaq Trader 管道分隔代码目录，只保留普通股（非 ETF、非测试代码），代码转为 yfinance 格式。"""
+    lines = [ln for ln in (text or "").splitlines() if ln and not ln.startswith("File Creation Time")]
+    if len(lines) < 2:
+        return []
+    header = lines[0].split("|")
+    out: List[str] = []
+    for ln in lines[1:]:
+        row = dict(zip(header, ln.split("|")))
+        sym = (row.get(symbol_col) or "").strip().upper()
+        if not sym or row.get("ETF") == "Y" or row.get("Test Issue") == "Y":
+            continue
+        if any(ch in sym for ch in "$^+=") or _US_NON_COMMON.search(row.get("Security Name") or ""):
+            continue
+        sym = sym.replace(".", "-")
+        if 1 <= len(sym) <= 6:
+            out.append(sym)
+    return out
 
 
-def _get_sp500_tickers() -> List[str]:
-    """从 Wikipedia 拉取 S&P 500 成分，失败时退回内置列表（多行业覆盖）。"""
+def get_us_listed_common_stocks() -> Optional[List[str]]:
+    """
+    美股全部上市普通股（数千只，按代码排序），供全市场异动扫描。
+    源为 Nasdaq Trader 每日更新的代码目录；跨进程共享缓存 1 天，失败返回 None。
+    """
+    return _shared_cached("us_listed", _fetch_us_listed)
+
+
+def _fetch_us_listed() -> Optional[List[str]]:
+    symbols: set = set()
+    for url, col in _US_SYMBOL_DIRECTORY:
+        try:
+            resp = get_session().get(url, timeout=30)
+            resp.raise_for_status()
+            symbols.update(_parse_symbol_directory(resp.text, col))
+        except Exception as e:
+            print(f"[Universe] 美股代码目录拉取失败 {url}: {e}", flush=True)
+            return None
+    out = sorted(_filter_delisted(list(symbols)))
+    return out if len(out) >= 1000 else None
+
+
+# 市值持久化在 data/cache.db 的 market_cap_cache 表（按日有效），并发拉取 info 的线程数
+MARKET_CAP_TTL_SEC = int(os.environ.get("MARKET_CAP_TTL_SEC", "86400").strip() or "86400")
+MARKET_CAP_WORKERS = max(1, int(os.environ.get("MARKET_CAP_WORKERS", "8").strip() or "8"))
+
+def _sp500_tickers_from_wikipedia() -> Optional[List[str]]:
+    """从 Wikipedia 拉取 S&P 500 成分，失败返回 None。"""
     try:
         url = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
         tables = pd.read_html(url)
         df = tables[0]
         # 股票代码：Yahoo 用 - 代替 .；过滤已退市
         symbols = df["Symbol"].astype(str).str.replace(".", "-", regex=False).tolist()
-        return _filter_delisted([s for s in symbols if s and len(s) <= 6])
+        out = _filter_delisted([s for s in symbols if s and len(s) <= 6])
+        return out if len(out) >= 400 else None
     except Exception:
-        pass
+        return None
+
+
+def _get_sp500_tickers() -> List[str]:
+    """S&P 500 成分（本地快照，见 data/constituents），无快照且拉取失败时退回内置列表（多行业覆盖）。"""
+    from data.constituents import get_constituents
+
+    tickers = get_constituents("sp500")
+    if tickers:
+        return _filter_delisted(tickers)
     # 退回：多行业常见标的（科技/消费/医药/金融/工业等）
     return [
         "AAPL", "MSFT", "GOOGL", "AMZN", "NVDA", "META", "TSLA", "BRK-B", "JPM", "V",
@@ -390,87 +564,123 @@ def _get_sp500_tickers() -> List[str]:
 
 
 def _batch_returns(tickers: List[str], period: str = "1mo") -> dict:
-    """批量拉取近期涨跌幅（日 K 维度）。"""
+    """批量拉取近期涨跌幅（日 K 维度）。优先读 utils.bar_store 面板，未命中则并发分块下载（utils.bulk_download）并写回面板。"""
     if not tickers:
         return {}
     out = {}
     try:
-        data = yf.download(
-            tickers, period=period, interval="1d", auto_adjust=True,
-            threads=True, progress=False, ignore_tz=True, group_by="ticker"
-        )
+        cached = frames_from_store(tickers, period=period, interval="1d")
     except Exception:
-        return {}
-    if data is None or data.empty:
-        return {}
-    # 多标的时列为 (Ticker, OHLC)，单标的时列为 Open/High/Low/Close
-    if isinstance(data.columns, pd.MultiIndex):
-        level0 = data.columns.get_level_values(0)
-        for t in tickers:
-            try:
-                if t not in level0:
-                    continue
-                sub = data[t] if t in data.columns.get_level_values(0) else None
-                if sub is None:
-                    continue
-                close = sub["Close"] if isinstance(sub, pd.DataFrame) and "Close" in sub.columns else None
-                if close is None:
-                    continue
-                s = close.dropna()
-                if len(s) >= 2:
-                    out[t] = (float(s.iloc[-1]) - float(s.iloc[0])) / float(s.iloc[0]) * 100
-            except Exception:
-                continue
-    else:
-        close = data["Close"] if "Close" in data.columns else data.iloc[:, 0]
-        if close is not None and len(close.dropna()) >= 2:
-            s = close.dropna()
-            out[tickers[0]] = (float(s.iloc[-1]) - float(s.iloc[0])) / float(s.iloc[0]) * 100
+        cached = None
+    if cached is not None:
+        for t, f in cached.items():
+            s = f["Close"].dropna() if "Close" in f.columns else None
+            if s is not None and len(s) >= 2:
+                out[t] = (float(s.iloc[-1]) - float(s.iloc[0])) / float(s.iloc[0]) * 100
+        return out
+    frames, _ = bulk_download(tickers, period=period, interval="1d")
+    for t, f in frames.items():
+        s = f["Close"].dropna()
+        if len(s) >= 2:
+            out[t] = (float(s.iloc[-1]) - float(s.iloc[0])) / float(s.iloc[0]) * 100
     return out
 
 
+def _read_market_caps(tickers: List[str], max_age_sec: float) -> Dict[str, Optional[float]]:
+    """读持久化市值表：未过期的 ticker -> 市值（拉取过但无市值的为 None）。"""
+    out: Dict[str, Optional[float]] = {}
+    try:
+        conn = _conn()
+        cutoff = time.time() - max_age_sec
+        for k in range(0, len(tickers), 500):
+            batch = tickers[k : k + 500]
+            rows = conn.execute(
+                f"SELECT ticker, market_cap FROM market_cap_cache WHERE fetched_at >= ? AND ticker IN ({','.join('?' * len(batch))})",
+                (cutoff, *batch),
+            ).fetchall()
+            out.update({t: (float(m) if m is not None else None) for t, m in rows})
+    except Exception as e:
+        print(f"[Universe] 读取市值缓存失败: {e}", flush=True)
+    return out
+
+
+def _fetch_market_cap(ticker: str) -> Tuple[bool, Optional[float]]:
+    """返回 (info 是否拉到, 市值)。"""
+    try:
+        info = yf_cache.get_info(ticker) or {}
+        mcap = info.get("marketCap")
+        return bool(info), (float(mcap) if mcap is not None else None)
+    except Exception:
+        return False, None
+
+
+def get_market_caps(tickers: List[str], max_age_sec: float = MARKET_CAP_TTL_SEC) -> Dict[str, Optional[float]]:
+    """
+    ticker -> 市值（美元，无则 None）。先读持久化表，过期 / 缺失的标的并发拉取 info
+    （经 utils.yf_cache，受共享 "yahoo" 限流器约束，同时写入 info 缓存）后写回表中。
+    """
+    tickers = list(dict.fromkeys(tickers))
+    caps = _read_market_caps(tickers, max_age_sec)
+    stale = [t for t in tickers if t not in caps]
+    if not stale:
+        return caps
+    t0 = time.time()
+    with ThreadPoolExecutor(max_workers=MARKET_CAP_WORKERS) as executor:
+        results = dict(zip(stale, executor.map(_fetch_market_cap, stale)))
+    fetched = {t: m for t, (_, m) in results.items()}
+    now = time.time()
+    try:
+        with _conn() as conn:
+            # info 拉到但无市值的也记下（同一天内不再请求）；请求失败的不记，下次重试
+            conn.executemany(
+                "INSERT OR REPLACE INTO market_cap_cache VALUES (?, ?, ?)",
+                [(t, now, m) for t, (ok, m) in results.items() if ok],
+            )
+    except Exception as e:
+        print(f"[Universe] 写入市值缓存失败: {e}", flush=True)
+    print(
+        f"[Universe] 市值：缓存 {len(caps)}，拉取 {len(stale)}（有效 {sum(m is not None for m in fetched.values())}），"
+        f"耗时 {now - t0:.1f}s",
+        flush=True,
+    )
+    caps.update(fetched)
+    return caps
+
+
 def get_top_by_market_cap_and_growth(
     n: int = 100,
     min_market_cap: Optional[float] = None,
     growth_weight: float = 0.3,
 ) -> List[str]:
     """
-    从 S&P 500 池中按市值与近期增长综合排序，取前 n 只。行业覆盖多领域。
+    从 S&P 500 全部成分中按市值与近期增长综合排序，取前 n 只。行业覆盖多领域。
+    整份排序结果存于跨进程共享缓存（按参数区分，1 天有效），多 worker / 定时报告 / 脚本每天只排一次。
     min_market_cap: 最低市值（美元），可选。
     growth_weight: 近期涨幅权重 0~1，其余为市值权重。
     """
-    global _CACHE, _CACHE_TS
-    now = time.time()
-    if _CACHE is not None and (now - _CACHE_TS) < _CACHE_TTL_SEC and len(_CACHE) >= n:
-        return _CACHE[:n]
+    key = f"sp500_rank|{min_market_cap}|{growth_weight}"
+    ranked = _shared_cached(key, lambda: _rank_sp500(min_market_cap, growth_weight))
+    if not ranked:
+        return _get_sp500_tickers()[:n]
+    return ranked[:n]
+
 
-    all_tickers = _get_sp500_tickers()
-    # 限制参与排名的数量以控制首次拉取时间（约 200 只，多行业已覆盖）
-    tickers = all_tickers[:250]
+def _rank_sp500(min_market_cap: Optional[float], growth_weight: float) -> Optional[List[str]]:
+    """市值来自持久化表（get_market_caps，按日刷新），近 1 个月涨跌幅来自日K面板；无可用市值返回 None。"""
+    tickers = _get_sp500_tickers()
     # 批量取 1 个月涨跌幅（日 K）
     returns = _batch_returns(tickers, period="1mo")
-    # 逐个取市值（避免单次请求过大）
+    caps = get_market_caps(tickers)
     rows = []
-    for i, t in enumerate(tickers):
-        try:
-            st = yf.Ticker(t)
-            info = st.info or {}
-            mcap = info.get("marketCap")
-            if mcap is None:
-                continue
-            mcap = float(mcap)
-            if min_market_cap is not None and mcap < min_market_cap:
-                continue
-            ret = returns.get(t)
-            if ret is None:
-                ret = 0.0
-            rows.append({"ticker": t, "market_cap": mcap, "return_1m": ret})
-        except Exception:
+    for t in tickers:
+        mcap = caps.get(t)
+        if mcap is None:
             continue
-        if (i + 1) % 50 == 0:
-            time.sleep(0.2)
+        if min_market_cap is not None and mcap < min_market_cap:
+            continue
+        rows.append({"ticker": t, "market_cap": mcap, "return_1m": returns.get(t, 0.0)})
     if not rows:
-        return tickers[:n]
+        return None
 
     df = pd.DataFrame(rows)
     df["mcap_rank"] = df["market_cap"].rank(ascending=False, method="first")
@@ -479,8 +689,5 @@ def get_top_by_market_cap_and_growth(
     df["score"] = (1 - df["mcap_rank"] / (max_m + 1e-10)) * (1 - growth_weight) + (
         1 - df["ret_rank"] / (max_r + 1e-10)
     ) * growth_weight
-    df = df.sort_values("score", ascending=False).head(_POOL_SIZE)
-    out_full = df["ticker"].astype(str).tolist()
-    _CACHE = out_full
-    _CACHE_TS = now
-    return out_full[:n]
+    df = df.sort_values("score", ascending=False)
+    return df["ticker"].astype(str).tolist()
@@ -1,16 +1,33 @@
 """
 美股日终异动扫描：基于日 K（yfinance），用于收盘后批量筛选「冲高放量」等条件。
+规则由 eval_us_daily_movers_panel 在对齐后的整池矩阵上一次算出（eval_us_daily_mover 为逐只版，口径相同）。
+全市场（数千只）用 scan_us_market_streaming 分段流式扫描，内存有界、可跨日续用缓存。
 """
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+import os
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Optional
 
+import numpy as np
 import pandas as pd
 
-from config.yf_suppress import suppress_yf_noise
+from utils.bar_store import (
+    BAR_STORE_TTL_SEC,
+    _period_offset,
+    frames_from_store,
+    open_panel,
+    prune_panels,
+    write_panel,
+)
+from utils.bulk_download import NO_DATA, bulk_download
 
-suppress_yf_noise()
-import yfinance as yf
+# 全市场扫描分段数（按代码哈希，段越多单段内存越小）
+MARKET_SCAN_SEGMENTS = max(1, int(os.environ.get("MARKET_SCAN_SEGMENTS", "16").strip() or "16"))
+# 续用段面板时只拉最近几根 K 线；与缓存重叠部分收盘价相对误差超出该值视为复权变化，整只重拉
+_RECENT_PERIOD = "5d"
+_ADJUST_TOLERANCE = 0.005
 
 
 def _download_ohlcv_by_ticker(
@@ -18,43 +35,20 @@ def _download_ohlcv_by_ticker(
     period: str = "6mo",
     chunk: int = 60,
 ) -> Dict[str, pd.DataFrame]:
-    """批量下载日 K，返回 ticker -> DataFrame(Open,High,Low,Close,Volume)。"""
-    out: Dict[str, pd.DataFrame] = {}
-    for i in range(0, len(tickers), chunk):
-        batch = [t.strip().upper() for t in tickers[i : i + chunk] if (t or "").strip()]
-        if not batch:
-            continue
-        try:
-            data = yf.download(
-                batch,
-                period=period,
-                interval="1d",
-                auto_adjust=True,
-                threads=True,
-                progress=False,
-                ignore_tz=True,
-                group_by="ticker",
-            )
-        except Exception:
-            continue
-        if data is None or data.empty:
-            continue
-        need = ("Close", "High", "Low", "Volume")
-        if isinstance(data.columns, pd.MultiIndex):
-            for t in batch:
-                try:
-                    if t not in data.columns.get_level_values(0):
-                        continue
-                    sub = data[t]
-                    if sub is None or sub.empty or not all(c in sub.columns for c in need):
-                        continue
-                    out[t] = sub[list(need)].copy()
-                except Exception:
-                    continue
-        else:
-            if len(batch) == 1 and all(c in data.columns for c in need):
-                out[batch[0]] = data[list(need)].copy()
-    return out
+    """
+    批量下载日 K，返回 ticker -> DataFrame(Close,High,Low,Volume)。
+    先读 utils.bar_store 面板（未过期且覆盖全部标的时不联网），未命中则并发分块下载（utils.bulk_download）并写回面板。
+    """
+    tickers = [t.strip().upper() for t in tickers if (t or "").strip()]
+    need = ("Close", "High", "Low", "Volume")
+    try:
+        cached = frames_from_store(tickers, period=period, interval="1d")
+    except Exception:
+        cached = None
+    if cached is not None:
+        return {t: f[list(need)] for t, f in cached.items() if all(c in f.columns for c in need)}
+    frames, _ = bulk_download(tickers, period=period, interval="1d", chunk=chunk)
+    return {t: f[list(need)] for t, f in frames.items() if all(c in f.columns for c in need)}
 
 
 def eval_us_daily_mover(
@@ -133,6 +127,76 @@ def eval_us_daily_mover(
     }
 
 
+def _window(a: np.ndarray, k: int) -> np.ndarray:
+    """右对齐矩阵中「昨日及之前」k 根（不含最后一根），转为按标的连续存放，逐行求和与逐只 pandas 同序。"""
+    return np.ascontiguousarray(a[-k - 1 : -1].T)
+
+
+def eval_us_daily_movers_panel(
+    frames: Dict[str, pd.DataFrame],
+    *,
+    min_daily_pct: float = 3.0,
+    min_volume_ratio: float = 1.5,
+    min_avg_dollar_volume_20d: float = 20_000_000.0,
+    require_breakout_20d: bool = True,
+    require_above_sma50: bool = False,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    eval_us_daily_mover 的面板版：把全部标的按并集时间轴对齐成 Close/High/Low/Volume 矩阵，
+    各列有效行（Close/High/Low 均非空）稳定地压到底部后一次算出全部规则。
+    返回命中的 ticker -> 指标 dict（与逐只结果一致），按 frames 顺序。
+    """
+    need = ["Close", "High", "Low", "Volume"]
+    frames = {t: f for t, f in frames.items() if f is not None and not f.empty and all(c in f.columns for c in need)}
+    if not frames:
+        return {}
+    tickers = list(frames)
+    wide = pd.concat({t: f[need] for t, f in frames.items()}, axis=1, sort=True)
+    c, h, l, v = (wide.xs(f, axis=1, level=1).reindex(columns=tickers).to_numpy(dtype=float) for f in need)
+    valid = ~(np.isnan(c) | np.isnan(h) | np.isnan(l))
+    order = np.argsort(valid, axis=0, kind="stable")
+    counts = valid.sum(axis=0)
+    c, h = np.take_along_axis(c, order, axis=0), np.take_along_axis(h, order, axis=0)
+    v = np.nan_to_num(np.take_along_axis(v, order, axis=0), nan=0.0)
+    n = len(c)
+    if n < 22:
+        return {}
+
+    tc, yc, tv = c[-1], c[-2], v[-1]
+    vol_ma20 = _window(v, 20).sum(axis=1) / 20
+    avg_dollar_20 = (_window(c, 20) * _window(v, 20)).sum(axis=1) / 20
+    high_20 = _window(h, 20).max(axis=1)
+    if n >= 51:
+        sma50_prior = np.where(counts >= 51, _window(c, 50).sum(axis=1) / 50, np.nan)
+    else:
+        sma50_prior = np.full(len(tickers), np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        daily_pct = (tc / yc - 1.0) * 100.0
+        vol_ratio = tv / vol_ma20
+    breakout = tc >= high_20 * 0.9999
+    above50 = ~np.isnan(sma50_prior) & (tc >= sma50_prior)
+
+    hit = (counts >= (52 if require_above_sma50 else 22)) & (yc > 0) & (tc > 0) & (vol_ma20 > 0)
+    hit &= (daily_pct >= min_daily_pct) & (vol_ratio >= min_volume_ratio) & (avg_dollar_20 >= min_avg_dollar_volume_20d)
+    if require_breakout_20d:
+        hit &= breakout
+    if require_above_sma50:
+        hit &= above50
+
+    out: Dict[str, Dict[str, Any]] = {}
+    for j in np.flatnonzero(hit):
+        out[tickers[j]] = {
+            "daily_pct": round(float(daily_pct[j]), 2),
+            "vol_ratio": round(float(vol_ratio[j]), 2),
+            "avg_dollar_vol_20d": round(float(avg_dollar_20[j]), 0),
+            "breakout_20d": bool(breakout[j]),
+            "above_sma50": bool(above50[j]),
+            "close": round(float(tc[j]), 4),
+            "volume": float(tv[j]),
+        }
+    return out
+
+
 def scan_us_equity_movers(
     tickers: List[str],
     *,
@@ -143,20 +207,192 @@ def scan_us_equity_movers(
     min_avg_dollar_volume_20d: float = 20_000_000.0,
     require_breakout_20d: bool = True,
     require_above_sma50: bool = False,
+    on_frames: Optional[Callable[[Dict[str, pd.DataFrame]], None]] = None,
 ) -> List[Dict[str, Any]]:
-    """对 ticker 列表下载日 K 并筛选，结果按当日涨幅降序。"""
+    """
+    对 ticker 列表下载日 K 并筛选，结果按当日涨幅降序。
+    on_frames：拿到 K 线后回调一次（如 data.scan_rules 自定义扫描复用同一批数据）。
+    """
     frames = _download_ohlcv_by_ticker(tickers, period=period, chunk=download_chunk)
+    if on_frames is not None:
+        on_frames(frames)
+    rules = dict(
+        min_daily_pct=min_daily_pct,
+        min_volume_ratio=min_volume_ratio,
+        min_avg_dollar_volume_20d=min_avg_dollar_volume_20d,
+        require_breakout_20d=require_breakout_20d,
+        require_above_sma50=require_above_sma50,
+    )
+    rows = _evaluate(frames, rules)
+    rows.sort(key=lambda x: x["daily_pct"], reverse=True)
+    return rows
+
+
+def _evaluate(frames: Dict[str, pd.DataFrame], rules: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """面板评估命中行（按 frames 顺序）；面板评估失败（如列类型异常）时回退逐只评估。"""
+    try:
+        hits = eval_us_daily_movers_panel(frames, **rules)
+    except Exception as e:
+        print(f"[Movers] 面板评估失败，回退逐只: {e}", flush=True)
+        hits = {}
+        for t, frame in frames.items():
+            m = eval_us_daily_mover(frame, **rules)
+            if m:
+                hits[t] = m
+    return [{"ticker": t, **m} for t, m in hits.items()]
+
+
+# ---------- 全市场流式扫描 ----------
+
+
+def _segment_interval(k: int) -> str:
+    # 段面板单独命名（"1d-segNN"），不会被普通 1d 读穿命中，也不与之合并
+    return f"1d-seg{k:02d}"
+
+
+def segment_of(ticker: str, segments: int = MARKET_SCAN_SEGMENTS) -> int:
+    """按代码哈希分段：同一标的每天落在同一段，段面板可跨日续用。"""
+    return zlib.crc32(ticker.encode("utf-8")) % max(1, segments)
+
+
+def _append_recent(old: pd.DataFrame, new: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """把最近几根 K 线接到缓存历史后；无重叠（缓存太旧）或重叠收盘价不一致（复权变化）返回 None，需整段重拉。"""
+    overlap = old.index.intersection(new.index)
+    if len(overlap) == 0:
+        return None
+    # 缓存的最后一根可能是盘中未走完的 K 线，不参与复权比对
+    check = overlap[overlap < old.index[-1]]
+    a = old.loc[check, "Close"].to_numpy(dtype=float)
+    b = new.loc[check, "Close"].to_numpy(dtype=float)
+    ok = ~(np.isnan(a) | np.isnan(b))
+    if ok.any() and np.max(np.abs(a[ok] / b[ok] - 1)) > _ADJUST_TOLERANCE:
+        return None
+    return pd.concat([old[~old.index.isin(new.index)], new]).sort_index()
+
+
+def _load_incremental(
+    tickers: List[str],
+    store_interval: str,
+    period: str,
+    chunk: int,
+    *,
+    interval: str = "1d",
+    recent_period: str = _RECENT_PERIOD,
+    max_age_sec: Optional[float] = None,
+    prepost: bool = False,
+) -> Dict[str, pd.DataFrame]:
+    """
+    增量取一组标的的 K 线，面板存于 utils.bar_store（名为 store_interval）：面板未过期（max_age_sec，默认 BAR_STORE_TTL_SEC）直接用；
+    过期则只拉 recent_period 接到缓存后（复权变化或缓存太旧的整只重拉）；面板中没有的标的拉完整 period。
+    有新数据时按 period 截取后写回面板并删除旧版本。日K分段扫描与分K异动扫描共用。
+    """
+    max_age = BAR_STORE_TTL_SEC if max_age_sec is None else max_age_sec
+    panel = open_panel(store_interval)
+    cached: Dict[str, pd.DataFrame] = {}
+    missing = set()
+    fresh = False
+    if panel is not None:
+        fresh = panel.age_sec <= max_age
+        for t in tickers:
+            if t in panel:
+                f = panel.frame(t)
+                if f is not None and not f.empty:
+                    cached[t] = f
+            elif t in panel.missing:
+                missing.add(t)
+    need_full = [t for t in tickers if t not in cached and t not in missing]
+    if fresh and not need_full:
+        return cached
+
+    fetch = dict(interval=interval, chunk=chunk, write_store=False, prepost=prepost)
+    frames: Dict[str, pd.DataFrame] = {}
+    if fresh:
+        frames.update(cached)
+    elif cached:
+        recent, failed = bulk_download(list(cached), period=recent_period, **fetch)
+        for t, old in cached.items():
+            new = recent.get(t)
+            if new is None and failed.get(t) != NO_DATA:
+                continue  # 请求失败：本轮不评估，下次整只重拉
+            merged = old if new is None else _append_recent(old, new)
+            if merged is None:
+                need_full.append(t)
+            else:
+                frames[t] = merged
+    if need_full:
+        got, failed = bulk_download(need_full, period=period, **fetch)
+        frames.update(got)
+        missing |= {t for t, r in failed.items() if r == NO_DATA}
+
+    offset = _period_offset(period)
+    if offset is not None:
+        frames = {t: f[f.index > f.index[-1] - offset] for t, f in frames.items() if len(f)}
+    try:
+        if frames:
+            write_panel(frames, interval=store_interval, merge=False, missing=missing)
+            prune_panels(store_interval, keep=1)
+    except Exception as e:
+        print(f"[BarStore] 增量面板写入失败 {store_interval}: {e}", flush=True)
+    return frames
+
+
+def _load_segment(tickers: List[str], k: int, period: str, chunk: int) -> Dict[str, pd.DataFrame]:
+    """取一段标的的日 K（段面板 "1d-segNN"，过期时只补拉最近几根）。"""
+    return _load_incremental(tickers, _segment_interval(k), period, chunk)
+
+
+def scan_us_market_streaming(
+    tickers: Optional[List[str]] = None,
+    *,
+    period: str = "6mo",
+    segments: int = MARKET_SCAN_SEGMENTS,
+    download_chunk: int = 60,
+    min_daily_pct: float = 3.0,
+    min_volume_ratio: float = 1.5,
+    min_avg_dollar_volume_20d: float = 20_000_000.0,
+    require_breakout_20d: bool = True,
+    require_above_sma50: bool = False,
+    on_frames: Optional[Callable[[Dict[str, pd.DataFrame]], None]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    全市场异动扫描（默认美股全部上市普通股，数千只）：按代码哈希分成 segments 段，逐段 下载/读缓存 → 评估 → 丢弃，
+    峰值内存只与单段大小有关。段面板存于 utils.bar_store（"1d-segNN"），次日只需拉最近几根 K 线；
+    中途中断后重跑，已完成且未过期的段直接读盘。规则与 scan_us_equity_movers 相同，结果按当日涨幅降序。
+    on_frames：每段以参与评估的 K 线回调一次（自定义扫描随段流式进行）。
+    """
+    if tickers is None:
+        from data.universe import get_us_listed_common_stocks
+
+        tickers = get_us_listed_common_stocks()
+        if not tickers:
+            raise RuntimeError("美股全市场代码目录拉取失败")
+    tickers = sorted({t.strip().upper() for t in tickers if (t or "").strip()})
+    rules = dict(
+        min_daily_pct=min_daily_pct,
+        min_volume_ratio=min_volume_ratio,
+        min_avg_dollar_volume_20d=min_avg_dollar_volume_20d,
+        require_breakout_20d=require_breakout_20d,
+        require_above_sma50=require_above_sma50,
+    )
+    buckets: Dict[int, List[str]] = {}
+    for t in tickers:
+        buckets.setdefault(segment_of(t, segments), []).append(t)
     rows: List[Dict[str, Any]] = []
-    for t, frame in frames.items():
-        m = eval_us_daily_mover(
-            frame,
-            min_daily_pct=min_daily_pct,
-            min_volume_ratio=min_volume_ratio,
-            min_avg_dollar_volume_20d=min_avg_dollar_volume_20d,
-            require_breakout_20d=require_breakout_20d,
-            require_above_sma50=require_above_sma50,
+    for i, k in enumerate(sorted(buckets)):
+        t0 = time.time()
+        frames = _load_segment(buckets[k], k, period, download_chunk)
+        # 只评估最新交易日有 K 线的标的（停牌 / 无新数据的不用旧 K 线报异动）
+        latest = max((f.index[-1] for f in frames.values()), default=None)
+        current = {t: f for t, f in frames.items() if f.index[-1] == latest}
+        seg_rows = _evaluate(current, rules)
+        if on_frames is not None:
+            on_frames(current)
+        rows.extend(seg_rows)
+        print(
+            f"[Movers] 段 {i + 1}/{len(buckets)}：{len(frames)}/{len(buckets[k])} 只有数据，"
+            f"命中 {len(seg_rows)}，耗时 {time.time() - t0:.1f}s",
+            flush=True,
         )
-        if m:
-            rows.append({"ticker": t, **m})
+        del frames, current
     rows.sort(key=lambda x: x["daily_pct"], reverse=True)
     return rows
@@ -0,0 +1,147 @@
+"""
+盘前缓存预热：在每日定时报告之前，按 DAILY_REPORT_JOBS 解析各选股池成分股，
+先同步刷新过期的成分快照（data/constituents），再批量拉取日 K（utils/bulk_download 并发分块）、info、财报写入 utils/yf_cache，报告阶段基本只剩 LLM 耗时。
+
+- 进程内：server 定时线程在 8:00 前 DAILY_REPORT_WARMUP_LEAD_MIN 分钟调用 warm_up_jobs()
+  （解析股票池时顺带填充 data/universe 的 S&P 排名共享缓存，报告与其他进程直接复用）。
+- 命令行：python scripts/cache_warmup.py [--test]
+
+预热写入的日 K 使用 WARMUP_HIST_TTL_SEC（默认 5400 秒）作为有效期，覆盖从预热到报告跑完的窗口；
+拉完日 K 后用面板引擎批量刷新最新技术指标快照（data/indicator_snapshot），并向历史因子库
+（data/factor_store）追加最新交易日分区；
+info / 财报沿用 yf_cache 自身 TTL（6h / 24h）；财报日历（data/earnings_calendar）只刷新到期条目，
+先于财报拉取执行，刚发布财报的标的会在同一轮预热中重新拉取财报。
+"""
+from config.yf_suppress import suppress_yf_noise
+suppress_yf_noise()
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from config.delisted import DELISTED_TICKERS
+from config.tickers import DAILY_REPORT_JOBS, get_report_tickers
+from data.constituents import get_constituents
+from data.earnings_calendar import financials_not_before, refresh_calendar
+from data.factor_store import append_daily as _append_factors
+from data.indicator_snapshot import refresh_from_frames as _refresh_snapshot
+from utils.bulk_download import bulk_download
+from utils.yf_cache import cache_coverage, get_financials, get_info, put_history
+
+# 预热日 K 的有效期（秒）：默认 1.5 小时，覆盖 8:00 报告窗口且早于 A股/港股 9:30 开盘
+WARMUP_HIST_TTL_SEC = int(os.environ.get("WARMUP_HIST_TTL_SEC", "5400").strip() or "5400")
+# info / 财报并发拉取线程数
+WARMUP_WORKERS = max(1, int(os.environ.get("WARMUP_WORKERS", "8").strip() or "8"))
+# yf.download 单批标的数
+WARMUP_DOWNLOAD_CHUNK = max(1, int(os.environ.get("WARMUP_DOWNLOAD_CHUNK", "60").strip() or "60"))
+
+
+def _bulk_history(
+    tickers: List[str],
+    period: str = "6mo",
+    chunk: int = WARMUP_DOWNLOAD_CHUNK,
+    ttl: int = WARMUP_HIST_TTL_SEC,
+    collect: Optional[Dict[str, pd.DataFrame]] = None,
+) -> int:
+    """
+    并发分块下载日 K（utils.bulk_download，同时写回 utils.bar_store 面板），按 ticker 写入缓存：
+    period 条目供技术面，5d 条目供 get_fundamental_data。
+    返回成功写入的标的数；传入 collect 时同时收集 ticker -> DataFrame（供刷新指标快照）。
+    """
+    frames, _ = bulk_download(tickers, period=period, interval="1d", chunk=chunk, actions=True, ignore_tz=None)
+    written = 0
+    for t, sub in frames.items():
+        try:
+            put_history(t, period, "1d", False, sub, ttl=ttl)
+            put_history(t, "5d", "1d", False, sub.tail(5), ttl=ttl)
+            if collect is not None:
+                collect[t] = sub
+            written += 1
+        except Exception:
+            continue
+    return written
+
+
+def _warm_one_fundamentals(ticker: str) -> None:
+    get_info(ticker)
+    get_financials(ticker, not_before=financials_not_before(ticker))
+
+
+def _warm_fundamentals(tickers: List[str], workers: int = WARMUP_WORKERS) -> None:
+    """并发拉取 info 与财报（均走 yf_cache，命中未过期的直接跳过网络）。"""
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for _ in executor.map(_warm_one_fundamentals, tickers):
+            pass
+
+
+def _pct(n: int, total: int) -> float:
+    return round(n / total * 100, 1) if total else 0.0
+
+
+def warm_up_jobs(
+    jobs: Optional[List[Dict[str, Any]]] = None,
+    limit: Optional[int] = None,
+    period: str = "6mo",
+    workers: int = WARMUP_WORKERS,
+) -> List[Dict[str, Any]]:
+    """
+    依次预热每个报告任务的选股池。limit 不传则使用任务自身的 limit。
+    返回每个任务的覆盖率：[{label, market, pool, total, history, info, financials, *_pct, elapsed_sec}, ...]。
+    """
+    jobs = jobs if jobs is not None else DAILY_REPORT_JOBS
+    # 过期的成分快照在这里同步刷新，报告阶段只读本地
+    for pool in dict.fromkeys(job.get("pool") for job in jobs if job.get("pool")):
+        try:
+            get_constituents(pool, background=False)
+        except Exception as e:
+            print(f"[Warmup] {pool} 成分快照刷新失败: {e}", flush=True)
+    results: List[Dict[str, Any]] = []
+    for i, job in enumerate(jobs):
+        label = job.get("label", "")
+        t0 = time.time()
+        n = limit if limit is not None else int(job.get("limit") or 100)
+        try:
+            tickers = get_report_tickers(limit=n, market=job.get("market"), pool=job.get("pool"))
+        except Exception as e:
+            print(f"[Warmup] [{i + 1}/{len(jobs)}] {label} 成分股解析失败: {e}", flush=True)
+            continue
+        tickers = [t for t in tickers if t not in DELISTED_TICKERS]
+        n_cal = refresh_calendar(tickers, workers=workers)
+        print(f"[Warmup] [{i + 1}/{len(jobs)}] {label}: {len(tickers)} 只（财报日历刷新 {n_cal}），拉取 info/财报…", flush=True)
+        _warm_fundamentals(tickers, workers=workers)
+        # 日 K 放在最后拉取，尽量贴近报告开始时间
+        frames: Dict[str, pd.DataFrame] = {}
+        n_hist = _bulk_history(tickers, period=period, collect=frames)
+        try:
+            n_snap = _refresh_snapshot(frames, interval="1d")
+        except Exception as e:
+            print(f"[Warmup] [{i + 1}/{len(jobs)}] {label} 指标快照刷新失败: {e}", flush=True)
+            n_snap = 0
+        try:
+            n_factor = _append_factors(frames)
+        except Exception as e:
+            print(f"[Warmup] [{i + 1}/{len(jobs)}] {label} 因子库追加失败: {e}", flush=True)
+            n_factor = 0
+        cov = cache_coverage(tickers, period=period, interval="1d", prepost=False)
+        row = {
+            "label": label,
+            "market": job.get("market"),
+            "pool": job.get("pool"),
+            **cov,
+            "history_pct": _pct(cov["history"], cov["total"]),
+            "info_pct": _pct(cov["info"], cov["total"]),
+            "financials_pct": _pct(cov["financials"], cov["total"]),
+            "snapshot": n_snap,
+            "factor_partitions": n_factor,
+            "elapsed_sec": round(time.time() - t0, 1),
+        }
+        results.append(row)
+        print(
+            f"[Warmup] [{i + 1}/{len(jobs)}] {label} 完成: 日K {row['history_pct']}% "
+            f"(本次写入 {n_hist}) | 指标快照 {n_snap} | info {row['info_pct']}% | 财报 {row['financials_pct']}% "
+            f"| 耗时 {row['elapsed_sec']}s",
+            flush=True,
+        )
+    return results
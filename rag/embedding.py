@@ -6,7 +6,7 @@ from rag.config import RAG_EMBEDDING, OLLAMA_EMBED_MODEL, OLLAMA_EMBED_URL
 
 
 class _OllamaEmbeddingFunction:
-    """兼容：若 chromadb 无 OllamaEmbeddingFunction，用 requests 调 Ollama /api/embeddings。"""
+    """兼容：若 chromadb 无 OllamaEmbeddingFunction，用共享 HTTP 会话（keep-alive）调 Ollama /api/embeddings。"""
 
     def __init__(self, url: str, model_name: str):
         self.url = url.rstrip("/")
@@ -15,11 +15,12 @@ class _OllamaEmbeddingFunction:
         self.model_name = model_name
 
     def __call__(self, input_texts):
-        import requests
+        from utils.http_session import get_session
+        session = get_session("ollama", timeout=60)
         out = []
         for t in input_texts:
             try:
-                r = requests.post(
+                r = session.post(
                     self.url,
                     json={"model": self.model_name, "prompt": (t or "").strip() or " "},
                     timeout=60,
@@ -380,6 +380,13 @@ def build_report_html(
         tech_status_one_line = _escape(c.get("tech_status_one_line") or "—")
         atr_pct = c.get("atr_pct")
         atr_pct_str = f"{atr_pct:.2f}%" if atr_pct is not None else "—"
+        cs = c.get("cross_section") or {}
+        cs_parts = [
+            f"{label} {cs[k]:.0f}"
+            for k, label in (("momentum_20d", "动量"), ("volume_ratio", "量比"), ("dist_to_high", "距高"), ("atr_pct", "ATR"))
+            if cs.get(k) is not None
+        ]
+        cross_section_str = _escape(" / ".join(cs_parts)) if cs_parts else "—"
         reason = _escape(c.get("analysis_reason"))
         action_cls = _action_class(action)
         long_align = "是" if c.get("daily_long_align") else "否"
@@ -569,6 +576,10 @@ def build_report_html(
                         <div class="info-label">ATR%</div>
                         <div class="info-value">{atr_pct_str}</div>
                     </div>
+                    <div class="info-item">
+                        <div class="info-label">池内分位</div>
+                        <div class="info-value">{cross_section_str}</div>
+                    </div>
                     <div class="info-item">
                         <div class="info-label">股息率</div>
                         <div class="info-value">{div_str}</div>
@@ -16,6 +16,8 @@ import sys
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
 REC_PATH = ROOT / "data" / "memory" / "recommendations.jsonl"
 
 
@@ -48,25 +50,42 @@ def main() -> None:
         print("无买入记录，退出")
         return
 
+    from utils.bar_store import frames_from_store, write_panel
+
     tickers = sorted({b["ticker"].upper() for b in buys})
-    print(f"标的数: {len(tickers)}，示例拉取日线…")
-
-    price = yf.download(
-        tickers,
-        period="2y",
-        interval="1d",
-        group_by="ticker",
-        threads=True,
-        progress=False,
-    )
-    if price.empty:
+    # 优先复用列式面板（data/bars），未命中再下载并写回，重复回测不再重复拉取
+    frames = frames_from_store(tickers, period="2y", interval="1d")
+    if frames is None:
+        print(f"标的数: {len(tickers)}，示例拉取日线…")
+        price = yf.download(
+            tickers,
+            period="2y",
+            interval="1d",
+            group_by="ticker",
+            threads=True,
+            progress=False,
+        )
+        if price.empty:
+            print("价格数据为空")
+            return
+        frames = {}
+        if isinstance(price.columns, pd.MultiIndex):
+            for t in tickers:
+                if t in price.columns.get_level_values(0):
+                    sub = price[t].dropna(how="all")
+                    if not sub.empty:
+                        frames[t] = sub
+        else:
+            frames[tickers[0]] = price.dropna(how="all")
+        write_panel(frames, interval="1d", missing=[t for t in tickers if t not in frames])
+    else:
+        print(f"标的数: {len(tickers)}，使用本地面板日线")
+
+    closes = pd.DataFrame({t: f["Close"] for t, f in frames.items() if "Close" in f.columns})
+    if closes.empty:
         print("价格数据为空")
         return
 
-    closes = price["Close"] if isinstance(price.columns, pd.MultiIndex) else price
-    if isinstance(closes, pd.Series):
-        closes = closes.to_frame(name=tickers[0])
-
     # 极简：全样本等权买入并持有最后 60 个交易日（演示 portfolio 接口）
     subset = closes.iloc[-60:].dropna(axis=1, how="any")
     if subset.shape[1] == 0:
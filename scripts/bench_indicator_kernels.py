@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+指标后端微基准：对比 numpy 内核（agents/indicator_kernels）与 ta 库计算全部技术指标的单标的耗时，
+以及 summarize_ohlcv 整体耗时。行情用 tests/fixtures 下的录制数据（不联网）。
+
+用法：
+  python scripts/bench_indicator_kernels.py
+  python scripts/bench_indicator_kernels.py --repeat 500 --fixture ohlcv_5m.csv
+"""
+import argparse
+import os
+import sys
+import time
+
+# 项目根目录
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
+
+import pandas as pd
+
+import agents.technical as technical
+
+
+def _bench(fn, repeat: int) -> float:
+    fn()  # 预热（导入、缓存）
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1000
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="指标后端微基准（numpy vs ta）")
+    p.add_argument("--fixture", default="ohlcv_daily.csv", help="tests/fixtures 下的行情文件")
+    p.add_argument("--repeat", type=int, default=200, help="每项重复次数")
+    args = p.parse_args()
+
+    df = pd.read_csv(os.path.join(_ROOT, "tests", "fixtures", args.fixture), index_col=0, parse_dates=True)
+    interval = "1d" if "daily" in args.fixture else "5m"
+    series = (df["Close"], df["High"], df["Low"], df["Volume"])
+    print(f"[Bench] {args.fixture}: {len(df)} 根，重复 {args.repeat} 次（单位：毫秒/标的）", flush=True)
+    for backend in ("ta", "numpy"):
+        ind_ms = _bench(lambda: technical._indicator_series(*series, backend=backend), args.repeat)
+        technical.TECH_INDICATOR_BACKEND = backend
+        sum_ms = _bench(lambda: technical.summarize_ohlcv(df, interval), args.repeat)
+        print(f"[Bench] {backend:>5}: 指标 {ind_ms:.3f}  摘要 {sum_ms:.3f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+盘前缓存预热（命令行版）：按每日报告任务（config.tickers.DAILY_REPORT_JOBS）解析成分股，
+批量拉取日 K、info、财报写入 data/cache.db，并打印各选股池的缓存覆盖率。
+
+server.py 内置定时任务默认已在 8:00 前自动预热（DAILY_REPORT_WARMUP_LEAD_MIN），
+使用 crontab 跑 daily_report.py 时可提前调度本脚本。
+
+用法：
+  python scripts/cache_warmup.py            # 全部任务，各取任务自身 limit
+  python scripts/cache_warmup.py --test     # 每个池只预热 2 只
+  python scripts/cache_warmup.py --limit 50
+
+定时（crontab，早于 daily_report.py）：
+  40 7 * * * cd /path/to/stock-agent && python scripts/cache_warmup.py
+"""
+import argparse
+import json
+import os
+import sys
+
+# 项目根目录
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
+
+from data.warmup import warm_up_jobs
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="每日报告前缓存预热")
+    p.add_argument("--limit", type=int, default=None, help="每个池预热前 N 只，默认沿用任务 limit")
+    p.add_argument("--test", action="store_true", help="测试模式：每个池只预热 2 只")
+    p.add_argument("--json", action="store_true", help="以 JSON 输出覆盖率")
+    args = p.parse_args()
+
+    limit = 2 if args.test else args.limit
+    results = warm_up_jobs(limit=limit)
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2), flush=True)
+    if not results:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,7 @@ deep=0（不跑深度分析），报告保存到 report/output/。
   # 每天早上 9 点执行，周末/节假日自动跳过
 """
 import argparse
+import os
 import sys
 from datetime import datetime
 
@@ -22,6 +23,13 @@ except ImportError:
     print("请安装: pip install requests", file=sys.stderr)
     sys.exit(1)
 
+# 项目根目录
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
+
+from config.tickers import DAILY_REPORT_JOBS as JOBS
+
 
 def _should_skip_today(force: bool) -> bool:
     """周末或中国法定节假日则跳过。force=True 时强制执行。"""
@@ -40,13 +48,6 @@ def _should_skip_today(force: bool) -> bool:
         pass
     return False
 
-JOBS = [
-    {"market": "us", "pool": "sp500", "limit": 100, "label": "美股SP500"},
-    {"market": "cn", "pool": "csi300", "limit": 100, "label": "A股沪深300"},
-    {"market": "cn", "pool": "csi2000", "limit": 100, "label": "A股中证2000"},
-    {"market": "hk", "pool": "hsi", "limit": 100, "label": "港股恒指"},
-]
-
 
 def main():
     parser = argparse.ArgumentParser(description="每日三份报告")
@@ -16,8 +16,15 @@
 用法：
   cd /path/to/stock-agent && python scripts/daily_us_movers_webhook.py --dry-run
   python scripts/daily_us_movers_webhook.py --pool nasdaq100 --limit 120
+  python scripts/daily_us_movers_webhook.py --all-market --dry-run
   python scripts/daily_us_movers_webhook.py --webhook-url 'https://...' --style feishu
 
+自定义扫描（data/scan_rules 规则 DSL，与上面的异动规则共用同一批 K 线，可多条）：
+  python scripts/daily_us_movers_webhook.py --dry-run \
+      --scan '放量长阳=pct_change(1) > 3 and volume / shift(sma(volume, 20), 1) > 1.5' \
+      --scan '超卖=rsi(14) < 30 and rank(pct_change(20)) < 10'
+  python scripts/daily_us_movers_webhook.py --scans-file scans.json   # {"名称": "规则", ...}
+
 定时（crontab，美股收盘后数据更完整；北京时间次日清晨示例）：
   30 6 * * 2-6 cd /path/to/stock-agent && .venv/bin/python scripts/daily_us_movers_webhook.py
 """
@@ -30,12 +37,6 @@ import sys
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional, Tuple
 
-try:
-    import requests
-except ImportError:
-    print("请安装: pip install requests", file=sys.stderr)
-    sys.exit(1)
-
 # 项目根目录
 _ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if _ROOT not in sys.path:
@@ -50,7 +51,9 @@ except ImportError:
     pass
 
 from config.tickers import get_report_tickers, MARKET_US, POOL_NASDAQ100
-from data.us_movers_scan import scan_us_equity_movers
+from data.universe import get_us_listed_common_stocks
+from data.scan_rules import compile_rule, run_scans
+from data.us_movers_scan import scan_us_equity_movers, scan_us_market_streaming
 
 
 def _build_message(
@@ -59,15 +62,18 @@ def _build_message(
     pool: str,
     limit: int,
     rules_desc: str,
+    scan_hits: Optional[Dict[str, List[str]]] = None,
+    max_alerts: int = 30,
 ) -> str:
     et = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
     if not rows:
-        return (
+        text = (
             f"【美股日终异动】{et}\n"
             f"池子: {pool} (最多 {limit} 只)\n"
             f"规则: {rules_desc}\n"
             f"结果: 无标的满足条件"
         )
+        return text + _scan_section(scan_hits, max_alerts)
     lines = [
         f"【美股日终异动】{et}",
         f"池子: {pool} (扫描上限 {limit} 只)",
@@ -82,9 +88,37 @@ def _build_message(
             f"20日均额 ${r['avg_dollar_vol_20d']:.0f} | "
             f"收盘 {r['close']}"
         )
+    return "\n".join(lines) + _scan_section(scan_hits, max_alerts)
+
+
+def _scan_section(scan_hits: Optional[Dict[str, List[str]]], max_alerts: int) -> str:
+    if not scan_hits:
+        return ""
+    lines = ["", "自定义扫描:"]
+    for name, hits in scan_hits.items():
+        shown = ", ".join(hits[: max(1, max_alerts)])
+        more = " 等" if len(hits) > max_alerts else ""
+        lines.append(f"- {name}: {len(hits)} 只" + (f"（{shown}{more}）" if hits else ""))
     return "\n".join(lines)
 
 
+def _load_scans(items: List[str], path: str) -> Dict[str, str]:
+    """--scan NAME=EXPR（可多次）与 --scans-file JSON（{名称: 规则}）合并，后者先读、同名以命令行为准。"""
+    scans: Dict[str, str] = {}
+    if path:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError("--scans-file 须为 {名称: 规则} 的 JSON 对象")
+        scans.update({str(k): str(v) for k, v in data.items()})
+    for item in items:
+        name, sep, expr = item.partition("=")
+        if not sep or not name.strip():
+            raise ValueError(f"--scan 格式应为 名称=规则: {item}")
+        scans[name.strip()] = expr.strip()
+    return scans
+
+
 def _webhook_body(text: str, style: str) -> Tuple[Any, str]:
     s = (style or "generic").strip().lower()
     if s == "feishu":
@@ -97,8 +131,10 @@ def _webhook_body(text: str, style: str) -> Tuple[Any, str]:
 
 
 def post_webhook(url: str, text: str, style: str, timeout: int = 20) -> None:
+    from utils.http_session import get_session
+
     body, _ = _webhook_body(text, style)
-    r = requests.post(
+    r = get_session("webhook").post(
         url,
         data=json.dumps(body, ensure_ascii=False).encode("utf-8"),
         headers={"Content-Type": "application/json; charset=utf-8"},
@@ -111,11 +147,24 @@ def main() -> None:
     p = argparse.ArgumentParser(description="美股日终异动扫描 + Webhook")
     p.add_argument("--pool", default=POOL_NASDAQ100, help=f"选股池，默认 {POOL_NASDAQ100}")
     p.add_argument("--limit", type=int, default=120, help="从池中取前 N 只扫描")
+    p.add_argument(
+        "--all-market",
+        action="store_true",
+        help="扫描美股全部上市普通股（分段流式，忽略 --pool/--limit；段缓存可跨日续用）",
+    )
     p.add_argument("--min-daily-pct", type=float, default=3.0, help="最低当日涨幅 %%")
     p.add_argument("--min-vol-ratio", type=float, default=1.5, help="量比：当日量 / 前20日均量")
     p.add_argument("--min-avg-dollar-vol", type=float, default=20_000_000, help="前20日日均成交额 USD")
     p.add_argument("--no-breakout", action="store_true", help="不要求创 20 日高")
     p.add_argument("--above-sma50", action="store_true", help="要求收盘高于 50 日均线")
+    p.add_argument(
+        "--scan",
+        action="append",
+        default=[],
+        metavar="NAME=EXPR",
+        help="自定义扫描规则（data/scan_rules DSL），可多次；与异动规则共用同一批 K 线一次求值",
+    )
+    p.add_argument("--scans-file", default="", help="JSON 文件：{名称: 规则}，与 --scan 合并")
     p.add_argument("--max-alerts", type=int, default=30, help="推送中最多展示条数")
     p.add_argument("--dry-run", action="store_true", help="只打印，不请求 Webhook")
     p.add_argument("--webhook-url", default="", help="覆盖环境变量 SCAN_WEBHOOK_URL")
@@ -132,15 +181,37 @@ def main() -> None:
     if style not in ("generic", "feishu", "dingtalk", "slack"):
         style = "generic"
 
-    tickers = get_report_tickers(limit=max(1, min(args.limit, 500)), market=MARKET_US, pool=args.pool)
-    rows = scan_us_equity_movers(
-        tickers,
+    rule_kwargs = dict(
         min_daily_pct=args.min_daily_pct,
         min_volume_ratio=args.min_vol_ratio,
         min_avg_dollar_volume_20d=args.min_avg_dollar_vol,
         require_breakout_20d=not args.no_breakout,
         require_above_sma50=args.above_sma50,
     )
+    try:
+        scans = {name: compile_rule(expr) for name, expr in _load_scans(args.scan, args.scans_file).items()}
+    except (OSError, ValueError) as e:
+        print(f"自定义扫描规则无效: {e}", file=sys.stderr)
+        sys.exit(2)
+    scan_hits: Dict[str, List[str]] = {name: [] for name in scans}
+
+    def on_frames(frames) -> None:
+        for name, hits in run_scans(frames, scans).items():
+            scan_hits[name].extend(hits)
+
+    if scans:
+        rule_kwargs["on_frames"] = on_frames
+    if args.all_market:
+        tickers = get_us_listed_common_stocks()
+        if not tickers:
+            print("美股全市场代码目录拉取失败。", file=sys.stderr)
+            sys.exit(1)
+        rows = scan_us_market_streaming(tickers, **rule_kwargs)
+        pool_desc, limit = "美股全市场", len(tickers)
+    else:
+        tickers = get_report_tickers(limit=max(1, min(args.limit, 500)), market=MARKET_US, pool=args.pool)
+        rows = scan_us_equity_movers(tickers, **rule_kwargs)
+        pool_desc, limit = args.pool, args.limit
     rows = rows[: max(1, args.max_alerts)]
 
     rules = (
@@ -152,7 +223,14 @@ def main() -> None:
     if args.above_sma50:
         rules += " | 站上50日均线"
 
-    text = _build_message(rows, pool=args.pool, limit=args.limit, rules_desc=rules)
+    text = _build_message(
+        rows,
+        pool=pool_desc,
+        limit=limit,
+        rules_desc=rules,
+        scan_hits=scan_hits,
+        max_alerts=args.max_alerts,
+    )
 
     print(text, flush=True)
 
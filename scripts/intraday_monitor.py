@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+分K实时盯盘（常驻进程）：按间隔轮询自选股最新 K 线，增量更新指标并重新评估规则信号
+（突破近 20 根高点 / 放量突破 / 站上或跌破 MA20、MA60 / ATR 止损 / MACD 金叉死叉），
+信号翻转时推送 Webhook（飞书 / 钉钉 / Slack / 通用 JSON，同 daily_us_movers_webhook）；
+只有翻转的标的才调用 LLM 综合研判（--no-llm 关闭）。
+
+环境变量（推荐写入 .env）：
+  SCAN_WEBHOOK_URL       机器人 Webhook 地址（必填，除非 --dry-run）
+  SCAN_WEBHOOK_STYLE     feishu | dingtalk | slack | generic（默认 generic）
+
+用法：
+  python scripts/intraday_monitor.py --tickers AAPL,NVDA,TSLA --interval 5m --dry-run
+  python scripts/intraday_monitor.py --tickers 600519.SS,0700.HK --interval 15m --poll 120 --no-llm
+  python scripts/intraday_monitor.py --pool nasdaq100 --limit 30 --prepost --style feishu
+  python scripts/intraday_monitor.py --market cn --pool csi300 --limit 20 --interval 15m
+"""
+import argparse
+import os
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+# 项目根目录
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
+
+try:
+    from dotenv import load_dotenv
+
+    load_dotenv(os.path.join(_ROOT, ".env"))
+    load_dotenv(os.path.join(_ROOT, ".env.local"))
+except ImportError:
+    pass
+
+from config.tickers import MARKET_CN, MARKET_HK, MARKET_US, POOL_NASDAQ100, get_report_tickers
+from data.intraday_monitor import IntradayMonitor, llm_escalation
+from scripts.daily_us_movers_webhook import post_webhook
+
+
+def _build_message(events: List[Dict[str, Any]], interval: str) -> str:
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
+    lines = [f"【分K盯盘信号】{now}（{interval}）", f"信号翻转: {len(events)} 条", ""]
+    for e in events:
+        line = f"- {e['ticker']}: {e['label']} | 价 {e['price']}"
+        if e.get("volume_ratio") is not None:
+            line += f" | 量比 {e['volume_ratio']}"
+        lines.append(line)
+        a = e.get("analysis") or {}
+        if a:
+            lines.append(f"  LLM: {a.get('action', '—')} {a.get('score', '—')}分 {a.get('core_conclusion', '')}".rstrip())
+    return "\n".join(lines)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="分K实时盯盘 + Webhook")
+    p.add_argument("--tickers", default="", help="逗号分隔代码；不传则按 --pool 取池")
+    p.add_argument("--market", default=MARKET_US, choices=[MARKET_US, MARKET_CN, MARKET_HK], help="--pool 所属市场")
+    p.add_argument(
+        "--pool",
+        default="",
+        help=f"选股池（不传 --tickers 时生效）：美股默认 {POOL_NASDAQ100}，A股 / 港股默认该市场大盘池（csi300 / hsi）",
+    )
+    p.add_argument("--limit", type=int, default=30, help="从池中取前 N 只")
+    p.add_argument("--interval", default="5m", help="K 线周期：1m/5m/10m/15m/30m/60m")
+    p.add_argument("--prepost", action="store_true", help="含盘前盘后")
+    p.add_argument("--poll", type=int, default=60, help="轮询间隔（秒）")
+    p.add_argument("--max-cycles", type=int, default=None, help="最多轮询次数（默认一直运行）")
+    p.add_argument("--no-llm", action="store_true", help="信号翻转时不调用 LLM")
+    p.add_argument("--dry-run", action="store_true", help="只打印，不请求 Webhook")
+    p.add_argument("--webhook-url", default="", help="覆盖环境变量 SCAN_WEBHOOK_URL")
+    p.add_argument(
+        "--style",
+        default="",
+        choices=["", "generic", "feishu", "dingtalk", "slack"],
+        help="覆盖 SCAN_WEBHOOK_STYLE",
+    )
+    args = p.parse_args()
+
+    url = (args.webhook_url or os.environ.get("SCAN_WEBHOOK_URL") or "").strip()
+    style = (args.style or os.environ.get("SCAN_WEBHOOK_STYLE") or "generic").strip().lower()
+    if style not in ("generic", "feishu", "dingtalk", "slack"):
+        style = "generic"
+    if not args.dry_run and not url:
+        print("未设置 SCAN_WEBHOOK_URL 且未传 --webhook-url（可用 --dry-run 仅打印）。", file=sys.stderr)
+        sys.exit(2)
+
+    if args.tickers:
+        tickers = [t.strip().upper() for t in args.tickers.split(",") if t.strip()]
+    else:
+        pool = args.pool or (POOL_NASDAQ100 if args.market == MARKET_US else None)
+        tickers = get_report_tickers(limit=max(1, min(args.limit, 500)), market=args.market, pool=pool)
+    interval = args.interval.strip().lower()
+    monitor = IntradayMonitor(
+        tickers,
+        interval=interval,
+        prepost=args.prepost,
+        escalate=None if args.no_llm else llm_escalation(interval, args.prepost),
+    )
+
+    def on_events(events: List[Dict[str, Any]]) -> None:
+        text = _build_message(events, interval)
+        print(text, flush=True)
+        if args.dry_run:
+            return
+        try:
+            post_webhook(url, text, style)
+            print("Webhook 已发送", flush=True)
+        except Exception as e:
+            print(f"Webhook 失败: {e}", file=sys.stderr)
+
+    print(f"[Monitor] 盯盘 {len(tickers)} 只，{interval}，每 {args.poll}s 轮询", flush=True)
+    try:
+        monitor.run(poll_sec=args.poll, on_events=on_events, max_cycles=args.max_cycles)
+    except KeyboardInterrupt:
+        print("[Monitor] 已停止", flush=True)
+
+
+if __name__ == "__main__":
+    main()
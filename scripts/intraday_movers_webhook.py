@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+美股盘中异动扫描（常驻进程）：每隔 N 分钟在 5m / 15m K 线上扫描整池，命中推送 Webhook
+（飞书 / 钉钉 / Slack / 通用 JSON，同 daily_us_movers_webhook）。
+
+规则（data/intraday_movers，可用参数调整）：
+  1) 较昨收涨幅 >= 阈值（默认 3%）
+  2) 分时量比 >= 倍数（默认 2）：今日累计量 / 前 20 个交易日同一时刻累计量均值，开盘放量不误报
+  3) 前几日日均成交额（美元）>= 阈值（默认 2000 万）
+  可选 4) --above-prev-high：现价站上昨日最高价
+同一标的同一交易日只推送一次（推送成功后登记，进程重启后仍去重；推送失败下一轮重试）；每轮只增量拉取最近 K 线。
+--dry-run 只打印、不登记去重，不影响之后的正式运行（同一进程内不重复打印）。
+
+环境变量（推荐写入 .env）：
+  SCAN_WEBHOOK_URL       机器人 Webhook 地址（必填，除非 --dry-run）
+  SCAN_WEBHOOK_STYLE     feishu | dingtalk | slack | generic（默认 generic）
+  INTRADAY_RVOL_DAYS     分时量比的历史基准交易日数（默认 20）
+
+用法：
+  python scripts/intraday_movers_webhook.py --pool nasdaq100 --limit 100 --dry-run --max-cycles 1
+  python scripts/intraday_movers_webhook.py --interval 15m --poll 900 --style feishu
+"""
+import argparse
+import os
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+# 项目根目录
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
+
+try:
+    from dotenv import load_dotenv
+
+    load_dotenv(os.path.join(_ROOT, ".env"))
+    load_dotenv(os.path.join(_ROOT, ".env.local"))
+except ImportError:
+    pass
+
+from config.tickers import MARKET_US, POOL_NASDAQ100, get_report_tickers
+from data.intraday_movers import IntradayMoversScanner
+from scripts.daily_us_movers_webhook import post_webhook
+
+
+def _build_message(rows: List[Dict[str, Any]], interval: str, pool: str, max_alerts: int) -> str:
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
+    lines = [f"【美股盘中异动】{now}（{interval}）", f"池子: {pool}", f"新命中: {len(rows)} 只（按涨幅排序）", ""]
+    for r in rows[: max(1, max_alerts)]:
+        line = f"- {r['ticker']}: {r['change_pct']:+.2f}% | 分时量比 {r['rvol']:.2f} | 价 {r['close']} | {r['bar_time']}"
+        if r.get("above_prev_high"):
+            line += " | 站上昨高"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="美股盘中异动扫描（分K）+ Webhook")
+    p.add_argument("--tickers", default="", help="逗号分隔代码；不传则按 --pool 取池")
+    p.add_argument("--pool", default=POOL_NASDAQ100, help=f"选股池（不传 --tickers 时生效），默认 {POOL_NASDAQ100}")
+    p.add_argument("--limit", type=int, default=120, help="从池中取前 N 只")
+    p.add_argument("--interval", default="5m", choices=["5m", "15m"], help="K 线周期")
+    p.add_argument("--prepost", action="store_true", help="含盘前盘后")
+    p.add_argument("--poll", type=int, default=300, help="扫描间隔（秒）")
+    p.add_argument("--max-cycles", type=int, default=None, help="最多扫描轮数（默认一直运行）")
+    p.add_argument("--min-change-pct", type=float, default=3.0, help="较昨收最低涨幅 %%")
+    p.add_argument("--min-rvol", type=float, default=2.0, help="分时量比：今日累计量 / 历史同一时刻累计量均值")
+    p.add_argument("--min-avg-dollar-vol", type=float, default=20_000_000, help="前几日日均成交额 USD")
+    p.add_argument("--above-prev-high", action="store_true", help="要求现价站上昨日最高价")
+    p.add_argument("--max-alerts", type=int, default=30, help="单条推送最多展示条数")
+    p.add_argument("--dry-run", action="store_true", help="只打印，不请求 Webhook")
+    p.add_argument("--webhook-url", default="", help="覆盖环境变量 SCAN_WEBHOOK_URL")
+    p.add_argument(
+        "--style",
+        default="",
+        choices=["", "generic", "feishu", "dingtalk", "slack"],
+        help="覆盖 SCAN_WEBHOOK_STYLE",
+    )
+    args = p.parse_args()
+
+    url = (args.webhook_url or os.environ.get("SCAN_WEBHOOK_URL") or "").strip()
+    style = (args.style or os.environ.get("SCAN_WEBHOOK_STYLE") or "generic").strip().lower()
+    if style not in ("generic", "feishu", "dingtalk", "slack"):
+        style = "generic"
+    if not args.dry_run and not url:
+        print("未设置 SCAN_WEBHOOK_URL 且未传 --webhook-url（可用 --dry-run 仅打印）。", file=sys.stderr)
+        sys.exit(2)
+
+    if args.tickers:
+        tickers = [t.strip().upper() for t in args.tickers.split(",") if t.strip()]
+        pool_desc = "自选"
+    else:
+        tickers = get_report_tickers(limit=max(1, min(args.limit, 500)), market=MARKET_US, pool=args.pool)
+        pool_desc = args.pool
+    scanner = IntradayMoversScanner(
+        tickers,
+        interval=args.interval,
+        prepost=args.prepost,
+        min_change_pct=args.min_change_pct,
+        min_rvol=args.min_rvol,
+        min_avg_dollar_volume=args.min_avg_dollar_vol,
+        require_above_prev_high=args.above_prev_high,
+    )
+
+    printed: set = set()
+
+    def on_alerts(rows: List[Dict[str, Any]]) -> bool:
+        if args.dry_run:
+            rows = [r for r in rows if r["alert_key"] not in printed]
+            printed.update(r["alert_key"] for r in rows)
+            if rows:
+                print(_build_message(rows, args.interval, pool_desc, args.max_alerts), flush=True)
+            return False
+        text = _build_message(rows, args.interval, pool_desc, args.max_alerts)
+        print(text, flush=True)
+        try:
+            post_webhook(url, text, style)
+            print("Webhook 已发送", flush=True)
+            return True
+        except Exception as e:
+            print(f"Webhook 失败，下一轮重试: {e}", file=sys.stderr)
+            return False
+
+    print(f"[IntradayMovers] 扫描 {len(tickers)} 只，{args.interval}，每 {args.poll}s 一轮", flush=True)
+    try:
+        scanner.run(poll_sec=args.poll, on_alerts=on_alerts, max_cycles=args.max_cycles)
+    except KeyboardInterrupt:
+        print("[IntradayMovers] 已停止", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -54,9 +54,7 @@ from llm import ask_llm
 
 
 def _normalize_interval(interval: str) -> str:
-    """yfinance 无 10m，用 15m 代替；展示时仍可写 10 分钟 K。"""
-    if (interval or "").strip().lower() == "10m":
-        return "15m"
+    """统一小写；10m 由 1m/5m 本地重采样得到真实 10 分钟 K（utils/bar_resample）。"""
     return (interval or "1d").strip().lower()
 
 
@@ -69,7 +67,7 @@ def _run_report_impl(
     job_id: str,
     pool: str = "",
 ) -> tuple:
-    """内部：跑报告循环，返回 (cards, title, html_content)。interval 可为 10m（内部用 15m）。"""
+    """内部：跑报告循环，返回 (cards, title, html_content)。interval 可为 10m（由 1m/5m 重采样）。"""
     interval_internal = _normalize_interval(interval)
     total = len(ticker_list)
     with _report_progress_lock:
@@ -90,6 +88,15 @@ def _run_report_impl(
         _, backtest_summary_prev = get_past_recommendations_with_returns(since_days=90)
     except Exception:
         pass
+    cross_sections: Dict[str, Dict[str, Any]] = {}
+    try:
+        from config.analysis_config import CROSS_SECTION_ENABLED
+        if CROSS_SECTION_ENABLED and total > 1:
+            from agents.cross_section import pool_cross_section
+            cross_sections = pool_cross_section(ticker_list, interval=interval_internal, prepost=(prepost == 1))
+            print(f"[Report] 池内横截面分位: {len(cross_sections)} 只", flush=True)
+    except Exception as e:
+        print(f"[Report] 池内横截面分位失败: {e}", flush=True)
     try:
         for i, t in enumerate(ticker_list):
             with _report_progress_lock:
@@ -107,9 +114,16 @@ def _run_report_impl(
                         interval=interval_internal,
                         include_prepost=(prepost == 1),
                         backtest_summary=backtest_summary_prev,
+                        cross_section=cross_sections.get(t.upper()),
                     )
                 else:
-                    one = run_full_analysis(t, interval=interval_internal, include_prepost=(prepost == 1), backtest_summary=backtest_summary_prev)
+                    one = run_full_analysis(
+                        t,
+                        interval=interval_internal,
+                        include_prepost=(prepost == 1),
+                        backtest_summary=backtest_summary_prev,
+                        cross_section=cross_sections.get(t.upper()),
+                    )
                 elapsed = time.time() - t0
                 if one:
                     cards.append(one)
@@ -255,11 +269,35 @@ def _run_daily_report_job() -> None:
         print(f"[DailyReport] 异常: {e}", flush=True)
 
 
+def _run_warmup_job() -> None:
+    """报告前缓存预热（进程内）：解析各任务成分股，批量拉取日K/info/财报，打印覆盖率。"""
+    try:
+        from data.warmup import warm_up_jobs
+        results = warm_up_jobs()
+        for r in results:
+            print(
+                f"[Warmup] 覆盖率 {r['label']}: 日K {r['history_pct']}% / info {r['info_pct']}% / 财报 {r['financials_pct']}%",
+                flush=True,
+            )
+    except Exception as e:
+        print(f"[Warmup] 异常: {e}", flush=True)
+
+
 def _daily_report_scheduler_loop() -> None:
-    """后台线程：每天 8 点执行 daily_report.py，跨平台不依赖 crontab。"""
+    """
+    后台线程：每天 8 点执行 daily_report.py，跨平台不依赖 crontab。
+    DAILY_REPORT_WARMUP_LEAD_MIN>0 时，在 8 点前该分钟数先做缓存预热（默认 20，设 0 关闭）。
+    """
+    lead_min = int(os.environ.get("DAILY_REPORT_WARMUP_LEAD_MIN", "20").strip() or "0")
     while True:
         secs = _seconds_until_8am()
-        print(f"[DailyReport] 下次执行: {datetime.now() + timedelta(seconds=secs)}", flush=True)
+        run_at = datetime.now() + timedelta(seconds=secs)
+        print(f"[DailyReport] 下次执行: {run_at}", flush=True)
+        if lead_min > 0 and secs > lead_min * 60:
+            time.sleep(secs - lead_min * 60)
+            print("[Warmup] 开始预热", flush=True)
+            _run_warmup_job()
+            secs = max(0.0, (run_at - datetime.now()).total_seconds())
         time.sleep(secs)
         print("[DailyReport] 开始执行", flush=True)
         _run_daily_report_job()
@@ -301,6 +339,7 @@ def root():
             "组合(①②③④)": "GET /analyze/full?ticker=AAPL&narrative=1 可选",
         },
         "长期上下文(LangChain)": "GET /memory?ticker=AAPL&type=fundamental_deep  GET /memory/context?ticker=AAPL",
+        "screen": "GET /screen?market=us&pool=sp500&long_align=1&rsi_max=70&pe_max=30&sort=-tech_baseline 在缓存的指标快照与估值上条件选股（分页 JSON，不调 LLM）",
     }
 
 
@@ -484,6 +523,62 @@ def memory_context(
         return "（无历史分析）"
 
 
+@app.get("/screen")
+def screen_tickers(
+    market: str = Query("us", description="市场：us / cn / hk（不传 tickers 时生效）"),
+    pool: str = Query("", description="选股池：sp500 / nasdaq100 / russell2000 / csi300 / csi2000 / hsi / hstech，不传为该市场默认池"),
+    tickers: Optional[str] = Query(None, description="逗号分隔股票代码，传则只在这些标的中筛选"),
+    interval: str = Query("1d", description="快照周期，默认日K"),
+    long_align: Optional[int] = Query(None, description="1=多头排列，0=非多头排列"),
+    macd_golden: Optional[int] = Query(None, description="1=MACD 金叉"),
+    rsi_min: Optional[float] = Query(None, description="RSI 下限"),
+    rsi_max: Optional[float] = Query(None, description="RSI 上限"),
+    volume_ratio_min: Optional[float] = Query(None, description="量比下限"),
+    dist_to_high_min: Optional[float] = Query(None, description="距 52 周高点 %（≤0）下限，如 -10 表示离高点 10% 以内"),
+    dist_to_high_max: Optional[float] = Query(None, description="距 52 周高点 % 上限"),
+    baseline_min: Optional[float] = Query(None, description="技术面定量基准分（0-100）下限"),
+    baseline_max: Optional[float] = Query(None, description="技术面定量基准分上限"),
+    pe_min: Optional[float] = Query(None, description="PE（TTM）下限"),
+    pe_max: Optional[float] = Query(None, description="PE（TTM）上限"),
+    max_age_sec: Optional[float] = Query(None, description="只看最近多少秒内刷新过的快照"),
+    sort: str = Query("-tech_baseline", description="排序列，前缀 - 为降序：tech_baseline / rsi / volume_ratio / dist_to_high_pct / return_20d_pct / pe / market_cap 等"),
+    page: int = Query(1, ge=1, description="页码，从 1 开始"),
+    page_size: int = Query(50, ge=1, le=200, description="每页条数"),
+):
+    """
+    条件选股：在已落盘的技术指标快照与 info 缓存上过滤、排序、分页（data/screener），不拉行情、不调 LLM。
+    快照由盘前预热 / 报告刷新；只读本地，池无本地成分快照时返回空结果并附 note；查询失败返回 500。
+    筛出的代码可直接传给 /report?tickers=...。
+    """
+    from data.screener import ScreenError, screen
+
+    ticker_list = [normalize_ticker(t) for t in tickers.split(",") if t.strip()] if tickers else None
+    try:
+        return screen(
+            tickers=ticker_list,
+            market=market or MARKET_US,
+            pool=pool or None,
+            interval=_normalize_interval(interval),
+            long_align=None if long_align is None else bool(long_align),
+            macd_golden=None if macd_golden is None else bool(macd_golden),
+            rsi_min=rsi_min,
+            rsi_max=rsi_max,
+            volume_ratio_min=volume_ratio_min,
+            dist_to_high_min=dist_to_high_min,
+            dist_to_high_max=dist_to_high_max,
+            baseline_min=baseline_min,
+            baseline_max=baseline_max,
+            pe_min=pe_min,
+            pe_max=pe_max,
+            max_age_sec=max_age_sec,
+            sort=sort,
+            page=page,
+            page_size=page_size,
+        )
+    except ScreenError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/report/page", response_class=HTMLResponse)
 def report_console_page():
     """
@@ -517,7 +612,7 @@ def report_page(
     tickers: str = Query(None, description="逗号分隔股票代码；A股可传 6 位（自动补 .SZ/.SS），港股可传 4/5 位（5 位只去第一位补 .HK，如 00100→0100.HK）；不传则按 market+pool 取池"),
     limit: int = Query(5, ge=1, le=200, description="当不传 tickers 时取的数量，默认 5（调试快；可传 100 跑全量）"),
     deep: int = Query(0, description="1=每只标的跑深度分析①②③④⑤+与上次对比，形成大方向/近期趋势；0=仅技术+消息+财报+期权"),
-    interval: str = Query("1d", description="K线周期：1d=日K，5m/15m/10m/1m=分K（10m 用 15m 数据）"),
+    interval: str = Query("1d", description="K线周期：1d=日K，5m/15m/10m/1m=分K（10m 由 1m/5m 重采样）"),
     prepost: int = Query(0, description="是否含盘前盘后：0=否，1=是（分K时常用）"),
     market: str = Query("us", description="市场选股：us=美股，cn=A股，hk=港股（不传 tickers 时生效）"),
     pool: str = Query("", description="选股池：不传或 sp500=大盘；nasdaq100=纳斯达克100；russell2000=美股小盘；csi300=A股沪深300；csi2000=A股中证2000；hsi=恒指；hstech=恒科，不传 tickers 时生效"),
@@ -530,7 +625,7 @@ def report_page(
     deep=1：每只额外跑 ①②③④⑤ 深度分析（仅日K），结合记忆做「与上次对比」。
     market=us/cn/hk：不传 tickers 时从对应市场池取前 limit 只。
     pool=sp500（默认）/ nasdaq100 / russell2000（美股小盘）/ csi300（A股沪深300）/ csi2000（A股中证2000）：不传 tickers 时生效。
-    interval=1d：日K；interval=5m/15m/10m/1m：分K超短线（10m 以 15m 数据代替）。prepost=1：含盘前盘后。
+    interval=1d：日K；interval=5m/15m/10m/1m：分K超短线（10m 由 1m/5m 本地重采样）。prepost=1：含盘前盘后。
     进度可轮询 GET /report/progress。
     """
     if tickers:
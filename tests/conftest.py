@@ -1,7 +1,22 @@
-"""pytest 配置：将项目根加入 sys.path。"""
+"""pytest 配置：将项目根加入 sys.path；每个用例结束时写回并清空进程内增量指标状态。"""
 import sys
 from pathlib import Path
 
+import pytest
+
 ROOT = Path(__file__).resolve().parent.parent
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture(autouse=True)
+def _isolate_indicator_states(monkeypatch):
+    """
+    增量指标状态留在进程内、退出时才写回：依赖 monkeypatch 使本夹具先于其撤销执行，
+    在用例替换的临时库仍生效时写回并清空，避免退出时写进真实 data/cache.db。
+    """
+    yield
+    from agents.indicator_stream import clear_live_states, flush_states
+
+    flush_states()
+    clear_live_states()
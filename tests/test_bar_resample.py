@@ -0,0 +1,64 @@
+"""utils.bar_resample：按交易时段重采样，及 yf_cache.get_history 由缓存基础周期派生（临时 DB，不联网）。"""
+import numpy as np
+import pandas as pd
+
+import utils.yf_cache as yf_cache
+from utils.bar_resample import resample_ohlcv
+
+
+def _minutes(start, n, tz, freq="1min"):
+    idx = pd.date_range(start, periods=n, freq=freq, tz=tz)
+    x = np.arange(n, dtype=float)
+    return pd.DataFrame({"Open": x, "High": x + 1, "Low": x - 1, "Close": x + 0.5, "Volume": np.ones(n)}, index=idx)
+
+
+def test_us_sessions_do_not_mix():
+    df = _minutes("2024-06-03 04:00", 16 * 60, "America/New_York")
+    regular = resample_ohlcv(df, "60m", "AAPL")
+    assert str(regular.index[0].time()) == "09:30:00" and len(regular) == 7
+    last = regular.iloc[-1]  # 15:30–16:00 半根，不混入盘后
+    assert last["Volume"] == 30 and last["Close"] == df["Close"].iloc[15 * 60 + 59 - 4 * 60]
+    ext = resample_ohlcv(df, "10m", "AAPL", prepost=True)
+    assert len(ext) == 96 and ext["Volume"].sum() == len(df)
+    first = ext.iloc[0]
+    assert (first["Open"], first["High"], first["Low"], first["Volume"]) == (0, 10, -1, 10)
+
+
+def test_cn_lunch_break_and_weekly():
+    df = _minutes("2024-06-03 09:30", 6 * 60, "Asia/Shanghai")
+    out = resample_ohlcv(df, "60m", "600519.SS")
+    assert [t.strftime("%H:%M") for t in out.index] == ["09:30", "10:30", "13:00", "14:00"]
+    daily = _minutes("2024-06-03", 10, "Asia/Shanghai", freq="B")
+    weekly = resample_ohlcv(daily, "1wk", "600519.SS")
+    assert list(weekly["Volume"]) == [5, 5] and weekly.index[1].weekday() == 0
+
+
+def test_get_history_derives_from_cached_1m(tmp_path, monkeypatch):
+    monkeypatch.setattr(yf_cache, "_DB_PATH", tmp_path / "cache.db")
+
+    def no_network(*a, **k):
+        raise AssertionError("不应联网")
+
+    monkeypatch.setattr(yf_cache.yf, "Ticker", no_network)
+    base = _minutes("2024-06-03 09:30", 390, "America/New_York")
+    yf_cache.put_history("AAPL", "5d", "1m", False, base)
+    for interval, bars in (("5m", 78), ("10m", 39), ("15m", 26), ("60m", 7)):
+        out = yf_cache.get_history("AAPL", period="5d", interval=interval)
+        assert len(out) == bars and out["Volume"].sum() == 390
+        assert out.index.tz is None  # 与缓存读出口径一致（UTC 无时区）
+
+
+def test_session_end_bars_fold_into_last_bucket():
+    # A股 11:30 / 15:00 那一根（收盘竞价）并入时段最后一个桶，不丢弃
+    morning = pd.date_range("2024-06-03 09:30", "2024-06-03 11:30", freq="1min", tz="Asia/Shanghai")
+    afternoon = pd.date_range("2024-06-03 13:00", "2024-06-03 15:00", freq="1min", tz="Asia/Shanghai")
+    idx = morning.append(afternoon)
+    x = np.arange(len(idx), dtype=float)
+    df = pd.DataFrame({"Open": x, "High": x + 1, "Low": x - 1, "Close": x + 0.5, "Volume": np.ones(len(idx))}, index=idx)
+    out = resample_ohlcv(df, "60m", "600519.SS")
+    assert [t.strftime("%H:%M") for t in out.index] == ["09:30", "10:30", "13:00", "14:00"]
+    assert list(out["Volume"]) == [60, 61, 60, 61] and out["Close"].iloc[-1] == df["Close"].iloc[-1]
+    # 港股 16:00 同理
+    hk = _minutes("2024-06-03 13:00", 181, "Asia/Hong_Kong")
+    out = resample_ohlcv(hk, "30m", "0700.HK")
+    assert len(out) == 6 and out["Volume"].iloc[-1] == 31 and out["Volume"].sum() == 181
@@ -0,0 +1,91 @@
+"""utils.bar_store：面板写入/读取、读穿命中与合并（临时目录，不联网）。"""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import utils.bar_store as bar_store
+
+
+def _ohlcv(start, n, base=100.0):
+    idx = pd.date_range(start, periods=n, freq="B", tz="America/New_York")
+    close = np.arange(n, dtype=float) + base
+    return pd.DataFrame(
+        {"Open": close, "High": close + 1, "Low": close - 1, "Close": close, "Volume": np.full(n, 1e6)},
+        index=idx,
+    )
+
+
+def test_write_then_open_panel_row_views(tmp_path, monkeypatch):
+    monkeypatch.setattr(bar_store, "_STORE_DIR", tmp_path)
+    frames = {"AAA": _ohlcv("2024-01-01", 60), "BBB": _ohlcv("2024-02-01", 30, base=50.0)}
+    bar_store.write_panel(frames, interval="1d")
+    panel = bar_store.open_panel("1d", tickers=["AAA", "BBB"])
+    assert panel is not None
+    assert panel.field("Close").shape == (2, len(panel.index))
+    # BBB 晚上市的部分为 NaN，frame() 去掉后与原始数据一致
+    b = panel.frame("BBB")
+    assert len(b) == 30
+    assert float(b["Close"].iloc[-1]) == 79.0
+    assert panel.matrix("Close", ["BBB"]).shape == (len(panel.index), 1)
+
+
+def test_frames_from_store_period_and_missing(tmp_path, monkeypatch):
+    monkeypatch.setattr(bar_store, "_STORE_DIR", tmp_path)
+    bar_store.write_panel({"AAA": _ohlcv("2024-01-01", 130)}, interval="1d", missing=["GONE"])
+    got = bar_store.frames_from_store(["AAA", "GONE"], period="1mo", interval="1d")
+    assert got is not None and list(got) == ["AAA"]
+    assert 18 <= len(got["AAA"]) <= 23
+    # 面板跨度不足 2 年 -> 未命中
+    assert bar_store.frames_from_store(["AAA"], period="2y") is None
+    # 未覆盖的标的 -> 未命中
+    assert bar_store.frames_from_store(["CCC"], period="1mo") is None
+    # 过期 -> 未命中
+    assert bar_store.frames_from_store(["AAA"], period="1mo", max_age_sec=-1) is None
+
+
+def test_write_panel_merges_same_range(tmp_path, monkeypatch):
+    monkeypatch.setattr(bar_store, "_STORE_DIR", tmp_path)
+    bar_store.write_panel({"AAA": _ohlcv("2024-01-01", 40)}, interval="1d")
+    bar_store.write_panel({"BBB": _ohlcv("2024-01-01", 40, base=10.0)}, interval="1d")
+    assert len(bar_store.list_panels("1d")) == 1
+    panel = bar_store.open_panel("1d")
+    assert set(panel.tickers) == {"AAA", "BBB"}
+
+
+def test_daily_bars_keep_exchange_local_dates(tmp_path, monkeypatch):
+    monkeypatch.setattr(bar_store, "_STORE_DIR", tmp_path)
+    hk = _ohlcv("2024-03-01", 10).tz_localize(None).tz_localize("Asia/Hong_Kong")  # 00:00+08:00，UTC 为前一天 16:00
+    bar_store.write_panel({"0700.HK": hk, "AAA": _ohlcv("2024-03-01", 10)}, interval="1d")
+    panel = bar_store.open_panel("1d")
+    assert list(panel.index) == list(hk.index.tz_localize(None))
+    assert len(panel.frame("0700.HK")) == len(panel.frame("AAA")) == 10
+
+
+def test_write_panel_prunes_superseded_versions(tmp_path, monkeypatch):
+    monkeypatch.setattr(bar_store, "_STORE_DIR", tmp_path)
+    bar_store.write_panel({"AAA": _ohlcv("2024-01-01", 40)}, interval="1d")
+    bar_store.write_panel({"ZZZ": _ohlcv("2024-01-02", 30)}, interval="1d")  # 标的不同：保留
+    bar_store.write_panel({"AAA": _ohlcv("2024-01-01", 41), "BBB": _ohlcv("2024-01-01", 41)}, interval="1d")
+    panels = bar_store.list_panels("1d")
+    assert len(panels) == 2
+    assert {tuple(bar_store.BarPanel(p).tickers) for p in panels} == {("ZZZ",), ("AAA", "BBB")}
+
+
+def test_write_panel_survives_concurrent_writer(tmp_path, monkeypatch):
+    monkeypatch.setattr(bar_store, "_STORE_DIR", tmp_path)
+    frames = {"AAA": _ohlcv("2024-01-01", 20)}
+    real_replace = bar_store.os.replace
+    raced = []
+
+    def replace(src, dst):
+        # 第一次换入前，另一个写入者抢先建好了同名面板
+        if not raced and Path(src).name.startswith(".tmp-"):
+            raced.append(1)
+            bar_store.write_panel({"BBB": _ohlcv("2024-01-01", 20)}, interval="1d", merge=False)
+        return real_replace(src, dst)
+
+    monkeypatch.setattr(bar_store.os, "replace", replace)
+    bar_store.write_panel(frames, interval="1d", merge=False)
+    assert raced and bar_store.open_panel("1d").tickers == ["AAA"]
+    assert not [p for p in tmp_path.iterdir() if p.name.startswith(".")]
@@ -0,0 +1,93 @@
+"""utils.bulk_download：并发分块、失败拆小重试、无数据标的与面板写回（替换 yf.download，不联网）。"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+import utils.bar_store as bar_store
+import utils.bulk_download as bd
+
+
+def _fake_download(max_batch, gone=(), flaky=()):
+    calls = []
+    lock = threading.Lock()
+    seen = set()
+
+    def download(batch, **kwargs):
+        with lock:
+            calls.append(list(batch))
+            first_flaky = [t for t in batch if t in flaky and t not in seen]
+            seen.update(batch)
+        if len(batch) > max_batch:
+            raise RuntimeError("Too Many Requests")
+        idx = pd.date_range("2024-01-02", periods=30, freq="B")
+        cols = {}
+        for t in batch:
+            c = np.full(30, np.nan) if t in gone or t in first_flaky else np.arange(30.0) + 10
+            for f in ("Open", "High", "Low", "Close", "Volume"):
+                cols[(t, f)] = c
+        return pd.DataFrame(cols, index=idx)
+
+    return download, calls
+
+
+def test_retries_with_smaller_chunks_and_reports_failures(tmp_path, monkeypatch):
+    monkeypatch.setattr(bar_store, "_STORE_DIR", tmp_path)
+    download, calls = _fake_download(max_batch=3, gone={"T05"}, flaky={"T07"})
+    monkeypatch.setattr(bd.yf, "download", download)
+    tickers = [f"T{i:02d}" for i in range(12)]
+
+    frames, failed = bd.bulk_download(tickers, chunk=6, workers=3, retries=1)
+    assert list(frames) == [t for t in tickers if t != "T05"]  # 顺序与输入一致
+    assert failed == {"T05": bd.NO_DATA}  # T07 首次无数据，补拉成功
+    assert max(len(b) for b in calls) == 6 and min(len(b) for b in calls) >= 1
+
+    panel = bar_store.open_panel("1d")
+    assert panel is not None and "T00" in panel and "T05" in panel.missing
+
+    # 重试轮数用尽：整块记为请求错误
+    download, _ = _fake_download(max_batch=1)
+    monkeypatch.setattr(bd.yf, "download", download)
+    frames, failed = bd.bulk_download(tickers[:4], chunk=4, retries=1, write_store=False)
+    assert frames == {} and set(failed) == set(tickers[:4])
+    assert all(r == "Too Many Requests" for r in failed.values())
+
+
+def test_serial_on_yfinance_with_shared_download_state(monkeypatch):
+    monkeypatch.setattr(bd, "_CONCURRENT_SAFE", False)
+    active, peak = [0], [0]
+    lock = threading.Lock()
+    download, _ = _fake_download(max_batch=10)
+
+    def tracked(batch, **kwargs):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        try:
+            return download(batch, **kwargs)
+        finally:
+            with lock:
+                active[0] -= 1
+
+    monkeypatch.setattr(bd.yf, "download", tracked)
+    frames, failed = bd.bulk_download([f"T{i:02d}" for i in range(12)], chunk=2, workers=4, write_store=False)
+    assert len(frames) == 12 and not failed
+    assert peak[0] == 1
+
+
+def test_intraday_bars_stored_as_utc(tmp_path, monkeypatch):
+    monkeypatch.setattr(bar_store, "_STORE_DIR", tmp_path)
+    seen = []
+
+    def download(batch, **kwargs):
+        seen.append(kwargs["ignore_tz"])
+        idx = pd.date_range("2024-06-03 09:30", periods=12, freq="5min", tz="America/New_York")
+        if kwargs["ignore_tz"]:
+            idx = idx.tz_localize(None)  # yfinance ignore_tz=True：本地墙钟时间
+        return pd.DataFrame({(t, f): np.arange(12.0) + 1 for t in batch for f in ("Open", "High", "Low", "Close", "Volume")}, index=idx)
+
+    monkeypatch.setattr(bd.yf, "download", download)
+    frames, _ = bd.bulk_download(["AAA"], period="5d", interval="5m")
+    assert seen == [False]
+    assert frames["AAA"].index[0] == pd.Timestamp("2024-06-03 13:30")  # 无时区 UTC
+    assert bar_store.open_panel("5m").index[0] == pd.Timestamp("2024-06-03 13:30")
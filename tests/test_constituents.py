@@ -0,0 +1,80 @@
+"""data.constituents：成分快照落盘、过期后台刷新、diff 记录与时点成分（替换抓取函数，临时目录）。"""
+import json
+import time
+
+import data.constituents as cons
+import data.universe as universe
+from config.tickers import get_report_tickers
+
+
+def test_snapshots_refresh_and_diffs(tmp_path, monkeypatch):
+    monkeypatch.setattr(cons, "CONSTITUENTS_DIR", tmp_path)
+    members = [f"N{i:03d}" for i in range(100)]
+    calls = []
+
+    def fake_fetch():
+        calls.append(1)
+        return list(members)
+
+    monkeypatch.setattr(universe, "get_nasdaq100_tickers_from_web", fake_fetch)
+
+    # 首次：同步抓取并落盘；之后只读本地
+    assert get_report_tickers(limit=3, market="us", pool="nasdaq100") == ["N000", "N001", "N002"]
+    assert get_report_tickers(limit=3, market="us", pool="nasdaq100") == ["N000", "N001", "N002"]
+    assert len(calls) == 1 and len(cons.list_snapshots("nasdaq100")) == 1
+
+    # 成分变化：同日刷新覆盖当日快照并记 diff；未变化只更新 checked_at
+    first = cons.load_snapshot("nasdaq100")
+    snap_path = tmp_path / "nasdaq100" / f"{first['date']}.json"
+    snap_path.rename(tmp_path / "nasdaq100" / "2024-01-02.json")
+    members[:] = members[1:] + ["NEW"]
+    assert cons.refresh("nasdaq100")[-1] == "NEW"
+    assert cons.load_diffs("nasdaq100") == [
+        {
+            "date": first["date"],
+            "prev_date": "2024-01-02",
+            "source": "get_nasdaq100_tickers_from_web",
+            "added": ["NEW"],
+            "removed": ["N000"],
+        }
+    ]
+    checked = cons.load_snapshot("nasdaq100")["checked_at"]
+    time.sleep(0.01)
+    cons.refresh("nasdaq100")
+    assert len(cons.load_diffs("nasdaq100")) == 1 and cons.load_snapshot("nasdaq100")["checked_at"] > checked
+    # 只是顺序变化：不算成分变化，沿用旧顺序
+    order = list(members)
+    members.reverse()
+    assert cons.refresh("nasdaq100") == order
+    assert len(cons.load_diffs("nasdaq100")) == 1 and cons.load_snapshot("nasdaq100")["tickers"] == order
+    members.reverse()
+
+    # 时点成分
+    assert cons.members_at("nasdaq100", "2024-06-30")[0] == "N000"
+    assert cons.members_at("nasdaq100", "2023-12-31") is None
+
+    # 过期：先返回旧快照，后台刷新
+    members[0] = "ONLY"
+    n_calls = len(calls)
+    got = cons.get_constituents("nasdaq100", max_age_sec=-1)
+    assert got[0] == "N001"
+    for _ in range(100):
+        if len(calls) > n_calls and not cons._INFLIGHT:
+            break
+        time.sleep(0.01)
+    assert cons.get_constituents("nasdaq100")[0] == "ONLY"
+
+
+def test_fetch_failure_falls_back(tmp_path, monkeypatch):
+    monkeypatch.setattr(cons, "CONSTITUENTS_DIR", tmp_path)
+    monkeypatch.setattr(universe, "get_hangseng_tickers_from_web", lambda: None)
+    assert cons.get_constituents("hsi") is None
+    assert len(get_report_tickers(limit=5, market="hk", pool="hsi")) == 5  # 静态列表
+    assert not (tmp_path / "hsi").exists()
+    assert cons.get_constituents("unknown") is None
+    # 快照文件损坏时视为无快照
+    (tmp_path / "hsi").mkdir()
+    (tmp_path / "hsi" / "2024-01-02.json").write_text("{", encoding="utf-8")
+    monkeypatch.setattr(universe, "get_hangseng_tickers_from_web", lambda: ["0700.HK"] * 12)
+    assert cons.get_constituents("hsi") == ["0700.HK"]
+    assert json.loads((tmp_path / "hsi" / f"{time.strftime('%Y-%m-%d')}.json").read_text())["source"]
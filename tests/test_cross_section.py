@@ -0,0 +1,58 @@
+"""agents.cross_section：池内分位与定量基准线的相对强弱微调（合成数据，不联网）。"""
+import numpy as np
+import pandas as pd
+
+import utils.yf_cache as yf_cache
+from agents.cross_section import cross_section_ranks, cross_section_text, pool_cross_section
+from agents.score_baseline import compute_quant_baseline
+
+
+def _summary(r20, vr, dh, atr):
+    return {
+        "ok": True,
+        "momentum_summary": {"return_20d_pct": r20, "return_60d_pct": None, "dist_to_52w_high_pct": dh},
+        "volume_context": {"volume_ratio": vr} if vr is not None else None,
+        "tech_levels": {"atr_pct": atr},
+    }
+
+
+def test_ranks_across_pool():
+    summaries = {f"T{i}": _summary(float(i), 1.0 + i / 10, -float(i), 2.0) for i in range(5)}
+    summaries["T4"]["volume_context"] = None
+    summaries["BAD"] = {"ok": False}
+    ranks = cross_section_ranks(summaries)
+
+    assert set(ranks) == {f"T{i}" for i in range(5)}
+    assert ranks["T4"]["momentum_20d"] == 100.0 and ranks["T0"]["momentum_20d"] == 20.0
+    assert ranks["T0"]["dist_to_high"] == 100.0
+    assert ranks["T4"]["volume_ratio"] is None and ranks["T3"]["volume_ratio"] == 100.0
+    assert ranks["T2"]["atr_pct"] == 60.0  # 并列取平均
+    assert ranks["T2"]["momentum_60d"] is None and ranks["T2"]["pool_size"] == 5
+    assert "池内 5 只" in cross_section_text(ranks["T4"])
+    assert cross_section_ranks({"A": summaries["T0"]}) == {}  # 池太小不输出
+
+
+def test_baseline_uses_cross_section():
+    technical = {"ok": True, "momentum_summary": {"return_20d_pct": 3.0}}
+    base, _ = compute_quant_baseline(technical, {}, {})
+    strong, note = compute_quant_baseline(technical, {}, {}, {"momentum_20d": 95.0, "dist_to_high": 90.0})
+    weak, _ = compute_quant_baseline(technical, {}, {}, {"momentum_20d": 10.0, "atr_pct": 95.0})
+    assert strong == base + 5 and "池内动量分位95+3" in note
+    assert weak == base - 5
+
+
+def test_pool_cross_section_from_cached_bars(monkeypatch):
+    def fake_history(ticker, period="6mo", interval="1d", prepost=False):
+        drift = {"UP": 0.01, "FLAT": 0.0, "DOWN": -0.01}[ticker[:-1]]
+        rng = np.random.default_rng(len(ticker) + ord(ticker[-1]))
+        c = 100 * np.exp(np.cumsum(drift + rng.normal(0, 0.005, 120)))
+        idx = pd.date_range("2024-01-02", periods=120, freq="B")
+        return pd.DataFrame({"High": c * 1.01, "Low": c * 0.99, "Close": c, "Volume": 1e6}, index=idx)
+
+    monkeypatch.setattr(yf_cache, "get_history", fake_history)
+    tickers = [f"{k}{i}" for k in ("UP", "FLAT", "DOWN") for i in range(2)]
+    ranks = pool_cross_section(tickers)
+    assert set(ranks) == set(tickers)
+    assert min(ranks["UP0"]["momentum_20d"], ranks["UP1"]["momentum_20d"]) > max(
+        ranks["DOWN0"]["momentum_20d"], ranks["DOWN1"]["momentum_20d"]
+    )
@@ -0,0 +1,51 @@
+"""data.earnings_calendar：本地读取、到期刷新与财报缓存失效时间点（临时 DB，替换拉取函数）。"""
+import time
+from datetime import date, timedelta
+
+import data.earnings_calendar as ec
+import utils.yf_cache as yf_cache
+
+
+def _setup(tmp_path, monkeypatch, dates):
+    monkeypatch.setattr(yf_cache, "_DB_PATH", tmp_path / "cache.db")
+    calls = []
+
+    def fake_fetch(ticker):
+        calls.append(ticker)
+        return dates
+
+    monkeypatch.setattr(ec, "_fetch_dates", fake_fetch)
+    return calls
+
+
+def test_get_earnings_reads_locally_until_due(tmp_path, monkeypatch):
+    nxt = (date.today() + timedelta(days=30)).strftime("%Y-%m-%d")
+    last = (date.today() - timedelta(days=60)).strftime("%Y-%m-%d")
+    calls = _setup(tmp_path, monkeypatch, (nxt, last))
+    assert ec.get_earnings("aapl") == {"next_earnings": nxt, "last_earnings": last}
+    assert ec.get_earnings("AAPL")["next_earnings"] == nxt
+    assert calls == ["AAPL"]
+    assert ec.due_tickers(["AAPL", "MSFT"]) == ["MSFT"]
+    assert ec.refresh_calendar(["AAPL", "MSFT"]) == 1
+
+
+def test_refresh_due_after_next_earnings_date(tmp_path, monkeypatch):
+    nxt = (date.today() + timedelta(days=2)).strftime("%Y-%m-%d")
+    _setup(tmp_path, monkeypatch, (nxt, None))
+    ec.refresh_ticker("NVDA")
+    refresh_after = ec.calendar_rows(["NVDA"])[0]["refresh_after"]
+    assert refresh_after <= ec._date_ts(nxt) + 86400
+    assert refresh_after < time.time() + ec.EARNINGS_CALENDAR_TTL_DAYS * 86400
+
+
+def test_financials_not_before_invalidates_old_cache(tmp_path, monkeypatch):
+    last = (date.today() - timedelta(days=10)).strftime("%Y-%m-%d")
+    _setup(tmp_path, monkeypatch, (None, last))
+    assert ec.financials_not_before("TSLA") is None
+    ec.refresh_ticker("TSLA")
+    nb = ec.financials_not_before("TSLA")
+    assert nb == ec._date_ts(last) + 86400
+    yf_cache.put_financials_interpretation("TSLA", "d1", "解读")
+    assert yf_cache.get_financials_interpretation_cached("TSLA", "d1", not_before=nb) == "解读"
+    assert yf_cache.get_financials_interpretation_cached("TSLA", "d2", not_before=nb) is None
+    assert yf_cache.get_financials_interpretation_cached("TSLA", "d1", not_before=time.time() + 1) is None
@@ -0,0 +1,88 @@
+"""data.factor_store：逐日因子与逐日摘要 + 定量基准一致，分区读写与前瞻收益（临时目录，合成数据）。"""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import data.factor_store as fs
+from agents.score_baseline import compute_quant_baseline
+from agents.technical import summarize_ohlcv
+
+_FIXTURE = Path(__file__).parent / "fixtures" / "ohlcv_daily.csv"
+
+
+def _daily():
+    return pd.read_csv(_FIXTURE, index_col="Date", parse_dates=True)
+
+
+def test_factors_match_daily_summary():
+    df = _daily().iloc[:160]
+    other = df.iloc[30:].copy()
+    other[["Open", "High", "Low", "Close"]] *= 0.5  # 不同起点的第二只
+    panel = fs.compute_factor_panel({"AAA": df, "BBB.HK": other})
+
+    assert np.isnan(panel["close"]["AAA"].iloc[58]) and not np.isnan(panel["close"]["AAA"].iloc[59])
+    for ticker, frame in (("AAA", df), ("BBB.HK", other)):
+        for k in range(60, len(frame) + 1, 7):
+            s = summarize_ohlcv(frame.iloc[:k], "1d")
+            ts = frame.index[k - 1]
+            row = {key: panel[key].at[ts, ticker] for key in fs.FACTOR_COLUMNS}
+            assert row["tech_baseline"] == compute_quant_baseline(s, {}, {})[0]
+            assert bool(row["long_align"]) == bool(s["daily_long_align"])
+            assert bool(row["golden_cross"]) == bool(s["macd_summary"]["golden_cross"])
+            assert row["rsi"] == s["rsi_summary"]["rsi"]
+            assert row["volume_ratio"] == s["volume_context"]["volume_ratio"]
+            assert row["dist_to_high_pct"] == s["momentum_summary"]["dist_to_52w_high_pct"]
+            div = s["divergence_summary"]
+            assert bool(row["div_top"]) == bool(div["macd_top"] or div["rsi_top"])
+
+
+def test_backfill_append_and_load(tmp_path, monkeypatch):
+    monkeypatch.setattr(fs, "_STORE_DIR", tmp_path)
+    df = _daily().iloc[:100]
+    assert fs.backfill({"AAA": df.iloc[:90], "BBB.HK": df.iloc[:90]}) == 2 * 31
+    assert fs.backfill({"AAA": df.iloc[:90]}) == 0  # 已存在的分区不改写
+    assert fs.append_daily({"AAA": df.iloc[:91]}) == 1
+    assert fs.append_daily({"AAA": df.iloc[:91]}) == 0
+    assert len(fs.list_partitions("us")) == 32 and len(fs.list_partitions("hk")) == 31
+
+    out = fs.load_factors(market="us", columns=["rsi", "tech_baseline"], forward=(1, 5))
+    assert list(out.columns) == ["rsi", "tech_baseline", "fwd_ret_1d", "fwd_ret_5d"]
+    closes = df["Close"].iloc[59:91].to_numpy()
+    np.testing.assert_allclose(out["fwd_ret_1d"].to_numpy()[:-1], (closes[1:] / closes[:-1] - 1) * 100)
+    assert out["fwd_ret_5d"].isna().sum() == 5
+
+    # 区间截止时前瞻收益仍使用截止日之后的分区
+    day = str(df.index[70].date())
+    one = fs.load_factors(start=day, end=day, tickers=["aaa"], forward=(1,))
+    assert len(one) == 1 and not np.isnan(one["fwd_ret_1d"].iloc[0])
+    assert fs.load_factors(start="2030-01-01").empty
+
+
+def test_second_pool_same_market_merges(tmp_path, monkeypatch):
+    monkeypatch.setattr(fs, "_STORE_DIR", tmp_path)
+    df = _daily().iloc[:80]
+    other = df.copy()
+    other[["Open", "High", "Low", "Close"]] *= 2
+    # 沪深300 先写当日分区，中证2000 随后追加同市场同日
+    assert fs.append_daily({"600000.SS": df}) == 1
+    before = fs.load_factors(market="cn", forward=())
+    assert fs.append_daily({"000001.SZ": other, "600000.SS": other}) == 1
+    assert fs.append_daily({"000001.SZ": other}) == 0
+    out = fs.load_factors(market="cn", forward=())
+    assert sorted(out.index.get_level_values("ticker")) == ["000001.SZ", "600000.SS"]
+    # 已有标的的行不改写
+    assert out.loc[(slice(None), "600000.SS"), "close"].iloc[0] == before["close"].iloc[0]
+
+
+def test_forward_returns_use_each_tickers_calendar(tmp_path, monkeypatch):
+    monkeypatch.setattr(fs, "_STORE_DIR", tmp_path)
+    df = _daily().iloc[:75]
+    us = df.drop(df.index[65])  # 美股休市日：只有港股有该日分区
+    fs.backfill({"AAA": us, "BBB.HK": df})
+    out = fs.load_factors(columns=["close"], forward=(1, 3))  # market=None：两市场日期并集
+    aaa = out.xs("AAA", level="ticker")
+    closes = aaa["close"].to_numpy()
+    np.testing.assert_allclose(aaa["fwd_ret_1d"].to_numpy()[:-1], (closes[1:] / closes[:-1] - 1) * 100)
+    np.testing.assert_allclose(aaa["fwd_ret_3d"].to_numpy()[:-3], (closes[3:] / closes[:-3] - 1) * 100)
+    assert aaa["fwd_ret_1d"].isna().sum() == 1
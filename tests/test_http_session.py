@@ -0,0 +1,30 @@
+"""utils.http_session：共享会话复用、默认超时与连接池配置（不联网）。"""
+import requests
+
+import utils.http_session as http_session
+
+
+def test_get_session_reused_and_default_timeout(monkeypatch):
+    http_session.close_sessions()
+    seen = {}
+
+    def fake_request(self, method, url, **kwargs):
+        seen.update(kwargs)
+        return "ok"
+
+    monkeypatch.setattr(requests.Session, "request", fake_request)
+    s = http_session.get_session("t", timeout=7)
+    assert http_session.get_session("t") is s
+    assert s.get("http://example.invalid") == "ok"
+    assert seen["timeout"] == 7
+    s.get("http://example.invalid", timeout=3)
+    assert seen["timeout"] == 3
+    http_session.close_sessions()
+
+
+def test_session_pool_size():
+    http_session.close_sessions()
+    s = http_session.get_session("pool", pool_maxsize=4)
+    adapter = s.get_adapter("https://api.nasdaq.com")
+    assert adapter._pool_maxsize == 4
+    http_session.close_sessions()
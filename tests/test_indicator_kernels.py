@@ -0,0 +1,41 @@
+"""agents.indicator_kernels：numpy 内核与 ta 库在录制行情（tests/fixtures，含平盘段与零成交量）上逐指标一致。"""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents.technical import _indicator_series, summarize_ohlcv
+import agents.technical as technical
+
+_FIXTURES = Path(__file__).parent / "fixtures"
+# ewm / 极值 / OBV 逐位一致；滚动均值与标准差的求和顺序不同，差异在浮点舍入误差内
+_EXACT = {"macd", "macd_signal", "macd_diff", "rsi", "obv"}
+
+
+def _load(name):
+    return pd.read_csv(_FIXTURES / name, index_col=0, parse_dates=True)
+
+
+@pytest.mark.parametrize("name", ["ohlcv_daily.csv", "ohlcv_5m.csv"])
+def test_kernels_match_ta(name):
+    df = _load(name)
+    args = (df["Close"], df["High"], df["Low"], df["Volume"])
+    ref = _indicator_series(*args, backend="ta")
+    got = _indicator_series(*args, backend="numpy")
+    assert set(got) == set(ref)
+    for key, expected in ref.items():
+        if key in _EXACT:
+            np.testing.assert_array_equal(got[key], expected, err_msg=key)
+        else:
+            np.testing.assert_allclose(got[key], expected, rtol=1e-12, atol=1e-9, equal_nan=True, err_msg=key)
+
+
+@pytest.mark.parametrize("name,interval", [("ohlcv_daily.csv", "1d"), ("ohlcv_5m.csv", "5m")])
+def test_summary_same_for_both_backends(name, interval, monkeypatch):
+    df = _load(name)
+    for end in (80, 150, 158, len(df)):
+        monkeypatch.setattr(technical, "TECH_INDICATOR_BACKEND", "ta")
+        ref = summarize_ohlcv(df.iloc[:end], interval)
+        monkeypatch.setattr(technical, "TECH_INDICATOR_BACKEND", "numpy")
+        assert summarize_ohlcv(df.iloc[:end], interval) == ref, end
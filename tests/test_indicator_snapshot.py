@@ -0,0 +1,33 @@
+"""data.indicator_snapshot：面板引擎刷新快照后按条件查询（临时 DB，合成数据）。"""
+import numpy as np
+import pandas as pd
+
+import data.indicator_snapshot as snap
+import utils.yf_cache as yf_cache
+
+
+def _trend(n, drift, seed):
+    rng = np.random.default_rng(seed)
+    c = 100 * np.exp(np.cumsum(drift + rng.normal(0, 0.005, n)))
+    idx = pd.date_range("2024-01-02", periods=n, freq="B")
+    return pd.DataFrame({"High": c * 1.01, "Low": c * 0.99, "Close": c, "Volume": rng.integers(1, 9, n) * 1e5}, index=idx)
+
+
+def test_refresh_and_query(tmp_path, monkeypatch):
+    monkeypatch.setattr(yf_cache, "_DB_PATH", tmp_path / "cache.db")
+    frames = {"UP": _trend(120, 0.01, 1), "DOWN": _trend(120, -0.01, 2), "SHORT": _trend(20, 0.0, 3)}
+    assert snap.refresh_from_frames(frames) == 2  # SHORT 数据不足不写入
+
+    up = snap.get_snapshot("up")
+    assert up["long_align"] is True and up["trend_ma"]["ma60"] is not None
+    assert [r["ticker"] for r in snap.query_snapshot(long_align=True)] == ["UP"]
+    assert [r["ticker"] for r in snap.query_snapshot(rsi_max=40)] == ["DOWN"]
+    assert [r["ticker"] for r in snap.query_snapshot(order_by="-return_20d_pct")] == ["UP", "DOWN"]
+    assert len(snap.query_snapshot(limit=1, offset=1)) == 1
+    assert snap.query_snapshot(interval="5m") == []
+
+    # 再次刷新覆盖同一行
+    frames["UP"] = _trend(120, -0.01, 4)
+    snap.refresh_from_frames({"UP": frames["UP"]})
+    assert snap.get_snapshot("UP")["long_align"] is False
+    assert len(snap.query_snapshot()) == 2
@@ -0,0 +1,76 @@
+"""agents.indicator_stream：增量指标与全量计算逐值一致、状态持久化后按新 K 线推进（临时 DB）。"""
+import json
+
+import numpy as np
+import pandas as pd
+
+import agents.indicator_stream as stream
+import utils.yf_cache as yf_cache
+from agents.technical import _indicator_series, summarize_ohlcv
+
+
+def _ohlcv(n=300, seed=3):
+    rng = np.random.default_rng(seed)
+    c = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    c[40:45] = c[40]  # 平盘段（滚动窗口内全部相同值）
+    h = c * (1 + rng.uniform(0, 0.01, n))
+    l = c * (1 - rng.uniform(0, 0.01, n))
+    v = rng.integers(1_000, 100_000, n).astype(float)
+    idx = pd.date_range("2024-03-01 09:30", periods=n, freq="5min", tz="America/New_York")
+    return pd.DataFrame({"Open": c, "High": h, "Low": l, "Close": c, "Volume": v}, index=idx)
+
+
+def test_stream_matches_batch_indicators():
+    df = _ohlcv()
+    ind = _indicator_series(df["Close"], df["High"], df["Low"], df["Volume"])
+    st = stream.TechnicalStream()
+    for i, (h, l, c, v) in enumerate(df[["High", "Low", "Close", "Volume"]].to_numpy()):
+        st.update(i, h, l, c, v)
+        for key, series in ind.items():
+            assert np.allclose(st.last[key], series[i], rtol=1e-12, atol=1e-9, equal_nan=True), (i, key)
+    restored = stream.TechnicalStream.from_dict(json.loads(json.dumps(st.to_dict())))
+    assert json.dumps(restored.to_dict()) == json.dumps(st.to_dict())
+
+
+def test_stream_summary_incremental(tmp_path, monkeypatch):
+    monkeypatch.setattr(yf_cache, "_DB_PATH", tmp_path / "cache.db")
+    stream.clear_live_states()
+    df = _ohlcv()
+    for end in (200, 201, 230, 300):
+        hist = df.iloc[:end]
+        assert stream.stream_summary("AAPL", hist, "5m", False, "5d") == summarize_ohlcv(hist, "5m", False)
+    # 状态留在进程内，按间隔写回；flush 后可从库中恢复
+    assert stream.load_state("AAPL", "5m", False, "5d").n_bars == 199
+    assert stream.flush_states() == 1
+    assert stream.load_state("AAPL", "5m", False, "5d").n_bars == 299
+
+    # 新进程：从库中恢复后继续推进
+    stream.clear_live_states()
+    assert stream.stream_summary("AAPL", df, "5m", False, "5d") == summarize_ohlcv(df, "5m", False)
+    assert stream.flush_states() == 0
+
+    # 窗口起点后移（yfinance 滚动周期）时从新起点重建；不同 period 各自一份状态
+    hist = df.iloc[20:]
+    assert stream.stream_summary("AAPL", hist, "5m", False, "1mo") == summarize_ohlcv(hist, "5m", False)
+    stream.flush_states()
+    assert stream.load_state("AAPL", "5m", False, "1mo").n_bars == len(hist) - 1
+    assert stream.load_state("AAPL", "5m", False, "5d").n_bars == 299
+
+
+def test_copy_is_independent():
+    df = _ohlcv(80)
+    st = stream.TechnicalStream()
+    for i, (h, l, c, v) in enumerate(df[["High", "Low", "Close", "Volume"]].to_numpy()):
+        st.update(i, h, l, c, v)
+    snapshot = json.dumps(st.to_dict())
+    live = st.copy()
+    live.update(999, 1.0, 1.0, 1.0, 1.0)
+    assert json.dumps(st.to_dict()) == snapshot and live.n_bars == st.n_bars + 1
+
+
+def test_stream_enabled_intervals(monkeypatch):
+    assert stream.stream_enabled("5m") and stream.stream_enabled("1m") and not stream.stream_enabled("15m")
+    monkeypatch.setattr(stream, "TECH_STREAM_INTRADAY", "1")
+    assert stream.stream_enabled("15m")
+    monkeypatch.setattr(stream, "TECH_STREAM_INTRADAY", "0")
+    assert not stream.stream_enabled("5m")
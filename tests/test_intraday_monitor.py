@@ -0,0 +1,56 @@
+"""data.intraday_monitor：首轮只建基线，信号翻转才产生事件并升级 LLM（替换行情函数，临时 DB）。"""
+import numpy as np
+import pandas as pd
+
+import data.intraday_monitor as im
+import utils.yf_cache as yf_cache
+
+
+def _bars(n, last_close=None):
+    rng = np.random.default_rng(8)
+    c = 100 + np.cumsum(rng.normal(0, 0.05, n))
+    if last_close is not None:
+        c[-1] = last_close
+    idx = pd.date_range("2024-06-03 09:30", periods=n, freq="5min", tz="America/New_York")
+    v = np.full(n, 1000.0)
+    v[-1] = 5000.0
+    return pd.DataFrame({"Open": c, "High": c + 0.02, "Low": c - 0.02, "Close": c, "Volume": v}, index=idx)
+
+
+def test_events_only_on_flips(tmp_path, monkeypatch):
+    monkeypatch.setattr(yf_cache, "_DB_PATH", tmp_path / "cache.db")
+    frames = {"AAPL": _bars(80)}
+    monkeypatch.setattr(im, "_get_history", lambda t, **k: frames[t])
+    escalated = []
+    monitor = im.IntradayMonitor(["AAPL"], escalate=lambda t: escalated.append(t) or {"action": "买入"})
+
+    assert monitor.poll_once() == []  # 基线
+    assert monitor.poll_once() == []  # 无变化
+    base = monitor.state["AAPL"]
+
+    frames["AAPL"] = _bars(81, last_close=110.0)  # 新 K 线放量突破
+    events = monitor.poll_once()
+    flipped = {e["signal"] for e in events}
+    assert {"breakout_20", "volume_breakout"} <= flipped
+    assert all(base[e["signal"]] != e["on"] for e in events)
+    assert escalated == ["AAPL"] and events[0]["analysis"] == {"action": "买入"}
+    assert events[0]["volume_ratio"] > 1.5
+
+
+def test_forming_bar_not_evaluated(tmp_path, monkeypatch):
+    monkeypatch.setattr(yf_cache, "_DB_PATH", tmp_path / "cache.db")
+    frames = {"AAPL": _bars(80)}
+    monkeypatch.setattr(im, "_get_history", lambda t, **k: frames[t])
+    monitor = im.IntradayMonitor(["AAPL"], escalate=None)
+    assert monitor.poll_once() == []
+
+    # 第 81 根尚未走完：盘中突破不算，last_ts 仍为上一根
+    frames["AAPL"] = _bars(81, last_close=110.0)
+    forming = frames["AAPL"].index[-1]
+    monkeypatch.setattr(im, "_now", lambda: forming.tz_convert("UTC") + pd.Timedelta(minutes=2))
+    assert monitor.poll_once() == []
+    assert monitor.evaluate("AAPL")["last_ts"] == str(frames["AAPL"].index[-2])
+
+    # 收盘后才报翻转
+    monkeypatch.setattr(im, "_now", lambda: forming.tz_convert("UTC") + pd.Timedelta(minutes=5))
+    assert {"breakout_20", "volume_breakout"} <= {e["signal"] for e in monitor.poll_once()}
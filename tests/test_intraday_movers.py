@@ -0,0 +1,77 @@
+"""data.intraday_movers：分时量比、增量取数与跨轮去重（替换下载函数，临时 DB / 面板目录）。"""
+import numpy as np
+import pandas as pd
+
+import data.intraday_movers as imv
+import data.us_movers_scan as ms
+import utils.bar_store as bar_store
+import utils.yf_cache as yf_cache
+
+_DAYS = pd.bdate_range("2024-06-03", periods=8)
+
+
+def _session(day, n=78, open_vol=50_000.0, vol=5_000.0, start=100.0, drift=0.0):
+    idx = pd.date_range(day + pd.Timedelta(hours=9, minutes=30), periods=n, freq="5min")
+    c = start * (1 + drift * np.arange(1, n + 1) / n)
+    v = np.full(n, vol)
+    v[:6] = open_vol  # 开盘半小时天然放量
+    return pd.DataFrame({"Open": c, "High": c * 1.001, "Low": c * 0.999, "Close": c, "Volume": v}, index=idx)
+
+
+def _history(today_bars=12, today_vol=5_000.0, today_open_vol=50_000.0, drift=0.0):
+    parts = [_session(d) for d in _DAYS[:-1]]
+    parts.append(_session(_DAYS[-1], n=today_bars, open_vol=today_open_vol, vol=today_vol, drift=drift))
+    return pd.concat(parts)
+
+
+def test_rvol_matches_time_of_day():
+    # 开盘量和往常一样大、价格大涨：分时量比 ≈ 1，不算放量
+    normal = _history(today_bars=3, drift=0.05)
+    assert imv.eval_intraday_mover(normal, min_avg_dollar_volume=0, min_rvol=1.5) is None
+    m = imv.eval_intraday_mover(normal, min_avg_dollar_volume=0, min_rvol=0)
+    assert m["rvol"] == 1.0 and m["change_pct"] > 3 and m["session"] == f"{_DAYS[-1]:%Y-%m-%d}"
+
+    hot = _history(today_bars=12, today_vol=20_000.0, today_open_vol=150_000.0, drift=0.05)
+    m = imv.eval_intraday_mover(hot, min_avg_dollar_volume=0)
+    assert m is not None and m["rvol"] > 2 and m["bar_time"] == "10:25"
+    assert imv.eval_intraday_mover(hot.loc[hot.index >= _DAYS[-4]], min_avg_dollar_volume=0) is None  # 历史不足
+
+
+def test_scanner_incremental_and_dedup(tmp_path, monkeypatch):
+    monkeypatch.setattr(bar_store, "_STORE_DIR", tmp_path / "bars")
+    monkeypatch.setattr(yf_cache, "_DB_PATH", tmp_path / "cache.db")
+    data = {"HOT": _history(today_vol=20_000.0, today_open_vol=150_000.0, drift=0.05), "FLAT": _history()}
+    calls = []
+
+    def fake_bulk(tickers, period="6mo", interval="1d", chunk=60, write_store=True, **kwargs):
+        calls.append((period, interval, sorted(tickers)))
+        frames = {t: data[t] for t in tickers}
+        if period == "2d":
+            frames = {t: f[f.index >= _DAYS[-2]] for t, f in frames.items()}
+        return frames, {}
+
+    monkeypatch.setattr(ms, "bulk_download", fake_bulk)
+    rules = dict(min_avg_dollar_volume=0)
+    scanner = imv.IntradayMoversScanner(["HOT", "FLAT"], interval="5m", **rules)
+
+    rows = scanner.scan_once()
+    assert [r["ticker"] for r in rows] == ["HOT"] and calls == [("1mo", "5m", ["FLAT", "HOT"])]
+    # 未推送成功（失败 / dry-run）不登记：下一轮仍是候选
+    scanner.run(poll_sec=0, on_alerts=lambda rows: False, max_cycles=1)
+    assert [r["ticker"] for r in scanner.scan_once()] == ["HOT"]
+    sent = []
+    scanner.run(poll_sec=0, on_alerts=lambda rows: sent.extend(rows) or True, max_cycles=1)
+    assert [r["ticker"] for r in sent] == ["HOT"]
+
+    # 下一轮：只拉最近 2 天；已推送过的不再重复
+    data["HOT"] = _history(today_bars=13, today_vol=20_000.0, today_open_vol=150_000.0, drift=0.05)
+    calls.clear()
+    assert scanner.scan_once() == []
+    assert calls == [("2d", "5m", ["FLAT", "HOT"])]
+    assert len(bar_store.open_panel("5m-movers").frame("HOT")) == len(data["HOT"])
+
+    # 进程重启后仍去重；FLAT 新放量则推送
+    data["FLAT"] = _history(today_bars=13, today_vol=30_000.0, today_open_vol=150_000.0, drift=0.04)
+    rows = imv.IntradayMoversScanner(["HOT", "FLAT"], interval="5m", **rules).scan_once()
+    assert [r["ticker"] for r in rows] == ["FLAT"]
+    assert imv.IntradayMoversScanner.claim(rows) == rows and imv.IntradayMoversScanner.claim(rows) == []
@@ -0,0 +1,49 @@
+"""data.universe 市值排名：并发拉取、持久化按日复用、全部成分参与排名；utils.rate_limit 令牌桶（替换 info 函数，临时 DB）。"""
+import threading
+import time
+
+import data.universe as universe
+import utils.yf_cache as yf_cache
+from utils.rate_limit import RateLimiter
+
+
+def test_ranking_uses_persisted_market_caps(tmp_path, monkeypatch):
+    monkeypatch.setattr(yf_cache, "_DB_PATH", tmp_path / "cache.db")
+    tickers = [f"T{i:03d}" for i in range(300)]
+    monkeypatch.setattr(universe, "_get_sp500_tickers", lambda: list(tickers))
+    monkeypatch.setattr(universe, "_batch_returns", lambda ts, period="1mo": {t: 0.0 for t in ts})
+    calls, threads = [], set()
+
+    def fake_info(t):
+        calls.append(t)
+        threads.add(threading.get_ident())
+        time.sleep(0.002)
+        if t == "T007":
+            return {}  # 请求失败：不持久化
+        return {"marketCap": float(int(t[1:]))} if t != "T005" else {"longName": "无市值"}
+
+    monkeypatch.setattr(yf_cache, "get_info", fake_info)
+    top = universe.get_top_by_market_cap_and_growth(n=5, growth_weight=0.0)
+    assert top == ["T299", "T298", "T297", "T296", "T295"]  # 第 250 只之后的也参与排名
+    assert sorted(calls) == tickers and len(threads) > 1
+
+    # 排名缓存失效后重排：只重试请求失败的那只，市值来自持久化表
+    calls.clear()
+    universe.clear_universe_cache()
+    assert universe.get_top_by_market_cap_and_growth(n=3, growth_weight=0.0) == ["T299", "T298", "T297"]
+    assert calls == ["T007"]
+    caps = universe.get_market_caps(["T005", "T010"])
+    assert caps == {"T005": None, "T010": 10.0}
+
+    # 过期后整体重拉
+    calls.clear()
+    assert universe.get_market_caps(["T010"], max_age_sec=-1) == {"T010": 10.0} and calls == ["T010"]
+
+
+def test_rate_limiter_spaces_requests():
+    limiter = RateLimiter(rate=50, burst=1)
+    started = time.monotonic()
+    for _ in range(6):
+        limiter.acquire()
+    assert time.monotonic() - started >= 5 / 50 * 0.9
+    assert RateLimiter(rate=0).acquire() == 0.0
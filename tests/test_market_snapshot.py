@@ -0,0 +1,39 @@
+"""data.market_snapshot：快照缓存与代码转换（替换拉取函数，不联网）。"""
+import data.market_snapshot as ms
+
+
+def test_spot_quote_cached_per_interval(monkeypatch):
+    calls = []
+
+    def fake_cn():
+        calls.append(1)
+        return None, {"600519.SS": {"price": 1500.0, "change_pct": 1.2, "volume": 1e6, "volume_ratio": 1.1, "market_cap": 1.9e12}}
+
+    monkeypatch.setitem(ms._FETCHERS, "cn", fake_cn)
+    ms.clear_snapshots()
+    assert ms.get_spot_quote("600519.ss")["price"] == 1500.0
+    assert ms.get_spot_quote("000001.SZ") is None
+    assert ms.get_spot_quote("AAPL") is None
+    assert len(calls) == 1
+    ms.clear_snapshots()
+
+
+def test_fetch_failure_cached_as_empty(monkeypatch):
+    calls = []
+
+    def boom():
+        calls.append(1)
+        raise RuntimeError("down")
+
+    monkeypatch.setitem(ms._FETCHERS, "hk", boom)
+    ms.clear_snapshots()
+    assert ms.get_spot_quote("0700.HK") is None
+    assert ms.get_spot_quote("9988.HK") is None
+    assert len(calls) == 1
+    ms.clear_snapshots()
+
+
+def test_hk_code_to_yfinance():
+    assert ms._hk_code_to_yfinance("00700") == "0700.HK"
+    assert ms._hk_code_to_yfinance("09988") == "9988.HK"
+    assert ms._hk_code_to_yfinance("abc") is None
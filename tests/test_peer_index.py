@@ -0,0 +1,63 @@
+"""data.peer_index：从 info 缓存建同行索引、按行业与市值取最近同行、无数据回退（临时 DB，不联网）。"""
+import json
+import time
+
+import data.peer_index as peer_index
+import utils.yf_cache as yf_cache
+from agents.analysis_deep import _get_peers_list
+
+
+def _put_info(ticker, **info):
+    with yf_cache._get_conn() as conn:
+        conn.execute("INSERT OR REPLACE INTO info_cache VALUES (?, ?, ?)", (ticker, time.time(), json.dumps(info)))
+
+
+def test_nearest_peers_by_industry_and_cap(tmp_path, monkeypatch):
+    monkeypatch.setattr(yf_cache, "_DB_PATH", tmp_path / "cache.db")
+    monkeypatch.setattr(peer_index, "_INDEX", None)
+    semis = {"NVDA": 3e12, "AVGO": 1e12, "AMD": 2.5e11, "QCOM": 1.8e11, "INTC": 1e11, "MCHP": 4e10}
+    for t, cap in semis.items():
+        _put_info(t, sector="Technology", industry="Semiconductors", country="United States", marketCap=cap, quoteType="EQUITY")
+    _put_info("TSM", sector="Technology", industry="Semiconductors", country="Taiwan", marketCap=2.6e11, quoteType="EQUITY")
+    _put_info("MSFT", sector="Technology", industry="Software - Infrastructure", country="United States", marketCap=3e12)
+    _put_info("SMH", sector="Technology", industry="Semiconductors", marketCap=2e10, quoteType="ETF")
+    _put_info("JPM", sector="Financial Services", industry="Banks - Diversified", marketCap=6e11)
+
+    # 市值最接近的同行业优先；国家不同有惩罚；ETF 不入索引
+    assert peer_index.nearest_peers("AMD", k=4) == ["QCOM", "INTC", "TSM", "AVGO"]
+    # 行业不足时同板块补齐
+    peers = peer_index.nearest_peers("NVDA", k=8)
+    assert peers[:2] == ["AVGO", "AMD"] and peers[-1] == "MSFT" and "SMH" not in peers and "JPM" not in peers
+
+    # 标的不在缓存中：用传入 info 查询
+    info = {"sector": "Technology", "industry": "Semiconductors", "marketCap": 1.2e11}
+    assert peer_index.nearest_peers("NEWCO", k=2, info=info) == ["INTC", "QCOM"]
+    assert _get_peers_list("NEWCO", info) == ", ".join(peer_index.nearest_peers("NEWCO", info=info))
+
+    # info 缓存变化后重建索引
+    _put_info("ARM", sector="Technology", industry="Semiconductors", country="United States", marketCap=2.4e11)
+    monkeypatch.setattr(peer_index, "_CHECKED_AT", 0)
+    assert peer_index.nearest_peers("AMD", k=1) == ["ARM"]
+
+
+def test_fallback_without_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(yf_cache, "_DB_PATH", tmp_path / "cache.db")
+    monkeypatch.setattr(peer_index, "_INDEX", None)
+    assert peer_index.nearest_peers("AAPL") == []
+    assert "MSFT" in _get_peers_list("AAPL", {"sector": "Technology"})
+    assert "未配置同行" in _get_peers_list("XYZ", {})
+
+
+def test_nan_payloads_do_not_break_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(yf_cache, "_DB_PATH", tmp_path / "cache.db")
+    monkeypatch.setattr(peer_index, "_INDEX", None)
+    _put_info("AAA", sector="Energy", industry="Oil & Gas", marketCap=1e10)
+    # 旧版本写入的非标准 JSON（NaN 字面量）
+    with yf_cache._get_conn() as conn:
+        conn.execute(
+            "INSERT INTO info_cache VALUES (?, ?, ?)",
+            ("BBB", time.time(), json.dumps({"sector": "Energy", "industry": "Oil & Gas", "marketCap": 2e10, "trailingPE": float("nan")})),
+        )
+    assert peer_index.nearest_peers("AAA") == ["BBB"] and peer_index.nearest_peers("BBB") == ["AAA"]
+    # 新写入的 info 不再含 NaN
+    assert json.loads(yf_cache._info_to_json({"pe": float("nan"), "x": [float("inf"), 1.0]})) == {"pe": None, "x": [None, 1.0]}
@@ -0,0 +1,91 @@
+"""data.scan_rules：规则 DSL 编译、与面板异动规则一致、多条扫描共用子表达式（合成数据，不联网）。"""
+import ast
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.scan_rules import ScanPanel, compile_rule, run_scans
+from data.us_movers_scan import eval_us_daily_movers_panel
+
+_IDX = pd.date_range("2024-01-02", periods=80, freq="B")
+
+
+def _frames(n=60, seed=11):
+    rng = np.random.default_rng(seed)
+    frames = {}
+    for i in range(n):
+        k = int(rng.integers(15, 80))
+        c = 50 * np.exp(np.cumsum(rng.normal(0, 0.02, k)))
+        c[-1] *= 1 + rng.uniform(-0.02, 0.12)
+        df = pd.DataFrame(
+            {"Close": c, "High": c * 1.01, "Low": c * 0.99, "Volume": rng.integers(1, 6, k) * 1e6},
+            index=_IDX[-k:],
+        )
+        df.iloc[-1, df.columns.get_loc("Volume")] *= rng.uniform(0.5, 4)
+        if i % 7 == 0:
+            df.iloc[int(rng.integers(0, k - 2)), 0] = np.nan
+        frames[f"T{i}"] = df
+    return frames
+
+
+_MOVERS = (
+    "bars >= 22 and pct_change(1) >= 3 and volume / shift(sma(volume, 20), 1) >= 1.5"
+    " and shift(sma(close * volume, 20), 1) >= 20e6 and close >= shift(highest(high, 20), 1) * 0.9999"
+)
+
+
+def test_dsl_matches_movers_panel():
+    frames = _frames()
+    expected = list(eval_us_daily_movers_panel(frames))
+    hits = run_scans(frames, {"movers": _MOVERS})["movers"]
+    assert expected and hits == expected
+
+
+def test_multiple_scans_share_panel():
+    frames = _frames()
+    panel = ScanPanel(frames)
+    scans = {
+        "up": "pct_change(1) > 0",
+        "not_up": "not pct_change(1) > 0",
+        "top": "rank(pct_change(1)) >= 90",
+        "range": "0 < pct_change(1) < 2 or rsi(14) > 70",
+        "long": "bars >= 60 and close > sma(close, 50) and ema(close, 10) > ema(close, 30) and atr(14) / close < 0.05",
+    }
+    hits = run_scans(panel, scans)
+    assert set(hits["up"]) | set(hits["not_up"]) == set(frames)
+    assert not set(hits["up"]) & set(hits["not_up"])
+    pct = {t: f["Close"].dropna().iloc[-1] / f["Close"].dropna().iloc[-2] - 1 for t, f in frames.items()}
+    top = sorted(pct, key=pct.get)[-len(hits["top"]) :]
+    assert 0 < len(hits["top"]) <= 7 and set(hits["top"]) == set(top)
+    assert all(len(frames[t].dropna()) >= 60 for t in hits["long"])
+    # 共用子表达式按语法树缓存：pct_change(1) 在 4 条规则里出现，缓存只有一份，再跑不重算
+    key = ast.dump(ast.parse("pct_change(1)", mode="eval").body)
+    cached = panel.cache[key]
+    assert run_scans(panel, scans) == hits and panel.cache[key] is cached
+
+
+def test_missing_history_is_unknown():
+    frames = _frames()
+    short = [t for t, f in frames.items() if len(f.dropna()) < 50]
+    hits = run_scans(frames, {"a": "close > sma(close, 50)", "b": "not close > sma(close, 50)"})
+    assert short and not set(short) & (set(hits["a"]) | set(hits["b"]))
+
+
+@pytest.mark.parametrize(
+    "expr",
+    [
+        "__import__('os').system('x') > 0",
+        "close.real > 1",
+        "foo > 1",
+        "sma(close, n) > 1",
+        "sma(close, 0) > 1",
+        "close + 1",
+        "close > ",
+        "[c for c in close] > 1",
+        "sma(close, window=5) > 1",
+    ],
+)
+def test_rejects_unsupported(expr):
+    with pytest.raises(ValueError):
+        compile_rule(expr)
@@ -0,0 +1,91 @@
+"""data.screener / GET /screen：在快照与 info 缓存上过滤、排序、分页（临时 DB，合成数据）。"""
+import json
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+import data.indicator_snapshot as snap
+import data.screener as screener
+import utils.yf_cache as yf_cache
+
+
+def _trend(n, drift, seed):
+    rng = np.random.default_rng(seed)
+    c = 100 * np.exp(np.cumsum(drift + rng.normal(0, 0.005, n)))
+    idx = pd.date_range("2024-01-02", periods=n, freq="B")
+    return pd.DataFrame({"High": c * 1.01, "Low": c * 0.99, "Close": c, "Volume": rng.integers(1, 9, n) * 1e5}, index=idx)
+
+
+def _setup(tmp_path, monkeypatch):
+    monkeypatch.setattr(yf_cache, "_DB_PATH", tmp_path / "cache.db")
+    frames = {f"U{i}": _trend(120, 0.01, i) for i in range(3)}
+    frames.update({f"D{i}": _trend(120, -0.01, 10 + i) for i in range(2)})
+    assert snap.refresh_from_frames(frames) == 5
+    with yf_cache._get_conn() as conn:
+        for t, pe in (("U0", 12.0), ("U1", 45.0), ("D0", 8.0)):
+            conn.execute("INSERT INTO info_cache VALUES (?, ?, ?)", (t, time.time(), json.dumps({"trailingPE": pe, "shortName": t.lower()})))
+    snap_pools = {"sp500": {"tickers": sorted(frames)}}
+    monkeypatch.setattr(screener, "load_snapshot", lambda pool: snap_pools.get(pool))
+    return frames
+
+
+def test_screen_filters_sort_and_pages(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+    assert snap.get_snapshot("U0")["tech_baseline"] > snap.get_snapshot("D0")["tech_baseline"]
+
+    out = screener.screen(long_align=True, sort="ticker")
+    assert out["total"] == 3 and [r["ticker"] for r in out["items"]] == ["U0", "U1", "U2"]
+    assert out["items"][0]["long_align"] is True and out["items"][0]["pe"] == 12.0 and out["items"][0]["name"] == "u0"
+
+    # PE 条件排除无 info 的标的；按 PE 排序
+    out = screener.screen(pe_max=20, sort="-pe")
+    assert [r["ticker"] for r in out["items"]] == ["U0", "D0"]
+    assert [r["ticker"] for r in screener.screen(rsi_max=40, sort="ticker")["items"]] == ["D0", "D1"]
+    top = screener.screen(baseline_min=snap.get_snapshot("U0")["tech_baseline"])["items"]
+    assert "D0" not in [r["ticker"] for r in top]
+
+    # 分页：total 为过滤后总数
+    p2 = screener.screen(sort="ticker", page=2, page_size=2)
+    assert p2["total"] == 5 and [r["ticker"] for r in p2["items"]] == ["U0", "U1"]
+    assert screener.screen(page=9, page_size=2)["total"] == 5
+    assert screener.screen(tickers=["d1", "u2"], sort="ticker")["total"] == 2
+    assert screener.screen(tickers=["ZZZ"])["total"] == 0  # 无快照
+
+    # 池没有本地成分快照：不联网，空结果附 note
+    out = screener.screen(market="hk")
+    assert out["total"] == 0 and "hsi" in out["note"] and "elapsed_ms" in out
+
+
+def test_screen_survives_nan_payload_and_reports_errors(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+    with yf_cache._get_conn() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO info_cache VALUES (?, ?, ?)",
+            ("U2", time.time(), json.dumps({"trailingPE": float("nan"), "forwardPE": 9.0})),
+        )
+    out = screener.screen(sort="ticker")
+    assert out["total"] == 5 and [r["pe"] for r in out["items"] if r["ticker"] == "U2"] == [None]
+    assert [r["ticker"] for r in screener.screen(pe_max=20, sort="ticker")["items"]] == ["D0", "U0"]
+
+    def broken():
+        raise RuntimeError("db locked")
+
+    monkeypatch.setattr(screener, "_conn", broken)
+    with pytest.raises(screener.ScreenError):
+        screener.screen()
+
+
+def test_screen_endpoint(tmp_path, monkeypatch):
+    import server
+
+    _setup(tmp_path, monkeypatch)
+    client = TestClient(server.app)
+    body = client.get("/screen", params={"long_align": 1, "pe_min": 10, "sort": "pe"}).json()
+    assert [r["ticker"] for r in body["items"]] == ["U0", "U1"] and body["page"] == 1
+    body = client.get("/screen", params={"tickers": "U2,D1", "sort": "-rsi", "page_size": 1}).json()
+    assert body["total"] == 2 and body["items"][0]["ticker"] == "U2"
+    monkeypatch.setattr(screener, "_conn", lambda: (_ for _ in ()).throw(RuntimeError("db locked")))
+    assert client.get("/screen").status_code == 500
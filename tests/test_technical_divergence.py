@@ -0,0 +1,52 @@
+"""agents.technical 向量化 swing / 背离：与逐根循环参考实现一致，面板与单只一致。"""
+import numpy as np
+import pandas as pd
+
+from agents.technical import _detect_divergence, _find_swing_highs, _find_swing_lows, detect_divergence_panel
+
+
+def _ref_swings(s: pd.Series, window: int, high: bool):
+    out = []
+    for i in range(window, len(s) - window):
+        w = s.iloc[i - window : i + window + 1]
+        if s.iloc[i] == (w.max() if high else w.min()):
+            out.append(i)
+    return out
+
+
+def test_swings_match_loop_reference():
+    rng = np.random.default_rng(7)
+    for _ in range(200):
+        n = int(rng.integers(3, 60))
+        s = pd.Series(np.round(rng.normal(0, 1, n).cumsum(), 1))
+        w = int(rng.integers(1, 4))
+        assert _find_swing_highs(s, w) == _ref_swings(s, w, True)
+        assert _find_swing_lows(s, w) == _ref_swings(s, w, False)
+
+
+def test_divergence_flags_on_constructed_top():
+    # 两个价格高点依次抬高，MACD/RSI 高点依次降低 -> 顶背离
+    close = np.array([1, 2, 3, 10, 3, 2, 1, 2, 3, 4, 12, 4, 3, 2, 1] * 2, dtype=float)[-25:]
+    macd = np.where(close >= 10, np.where(np.arange(25) < 20, 5.0, 2.0), 0.0)
+    rsi = np.where(close >= 10, np.where(np.arange(25) < 20, 80.0, 60.0), 50.0)
+    flags = _detect_divergence(close, macd, rsi, lookback=24, min_bars=20)
+    assert flags == {"macd_top": True, "macd_bottom": False, "rsi_top": True, "rsi_bottom": False}
+
+
+def test_panel_matches_single_with_ragged_columns():
+    rng = np.random.default_rng(3)
+    lengths = [25, 40, 60, 18]
+    n = max(lengths)
+    c = np.full((n, len(lengths)), np.nan)
+    m = np.full_like(c, np.nan)
+    r = np.full_like(c, np.nan)
+    singles = []
+    for j, L in enumerate(lengths):
+        cc = rng.normal(0, 1, L).cumsum()
+        mm = rng.normal(0, 1, L)
+        rr = rng.uniform(0, 100, L)
+        c[n - L :, j], m[n - L :, j], r[n - L :, j] = cc, mm, rr
+        singles.append(_detect_divergence(cc, mm, rr, lookback=30, min_bars=20))
+    panel = detect_divergence_panel(c, m, r, np.array(lengths), lookback=30, min_bars=20)
+    for j, single in enumerate(singles):
+        assert {k: bool(v[j]) for k, v in panel.items()} == single
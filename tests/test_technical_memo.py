@@ -0,0 +1,52 @@
+"""agents.technical：技术面摘要按 K 线指纹记忆化（替换行情拉取与计算函数，不联网）。"""
+import numpy as np
+import pandas as pd
+
+import agents.technical as technical
+
+
+def _hist(n=80):
+    rng = np.random.default_rng(5)
+    c = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    idx = pd.date_range("2024-01-02", periods=n, freq="B")
+    return pd.DataFrame({"High": c * 1.01, "Low": c * 0.99, "Close": c, "Volume": rng.integers(1, 9, n) * 1e5}, index=idx)
+
+
+def test_summary_memoized_by_bar_fingerprint(monkeypatch):
+    hist = _hist()
+    monkeypatch.setattr(technical, "_yf_get_history", lambda *a, **k: hist)
+    calls = []
+    real = technical.summarize_ohlcv
+    monkeypatch.setattr(technical, "summarize_ohlcv", lambda h, **k: calls.append(len(h)) or real(h, **k))
+    technical.clear_summary_cache()
+
+    first = technical.get_technical_summary("aapl")
+    first["mutated"] = True  # 调用方修改返回值不影响缓存
+    second = technical.get_technical_summary("AAPL")
+    assert calls == [80] and "mutated" not in second
+
+    # 最后一根盘中更新（时间与根数不变）或参数变化均重新计算
+    hist.iloc[-1, hist.columns.get_loc("Close")] *= 1.02
+    assert technical.get_technical_summary("AAPL")["trend_ma"]["price"] != second["trend_ma"]["price"]
+    monkeypatch.setattr(technical, "TECH_INDICATOR_BACKEND", "ta")
+    technical.get_technical_summary("AAPL")
+    assert len(calls) == 3
+
+    monkeypatch.setattr(technical, "TECH_SUMMARY_CACHE_SIZE", 1)
+    technical.get_technical_summary("MSFT")
+    assert len(technical._SUMMARY_CACHE) == 1
+    technical.clear_summary_cache()
+
+
+def test_nan_last_bar_still_hits_memo(monkeypatch):
+    hist = _hist()
+    hist.iloc[-1, hist.columns.get_loc("Volume")] = np.nan  # 停牌 / 形成中的 K 线
+    monkeypatch.setattr(technical, "_yf_get_history", lambda *a, **k: hist)
+    calls = []
+    real = technical.summarize_ohlcv
+    monkeypatch.setattr(technical, "summarize_ohlcv", lambda h, **k: calls.append(len(h)) or real(h, **k))
+    technical.clear_summary_cache()
+    technical.get_technical_summary("AAPL")
+    technical.get_technical_summary("AAPL")
+    assert calls == [80] and len(technical._SUMMARY_CACHE) == 1
+    technical.clear_summary_cache()
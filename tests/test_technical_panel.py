@@ -0,0 +1,69 @@
+"""agents.technical_panel：面板引擎输出与逐只 summarize_ohlcv、get_technical_summary 完全一致（合成数据，不联网）。"""
+import numpy as np
+import pandas as pd
+
+import agents.indicator_stream as stream
+import agents.technical as technical
+import utils.yf_cache as yf_cache
+from agents.technical import summarize_ohlcv
+from agents.technical_panel import from_frames
+
+
+def _ohlcv(n, seed, start="2024-01-02", freq="B"):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    idx = pd.date_range(start, periods=n, freq=freq)
+    return pd.DataFrame(
+        {
+            "Open": close,
+            "High": close * (1 + rng.uniform(0, 0.02, n)),
+            "Low": close * (1 - rng.uniform(0, 0.02, n)),
+            "Close": close,
+            "Volume": rng.integers(100_000, 10_000_000, n),
+        },
+        index=idx,
+    )
+
+
+def test_panel_matches_single_ticker_daily():
+    frames = {}
+    for s in range(24):
+        df = _ohlcv(45 + s * 7, s, start=str(pd.Timestamp("2024-01-02") + pd.Timedelta(days=s)))
+        if s % 5 == 0:
+            df = df.drop(df.index[len(df) // 2])  # 停牌缺一根
+        frames[f"T{s}"] = df
+    frames["SHORT"] = _ohlcv(30, 99)
+    panel = from_frames(frames, interval="1d")
+    assert panel["SHORT"]["ok"] is False
+    for t, df in frames.items():
+        assert panel[t] == summarize_ohlcv(df, interval="1d"), t
+
+
+def test_panel_matches_single_ticker_intraday():
+    frames = {f"M{s}": _ohlcv(40 + s, 100 + s, freq="5min") for s in range(6)}
+    panel = from_frames(frames, interval="5m")
+    for t, df in frames.items():
+        assert panel[t] == summarize_ohlcv(df, interval="5m"), t
+
+
+def test_panel_matches_get_technical_summary(tmp_path, monkeypatch):
+    # 报告路径走 get_technical_summary：分K 可能切到增量状态后端，两个后端都须与面板一致
+    monkeypatch.setattr(yf_cache, "_DB_PATH", tmp_path / "cache.db")
+    full = {f"M{s}": _ohlcv(60 + s, 200 + s, freq="5min") for s in range(4)}
+    current = {}
+    monkeypatch.setattr(technical, "_yf_get_history", lambda t, **k: current[t])
+    for end in (45, 50, None):  # 逐次追加新 K 线：首次建状态，之后增量推进
+        frames = {t: df.iloc[:end] for t, df in full.items()}
+        current.update(frames)
+        technical.clear_summary_cache()
+        panel = from_frames(frames, interval="5m")
+        for t in frames:
+            assert technical.get_technical_summary(t, period="5d", interval="5m") == panel[t], (t, end)
+    assert stream.stream_enabled("5m") and stream.flush_states() == len(full)  # 确实走了增量状态
+
+    daily = {f"D{s}": _ohlcv(80, 300 + s) for s in range(4)}
+    current.update(daily)
+    panel = from_frames(daily, interval="1d")
+    for t in daily:
+        assert technical.get_technical_summary(t, interval="1d") == panel[t], t
+    technical.clear_summary_cache()
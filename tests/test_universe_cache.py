@@ -0,0 +1,56 @@
+"""data.universe 跨进程共享缓存：排名按天只算一次、TTL 过期重算、计算租约互斥（临时 DB）。"""
+import threading
+import time
+
+import data.universe as universe
+import utils.yf_cache as yf_cache
+
+
+def test_ranking_computed_once_and_shared(tmp_path, monkeypatch):
+    monkeypatch.setattr(yf_cache, "_DB_PATH", tmp_path / "cache.db")
+    calls = []
+
+    def fake_rank(min_market_cap, growth_weight):
+        calls.append(growth_weight)
+        return ["AAA", "BBB", "CCC"]
+
+    monkeypatch.setattr(universe, "_rank_sp500", fake_rank)
+    assert universe.get_top_by_market_cap_and_growth(n=2) == ["AAA", "BBB"]
+    assert universe.get_top_by_market_cap_and_growth(n=3) == ["AAA", "BBB", "CCC"]
+    assert calls == [0.3]
+    # 不同参数各自缓存
+    universe.get_top_by_market_cap_and_growth(n=1, growth_weight=0.0)
+    assert calls == [0.3, 0.0]
+
+    # 过期后重算；计算失败不写缓存，回退静态成分
+    monkeypatch.setattr(universe, "_get_sp500_tickers", lambda: ["S1", "S2"])
+    assert universe._shared_cached("sp500_rank|None|0.3", lambda: ["ZZZ"], ttl=-1) == ["ZZZ"]
+    universe.clear_universe_cache()
+    monkeypatch.setattr(universe, "_rank_sp500", lambda *a: None)
+    assert universe.get_top_by_market_cap_and_growth(n=5) == ["S1", "S2"]
+    assert universe._read_shared("sp500_rank|None|0.3", 86400) is None
+
+
+def test_lease_lets_one_process_compute(tmp_path, monkeypatch):
+    monkeypatch.setattr(yf_cache, "_DB_PATH", tmp_path / "cache.db")
+    assert universe._acquire_lease("k") and not universe._acquire_lease("k")
+    universe._release_lease("k")
+
+    # 租约被占用时等待持有者写入的结果，不自行计算
+    assert universe._acquire_lease("k")
+    computed = []
+
+    def holder():
+        time.sleep(0.3)
+        universe._write_shared("k", ["X"])
+        universe._release_lease("k")
+
+    t = threading.Thread(target=holder)
+    t.start()
+    got = universe._shared_cached("k", lambda: computed.append(1) or ["Y"])
+    t.join()
+    assert got == ["X"] and computed == []
+
+    # 持有者崩溃：租约过期后可被接手
+    monkeypatch.setattr(universe, "_LEASE_SEC", -1)
+    assert universe._acquire_lease("k2") and universe._acquire_lease("k2")
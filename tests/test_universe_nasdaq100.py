@@ -1,4 +1,4 @@
-"""data.universe 纳指100 拉取：解析逻辑单测（网络请求 mock）。"""
+"""data.universe 纳指100 拉取：解析逻辑单测（共享 HTTP 会话 mock）。"""
 from unittest.mock import MagicMock, patch
 
 from data.universe import get_nasdaq100_tickers_from_nasdaq_api
@@ -11,7 +11,9 @@ def test_get_nasdaq100_tickers_from_nasdaq_api_parses_rows():
     mock_resp = MagicMock()
     mock_resp.json.return_value = payload
     mock_resp.raise_for_status = MagicMock()
-    with patch("data.universe.requests.get", return_value=mock_resp):
+    mock_session = MagicMock()
+    mock_session.get.return_value = mock_resp
+    with patch("data.universe.get_session", return_value=mock_session):
         out = get_nasdaq100_tickers_from_nasdaq_api()
     assert out is not None
     assert len(out) == 56
@@ -24,5 +26,7 @@ def test_get_nasdaq100_tickers_from_nasdaq_api_short_list_returns_none():
     mock_resp = MagicMock()
     mock_resp.json.return_value = payload
     mock_resp.raise_for_status = MagicMock()
-    with patch("data.universe.requests.get", return_value=mock_resp):
+    mock_session = MagicMock()
+    mock_session.get.return_value = mock_resp
+    with patch("data.universe.get_session", return_value=mock_session):
         assert get_nasdaq100_tickers_from_nasdaq_api() is None
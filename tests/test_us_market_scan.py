@@ -0,0 +1,78 @@
+"""data.us_movers_scan.scan_us_market_streaming：分段流式扫描与段缓存续用（替换下载函数，不联网）。"""
+import numpy as np
+import pandas as pd
+
+import data.us_movers_scan as ms
+import utils.bar_store as bar_store
+from utils.bulk_download import NO_DATA
+
+_IDX = pd.date_range("2024-01-02", periods=140, freq="B")
+
+
+def _universe(n=40, seed=3):
+    rng = np.random.default_rng(seed)
+    out = {}
+    for i in range(n):
+        c = 50 * np.exp(np.cumsum(rng.normal(0, 0.02, len(_IDX))))
+        c[-1] = c[-2] * (1 + rng.uniform(0, 0.1)) if i % 3 == 0 else c[-1]
+        v = rng.integers(5, 9, len(_IDX)) * 1e6
+        v[-1] *= 3 if i % 3 == 0 else 1
+        out[f"S{i:02d}"] = pd.DataFrame({"Open": c, "High": c, "Low": c * 0.99, "Close": c, "Volume": v}, index=_IDX)
+    return out
+
+
+def _fake_bulk(data, upto, calls, scale=None):
+    def bulk_download(tickers, period="6mo", interval="1d", chunk=60, write_store=True, **kwargs):
+        calls.append((period, sorted(tickers)))
+        frames, failed = {}, {}
+        for t in tickers:
+            if t not in data:
+                failed[t] = NO_DATA
+                continue
+            f = data[t].iloc[:upto]
+            if scale and t in scale:
+                f = f.assign(Close=f["Close"] * scale[t])
+            frames[t] = f.iloc[-5:] if period == "5d" else f.iloc[-126:]
+        return frames, failed
+
+    return bulk_download
+
+
+def test_streaming_scan_resumes_from_segment_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(bar_store, "_STORE_DIR", tmp_path)
+    data = _universe()
+    tickers = list(data) + ["GONE"]
+    calls = []
+
+    # 第一天：全部整段下载，结果与一次性扫描一致
+    monkeypatch.setattr(ms, "bulk_download", _fake_bulk(data, 139, calls))
+    rows = ms.scan_us_market_streaming(tickers, segments=4)
+    expected = ms._evaluate({t: f.iloc[:139].iloc[-126:] for t, f in data.items()}, dict(
+        min_daily_pct=3.0, min_volume_ratio=1.5, min_avg_dollar_volume_20d=20_000_000.0,
+        require_breakout_20d=True, require_above_sma50=False,
+    ))
+    assert sorted(r["ticker"] for r in rows) == sorted(r["ticker"] for r in expected)
+    assert {p for p, _ in calls} == {"6mo"}
+    assert len(bar_store.list_panels("1d-seg00")) == 1
+
+    # 未过期：不联网
+    calls.clear()
+    ms.scan_us_market_streaming(tickers, segments=4)
+    assert calls == []
+
+    # 第二天（段面板过期）：只拉最近 5 根；S01 复权变化需整只重拉
+    calls.clear()
+    monkeypatch.setattr(ms, "BAR_STORE_TTL_SEC", -1)
+    monkeypatch.setattr(ms, "bulk_download", _fake_bulk(data, 140, calls, scale={"S01": 0.5}))
+    rows = ms.scan_us_market_streaming(tickers, segments=4)
+    assert all(p == "5d" for p, _ in calls if "S01" not in _)
+    assert ("6mo", ["S01"]) in calls
+    full = {t: f.iloc[-126:] for t, f in data.items()}
+    full["S01"] = full["S01"].assign(Close=full["S01"]["Close"] * 0.5)
+    expected = ms._evaluate(full, dict(
+        min_daily_pct=3.0, min_volume_ratio=1.5, min_avg_dollar_volume_20d=20_000_000.0,
+        require_breakout_20d=True, require_above_sma50=False,
+    ))
+    assert rows and sorted(r["ticker"] for r in rows) == sorted(r["ticker"] for r in expected)
+    for k in range(4):
+        assert len(bar_store.list_panels(f"1d-seg{k:02d}")) == 1  # 旧版本已清理
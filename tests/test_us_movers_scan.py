@@ -47,3 +47,34 @@ def test_eval_us_daily_mover_rejects_no_breakout():
     rows.append({"Open": 100.0, "High": 105.0, "Low": 99.0, "Close": 105.0, "Volume": 3_000_000.0})
     df = pd.DataFrame(rows)
     assert eval_us_daily_mover(df, min_daily_pct=3.0) is None
+
+
+def test_panel_matches_per_ticker_loop():
+    import numpy as np
+
+    from data.us_movers_scan import eval_us_daily_movers_panel
+
+    rng = np.random.default_rng(7)
+    idx = pd.date_range("2024-01-02", periods=80, freq="B")
+    frames = {}
+    for i in range(60):
+        n = int(rng.integers(15, 80))
+        c = 50 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+        c[-1] *= 1 + rng.uniform(-0.02, 0.12)
+        df = pd.DataFrame(
+            {"Close": c, "High": c * 1.01, "Low": c * 0.99, "Volume": rng.integers(1, 6, n) * 1e6},
+            index=idx[-n:],
+        )
+        df.iloc[-1, df.columns.get_loc("Volume")] *= rng.uniform(0.5, 4)
+        if i % 7 == 0:
+            df.iloc[int(rng.integers(0, n - 2)), 0] = np.nan  # 中间缺一根
+        frames[f"T{i}"] = df
+    for rules in (
+        {},
+        {"min_daily_pct": 1.0, "min_volume_ratio": 1.0, "require_breakout_20d": False},
+        {"min_daily_pct": 0.0, "min_volume_ratio": 0.0, "require_above_sma50": True, "require_breakout_20d": False},
+    ):
+        loop = {t: m for t, m in ((t, eval_us_daily_mover(f, **rules)) for t, f in frames.items()) if m}
+        panel = eval_us_daily_movers_panel(frames, **rules)
+        assert loop and list(panel) == list(loop)
+        assert panel == loop
@@ -0,0 +1,37 @@
+"""utils.yf_cache：批量写入、有效期与覆盖率统计（临时 DB，不联网）。"""
+import time
+
+import pandas as pd
+
+import utils.yf_cache as yf_cache
+
+
+def _bars(n=3):
+    idx = pd.date_range("2024-01-02", periods=n, freq="D", tz="America/New_York")
+    return pd.DataFrame({"Close": [100.5 + i for i in range(n)], "Volume": [1000 + i for i in range(n)]}, index=idx)
+
+
+def test_put_history_then_get_hits_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(yf_cache, "_DB_PATH", tmp_path / "cache.db")
+    yf_cache.put_history("aapl", "6mo", "1d", False, _bars(), ttl=600)
+    df = yf_cache.get_history("AAPL", period="6mo", interval="1d")
+    assert df is not None
+    assert len(df) == 3
+    assert float(df["Close"].iloc[-1]) == 102.5
+
+
+def test_put_history_ttl_overrides_default(tmp_path, monkeypatch):
+    monkeypatch.setattr(yf_cache, "_DB_PATH", tmp_path / "cache.db")
+    monkeypatch.setattr(yf_cache, "_TTL_DAILY", 0)
+    yf_cache.put_history("MSFT", "6mo", "1d", False, _bars(), ttl=600)
+    assert yf_cache.cache_coverage(["MSFT"])["history"] == 1
+    yf_cache.put_history("MSFT", "6mo", "1d", False, _bars())
+    time.sleep(0.01)
+    assert yf_cache.cache_coverage(["MSFT"])["history"] == 0
+
+
+def test_cache_coverage_counts(tmp_path, monkeypatch):
+    monkeypatch.setattr(yf_cache, "_DB_PATH", tmp_path / "cache.db")
+    yf_cache.put_history("A", "6mo", "1d", False, _bars(), ttl=600)
+    cov = yf_cache.cache_coverage(["A", "B"])
+    assert cov == {"total": 2, "history": 1, "info": 0, "financials": 0}
@@ -13,7 +13,7 @@ import math
 import os
 from typing import Optional, Tuple
 
-import requests
+from utils.http_session import get_session
 
 _AV_BASE = "https://www.alphavantage.co/query"
 _US_ONLY_SUFFIX = {".HK", ".SS", ".SZ"}
@@ -50,7 +50,7 @@ def get_quote(ticker: str) -> Tuple[Optional[float], Optional[float]]:
         return None, None
 
     try:
-        resp = requests.get(
+        resp = get_session().get(
             _AV_BASE,
             params={
                 "function": "GLOBAL_QUOTE",
@@ -0,0 +1,125 @@
+"""
+K 线本地重采样：由一份基础周期 K 线派生更粗周期，避免 1m/5m/15m/10m 各自单独请求 yfinance。
+
+- 分K：5m/10m/15m/30m/60m 由 1m（或更细的已缓存周期）聚合；日K → 周K（1wk，周一标记，与 yfinance 一致）；
+- 按交易所时段切分：美股 9:30–16:00（prepost 时另有 4:00–9:30 盘前、16:00–20:00 盘后），
+  A股 9:30–11:30 / 13:00–15:00，港股 9:30–12:00 / 13:00–16:00。每个时段从开盘时刻起按周期对齐分桶，
+  桶不跨时段（午休、盘前/盘中/盘后互不混合），时段末不足一个周期的桶照常输出；
+  标在时段结束时刻的 K 线（A股 15:00、港股 16:00 收盘竞价）并入该时段最后一个桶；
+- 聚合口径：Open 取首、High 取最大、Low 取最小、Close 取末、Volume（及 Dividends / Stock Splits）求和；
+- 输入索引可为带时区（yfinance 原始）或无时区 UTC（utils.yf_cache 缓存读出），输出保持同一口径。
+
+utils.yf_cache.get_history 对可派生周期优先用缓存中的基础周期重采样（见 RESAMPLE_BASES）。
+"""
+import re
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 目标周期 -> 可用的基础周期（按优先级）
+RESAMPLE_BASES: Dict[str, Tuple[str, ...]] = {
+    "5m": ("1m",),
+    "10m": ("1m", "5m"),
+    "15m": ("1m", "5m"),
+    "30m": ("1m", "5m", "15m"),
+    "60m": ("1m", "5m", "15m", "30m"),
+    "1wk": ("1d",),
+}
+
+# 时段（交易所本地时间，距 0 点的分钟数）
+_US_REGULAR = [(9 * 60 + 30, 16 * 60)]
+_US_PRE = (4 * 60, 9 * 60 + 30)
+_US_POST = (16 * 60, 20 * 60)
+_CN_REGULAR = [(9 * 60 + 30, 11 * 60 + 30), (13 * 60, 15 * 60)]
+_HK_REGULAR = [(9 * 60 + 30, 12 * 60), (13 * 60, 16 * 60)]
+# 行情在时段结束时刻另有一根 K 线（收盘集合竞价）的市场
+_END_STAMPED_TZ = ("Asia/Shanghai", "Asia/Hong_Kong")
+
+_AGG = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum", "Dividends": "sum", "Stock Splits": "sum"}
+
+
+def interval_minutes(interval: str) -> Optional[int]:
+    """'15m' -> 15，'1h' / '60m' -> 60；日K及以上返回 None。"""
+    m = re.fullmatch(r"(\d+)(m|h)", (interval or "").strip().lower())
+    if not m:
+        return None
+    return int(m.group(1)) * (60 if m.group(2) == "h" else 1)
+
+
+def market_sessions(ticker: str, prepost: bool = False) -> Tuple[str, List[Tuple[int, int]]]:
+    """返回 (交易所时区, 时段列表)；时段为 (开始分钟, 结束分钟)，按时间排序。"""
+    t = (ticker or "").upper()
+    if t.endswith(".SS") or t.endswith(".SZ"):
+        return "Asia/Shanghai", list(_CN_REGULAR)
+    if t.endswith(".HK"):
+        return "Asia/Hong_Kong", list(_HK_REGULAR)
+    if prepost:
+        return "America/New_York", [_US_PRE] + _US_REGULAR + [_US_POST]
+    return "America/New_York", list(_US_REGULAR)
+
+
+def _local_index(index: pd.Index, tz: str) -> pd.DatetimeIndex:
+    idx = pd.DatetimeIndex(index)
+    if idx.tz is None:
+        idx = idx.tz_localize("UTC")
+    return idx.tz_convert(tz)
+
+
+def _restore_index(labels: pd.DatetimeIndex, like: pd.Index) -> pd.DatetimeIndex:
+    """输出索引与输入同一口径：输入无时区则转回无时区 UTC。"""
+    if pd.DatetimeIndex(like).tz is None:
+        return labels.tz_convert("UTC").tz_localize(None)
+    return labels.tz_convert(pd.DatetimeIndex(like).tz)
+
+
+def _wall_index(ns: pd.Index, tz: str) -> pd.DatetimeIndex:
+    """交易所本地墙钟时间（int64 纳秒）-> 带时区索引。"""
+    return pd.DatetimeIndex(pd.to_datetime(np.asarray(ns, dtype=np.int64), unit="ns")).tz_localize(tz)
+
+
+def _aggregate(df: pd.DataFrame, labels: np.ndarray) -> pd.DataFrame:
+    agg = {c: f for c, f in _AGG.items() if c in df.columns}
+    out = df.groupby(labels, sort=True).agg(agg)
+    return out[[c for c in df.columns if c in agg]]
+
+
+def resample_ohlcv(df: pd.DataFrame, interval: str, ticker: str = "", prepost: bool = False) -> Optional[pd.DataFrame]:
+    """
+    把 df 聚合到 interval（分K 或 1wk）。时段外的 K 线（如 prepost=False 时混入的盘前数据）丢弃。
+    df 为空或周期不支持时返回 None。
+    """
+    if df is None or len(df) == 0:
+        return None
+    tz, sessions = market_sessions(ticker, prepost)
+    local = _local_index(df.index, tz).as_unit("ns")
+    day = local.normalize()
+
+    if interval == "1wk":
+        labels = day - pd.to_timedelta(local.weekday, unit="D")
+        out = _aggregate(df, labels.tz_localize(None).asi8)
+        out.index = _restore_index(_wall_index(out.index, tz), df.index)
+        return out
+
+    step = interval_minutes(interval)
+    if step is None:
+        return None
+    minute = ((local - day) // pd.Timedelta(minutes=1)).to_numpy()
+    bucket = np.full(len(minute), -1, dtype=np.int64)
+    for start, end in sessions:
+        inside = (minute >= start) & (minute < end)
+        bucket[inside] = start + (minute[inside] - start) // step * step
+    # A股 / 港股恰好标在时段结束时刻的 K 线（11:30 / 15:00、12:00 / 16:00 收盘集合竞价）并入该时段最后一个桶；
+    # 美股 16:00 起的 K 线属于盘后，不并入
+    if tz in _END_STAMPED_TZ:
+        for start, end in sessions:
+            at_end = (minute == end) & (bucket < 0)
+            bucket[at_end] = start + (end - 1 - start) // step * step
+    keep = bucket >= 0
+    if not keep.any():
+        return None
+    day_ns = day.tz_localize(None).asi8[keep]
+    labels = day_ns + bucket[keep] * 60 * 10**9
+    out = _aggregate(df[keep], labels)
+    out.index = _restore_index(_wall_index(out.index, tz), df.index)
+    return out
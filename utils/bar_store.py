@@ -0,0 +1,343 @@
+"""
+列式 K 线面板存储（memory-mapped numpy）：全市场扫描、回测等批量场景共享同一份磁盘数据。
+
+每个面板按 (interval, 起止日期) 存为一个目录：
+  data/bars/<interval>_<YYYYMMDD>_<YYYYMMDD>/
+    meta.json      interval、tickers（行顺序）、fields、created_at
+    dates.npy      int64 纳秒时间戳（naive）：分K 为 UTC；日K及以上为交易所本地日期（A股 / 港股 00:00+08:00
+                   的日K 转 UTC 会落到前一天，故按本地日期存）
+    Close.npy ...  每个字段一个连续 float64 数组，形状 (n_tickers, n_bars)，行=标的、列=K 线
+
+读取用 np.load(mmap_mode="r")：多个进程打开同一面板共享操作系统页缓存，按行取单标的序列为零拷贝视图。
+写入先落临时目录再 os.replace，读者永远看到完整面板；写入后删除被新面板完全覆盖的同 interval 旧版本。
+目录可用环境变量 BAR_STORE_DIR 覆盖。
+"""
+import json
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+_STORE_DIR = Path(os.environ.get("BAR_STORE_DIR", "").strip() or str(_PROJECT_ROOT / "data" / "bars"))
+
+FIELDS = ("Open", "High", "Low", "Close", "Volume")
+# 读穿缓存时面板的有效期（秒），超时视为未命中并重新下载
+BAR_STORE_TTL_SEC = int(os.environ.get("BAR_STORE_TTL_SEC", "3600").strip() or "3600")
+# 面板首根 K 线晚于 period 起点的容忍天数（节假日、yfinance 按自然日取窗口）
+_PERIOD_SLACK_DAYS = 5
+
+
+def _is_daily(interval: str) -> bool:
+    return (interval or "").strip().lower().endswith(("d", "wk", "mo"))
+
+
+def _to_naive(index: pd.Index, interval: str) -> pd.DatetimeIndex:
+    """
+    分K 转 UTC 去时区（无时区输入视为已是 UTC，utils.bulk_download 与 utils.yf_cache 均按此口径给出）；
+    日K及以上取交易所本地日期（去时区后归一到 00:00）。
+    """
+    idx = pd.DatetimeIndex(pd.to_datetime(index))
+    if _is_daily(interval):
+        if idx.tz is not None:
+            idx = idx.tz_localize(None)
+        idx = idx.normalize()
+    elif idx.tz is not None:
+        idx = idx.tz_convert("UTC").tz_localize(None)
+    # pandas 3 默认可能为 us 精度，dates.npy 统一存纳秒
+    return idx.as_unit("ns")
+
+
+def _panel_name(interval: str, index: pd.DatetimeIndex) -> str:
+    return f"{interval}_{index[0]:%Y%m%d}_{index[-1]:%Y%m%d}"
+
+
+class BarPanel:
+    """
+    只读面板。field(name) 返回 (n_tickers, n_bars) 的 memmap；series(ticker, name) 返回该行零拷贝视图；
+    matrix(name) 返回 (bars × tickers) 的 DataFrame，供向量化指标/扫描使用。
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path / "meta.json", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.interval: str = meta["interval"]
+        self.tickers: List[str] = list(meta["tickers"])
+        self.fields: List[str] = list(meta["fields"])
+        self.missing: Set[str] = set(meta.get("missing") or [])
+        self.created_at: float = float(meta.get("created_at") or 0)
+        self._row = {t: i for i, t in enumerate(self.tickers)}
+        self.index = pd.DatetimeIndex(np.load(self.path / "dates.npy").astype("datetime64[ns]"))
+        self._arrays: Dict[str, np.ndarray] = {}
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self._row
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    @property
+    def age_sec(self) -> float:
+        return time.time() - self.created_at
+
+    def row(self, ticker: str) -> Optional[int]:
+        return self._row.get(ticker)
+
+    def field(self, name: str) -> np.ndarray:
+        arr = self._arrays.get(name)
+        if arr is None:
+            arr = np.load(self.path / f"{name}.npy", mmap_mode="r")
+            self._arrays[name] = arr
+        return arr
+
+    def series(self, ticker: str, name: str) -> Optional[np.ndarray]:
+        """单标的单字段（零拷贝行视图，含前置 NaN）。"""
+        i = self._row.get(ticker)
+        return None if i is None else self.field(name)[i]
+
+    def frame(self, ticker: str, fields: Optional[Iterable[str]] = None) -> Optional[pd.DataFrame]:
+        """单标的 OHLCV DataFrame（去掉该标的无数据的 K 线）；用于兼容逐标的逻辑。"""
+        i = self._row.get(ticker)
+        if i is None:
+            return None
+        cols = list(fields or self.fields)
+        df = pd.DataFrame({c: self.field(c)[i] for c in cols}, index=self.index)
+        return df.dropna(how="all")
+
+    def matrix(self, name: str, tickers: Optional[List[str]] = None) -> pd.DataFrame:
+        """(bars × tickers) 矩阵；不传 tickers 时为整张面板的转置视图（不复制）。"""
+        arr = self.field(name)
+        if tickers is None:
+            return pd.DataFrame(arr.T, index=self.index, columns=self.tickers, copy=False)
+        rows = [self._row[t] for t in tickers if t in self._row]
+        cols = [t for t in tickers if t in self._row]
+        return pd.DataFrame(arr[rows].T, index=self.index, columns=cols)
+
+
+def write_panel(
+    frames: Dict[str, pd.DataFrame],
+    interval: str = "1d",
+    fields: Iterable[str] = FIELDS,
+    merge: bool = True,
+    missing: Optional[Iterable[str]] = None,
+) -> Optional[Path]:
+    """
+    将 ticker -> OHLCV DataFrame 对齐到并集时间轴后写成面板，返回面板目录；无数据返回 None。
+    同名面板（同 interval、同起止日期）整体替换；merge=True 时保留旧面板中本次未提供的标的。
+    写入后删除同 interval 中被新面板完全覆盖（标的含于新面板、日期区间在新面板内）的旧面板。
+    missing：本次请求过但无数据的标的（退市/代码错误），记入 meta，读穿时视为已覆盖、不再反复下载。
+    """
+    missing_set = {t for t in (missing or []) if t not in frames or frames[t] is None or len(frames[t]) == 0}
+    frames = {t: df for t, df in frames.items() if df is not None and len(df) > 0}
+    if not frames:
+        return None
+    if merge:
+        frames, old_missing = _merge_existing(frames, interval)
+        missing_set |= {t for t in old_missing if t not in frames}
+    fields = [f for f in fields if any(f in df.columns for df in frames.values())]
+    index = None
+    normalized: Dict[str, pd.DataFrame] = {}
+    for t, df in frames.items():
+        d = df.copy(deep=False)
+        d.index = _to_naive(d.index, interval)
+        d = d[~d.index.duplicated(keep="last")]
+        normalized[t] = d
+        index = d.index if index is None else index.union(d.index)
+    index = index.sort_values()
+    tickers = list(normalized.keys())
+
+    _STORE_DIR.mkdir(parents=True, exist_ok=True)
+    final = _STORE_DIR / _panel_name(interval, index)
+    tmp = _STORE_DIR / f".tmp-{uuid.uuid4().hex}"
+    tmp.mkdir()
+    try:
+        np.save(tmp / "dates.npy", index.asi8)
+        for name in fields:
+            mm = np.lib.format.open_memmap(tmp / f"{name}.npy", mode="w+", dtype=np.float64, shape=(len(tickers), len(index)))
+            mm[:] = np.nan
+            for i, t in enumerate(tickers):
+                d = normalized[t]
+                if name in d.columns:
+                    mm[i] = pd.to_numeric(d[name], errors="coerce").reindex(index).to_numpy(dtype=np.float64)
+            mm.flush()
+            del mm
+        meta = {
+            "interval": interval,
+            "tickers": tickers,
+            "fields": fields,
+            "missing": sorted(missing_set),
+            "created_at": time.time(),
+        }
+        with open(tmp / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        _install(tmp, final)
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    _prune_superseded(final, interval, set(tickers) | missing_set)
+    return final
+
+
+def _install(tmp: Path, final: Path, attempts: int = 5) -> None:
+    """
+    把临时目录换成 final。目标已存在（含其他写入者在检查后才创建）时 os.replace 会因目录非空失败：
+    先把现有目录移到 .old-*（被别人先移走则直接重试），再换入，最多 attempts 次。
+    """
+    for i in range(attempts):
+        try:
+            os.replace(tmp, final)
+            return
+        except OSError:
+            if i == attempts - 1:
+                raise
+        trash = _STORE_DIR / f".old-{uuid.uuid4().hex}"
+        try:
+            os.replace(final, trash)
+        except OSError:
+            continue
+        shutil.rmtree(trash, ignore_errors=True)
+
+
+def _prune_superseded(final: Path, interval: str, covered: Set[str]) -> int:
+    """删除被 final 覆盖的旧面板：标的（含 missing）都在 covered 内、起止日期落在 final 区间内。"""
+    start, end = final.name.rsplit("_", 2)[-2:]
+    removed = 0
+    for path in list_panels(interval):
+        if path == final:
+            continue
+        p_start, p_end = path.name.rsplit("_", 2)[-2:]
+        if p_start < start or p_end > end:
+            continue
+        try:
+            with open(path / "meta.json", encoding="utf-8") as f:
+                meta = json.load(f)
+        except Exception:
+            continue
+        if set(meta.get("tickers") or []) | set(meta.get("missing") or []) <= covered:
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+def _merge_existing(frames: Dict[str, pd.DataFrame], interval: str) -> Tuple[Dict[str, pd.DataFrame], Set[str]]:
+    """同 interval、同起止日期的旧面板中本次未覆盖的标的并入 frames（新数据优先），并返回旧面板的 missing。"""
+    idx = None
+    for df in frames.values():
+        i = _to_naive(df.index, interval)
+        idx = i if idx is None else idx.union(i)
+    path = _STORE_DIR / _panel_name(interval, idx.sort_values())
+    if not (path / "meta.json").exists():
+        return frames, set()
+    try:
+        old = BarPanel(path)
+    except Exception:
+        return frames, set()
+    merged = dict(frames)
+    for t in old.tickers:
+        if t not in merged:
+            f = old.frame(t)
+            if f is not None and not f.empty:
+                merged[t] = f
+    return merged, old.missing
+
+
+def _period_offset(period: str) -> Optional[pd.DateOffset]:
+    """yfinance 风格 period（5d / 1mo / 6mo / 1y / 2y）→ DateOffset；max / ytd 等返回 None。"""
+    p = (period or "").strip().lower()
+    try:
+        if p.endswith("mo"):
+            return pd.DateOffset(months=int(p[:-2]))
+        if p.endswith("y"):
+            return pd.DateOffset(years=int(p[:-1]))
+        if p.endswith("d"):
+            return pd.DateOffset(days=int(p[:-1]))
+    except ValueError:
+        return None
+    return None
+
+
+def frames_from_store(
+    tickers: List[str],
+    period: str = "6mo",
+    interval: str = "1d",
+    max_age_sec: Optional[float] = None,
+) -> Optional[Dict[str, pd.DataFrame]]:
+    """
+    读穿缓存：若某个未过期面板覆盖全部 tickers 且时间跨度不短于 period，返回按 period 截取的
+    ticker -> OHLCV DataFrame（已去掉该标的无数据的行）；否则返回 None，由调用方下载后 write_panel。
+    """
+    offset = _period_offset(period)
+    if not tickers or offset is None:
+        return None
+    max_age = BAR_STORE_TTL_SEC if max_age_sec is None else max_age_sec
+    for path in reversed(list_panels(interval)):
+        try:
+            panel = BarPanel(path)
+        except Exception:
+            continue
+        if panel.age_sec > max_age or len(panel.index) == 0:
+            continue
+        if not all(t in panel or t in panel.missing for t in tickers):
+            continue
+        start = panel.index[-1] - offset
+        if panel.index[0] > start + pd.Timedelta(days=_PERIOD_SLACK_DAYS):
+            continue
+        out: Dict[str, pd.DataFrame] = {}
+        for t in tickers:
+            f = panel.frame(t)
+            if f is not None and not f.empty:
+                out[t] = f[f.index > start]
+        return out
+    return None
+
+
+def list_panels(interval: Optional[str] = None) -> List[Path]:
+    """列出已有面板目录（按结束日期、创建时间升序）。"""
+    if not _STORE_DIR.exists():
+        return []
+    out = []
+    for p in _STORE_DIR.iterdir():
+        if not p.is_dir() or p.name.startswith(".") or not (p / "meta.json").exists():
+            continue
+        if interval is not None and not p.name.startswith(f"{interval}_"):
+            continue
+        out.append(p)
+    return sorted(out, key=lambda p: (p.name.rsplit("_", 1)[-1], (p / "meta.json").stat().st_mtime))
+
+
+def prune_panels(interval: str, keep: int = 1) -> int:
+    """删除该 interval 较旧的面板，只保留最新 keep 个；返回删除数。已打开的 memmap 不受影响（POSIX）。"""
+    paths = list_panels(interval)
+    removed = 0
+    for path in paths[: max(0, len(paths) - keep)]:
+        shutil.rmtree(path, ignore_errors=True)
+        removed += 1
+    return removed
+
+
+def open_panel(
+    interval: str = "1d",
+    tickers: Optional[List[str]] = None,
+    max_age_sec: Optional[float] = None,
+) -> Optional[BarPanel]:
+    """
+    打开该 interval 最新的面板；tickers 给定时要求面板覆盖全部标的，max_age_sec 给定时要求足够新。
+    不满足返回 None（由调用方下载后 write_panel）。
+    """
+    for path in reversed(list_panels(interval)):
+        try:
+            panel = BarPanel(path)
+        except Exception:
+            continue
+        if max_age_sec is not None and panel.age_sec > max_age_sec:
+            return None
+        if tickers is not None and not all(t in panel for t in tickers):
+            continue
+        return panel
+    return None
@@ -0,0 +1,177 @@
+"""
+批量 OHLCV 下载：按块并发 yf.download，失败的块拆小重试，逐标的报告失败原因，结果写回 utils.bar_store 面板。
+异动扫描（data/us_movers_scan）、股票池涨跌幅（data/universe._batch_returns）、盘前预热（data/warmup）共用。
+
+- 并发：同时最多 BULK_DOWNLOAD_WORKERS 个块在途，整体耗时接近最慢的一块，而不是各块之和；
+  只有 download 状态按调用独立的 yfinance（multi._DownloadCtx）才并发，旧版共用模块级 shared._DFS / _ERRORS，
+  并发会串数据，自动退回逐块下载；
+- 重试：整块异常或返回空表时对半拆分后重试，最多 BULK_DOWNLOAD_RETRIES 轮，仍失败的标的记下错误；
+  块内个别标的无数据时单独再请求一次，仍无数据记为「无数据」（退市 / 代码错误），写入面板 missing，读穿时不再反复下载；
+- 返回 (ticker -> DataFrame, ticker -> 失败原因)，DataFrame 顺序与输入一致；
+  分K 一律按带时区请求（忽略 ignore_tz），返回无时区 UTC 索引，与 utils.yf_cache / utils.bar_store 同一口径
+  （yfinance ignore_tz=True 给的是交易所本地墙钟时间，写进面板会与 UTC 的分K 混在一起）。
+"""
+import math
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from config.yf_suppress import suppress_yf_noise
+
+suppress_yf_noise()
+import yfinance as yf
+
+from utils.bar_store import _is_daily, write_panel
+
+
+def _int_env(key: str, default: int) -> int:
+    try:
+        return int(os.environ.get(key, str(default)).strip() or default)
+    except ValueError:
+        return default
+
+
+# 单块标的数 / 同时在途的块数 / 失败块拆小重试轮数
+BULK_DOWNLOAD_CHUNK = max(1, _int_env("BULK_DOWNLOAD_CHUNK", 60))
+BULK_DOWNLOAD_WORKERS = max(1, _int_env("BULK_DOWNLOAD_WORKERS", 4))
+BULK_DOWNLOAD_RETRIES = max(0, _int_env("BULK_DOWNLOAD_RETRIES", 2))
+
+# yfinance 的 download 是否按调用隔离状态（旧版写模块级 shared._DFS，多线程同时调用会互相覆盖）
+_CONCURRENT_SAFE = hasattr(getattr(yf, "multi", None), "_DownloadCtx")
+_SERIAL_NOTED = False
+
+# 请求成功但该标的无数据（退市 / 代码错误）
+NO_DATA = "无数据"
+
+
+def _extract(data: pd.DataFrame, batch: List[str]) -> Dict[str, pd.DataFrame]:
+    """从 yf.download(group_by="ticker") 结果中按标的取出非空 DataFrame（去掉并集时间轴上的空行）。"""
+    out: Dict[str, pd.DataFrame] = {}
+    if isinstance(data.columns, pd.MultiIndex):
+        level0 = set(data.columns.get_level_values(0))
+        subs = ((t, data[t]) for t in batch if t in level0)
+    elif len(batch) == 1:
+        subs = iter([(batch[0], data)])
+    else:
+        return out
+    for t, sub in subs:
+        try:
+            sub = sub.dropna(how="all")
+            if not sub.empty and "Close" in sub.columns and sub["Close"].notna().any():
+                out[t] = sub
+        except Exception:
+            continue
+    return out
+
+
+def _utc_naive(df: pd.DataFrame) -> pd.DataFrame:
+    idx = pd.DatetimeIndex(df.index)
+    if idx.tz is None:
+        return df
+    out = df.copy(deep=False)
+    out.index = idx.tz_convert("UTC").tz_localize(None)
+    return out
+
+
+def _split(batch: List[str]) -> List[List[str]]:
+    size = max(1, math.ceil(len(batch) / 2))
+    return [batch[i : i + size] for i in range(0, len(batch), size)]
+
+
+def bulk_download(
+    tickers: List[str],
+    period: str = "6mo",
+    interval: str = "1d",
+    chunk: int = BULK_DOWNLOAD_CHUNK,
+    workers: int = BULK_DOWNLOAD_WORKERS,
+    retries: int = BULK_DOWNLOAD_RETRIES,
+    actions: bool = False,
+    ignore_tz: Optional[bool] = True,
+    write_store: bool = True,
+    prepost: bool = False,
+) -> Tuple[Dict[str, pd.DataFrame], Dict[str, str]]:
+    """
+    并发分块下载，返回 (frames, failed)。failed 中原因为 NO_DATA 的是请求成功但无数据的标的，其余为请求错误。
+    write_store=True 时把结果（及无数据标的）写回 utils.bar_store 面板；prepost 仅对分K有效（含盘前盘后）。
+    ignore_tz 只对日K及以上生效；分K 索引统一为无时区 UTC。
+    """
+    tickers = list(dict.fromkeys(t.strip().upper() for t in tickers if (t or "").strip()))
+    frames: Dict[str, pd.DataFrame] = {}
+    failed: Dict[str, str] = {}
+    if not tickers:
+        return frames, failed
+    chunk = max(1, int(chunk))
+    daily = _is_daily(interval)
+    workers = max(1, int(workers))
+    if workers > 1 and not _CONCURRENT_SAFE:
+        global _SERIAL_NOTED
+        if not _SERIAL_NOTED:
+            _SERIAL_NOTED = True
+            print(f"[BulkDownload] yfinance {getattr(yf, '__version__', '?')} 的 download 不可并发，改为逐块下载", flush=True)
+        workers = 1
+
+    def fetch(batch: List[str]) -> pd.DataFrame:
+        return yf.download(
+            batch,
+            period=period,
+            interval=interval,
+            auto_adjust=True,
+            actions=actions,
+            prepost=prepost,
+            threads=True,
+            progress=False,
+            ignore_tz=ignore_tz if daily else False,
+            group_by="ticker",
+        )
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # future -> (块, 已重试轮数, 是否为块内无数据标的的补拉)
+        pending = {}
+
+        def submit(batch: List[str], attempt: int, recheck: bool = False) -> None:
+            pending[executor.submit(fetch, batch)] = (batch, attempt, recheck)
+
+        for i in range(0, len(tickers), chunk):
+            submit(tickers[i : i + chunk], 0)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                batch, attempt, recheck = pending.pop(fut)
+                try:
+                    data = fut.result()
+                    err = None if data is not None and not data.empty else "空结果"
+                except Exception as e:
+                    data, err = None, (str(e).strip() or type(e).__name__)[:120]
+                if err is None:
+                    got = _extract(data, batch)
+                    frames.update(got)
+                    empty = [t for t in batch if t not in got]
+                    if empty and got and not recheck:
+                        submit(empty, attempt, recheck=True)
+                    else:
+                        failed.update({t: NO_DATA for t in empty})
+                elif recheck:
+                    # 补拉仍无结果：按无数据处理，不再拆分
+                    failed.update({t: NO_DATA for t in batch})
+                elif attempt >= retries:
+                    failed.update({t: err for t in batch})
+                else:
+                    for sub in _split(batch):
+                        submit(sub, attempt + 1)
+
+    frames = {t: frames[t] if daily else _utc_naive(frames[t]) for t in tickers if t in frames}
+    if failed:
+        n_missing = sum(1 for r in failed.values() if r == NO_DATA)
+        print(
+            f"[BulkDownload] {interval} {period}: 成功 {len(frames)}/{len(tickers)}，"
+            f"无数据 {n_missing}，失败 {len(failed) - n_missing}",
+            flush=True,
+        )
+    if write_store and frames:
+        try:
+            write_panel(frames, interval=interval, missing=[t for t, r in failed.items() if r == NO_DATA])
+        except Exception as e:
+            print(f"[BarStore] 写入面板失败: {e}", flush=True)
+    return frames, failed
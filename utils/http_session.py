@@ -0,0 +1,101 @@
+"""
+共享 HTTP 会话：按名称复用 requests.Session（keep-alive 连接池），避免每次请求重新建立 TCP+TLS。
+
+- 每个会话挂载 HTTPAdapter：HTTP_POOL_CONNECTIONS 个主机池、每主机最多 HTTP_POOL_MAXSIZE 个连接；
+- 未显式传 timeout 的请求使用会话默认超时（HTTP_TIMEOUT，秒）；
+- 连接错误与 502/503/504 对幂等请求（GET 等）自动重试 HTTP_RETRIES 次，POST 不重试。
+
+用法：
+  from utils.http_session import get_session
+  r = get_session().get(url, params=..., timeout=8)
+  r = get_session("ollama", timeout=60).post(url, json=...)
+"""
+import os
+import threading
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+def _int_env(key: str, default: int) -> int:
+    try:
+        return int(os.environ.get(key, str(default)).strip() or default)
+    except ValueError:
+        return default
+
+
+HTTP_TIMEOUT = _int_env("HTTP_TIMEOUT", 30)
+HTTP_POOL_CONNECTIONS = _int_env("HTTP_POOL_CONNECTIONS", 16)
+HTTP_POOL_MAXSIZE = _int_env("HTTP_POOL_MAXSIZE", 16)
+HTTP_RETRIES = _int_env("HTTP_RETRIES", 2)
+
+_SESSIONS: Dict[str, requests.Session] = {}
+_LOCK = threading.Lock()
+
+
+class _TimeoutSession(requests.Session):
+    """未传 timeout 时使用默认超时的 Session（requests 默认无超时，可能永久挂起）。"""
+
+    def __init__(self, timeout: float):
+        super().__init__()
+        self.default_timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.default_timeout
+        return super().request(method, url, **kwargs)
+
+
+def _build_session(timeout: float, pool_maxsize: int, retries: int) -> requests.Session:
+    session = _TimeoutSession(timeout)
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=0.5,
+        status_forcelist=(502, 503, 504),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=pool_maxsize, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session(
+    name: str = "default",
+    timeout: Optional[float] = None,
+    pool_maxsize: Optional[int] = None,
+    retries: Optional[int] = None,
+) -> requests.Session:
+    """
+    取名为 name 的共享会话（首次调用时创建，参数仅在创建时生效）。
+    不同用途（如 ollama 本地服务、webhook）可用不同 name 隔离连接池与默认超时。
+    """
+    session = _SESSIONS.get(name)
+    if session is not None:
+        return session
+    with _LOCK:
+        session = _SESSIONS.get(name)
+        if session is None:
+            session = _build_session(
+                timeout if timeout is not None else HTTP_TIMEOUT,
+                pool_maxsize if pool_maxsize is not None else HTTP_POOL_MAXSIZE,
+                retries if retries is not None else HTTP_RETRIES,
+            )
+            _SESSIONS[name] = session
+        return session
+
+
+def close_sessions() -> None:
+    """关闭全部共享会话（进程退出或测试清理时调用）。"""
+    with _LOCK:
+        for s in _SESSIONS.values():
+            try:
+                s.close()
+            except Exception:
+                pass
+        _SESSIONS.clear()
@@ -0,0 +1,66 @@
+"""
+进程内共享限流器（令牌桶）：多个线程对同一数据源（如 Yahoo 的 info / 单只 K 线接口）的请求共用一个速率上限，
+并发拉取时不至于触发对方限流（429 / 空结果）。
+
+用法：
+  from utils.rate_limit import get_limiter
+  get_limiter("yahoo").acquire()   # 超出速率时阻塞到有令牌
+
+速率由环境变量 RATE_LIMIT_<NAME>（每秒请求数，如 RATE_LIMIT_YAHOO=8）配置，<= 0 表示不限流。
+"""
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+# 各数据源默认速率（次/秒）
+_DEFAULT_RATES = {"yahoo": 8.0}
+
+_LIMITERS: Dict[str, "RateLimiter"] = {}
+_LOCK = threading.Lock()
+
+
+class RateLimiter:
+    """令牌桶：每秒补充 rate 个令牌，最多积攒 burst 个；acquire() 取一个令牌，不足时阻塞。"""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst if burst is not None else max(1, round(self.rate))))
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """取一个令牌，返回等待秒数。rate <= 0 时不限流。"""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= 1.0
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        # 在锁外等待：令牌已预扣，后来者按顺序排在更晚的时刻
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+def _rate_from_env(name: str) -> float:
+    raw = os.environ.get(f"RATE_LIMIT_{name.upper()}", "").strip()
+    try:
+        return float(raw) if raw else _DEFAULT_RATES.get(name, 0.0)
+    except ValueError:
+        return _DEFAULT_RATES.get(name, 0.0)
+
+
+def get_limiter(name: str = "yahoo") -> RateLimiter:
+    """取名为 name 的共享限流器（首次调用时按环境变量创建）。"""
+    limiter = _LIMITERS.get(name)
+    if limiter is not None:
+        return limiter
+    with _LOCK:
+        limiter = _LIMITERS.get(name)
+        if limiter is None:
+            limiter = _LIMITERS[name] = RateLimiter(_rate_from_env(name))
+        return limiter
@@ -1,28 +1,58 @@
 """
-yfinance 历史数据 SQLite TTL 缓存。
+yfinance 历史数据 / info / 财报 SQLite TTL 缓存。
 
-每次调用 get_history() 时先查 SQLite，命中且未过期直接返回；
-否则从 yfinance 拉取后写入缓存。
+每次调用 get_history() / get_info() / get_financials() 时先查 SQLite，命中且未过期直接返回；
+否则从 yfinance 拉取后写入缓存。预热任务（data/warmup.py）可用 put_history() 批量写入。
 
-TTL 策略：
-  - 日线（1d）：300 秒（5 分钟）
-  - 分线（1m/5m/15m 等）：60 秒（1 分钟）
+TTL 策略（均可用环境变量覆盖）：
+  - 日线（1d）：300 秒（5 分钟），YF_CACHE_TTL_DAILY
+  - 分线（1m/5m/15m 等）：60 秒（1 分钟），YF_CACHE_TTL_INTRADAY
+  - info：6 小时，YF_CACHE_TTL_INFO
+  - 财报（financials）：24 小时，YF_CACHE_TTL_FINANCIALS
+  - put_history(ttl=...) 写入的条目按 expires_at 判断，不受上述 K 线 TTL 约束
+  - 财报 / LLM 财报解读另受 not_before 约束（data/earnings_calendar：最近一次财报发布后失效）
+
+多周期：5m/10m/15m/30m/60m 与周K（1wk）优先由已缓存的更细周期本地重采样（utils/bar_resample）；
+未命中时分K默认拉一次 1m（周期 ≤7 天，YF_RESAMPLE_INTRADAY）再派生，周K 由日K派生。10m 总是派生（yfinance 无 10m）。
+
+未命中时的单只请求（K 线 / info / 财报）共用 utils.rate_limit 的 "yahoo" 限流器（RATE_LIMIT_YAHOO，次/秒），
+并发预热、市值排名等批量场景不会打满 Yahoo 的速率上限。
 
 缓存文件：项目 data/cache.db（自动创建）
 """
+import io
 import json
 import math
+import os
 import sqlite3
 import time
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 import pandas as pd
 import yfinance as yf
 
+from utils.bar_resample import RESAMPLE_BASES, resample_ohlcv
+from utils.rate_limit import get_limiter
+
+
+def _int_env(key: str, default: int) -> int:
+    try:
+        v = os.environ.get(key, "").strip()
+        return int(v) if v else default
+    except (TypeError, ValueError):
+        return default
+
+
 _DB_PATH = Path(__file__).parent.parent / "data" / "cache.db"
-_TTL_DAILY = 300    # 5 min
-_TTL_INTRADAY = 60  # 1 min
+_TTL_DAILY = _int_env("YF_CACHE_TTL_DAILY", 300)          # 5 min
+_TTL_INTRADAY = _int_env("YF_CACHE_TTL_INTRADAY", 60)     # 1 min
+_TTL_INFO = _int_env("YF_CACHE_TTL_INFO", 6 * 3600)       # 6 h
+_TTL_FINANCIALS = _int_env("YF_CACHE_TTL_FINANCIALS", 86400)  # 1 d
+# 分K 未命中时拉 1m 作为基础周期再本地重采样（一次请求覆盖 5m/10m/15m/30m/60m）
+YF_RESAMPLE_INTRADAY = os.environ.get("YF_RESAMPLE_INTRADAY", "1").strip().lower() in ("1", "true", "yes")
+# yfinance 1m 最多约 7 天
+_MAX_1M_DAYS = 7
 
 # 建表 SQL（首次运行自动初始化）
 _DDL = """
@@ -31,13 +61,38 @@ CREATE TABLE IF NOT EXISTS hist_cache (
     fetched_at REAL NOT NULL,
     payload    TEXT NOT NULL
 );
+CREATE TABLE IF NOT EXISTS info_cache (
+    ticker     TEXT PRIMARY KEY,
+    fetched_at REAL NOT NULL,
+    payload    TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS fin_cache (
+    ticker     TEXT PRIMARY KEY,
+    fetched_at REAL NOT NULL,
+    payload    TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS fin_interp_cache (
+    ticker     TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    digest     TEXT NOT NULL,
+    text       TEXT NOT NULL
+);
 """
 
 
-def _get_conn() -> sqlite3.Connection:
-    _DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(str(_DB_PATH), check_same_thread=False)
-    conn.execute(_DDL)
+def _get_conn(path: Optional[Path] = None) -> sqlite3.Connection:
+    """打开缓存库；path 默认为当前 _DB_PATH（延迟写回的调用方传入登记时的路径）。"""
+    path = Path(path or _DB_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), check_same_thread=False, timeout=30)
+    conn.executescript(_DDL)
+    # 旧库迁移：hist_cache 增加 expires_at（预热写入的条目用它覆盖默认 TTL）
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(hist_cache)").fetchall()}
+    if "expires_at" not in cols:
+        try:
+            conn.execute("ALTER TABLE hist_cache ADD COLUMN expires_at REAL")
+        except sqlite3.OperationalError:
+            pass  # 其他进程已迁移
     conn.commit()
     return conn
 
@@ -59,7 +114,7 @@ def _df_to_json(df: pd.DataFrame) -> str:
 
 
 def _json_to_df(payload: str) -> pd.DataFrame:
-    df = pd.read_json(payload, orient="split")
+    df = pd.read_json(io.StringIO(payload), orient="split")
     df.index = pd.to_datetime(df.index)
     return df
 
@@ -74,43 +129,224 @@ def get_history(
     拉取 yfinance 历史 K 线，命中缓存则直接返回，否则请求网络后写入缓存。
     返回 None 表示拉取失败（yfinance 无数据 / 网络异常）。
     """
-    key = _cache_key(ticker, period, interval, prepost)
-    ttl = _ttl(interval)
+    cached = _read_history(_cache_key(ticker, period, interval, prepost), _ttl(interval))
+    if cached is not None:
+        return cached
+
+    # 可派生周期：由基础周期本地重采样
+    if interval in RESAMPLE_BASES:
+        derived = _derive_history(ticker, period, interval, prepost)
+        if derived is not None and len(derived) > 0:
+            return derived
+    if interval == "10m":
+        return None
 
+    # 缓存未命中或已过期，从 yfinance 拉取
     try:
-        conn = _get_conn()
-        row = conn.execute(
-            "SELECT fetched_at, payload FROM hist_cache WHERE cache_key = ?", (key,)
+        get_limiter("yahoo").acquire()
+        hist = yf.Ticker(ticker).history(period=period, interval=interval, prepost=prepost)
+    except Exception:
+        hist = None
+
+    if hist is None or len(hist) == 0:
+        return None
+
+    put_history(ticker, period, interval, prepost, hist)
+    return hist
+
+
+def _read_history(key: str, ttl: int) -> Optional[pd.DataFrame]:
+    """只读缓存：命中且新鲜返回 DataFrame，否则 None。"""
+    try:
+        row = _get_conn().execute(
+            "SELECT fetched_at, payload, expires_at FROM hist_cache WHERE cache_key = ?", (key,)
         ).fetchone()
         if row is not None:
-            age = time.time() - row[0]
-            if age < ttl:
+            now = time.time()
+            fresh = now < row[2] if row[2] is not None else (now - row[0]) < ttl
+            if fresh:
                 df = _json_to_df(row[1])
                 if df is not None and len(df) > 0:
                     return df
     except Exception:
         pass
+    return None
 
-    # 缓存未命中或已过期，从 yfinance 拉取
-    try:
-        hist = yf.Ticker(ticker).history(period=period, interval=interval, prepost=prepost)
-    except Exception:
-        hist = None
 
+def _period_days(period: str) -> Optional[int]:
+    """'5d' -> 5，'1mo' -> 30，'1y' -> 365；无法解析返回 None。"""
+    p = (period or "").strip().lower()
+    for suffix, days in (("mo", 30), ("wk", 7), ("d", 1), ("y", 365)):
+        if p.endswith(suffix) and p[: -len(suffix)].isdigit():
+            return int(p[: -len(suffix)]) * days
+    return None
+
+
+def _derive_history(ticker: str, period: str, interval: str, prepost: bool) -> Optional[pd.DataFrame]:
+    """
+    由基础周期派生 interval：先找已缓存的更细周期；都没有时按需拉一次基础周期
+    （周K 用日K；分K 在 YF_RESAMPLE_INTRADAY 且周期 ≤7 天时用 1m；10m 否则用 5m）。
+    """
+    for base in RESAMPLE_BASES[interval]:
+        cached = _read_history(_cache_key(ticker, period, base, prepost), _ttl(base))
+        if cached is not None:
+            return resample_ohlcv(cached, interval, ticker, prepost)
+    days = _period_days(period)
+    if interval == "1wk":
+        base = "1d"
+    elif YF_RESAMPLE_INTRADAY and days is not None and days <= _MAX_1M_DAYS:
+        base = "1m"
+    elif interval == "10m":
+        base = "5m"
+    else:
+        return None
+    hist = get_history(ticker, period=period, interval=base, prepost=prepost)
     if hist is None or len(hist) == 0:
         return None
+    return resample_ohlcv(hist, interval, ticker, prepost)
+
 
+def put_history(
+    ticker: str,
+    period: str,
+    interval: str,
+    prepost: bool,
+    df: pd.DataFrame,
+    ttl: Optional[int] = None,
+) -> None:
+    """
+    直接写入一条 K 线缓存（批量下载 / 预热用）。
+    ttl 为 None 时按 interval 默认 TTL 判断新鲜度；否则在 ttl 秒内视为新鲜。
+    """
+    if df is None or len(df) == 0:
+        return
+    now = time.time()
+    expires_at = now + ttl if ttl is not None else None
     try:
-        payload = _df_to_json(hist)
+        payload = _df_to_json(df)
         with _get_conn() as conn:
             conn.execute(
-                "INSERT OR REPLACE INTO hist_cache VALUES (?, ?, ?)",
-                (key, time.time(), payload),
+                "INSERT OR REPLACE INTO hist_cache (cache_key, fetched_at, payload, expires_at) VALUES (?, ?, ?, ?)",
+                (_cache_key(ticker, period, interval, prepost), now, payload, expires_at),
             )
     except Exception:
         pass
 
-    return hist
+
+def _json_safe(obj: Any) -> Any:
+    """NaN / ±Infinity 换成 None：标准 JSON 不含这些字面量，SQLite json_extract 遇到会整条语句报错。"""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {k: _json_safe(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_json_safe(v) for v in obj]
+    return obj
+
+
+def _info_to_json(info: Dict[str, Any]) -> str:
+    return json.dumps(_json_safe(info), ensure_ascii=False, default=str, allow_nan=False)
+
+
+def get_info(ticker: str) -> Dict[str, Any]:
+    """
+    yfinance Ticker.info（公司信息、估值、市值等），命中缓存直接返回。
+    拉取失败返回 {}（不写缓存，下次重试）。
+    """
+    t = (ticker or "").upper().strip()
+    try:
+        row = _get_conn().execute(
+            "SELECT fetched_at, payload FROM info_cache WHERE ticker = ?", (t,)
+        ).fetchone()
+        if row is not None and (time.time() - row[0]) < _TTL_INFO:
+            info = json.loads(row[1])
+            if isinstance(info, dict) and info:
+                return info
+    except Exception:
+        pass
+    try:
+        get_limiter("yahoo").acquire()
+        info = yf.Ticker(t).info or {}
+    except Exception:
+        info = {}
+    if not isinstance(info, dict) or not info:
+        return {}
+    try:
+        with _get_conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO info_cache VALUES (?, ?, ?)",
+                (t, time.time(), _info_to_json(info)),
+            )
+    except Exception:
+        pass
+    return info
+
+
+def get_financials(ticker: str, not_before: Optional[float] = None) -> Optional[pd.DataFrame]:
+    """
+    yfinance Ticker.financials（年度利润表），命中缓存直接返回；无数据返回 None。
+    not_before：Unix 时间戳，早于该时刻写入的缓存视为过期（如财报发布后强制刷新）。
+    """
+    t = (ticker or "").upper().strip()
+    try:
+        row = _get_conn().execute(
+            "SELECT fetched_at, payload FROM fin_cache WHERE ticker = ?", (t,)
+        ).fetchone()
+        if row is not None and (time.time() - row[0]) < _TTL_FINANCIALS and (
+            not_before is None or row[0] >= not_before
+        ):
+            return pd.read_json(io.StringIO(row[1]), orient="split", dtype=False)
+    except Exception:
+        pass
+    try:
+        get_limiter("yahoo").acquire()
+        fin = yf.Ticker(t).financials
+    except Exception:
+        fin = None
+    if fin is None or fin.empty:
+        return None
+    try:
+        with _get_conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO fin_cache VALUES (?, ?, ?)",
+                (t, time.time(), fin.to_json(orient="split", date_format="iso")),
+            )
+    except Exception:
+        pass
+    return fin
+
+
+def get_financials_interpretation_cached(ticker: str, digest: str, not_before: Optional[float] = None) -> Optional[str]:
+    """
+    读取 LLM 财报解读缓存：财报摘要 digest 一致且写入时间不早于 not_before 时返回解读文本，否则 None。
+    不设 TTL：财报内容不变则解读不变，由财报日历（not_before）与 digest 驱动失效。
+    """
+    try:
+        row = _get_conn().execute(
+            "SELECT created_at, digest, text FROM fin_interp_cache WHERE ticker = ?",
+            ((ticker or "").upper().strip(),),
+        ).fetchone()
+    except Exception:
+        return None
+    if row is None or row[1] != digest:
+        return None
+    if not_before is not None and row[0] < not_before:
+        return None
+    return row[2]
+
+
+def put_financials_interpretation(ticker: str, digest: str, text: str) -> None:
+    """写入 LLM 财报解读缓存（空文本不写）。"""
+    if not text:
+        return
+    try:
+        with _get_conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO fin_interp_cache VALUES (?, ?, ?, ?)",
+                ((ticker or "").upper().strip(), time.time(), digest, text),
+            )
+    except Exception:
+        pass
 
 
 def invalidate(ticker: str, period: str, interval: str, prepost: bool = False) -> None:
@@ -123,6 +359,41 @@ def invalidate(ticker: str, period: str, interval: str, prepost: bool = False) -
         pass
 
 
+def cache_coverage(
+    tickers: List[str],
+    period: str = "6mo",
+    interval: str = "1d",
+    prepost: bool = False,
+) -> dict:
+    """
+    统计一组标的在缓存中的新鲜覆盖率（不触发网络请求）。
+    返回 {"total", "history", "info", "financials"}，后三项为新鲜条目数。
+    """
+    out = {"total": len(tickers), "history": 0, "info": 0, "financials": 0}
+    if not tickers:
+        return out
+    now = time.time()
+    ttl = _ttl(interval)
+    try:
+        conn = _get_conn()
+        for t in tickers:
+            row = conn.execute(
+                "SELECT fetched_at, expires_at FROM hist_cache WHERE cache_key = ?",
+                (_cache_key(t, period, interval, prepost),),
+            ).fetchone()
+            if row is not None and (now < row[1] if row[1] is not None else (now - row[0]) < ttl):
+                out["history"] += 1
+            row = conn.execute("SELECT fetched_at FROM info_cache WHERE ticker = ?", (t.upper(),)).fetchone()
+            if row is not None and (now - row[0]) < _TTL_INFO:
+                out["info"] += 1
+            row = conn.execute("SELECT fetched_at FROM fin_cache WHERE ticker = ?", (t.upper(),)).fetchone()
+            if row is not None and (now - row[0]) < _TTL_FINANCIALS:
+                out["financials"] += 1
+    except Exception:
+        pass
+    return out
+
+
 def cache_stats() -> dict:
     """返回缓存基本统计信息（条目数、DB 大小）。"""
     try: